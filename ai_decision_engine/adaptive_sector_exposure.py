@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="adaptive_sector_exposure.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_sector_performance(market_data):
@@ -18,12 +18,12 @@ def analyze_sector_performance(market_data):
         top_sectors = sector_performance.head(3).index.tolist()
         bottom_sectors = sector_performance.tail(3).index.tolist()
 
-        logging.info(
+        logger.info(
             f"✅ Bästa sektorer: {top_sectors}, Sämsta sektorer: {bottom_sectors}"
         )
         return top_sectors, bottom_sectors
     except Exception as e:
-        logging.error(f"❌ Fel vid sektoranalys: {str(e)}")
+        logger.error(f"❌ Fel vid sektoranalys: {str(e)}")
         return None, None
 
 
@@ -41,10 +41,10 @@ def adjust_sector_exposure(portfolio, top_sectors, bottom_sectors):
 
         # Säkerställ att allokeringen ligger mellan 0% och 100%
         portfolio["new_allocation"] = np.clip(portfolio["new_allocation"], 0, 1)
-        logging.info("✅ Sektorexponering justerad i portföljen.")
+        logger.info("✅ Sektorexponering justerad i portföljen.")
         return portfolio
     except Exception as e:
-        logging.error(f"❌ Fel vid justering av sektorexponering: {str(e)}")
+        logger.error(f"❌ Fel vid justering av sektorexponering: {str(e)}")
         return portfolio
 
 
@@ -59,10 +59,10 @@ def identify_overvalued_sectors(market_data, threshold=0.10):
         sector_performance = market_data.groupby("sector")["return"].mean()
         # Filtrera ut de som överstiger threshold
         overvalued = sector_performance[sector_performance > threshold].index.tolist()
-        logging.info(f"📈 Övervärderade sektorer (return > {threshold}): {overvalued}")
+        logger.info(f"📈 Övervärderade sektorer (return > {threshold}): {overvalued}")
         return overvalued
     except Exception as e:
-        logging.error(f"❌ Fel vid identifiering av övervärderade sektorer: {str(e)}")
+        logger.error(f"❌ Fel vid identifiering av övervärderade sektorer: {str(e)}")
         return []
 
 
@@ -87,12 +87,12 @@ def rotate_to_alternatives(portfolio, overvalued_sectors):
 
             # Lägg till den alternativa investeringen
             portfolio = portfolio.append(alternative_asset, ignore_index=True)
-            logging.info("📌 Roterar 10% av portföljen till alternativa investeringar (Guld).")
+            logger.info("📌 Roterar 10% av portföljen till alternativa investeringar (Guld).")
         else:
-            logging.info("📌 Inga större rotationer till alternativa investeringar just nu.")
+            logger.info("📌 Inga större rotationer till alternativa investeringar just nu.")
         return portfolio
     except Exception as e:
-        logging.error(f"❌ Fel vid rotation till alternativa investeringar: {str(e)}")
+        logger.error(f"❌ Fel vid rotation till alternativa investeringar: {str(e)}")
         return portfolio
 
 
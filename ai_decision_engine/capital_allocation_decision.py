@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="capital_allocation_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_optimal_allocation(
@@ -32,10 +32,10 @@ def calculate_optimal_allocation(
         )
         allocation = np.clip(allocation, min_allocation, max_allocation)
 
-        logging.info("✅ Kapitalallokering beräknad för varje handel.")
+        logger.info("✅ Kapitalallokering beräknad för varje handel.")
         return allocation
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av kapitalallokering: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av kapitalallokering: {str(e)}")
         return None
 
 
@@ -49,10 +49,10 @@ def adjust_allocation_based_on_market(trade_log, market_conditions):
         adjusted_allocation = trade_log["allocation"] * market_factor.get(
             market_conditions, 1.0
         )
-        logging.info("✅ Kapitalallokering justerad baserat på marknadsläge.")
+        logger.info("✅ Kapitalallokering justerad baserat på marknadsläge.")
         return adjusted_allocation
     except Exception as e:
-        logging.error(f"❌ Fel vid justering av kapitalallokering: {str(e)}")
+        logger.error(f"❌ Fel vid justering av kapitalallokering: {str(e)}")
         return None
 
 
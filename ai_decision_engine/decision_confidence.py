@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="decision_confidence.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_decision_confidence(trade_signals, risk_metrics, sentiment_score):
@@ -20,10 +20,10 @@ def calculate_decision_confidence(trade_signals, risk_metrics, sentiment_score):
         confidence_score = (
             (signal_strength * 0.5) + (risk_factor * 0.3) + (sentiment_factor * 0.2)
         )
-        logging.info("✅ Konfidensnivå beräknad för handelsbeslut.")
+        logger.info("✅ Konfidensnivå beräknad för handelsbeslut.")
         return confidence_score
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av konfidensnivå: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av konfidensnivå: {str(e)}")
         return None
 
 
@@ -42,10 +42,10 @@ def adjust_decision_based_on_confidence(trade_signals, confidence_threshold=0.7)
         adjusted_decision[confidence_score > confidence_threshold] = "BUY"
         adjusted_decision[confidence_score < (1 - confidence_threshold)] = "SELL"
 
-        logging.info("✅ Handelsbeslut justerade baserat på konfidensnivå.")
+        logger.info("✅ Handelsbeslut justerade baserat på konfidensnivå.")
         return adjusted_decision
     except Exception as e:
-        logging.error(
+        logger.error(
             f"❌ Fel vid justering av beslut baserat på konfidensnivå: {str(e)}"
         )
         return None
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="dynamic_sector_exposure.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_sector_performance(sector_data):
@@ -13,10 +13,10 @@ def calculate_sector_performance(sector_data):
     """
     try:
         performance = sector_data.mean()
-        logging.info(f"✅ Sektorprestanda beräknad: {performance}")
+        logger.info(f"✅ Sektorprestanda beräknad: {performance}")
         return performance
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av sektorprestanda: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av sektorprestanda: {str(e)}")
         return None
 
 
@@ -31,10 +31,10 @@ def adjust_sector_exposure(portfolio, sector_performance, threshold=0.02):
                 adjusted_exposure[sector] *= 1.1  # Öka exponering
             elif performance < -threshold:
                 adjusted_exposure[sector] *= 0.9  # Minska exponering
-        logging.info(f"✅ Sektorallokering justerad: {adjusted_exposure}")
+        logger.info(f"✅ Sektorallokering justerad: {adjusted_exposure}")
         return adjusted_exposure
     except Exception as e:
-        logging.error(f"❌ Fel vid justering av sektorallokering: {str(e)}")
+        logger.error(f"❌ Fel vid justering av sektorallokering: {str(e)}")
         return None
 
 
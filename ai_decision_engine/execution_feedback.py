@@ -1,20 +1,25 @@
 import logging
 from datetime import datetime
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from live_trading.trade_ledger import get_trade_ledger
 
 # Konfigurera loggning
-logging.basicConfig(filename="execution_feedback.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def evaluate_trade_performance(trade_log: pd.DataFrame) -> Dict[str, Any]:
+def evaluate_trade_performance(trade_log: Optional[pd.DataFrame] = None, days: int = 30) -> Dict[str, Any]:
     """
     Utvärderar hur väl tidigare rekommendationer har presterat baserat på faktiska marknadsrörelser.
+    Utan trade_log används handelsliggarens utfall för de senaste `days` dagarna.
     Returnerar en dict med win_rate, avg_return och antal trades.
     """
     try:
+        if trade_log is None:
+            trade_log = get_trade_ledger().trade_log(start=datetime.now() - pd.Timedelta(days=days))
         trade_log = trade_log.copy()
-        trade_log["return"] = (trade_log["exit_price"] - trade_log["entry_price"]) / trade_log["entry_price"]
+        if "return" not in trade_log.columns:
+            trade_log["return"] = (trade_log["exit_price"] - trade_log["entry_price"]) / trade_log["entry_price"]
         trade_log["win"] = trade_log["return"] > 0
         win_rate = trade_log["win"].mean()
         avg_return = trade_log["return"].mean()
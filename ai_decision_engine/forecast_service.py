@@ -0,0 +1,382 @@
+"""
+forecast_service.py
+
+Prognostjänst för riktpriser (3, 6 och 12 månader) för många innehav på en gång.
+
+- Anpassade modeller cachas per symbol, i minnet och som JSON på disk
+  (data/forecast_cache/<symbol>.json), med en hash av prisserien som nyckel.
+  En oförändrad serie anpassas aldrig om; endast prognosdatumen beräknas.
+- När serien har ändrats anpassas modellen om med den tidigare modellens
+  parametrar som startvärden (varmstart), vilket kortar optimeringen avsevärt.
+- Anpassning och prediktion körs i den gemensamma processpoolen (TaskRunner),
+  en uppgift per symbol, och bara de efterfrågade horisontdatumen prediceras.
+- Hela körningen har en tidsbudget: uppgifter som inte hunnit klart avbryts och
+  symbolen får sina senast kända riktpriser (markerade som inaktuella) i stället.
+- Med backend="ets" eller "ar" används i stället de vektoriserade modellerna i
+  ai_learning.fast_forecast: alla symboler prognostiseras i ett anrop i den här
+  processen (hundratals serier på under en sekund), utan modellcache.
+- Med backend="lstm" finjusteras den delade LSTM-modellen (ai_learning.lstm_forecaster)
+  på ny data och alla symboler prognostiseras i samma kompilerade anrop.
+
+Prophet importeras först i arbetsprocesserna, så modulen kan importeras utan Prophet.
+
+Exempel:
+    service = get_forecast_service()
+    targets = service.predict({"AAPL": aapl_df, "VOLV-B.ST": volvo_df}, time_budget=120)
+    print(targets[["3m", "6m", "12m"]])
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import wait
+
+import numpy as np
+import pandas as pd
+
+from ai_learning.fast_forecast import FAST_METHODS
+from utils.pipeline import hash_inputs
+from utils.process_manager import get_task_runner
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("data", "forecast_cache")
+DEFAULT_HORIZONS = (90, 180, 365)
+DEFAULT_TIME_BUDGET = 15 * 60
+HORIZON_LABELS = {90: "3m", 180: "6m", 365: "12m"}
+# Modeller för serier utan symbol (nyckel _series_<hash>) hålls bara i minnet, högst så här många
+MAX_SERIES_MODELS = 32
+
+
+def horizon_label(days):
+    return HORIZON_LABELS.get(days, f"{days}d")
+
+
+def prepare_series(data):
+    """
+    Normaliserar en prisserie till en DataFrame med kolumnerna ds och y, sorterad och utan luckor.
+
+    Accepterar en DataFrame med date/close (eller ds/y, eller datumindex + close) eller en Series med datumindex.
+    """
+    if isinstance(data, pd.Series):
+        ds, y = data.index, data.to_numpy()
+    else:
+        columns = {c.lower(): c for c in data.columns}
+        value_col = columns.get("y") or columns.get("close")
+        if value_col is None:
+            raise ValueError("Prisserien saknar kolumnen 'close'")
+        date_col = columns.get("ds") or columns.get("date")
+        ds = data[date_col] if date_col is not None else data.index
+        y = data[value_col].to_numpy()
+    df = pd.DataFrame({"ds": pd.to_datetime(np.asarray(ds)), "y": pd.to_numeric(y, errors="coerce")})
+    df = df.dropna()
+    if df["ds"].dt.tz is not None:
+        df["ds"] = df["ds"].dt.tz_localize(None)
+    return df.sort_values("ds", kind="stable").reset_index(drop=True)
+
+
+def horizon_dates(horizons, as_of=None):
+    """Prognosdatum för horisonterna (dagar) räknat från as_of (standard: i dag)."""
+    base = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+    return np.array([base + pd.Timedelta(days=int(h)) for h in horizons], dtype="datetime64[ns]")
+
+
+def _warm_start_params(model):
+    """Startvärden för en ny anpassning från en anpassad modell (enligt Prophets dokumentation)."""
+    return {
+        "k": float(model.params["k"][0][0]),
+        "m": float(model.params["m"][0][0]),
+        "sigma_obs": float(model.params["sigma_obs"][0][0]),
+        "delta": model.params["delta"][0].tolist(),
+        "beta": model.params["beta"][0].tolist(),
+    }
+
+
+def _prophet_task(ds, y, future_ds, model_json=None, previous_json=None, uncertainty=False):
+    """
+    Arbetsfunktion: laddar en cachad modell (model_json) eller anpassar en ny, med varmstart från
+    previous_json om den finns. Returnerar (modell-JSON, prognos-DataFrame, anpassningstid i sekunder).
+    """
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    try:
+        from prophet import Prophet
+        from prophet.serialize import model_from_json, model_to_json
+    except ImportError:
+        from fbprophet import Prophet
+        from fbprophet.serialize import model_from_json, model_to_json
+
+    fit_s = 0.0
+    if model_json is not None:
+        model = model_from_json(model_json)
+    else:
+        history = pd.DataFrame({"ds": ds, "y": y})
+        init = None
+        if previous_json is not None:
+            try:
+                init = _warm_start_params(model_from_json(previous_json))
+            except Exception:
+                init = None
+        start = time.perf_counter()
+        try:
+            model = Prophet().fit(history, init=init) if init else Prophet().fit(history)
+        except Exception:
+            if init is None:
+                raise
+            # Startvärdena passar inte (t.ex. ändrat antal säsongstermer) – anpassa från början
+            model = Prophet().fit(history)
+        fit_s = time.perf_counter() - start
+        model_json = model_to_json(model)
+
+    if not uncertainty:
+        model.uncertainty_samples = 0
+    forecast = model.predict(pd.DataFrame({"ds": future_ds}))
+    columns = [c for c in ("ds", "yhat", "yhat_lower", "yhat_upper") if c in forecast.columns]
+    return model_json, forecast[columns].reset_index(drop=True), fit_s
+
+
+class ForecastService:
+    """
+    Anpassar, cachar och predicerar prognosmodeller för många symboler.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, runner=None, time_budget=DEFAULT_TIME_BUDGET, task=_prophet_task,
+                 backend="prophet"):
+        if backend not in ("prophet", "lstm") and backend not in FAST_METHODS:
+            raise ValueError(f"Okänd prognosbackend: {backend}")
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.runner = runner
+        self.time_budget = time_budget
+        self.task = task
+        self._models = {}
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    # --- Cache -------------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".json")
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._models.get(key)
+        if entry is not None or not self.cache_dir:
+            return entry
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte läsa prognoscache för {key}: {str(e)}")
+            return None
+        with self._lock:
+            self._models[key] = entry
+        return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._models[key] = entry
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte spara prognoscache för {key}: {str(e)}")
+
+    def _remember_series(self, key, entry):
+        """Sparar en modell för en serie utan symbol i minnet; de äldsta tas bort över MAX_SERIES_MODELS."""
+        with self._lock:
+            self._models.pop(key, None)
+            self._models[key] = entry
+            series_keys = [k for k in self._models if k.startswith("_series_")]
+            for stale in series_keys[:-MAX_SERIES_MODELS]:
+                del self._models[stale]
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    # --- Prognoser ---------------------------------------------------------
+
+    def predict(self, series_by_symbol, horizons=DEFAULT_HORIZONS, as_of=None, time_budget=None):
+        """
+        Batchprognos: dict symbol -> prisserie till en DataFrame (index symbol) med en kolumn per
+        horisont (3m, 6m, 12m), samt status ("cached", "fitted", "stale" eller "failed").
+        """
+        if self.backend != "prophet":
+            return self._predict_fast(series_by_symbol, horizons, as_of)
+        start = time.perf_counter()
+        time_budget = self.time_budget if time_budget is None else time_budget
+        future_ds = horizon_dates(horizons, as_of)
+        day = str(pd.Timestamp(future_ds[0]).date())
+        labels = [horizon_label(h) for h in horizons]
+        rows, pending = {}, {}
+        runner = self.runner or get_task_runner()
+
+        for symbol, data in series_by_symbol.items():
+            try:
+                history = prepare_series(data)
+            except Exception as e:
+                logger.error(f"❌ Ogiltig prisserie för {symbol}: {str(e)}")
+                rows[symbol] = ([None] * len(labels), "failed")
+                continue
+            if len(history) < 2:
+                rows[symbol] = ([None] * len(labels), "failed")
+                continue
+            data_hash = hash_inputs(history)
+            entry = self._load(symbol)
+            if entry and entry["hash"] == data_hash and entry.get("day") == day and entry.get("labels") == labels:
+                rows[symbol] = (entry["targets"], "cached")
+                continue
+            same_data = entry is not None and entry["hash"] == data_hash
+            future = runner.submit(
+                self.task, history["ds"].to_numpy(), history["y"].to_numpy(dtype=np.float64), future_ds,
+                entry["model"] if same_data else None,
+                entry["model"] if entry and not same_data else None,
+                timeout=time_budget,
+            )
+            pending[future] = (symbol, data_hash, entry)
+
+        done, not_done = wait(pending, timeout=time_budget)
+        fit_s = 0.0
+        for future, (symbol, data_hash, entry) in pending.items():
+            try:
+                if future not in done:
+                    raise TimeoutError(f"tidsbudgeten på {time_budget}s överskreds")
+                model_json, forecast, task_fit_s = future.result()
+            except Exception as e:
+                stale = entry["targets"] if entry and entry.get("labels") == labels else [None] * len(labels)
+                logger.warning(f"⚠️ Prognos för {symbol} misslyckades ({str(e)}); använder senast kända riktpriser")
+                rows[symbol] = (stale, "stale" if entry else "failed")
+                continue
+            fit_s += task_fit_s
+            targets = [float(v) for v in forecast["yhat"].to_numpy()]
+            self._store(symbol, {"hash": data_hash, "day": day, "labels": labels, "targets": targets,
+                                 "model": model_json})
+            rows[symbol] = (targets, "fitted" if task_fit_s > 0 else "cached")
+
+        result = pd.DataFrame([values for values, _ in rows.values()], index=list(rows), columns=labels)
+        result["status"] = [status for _, status in rows.values()]
+        result.index.name = "symbol"
+        counts = result["status"].value_counts().to_dict()
+        self.stats = {"elapsed_s": time.perf_counter() - start, "fit_s": fit_s, **counts}
+        logger.info(f"✅ Riktpriser för {len(result)} symboler på {self.stats['elapsed_s']:.1f}s: {counts}")
+        return result
+
+    def _predict_fast(self, series_by_symbol, horizons, as_of):
+        """Alla symboler i ett vektoriserat anrop; horisonterna räknas om till antal handelsdagar."""
+        start = time.perf_counter()
+        future_ds = horizon_dates(horizons, as_of).astype("datetime64[D]")
+        labels = [horizon_label(h) for h in horizons]
+        histories, last_days = {}, []
+        for symbol, data in series_by_symbol.items():
+            try:
+                history = prepare_series(data)
+            except Exception as e:
+                logger.error(f"❌ Ogiltig prisserie för {symbol}: {str(e)}")
+                history = pd.DataFrame({"ds": pd.to_datetime([]), "y": []})
+            histories[symbol] = pd.Series(history["y"].to_numpy(dtype=np.float64), index=history["ds"])
+            last_days.append(history["ds"].iloc[-1] if len(history) else pd.Timestamp.today())
+        symbols = list(histories)
+        closes = [h.to_numpy() for h in histories.values()]
+        last_days = np.array(last_days, dtype="datetime64[D]")
+        steps = np.maximum(np.busday_count(last_days[:, None], future_ds[None, :]), 1)
+        if self.backend == "lstm":
+            from ai_learning.lstm_forecaster import get_lstm_forecaster
+
+            forecaster = get_lstm_forecaster()
+            forecaster.update(histories)  # finjusterar bara på data som tillkommit sedan förra körningen
+            batch = forecaster.predict_batch
+        else:
+            batch = FAST_METHODS[self.backend]
+        forecast = batch(closes, forecast_steps=int(steps.max()) if len(steps) else 1)
+        values = np.take_along_axis(forecast, steps - 1, axis=1) if len(symbols) else np.empty((0, len(labels)))
+        result = pd.DataFrame(values, index=pd.Index(symbols, name="symbol"), columns=labels)
+        result["status"] = np.where(np.isfinite(values).all(axis=1), "fitted", "failed")
+        counts = result["status"].value_counts().to_dict()
+        self.stats = {"elapsed_s": time.perf_counter() - start, "fit_s": time.perf_counter() - start, **counts}
+        logger.info(f"✅ Riktpriser ({self.backend}) för {len(result)} symboler på {self.stats['elapsed_s']:.2f}s")
+        return result
+
+    def price_targets(self, series_by_symbol, horizons=DEFAULT_HORIZONS, time_budget=None):
+        """Som predict(), men som dict symbol -> {"3m": ..., "6m": ..., "12m": ...}."""
+        targets = self.predict(series_by_symbol, horizons, time_budget=time_budget)
+        targets = targets.drop(columns="status").astype(object).where(targets.notna(), None)
+        return targets.to_dict("index")
+
+    def forecast(self, data, forecast_days=365, key=None, uncertainty=True):
+        """
+        Full daglig prognos (historik + forecast_days framåt) för en enskild serie, i den här processen.
+        Modellen cachas per datahash, så upprepade anrop med samma data anpassar inte om.
+    Serier utan key hålls bara i minnet (de MAX_SERIES_MODELS senaste).
+        """
+        history = prepare_series(data)
+        data_hash = hash_inputs(history)
+        key = key or f"_series_{data_hash[:16]}"
+        entry = self._load(key)
+        cached = entry["model"] if entry and entry["hash"] == data_hash else None
+        previous = entry["model"] if entry and cached is None else None
+        future_ds = pd.date_range(history["ds"].iloc[0], history["ds"].iloc[-1] + pd.Timedelta(days=forecast_days),
+                                  freq="D").to_numpy()
+        model_json, forecast, _ = self.task(history["ds"].to_numpy(), history["y"].to_numpy(dtype=np.float64),
+                                            future_ds, cached, previous, uncertainty)
+        if cached is None:
+            # Enskilda serier utan symbol hålls bara i minnet
+            if key.startswith("_series_"):
+                self._remember_series(key, {"hash": data_hash, "model": model_json})
+            else:
+                self._store(key, {"hash": data_hash, "model": model_json})
+        return forecast
+
+
+def fetch_price_history(tickers, period="5y"):
+    """
+    Hämtar daglig stängningskurs för alla tickers i ett enda yfinance-anrop. Returnerar dict ticker -> Series.
+    """
+    import yfinance as yf
+
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    data = yf.download(tickers, period=period, interval="1d", auto_adjust=True, progress=False, threads=True)
+    close = data["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    return {ticker: close[ticker].dropna() for ticker in close.columns if close[ticker].notna().sum() > 1}
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_forecast_service():
+    """
+    Returnerar den gemensamma prognostjänsten (skapas vid första anropet).
+    """
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ForecastService()
+        return _default_service
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(42)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=500, freq="D")
+    universe = {f"SYM{i}": pd.Series(100 + np.cumsum(rng.normal(0, 1, len(dates))), index=dates) for i in range(8)}
+    service = ForecastService(cache_dir=None)
+    print(service.predict(universe, time_budget=300))
+    print(f"📊 Första körningen: {service.stats}")
+    print(service.predict(universe))
+    print(f"📊 Andra körningen (cache): {service.stats}")
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="hybrid_strategy_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def combine_trading_strategies(
@@ -24,10 +24,10 @@ def combine_trading_strategies(
         decision[combined_score > 0.5] = "BUY"
         decision[combined_score < -0.5] = "SELL"
 
-        logging.info("✅ Hybridstrategi genererad baserat på kombinerade signaler.")
+        logger.info("✅ Hybridstrategi genererad baserat på kombinerade signaler.")
         return decision
     except Exception as e:
-        logging.error(f"❌ Fel vid generering av hybridstrategi: {str(e)}")
+        logger.error(f"❌ Fel vid generering av hybridstrategi: {str(e)}")
         return None
 
 
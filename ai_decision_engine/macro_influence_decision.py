@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="macro_influence_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_macro_factors(macro_data):
@@ -22,10 +22,10 @@ def analyze_macro_factors(macro_data):
         )  # Högre BNP-tillväxt är positivt
 
         macro_score = interest_rate_impact + inflation_impact + gdp_growth_impact
-        logging.info(f"✅ Makroekonomisk påverkan beräknad: {macro_score:.4f}")
+        logger.info(f"✅ Makroekonomisk påverkan beräknad: {macro_score:.4f}")
         return macro_score
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av makrofaktorer: {str(e)}")
+        logger.error(f"❌ Fel vid analys av makrofaktorer: {str(e)}")
         return None
 
 
@@ -42,10 +42,10 @@ def adjust_decision_based_on_macro(macro_data, trade_log, threshold=0.5):
         adjusted_decision[(macro_score > threshold)] = "BUY"
         adjusted_decision[(macro_score < -threshold)] = "SELL"
 
-        logging.info("✅ Makroekonomiskt justerade beslut genererade.")
+        logger.info("✅ Makroekonomiskt justerade beslut genererade.")
         return adjusted_decision
     except Exception as e:
-        logging.error(
+        logger.error(
             f"❌ Fel vid justering av beslut baserat på makrofaktorer: {str(e)}"
         )
         return None
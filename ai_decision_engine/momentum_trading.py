@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="momentum_trading.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_momentum(prices, period=14):
@@ -13,10 +13,10 @@ def calculate_momentum(prices, period=14):
     """
     try:
         momentum = prices - prices.shift(period)
-        logging.info(f"✅ Momentum beräknat för {period} perioder.")
+        logger.info(f"✅ Momentum beräknat för {period} perioder.")
         return momentum
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av momentum: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av momentum: {str(e)}")
         return None
 
 
@@ -32,10 +32,10 @@ def relative_strength_index(prices, period=14):
         rs = gain / loss
         rsi = 100 - (100 / (1 + rs))
 
-        logging.info(f"✅ RSI beräknat för {period} perioder.")
+        logger.info(f"✅ RSI beräknat för {period} perioder.")
         return rsi
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av RSI: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av RSI: {str(e)}")
         return None
 
 
@@ -51,10 +51,10 @@ def momentum_strategy(prices, period=14, rsi_threshold=50):
         signals[(momentum > 0) & (rsi > rsi_threshold)] = "BUY"
         signals[(momentum < 0) & (rsi < rsi_threshold)] = "SELL"
 
-        logging.info(f"✅ Momentumstrategi genererad.")
+        logger.info(f"✅ Momentumstrategi genererad.")
         return signals
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av momentumstrategi: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av momentumstrategi: {str(e)}")
         return None
 
 
@@ -5,14 +5,13 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 import logging
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 from notifications.telegram_bot import send_chart_to_telegram
+from utils.chart_service import get_chart_service
 
 # Konfigurera loggning
-logging.basicConfig(filename="optimal_entry_exit.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def moving_average(prices: pd.Series, window: int = 20) -> Optional[pd.Series]:
@@ -93,34 +92,40 @@ def generate_entry_exit_dataframe(prices: pd.Series, window: int = 20, num_std:
 
 def plot_entry_exit_signals(df: pd.DataFrame, window: int = 20, save_png: bool = True) -> None:
     try:
-        plt.figure(figsize=(12, 6))
-        plt.plot(df["Price"], label="Pris", linewidth=1.5)
-        plt.plot(df[f"MA{window}"], label=f"MA{window}", linestyle="--")
-        plt.plot(df["UpperBand"], label="Övre Band", color="green", alpha=0.5)
-        plt.plot(df["LowerBand"], label="Nedre Band", color="red", alpha=0.5)
+        if not save_png:
+            return
+        os.makedirs("charts", exist_ok=True)
+        date_str = datetime.now().strftime("%Y%m%d")
+        file_path = f"charts/entry_exit_plot_{date_str}.png"
+        get_chart_service().render_lines(
+            "entry_exit",
+            {
+                "Pris": df["Price"],
+                f"MA{window}": df[f"MA{window}"],
+                "Övre Band": df["UpperBand"],
+                "Nedre Band": df["LowerBand"],
+                "BUY": df.loc[df["Signal"] == "BUY", "Price"],
+                "SELL": df.loc[df["Signal"] == "SELL", "Price"],
+            },
+            title="Entry/Exit-signaler med Bollinger Bands",
+            output_file=file_path,
+            styles={
+                "Pris": {"linewidth": 1.5},
+                f"MA{window}": {"linestyle": "--"},
+                "Övre Band": {"color": "green", "alpha": 0.5},
+                "Nedre Band": {"color": "red", "alpha": 0.5},
+                "BUY": {"linestyle": "", "marker": "^", "color": "green", "markersize": 9},
+                "SELL": {"linestyle": "", "marker": "v", "color": "red", "markersize": 9},
+            },
+            xlabel="Datum",
+            ylabel="Pris",
+            grid=True,
+            figsize=(12, 6),
+        )
+        logger.info(f"[{datetime.now()}] 💾 Plot sparad till {file_path}")
 
-        buy_signals = df[df["Signal"] == "BUY"]
-        sell_signals = df[df["Signal"] == "SELL"]
-        plt.scatter(buy_signals.index, buy_signals["Price"], marker="^", color="green", label="BUY", s=80)
-        plt.scatter(sell_signals.index, sell_signals["Price"], marker="v", color="red", label="SELL", s=80)
-
-        plt.title("📉 Entry/Exit-signaler med Bollinger Bands")
-        plt.xlabel("Datum")
-        plt.ylabel("Pris")
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-
-        if save_png:
-            os.makedirs("charts", exist_ok=True)
-            date_str = datetime.now().strftime("%Y%m%d")
-            file_path = f"charts/entry_exit_plot_{date_str}.png"
-            plt.savefig(file_path)
-            logger.info(f"[{datetime.now()}] 💾 Plot sparad till {file_path}")
-
-            # Skicka till Telegram
-            send_chart_to_telegram(file_path, caption=f"📊 Entry/Exit-signal ({date_str})")
-        plt.show()
+        # Skicka till Telegram
+        send_chart_to_telegram(file_path, caption=f"📊 Entry/Exit-signal ({date_str})")
     except Exception as e:
         logger.error(f"[{datetime.now()}] ❌ Fel vid plotting: {str(e)}")
 
@@ -1,16 +1,22 @@
 import logging
+from datetime import datetime
 
 import pandas as pd
 
+from live_trading.trade_ledger import get_trade_ledger
+
 # Konfigurera loggning
-logging.basicConfig(filename="risk_adjusted_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def calculate_risk_metrics(trade_log):
+def calculate_risk_metrics(trade_log=None, days=30):
     """
     Beräknar riskmått såsom volatilitet, drawdown och Sharpe-ratio.
+    Utan trade_log används handelsliggarens utfall för de senaste `days` dagarna.
     """
     try:
+        if trade_log is None:
+            trade_log = get_trade_ledger().trade_log(start=datetime.now() - pd.Timedelta(days=days))
         trade_log["return"] = (
             trade_log["exit_price"] - trade_log["entry_price"]
         ) / trade_log["entry_price"]
@@ -18,7 +24,7 @@ def calculate_risk_metrics(trade_log):
         max_drawdown = trade_log["return"].cumsum().min()
         sharpe_ratio = trade_log["return"].mean() / volatility if volatility > 0 else 0
 
-        logging.info(
+        logger.info(
             f"✅ Riskmått beräknade: Volatilitet={volatility:.4f}, Max Drawdown={max_drawdown:.4f}, Sharpe Ratio={sharpe_ratio:.4f}"
         )
         return {
@@ -27,15 +33,18 @@ def calculate_risk_metrics(trade_log):
             "sharpe_ratio": sharpe_ratio,
         }
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av riskmått: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av riskmått: {str(e)}")
         return None
 
 
-def adjust_decision_based_on_risk(trade_log, risk_threshold=0.02):
+def adjust_decision_based_on_risk(trade_log=None, risk_threshold=0.02, days=30):
     """
     Justerar beslut baserat på risknivåer.
+    Utan trade_log används handelsliggarens utfall för de senaste `days` dagarna.
     """
     try:
+        if trade_log is None:
+            trade_log = get_trade_ledger().trade_log(start=datetime.now() - pd.Timedelta(days=days))
         risk_metrics = calculate_risk_metrics(trade_log)
         if risk_metrics is None:
             return None
@@ -49,10 +58,10 @@ def adjust_decision_based_on_risk(trade_log, risk_threshold=0.02):
             | (risk_metrics["max_drawdown"] < -0.1)
         ] = "SELL"
 
-        logging.info("✅ Riskjusterade beslut genererade.")
+        logger.info("✅ Riskjusterade beslut genererade.")
         return adjusted_decision
     except Exception as e:
-        logging.error(f"❌ Fel vid justering av beslut baserat på risk: {str(e)}")
+        logger.error(f"❌ Fel vid justering av beslut baserat på risk: {str(e)}")
         return None
 
 
@@ -1,10 +1,13 @@
 import logging
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
+from live_trading.trade_ledger import get_trade_ledger
+
 # Konfigurera loggning
-logging.basicConfig(filename="seasonality_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_seasonality(historical_data):
@@ -17,20 +20,23 @@ def analyze_seasonality(historical_data):
         best_months = seasonal_performance.nlargest(3).index.tolist()
         worst_months = seasonal_performance.nsmallest(3).index.tolist()
 
-        logging.info(
+        logger.info(
             f"✅ Identifierade säsongsmönster. Bästa månader: {best_months}, Sämsta månader: {worst_months}"
         )
         return best_months, worst_months
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av säsongsmönster: {str(e)}")
+        logger.error(f"❌ Fel vid analys av säsongsmönster: {str(e)}")
         return None, None
 
 
-def adjust_decision_based_on_seasonality(historical_data, trade_log):
+def adjust_decision_based_on_seasonality(historical_data, trade_log=None, days=30):
     """
     Justerar handelsbeslut baserat på identifierade säsongsmönster.
+    Utan trade_log används handelsliggarens utfall för de senaste `days` dagarna.
     """
     try:
+        if trade_log is None:
+            trade_log = get_trade_ledger().trade_log(start=datetime.now() - pd.Timedelta(days=days))
         best_months, worst_months = analyze_seasonality(historical_data)
         if best_months is None:
             return None
@@ -40,10 +46,10 @@ def adjust_decision_based_on_seasonality(historical_data, trade_log):
         adjusted_decision[trade_log["month"].isin(best_months)] = "BUY"
         adjusted_decision[trade_log["month"].isin(worst_months)] = "SELL"
 
-        logging.info("✅ Beslut justerade baserat på säsongsmönster.")
+        logger.info("✅ Beslut justerade baserat på säsongsmönster.")
         return adjusted_decision
     except Exception as e:
-        logging.error(
+        logger.error(
             f"❌ Fel vid justering av beslut baserat på säsongsmönster: {str(e)}"
         )
         return None
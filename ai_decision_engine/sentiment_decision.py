@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="sentiment_decision.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_sentiment(sentiment_data):
@@ -12,10 +12,10 @@ def analyze_sentiment(sentiment_data):
     """
     try:
         sentiment_score = sentiment_data["sentiment_score"].mean()
-        logging.info(f"✅ Genomsnittlig sentimentpoäng beräknad: {sentiment_score:.4f}")
+        logger.info(f"✅ Genomsnittlig sentimentpoäng beräknad: {sentiment_score:.4f}")
         return sentiment_score
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av sentiment: {str(e)}")
+        logger.error(f"❌ Fel vid analys av sentiment: {str(e)}")
         return None
 
 
@@ -34,10 +34,10 @@ def adjust_decision_based_on_sentiment(
         adjusted_decision[(sentiment_score > sentiment_threshold)] = "BUY"
         adjusted_decision[(sentiment_score < -sentiment_threshold)] = "SELL"
 
-        logging.info("✅ Sentimentbaserade beslut genererade.")
+        logger.info("✅ Sentimentbaserade beslut genererade.")
         return adjusted_decision
     except Exception as e:
-        logging.error(f"❌ Fel vid justering av beslut baserat på sentiment: {str(e)}")
+        logger.error(f"❌ Fel vid justering av beslut baserat på sentiment: {str(e)}")
         return None
 
 
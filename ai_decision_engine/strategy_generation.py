@@ -6,17 +6,8 @@ from typing import Optional, Dict, Any
 import numpy as np
 import pandas as pd
 
-# För Prophet: Försök importera den nyare versionen, annars fbprophet
-try:
-    from prophet import Prophet
-except ImportError:
-    from fbprophet import Prophet
-
-logging.basicConfig(
-    filename="strategy_generation.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from ai_decision_engine.forecast_service import get_forecast_service
+
 logger = logging.getLogger(__name__)
 
 def generate_momentum_strategy(
@@ -120,14 +111,10 @@ def generate_future_price_forecast(
 ) -> pd.DataFrame:
     """
     Genererar en framtidsprognos för prisdata med hjälp av Prophet.
+    Den anpassade modellen cachas per datahash, så samma serie anpassas bara en gång.
     """
     try:
-        df = data.copy()
-        df = df.rename(columns={"date": "ds", "close": "y"})
-        model = Prophet()
-        model.fit(df)
-        future = model.make_future_dataframe(periods=forecast_days)
-        forecast = model.predict(future)
+        forecast = get_forecast_service().forecast(data, forecast_days=forecast_days)
         logger.info(f"✅ Tidsserieprognos genererad för {forecast_days} dagar.")
         return forecast
     except Exception as e:
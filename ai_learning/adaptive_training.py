@@ -4,11 +4,12 @@ import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
 
 # Konfigurera loggning
-logging.basicConfig(filename="adaptive_training.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def load_training_data(file_path):
@@ -17,51 +18,142 @@ def load_training_data(file_path):
     """
     try:
         data = pd.read_csv(file_path)
-        logging.info("✅ Träningsdata laddad.")
+        logger.info("✅ Träningsdata laddad.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid laddning av träningsdata: {str(e)}")
+        logger.error(f"❌ Fel vid laddning av träningsdata: {str(e)}")
         return None
 
 
-def train_adaptive_model(data, model_path="adaptive_model.pkl"):
+def split_features(data):
     """
-    Tränar en adaptiv AI-modell och uppdaterar den med ny data vid behov.
+    Sorterar på datum (om det finns) och delar upp i features och target.
+    """
+    if "date" in data.columns:
+        data = data.sort_values("date", kind="stable")
+    feature_columns = [col for col in data.columns if col not in ["symbol", "date", "target"]]
+    return data, feature_columns
+
+
+def load_model_state(model_path):
+    """
+    Laddar sparat modelltillstånd: modell, vattenmärke (senaste tränade datum/rad) och metadata.
+    Äldre filer som bara innehåller modellen ger ett tillstånd utan vattenmärke.
+    """
+    try:
+        state = joblib.load(model_path)
+    except FileNotFoundError:
+        return None
+    if not isinstance(state, dict) or "model" not in state:
+        logger.info("ℹ️ Äldre modellfil utan vattenmärke – tränar om på all data.")
+        return None
+    return state
+
+
+def _rows_after_watermark(data, watermark):
+    if watermark is None:
+        return data
+    if "date" in data.columns:
+        return data[pd.to_datetime(data["date"]) > pd.Timestamp(watermark)]
+    return data.iloc[int(watermark):]
+
+
+def _watermark(data, previous=None):
+    if "date" in data.columns:
+        return pd.to_datetime(data["date"]).max()
+    return (int(previous) if previous is not None else 0) + len(data)
+
+
+def _new_model(mode):
+    if mode == "online":
+        return {"scaler": StandardScaler(), "clf": SGDClassifier(loss="log_loss", random_state=42)}
+    return RandomForestClassifier(n_estimators=100, warm_start=True, random_state=42, n_jobs=-1)
+
+
+def _predict(state, X):
+    if state["mode"] == "online":
+        return state["model"]["clf"].predict(state["model"]["scaler"].transform(X))
+    return state["model"].predict(X)
+
+
+def _learn(state, X, y, trees_per_update, max_trees):
+    """Lär modellen enbart på (X, y): nya träd för skogen eller partial_fit för onlinemodellen."""
+    model = state["model"]
+    if state["mode"] == "online":
+        model["scaler"].partial_fit(X)
+        model["clf"].partial_fit(model["scaler"].transform(X), y, classes=state["classes"])
+        return
+    if hasattr(model, "estimators_"):
+        model.n_estimators = len(model.estimators_) + trees_per_update
+    model.fit(X, y)  # warm_start: bara de nya träden anpassas, på de nya raderna
+    if len(model.estimators_) > max_trees:
+        # Glidande fönster: de äldsta träden (äldsta datan) tas bort
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.n_estimators = max_trees
+
+
+def train_adaptive_model(data, model_path="adaptive_model.pkl", mode="forest", trees_per_update=20,
+                         max_trees=500, min_new_rows=20, full_retrain=False):
+    """
+    Tränar en adaptiv AI-modell inkrementellt: bara rader efter det sparade vattenmärket bearbetas.
+
+    mode="forest" lägger till trees_per_update nya träd (warm_start) tränade på de nya raderna och
+    behåller högst max_trees träd; mode="online" uppdaterar en SGD-modell med partial_fit.
+    De nya raderna utvärderas med den befintliga modellen innan den lär sig av dem. Färre än
+    min_new_rows nya rader sparas till nästa körning (vattenmärket flyttas inte).
+    full_retrain=True ignorerar sparat tillstånd och tränar från början.
     """
     try:
-        feature_columns = [
-            col for col in data.columns if col not in ["symbol", "date", "target"]
-        ]
-        X = data[feature_columns]
-        y = data["target"]
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-
-        # Ladda befintlig modell om den finns, annars skapa ny
-        try:
-            model = joblib.load(model_path)
-            logging.info("✅ Existerande modell laddad.")
-        except FileNotFoundError:
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            logging.info("🔄 Ingen befintlig modell hittades, ny modell skapas.")
-
-        # Träna eller finjustera modellen
-        model.fit(X_train, y_train)
-
-        # Utvärdera modellen
-        y_pred = model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        logging.info(f"✅ Modell uppdaterad. Noggrannhet: {accuracy:.2%}")
-
-        # Spara den uppdaterade modellen
-        joblib.dump(model, model_path)
-        logging.info("✅ Modell sparad.")
-
-        return model
+        data, feature_columns = split_features(data)
+        state = None if full_retrain else load_model_state(model_path)
+        if state is not None and (state["features"] != feature_columns or state["mode"] != mode):
+            logger.info("🔄 Features eller modelltyp har ändrats – ny modell skapas.")
+            state = None
+
+        if state is None:
+            logger.info("🔄 Ingen befintlig modell hittades, ny modell skapas.")
+            state = {"model": _new_model(mode), "mode": mode, "features": feature_columns,
+                     "classes": np.unique(data["target"]), "watermark": None, "n_rows": 0}
+            new_rows = data
+            # Kallstart: träna på de första 80 %, utvärdera på de sista 20 % och lär sedan även på dem
+            cut = int(len(new_rows) * 0.8)
+            _learn(state, new_rows[feature_columns].iloc[:cut], new_rows["target"].iloc[:cut], trees_per_update, max_trees)
+            learned, holdout = new_rows.iloc[:cut], new_rows.iloc[cut:]
+        else:
+            logger.info("✅ Existerande modell laddad.")
+            new_rows = _rows_after_watermark(data, state["watermark"])
+            if len(new_rows) < max(min_new_rows, 1):
+                logger.info(f"ℹ️ {len(new_rows)} nya rader efter vattenmärket – väntar med uppdatering.")
+                return state["model"]
+            if not set(np.unique(new_rows["target"])) <= set(state["classes"]):
+                logger.warning("⚠️ Nya klasser i target – tränar om från början.")
+                return train_adaptive_model(data, model_path, mode, trees_per_update, max_trees, min_new_rows,
+                                            full_retrain=True)
+            learned, holdout = new_rows.iloc[:0], new_rows
+
+        X_new, y_new = holdout[feature_columns], holdout["target"]
+        if len(holdout):
+            accuracy = accuracy_score(y_new, _predict(state, X_new))
+            logger.info(f"✅ Noggrannhet på {len(holdout)} nya rader före uppdatering: {accuracy:.2%}")
+            state["accuracy"] = accuracy
+            if state["mode"] == "online" or len(np.unique(y_new)) == len(state["classes"]):
+                _learn(state, X_new, y_new, trees_per_update, max_trees)
+            else:
+                # Nya träd kräver alla klasser i fönstret; raderna tas med i nästa uppdatering
+                logger.info("ℹ️ Alla klasser finns inte i det nya fönstret – väntar med nya träd.")
+                new_rows = learned
+
+        state["watermark"] = _watermark(new_rows, state["watermark"]) if len(new_rows) else state["watermark"]
+        state["n_rows"] += len(new_rows)
+        logger.info(f"✅ Modell uppdaterad med {len(new_rows)} nya rader (totalt {state['n_rows']}).")
+
+        # Spara den uppdaterade modellen med vattenmärke
+        joblib.dump(state, model_path)
+        logger.info("✅ Modell sparad.")
+
+        return state["model"]
     except Exception as e:
-        logging.error(f"❌ Fel vid träning av adaptiv modell: {str(e)}")
+        logger.error(f"❌ Fel vid träning av adaptiv modell: {str(e)}")
         return None
 
 
@@ -80,5 +172,7 @@ if __name__ == "__main__":
         }
     )
 
+    model = train_adaptive_model(simulated_data.iloc[:400])
+    # Nästa dag: bara de 100 nya raderna bearbetas
     model = train_adaptive_model(simulated_data)
     print("📢 AI-modellen är uppdaterad och redo att använda!")
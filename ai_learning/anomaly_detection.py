@@ -6,7 +6,7 @@ from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
 # Konfigurera loggning
-logging.basicConfig(filename="anomaly_detection.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def detect_anomalies(data, contamination=0.01):
@@ -21,10 +21,10 @@ def detect_anomalies(data, contamination=0.01):
         data["anomaly_score"] = model.fit_predict(scaled_data)
 
         anomalies = data[data["anomaly_score"] == -1]
-        logging.info(f"✅ {len(anomalies)} anomalier upptäckta i marknadsdatan.")
+        logger.info(f"✅ {len(anomalies)} anomalier upptäckta i marknadsdatan.")
         return anomalies
     except Exception as e:
-        logging.error(f"❌ Fel vid upptäckt av anomalier: {str(e)}")
+        logger.error(f"❌ Fel vid upptäckt av anomalier: {str(e)}")
         return None
 
 
@@ -11,13 +11,11 @@ import pandas as pd
 import numpy as np
 from stable_baselines3 import PPO
 from ai_learning.reinforcement_learning import TradingEnv
+from utils.logging_config import get_sampled_logger
 
 # Konfigurera loggning
-logging.basicConfig(
-    filename="backtest_rl.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
+step_logger = get_sampled_logger(__name__ + ".steps", every_n=100)
 
 def backtest_rl_agent(df: pd.DataFrame, model_path="rl_trading_model.zip"):
     """
@@ -37,13 +35,13 @@ def backtest_rl_agent(df: pd.DataFrame, model_path="rl_trading_model.zip"):
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"❌ RL-modellen hittades inte på {model_path}")
 
-    logging.info(f"📥 Laddar RL-modell från: {os.path.abspath(model_path)}")
+    logger.info(f"📥 Laddar RL-modell från: {os.path.abspath(model_path)}")
     print(f"📥 Laddar RL-modell från: {os.path.abspath(model_path)}")
 
     try:
         model = PPO.load(model_path)
     except Exception as e:
-        logging.error(f"⚠️ Misslyckades att ladda RL-modellen: {str(e)}")
+        logger.error(f"⚠️ Misslyckades att ladda RL-modellen: {str(e)}")
         raise
 
     # Initiera TradingEnv
@@ -60,16 +58,15 @@ def backtest_rl_agent(df: pd.DataFrame, model_path="rl_trading_model.zip"):
         done = terminated or truncated
         total_reward += reward
 
-        # Logga varje steg
-        current_value = env._get_portfolio_value()
-        msg = f"Steg {step:3d} | Action: {action} | Reward: {reward:.2f} | Portföljvärde: {current_value:.2f}"
-        logging.info(msg)
-        print(msg)
+        # Logga steget (samplas, och formateras bara om DEBUG är aktiverat)
+        if step_logger.isEnabledFor(logging.DEBUG):
+            step_logger.debug("Steg %3d | Action: %s | Reward: %.2f | Portföljvärde: %.2f",
+                              step, action, reward, env._get_portfolio_value())
         step += 1
 
     final_value = env._get_portfolio_value()
     summary = f"✅ Backtest: Totalt reward = {total_reward:.2f}, slutligt portföljvärde = {final_value:.2f}"
-    logging.info(summary)
+    logger.info(summary)
     print(summary)
 
     return {"reward": total_reward, "final_value": final_value}
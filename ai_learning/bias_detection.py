@@ -5,7 +5,7 @@ import pandas as pd
 from sklearn.utils import resample
 
 # Konfigurera loggning
-logging.basicConfig(filename="bias_detection.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def detect_class_imbalance(y):
@@ -14,12 +14,12 @@ def detect_class_imbalance(y):
     """
     try:
         class_distribution = y.value_counts(normalize=True)
-        logging.info(f"✅ Klassfördelning: {class_distribution}")
+        logger.info(f"✅ Klassfördelning: {class_distribution}")
         if class_distribution.min() < 0.1:
-            logging.warning("⚠️ Möjlig klassobalans upptäckt!")
+            logger.warning("⚠️ Möjlig klassobalans upptäckt!")
         return class_distribution
     except Exception as e:
-        logging.error(f"❌ Fel vid klassobalansdetektion: {str(e)}")
+        logger.error(f"❌ Fel vid klassobalansdetektion: {str(e)}")
         return None
 
 
@@ -38,10 +38,10 @@ def apply_data_resampling(X, y):
         )
         balanced_df = pd.concat([df_majority, df_minority_upsampled])
 
-        logging.info("✅ Dataresampling genomförd för att minska bias.")
+        logger.info("✅ Dataresampling genomförd för att minska bias.")
         return balanced_df.drop(columns=[y.name]), balanced_df[y.name]
     except Exception as e:
-        logging.error(f"❌ Fel vid dataresampling: {str(e)}")
+        logger.error(f"❌ Fel vid dataresampling: {str(e)}")
         return None, None
 
 
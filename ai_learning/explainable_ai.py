@@ -1,39 +1,232 @@
 import logging
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
 
 import joblib
 import numpy as np
 import pandas as pd
-import shap
+
+from utils.pipeline import hash_inputs
 
 # Konfigurera loggning
-logging.basicConfig(filename="explainable_ai.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("data", "shap_cache")
+BACKGROUND_SIZE = 100
+DEFAULT_TOP_K = 3
 
 
 def load_model(model_path):
     """
-    Laddar en sparad AI-modell.
+    Laddar en sparad AI-modell (även modelltillstånd sparade av adaptive_training).
     """
     try:
         model = joblib.load(model_path)
-        logging.info("✅ Modell laddad för explainability-analys.")
+        if isinstance(model, dict) and "model" in model:
+            model = model["model"]
+        logger.info("✅ Modell laddad för explainability-analys.")
         return model
     except Exception as e:
-        logging.error(f"❌ Fel vid laddning av modellen: {str(e)}")
+        logger.error(f"❌ Fel vid laddning av modellen: {str(e)}")
         return None
 
 
+def _is_tree_model(model):
+    return hasattr(model, "estimators_") or hasattr(model, "tree_") or hasattr(model, "get_booster")
+
+
+def _positive_class(values, model):
+    """SHAP-värden för klassificerare: välj sista klassen (köp/1) så att resultatet blir (rader x features)."""
+    if isinstance(values, list):
+        return np.asarray(values[-1])
+    values = np.asarray(values)
+    if values.ndim == 3:
+        return values[:, :, -1]
+    return values
+
+
+class ExplanationService:
+    """
+    SHAP-förklaringar med trädspecifik explainer och cache per modell och rad.
+
+    - Trädmodeller (RandomForest m.fl.) förklaras med shap.TreeExplainer mot en bakgrundsmängd;
+      övriga modeller med shap.Explainer. Bakgrunden dras en gång (seedat, background_size
+      rader) ur hela datan eller anges explicit, t.ex. som modellens träningsdata.
+    - SHAP-värden cachas per modellhash, bakgrundshash och radhash (i minnet och som .npz
+      på disk), så bara rader som inte förklarats tidigare mot samma modell och bakgrund beräknas.
+    - explain() returnerar bara de top_k viktigaste features per prediktion.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, background_size=BACKGROUND_SIZE, max_models=8, random_state=42):
+        self.cache_dir = cache_dir
+        self.background_size = background_size
+        self.random_state = random_state
+        self.max_models = max_models
+        self._values = OrderedDict()  # modellhash -> {radhash: SHAP-rad}
+        self._model_hashes = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    def model_hash(self, model):
+        try:
+            cached = self._model_hashes.get(model)
+        except TypeError:
+            cached = None
+        if cached is None:
+            cached = hash_inputs(model)
+            try:
+                self._model_hashes[model] = cached
+            except TypeError:
+                pass
+        return cached
+
+    # --- Cache -------------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".npz")
+
+    def _cache_for(self, key):
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+        rows = {}
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with np.load(self._path(key)) as f:
+                    rows = dict(zip(f["row_hashes"].tolist(), f["values"]))
+            except Exception as e:
+                logger.warning(f"⚠️ Kunde inte läsa SHAP-cache: {str(e)}")
+        with self._lock:
+            self._values[key] = rows
+            while len(self._values) > self.max_models:
+                self._values.popitem(last=False)
+        return rows
+
+    def _persist(self, key, rows):
+        if not self.cache_dir or not rows:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp, row_hashes=np.fromiter(rows, dtype=np.uint64, count=len(rows)),
+                     values=np.stack(list(rows.values())))
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte spara SHAP-cache: {str(e)}")
+
+    # --- Beräkning -----------------------------------------------------------
+
+    def background(self, data):
+        """Fast, seedad bakgrundsmängd ur hela datan (högst background_size rader)."""
+        if len(data) <= self.background_size:
+            return data
+        return data.sample(self.background_size, random_state=self.random_state)
+
+    def _compute(self, model, data, background):
+        import shap
+
+        if _is_tree_model(model):
+            explainer = shap.TreeExplainer(model, data=background, feature_perturbation="interventional")
+            values = explainer.shap_values(data, check_additivity=False)
+        else:
+            predict = model.predict_proba if hasattr(model, "predict_proba") else model.predict
+            values = shap.Explainer(predict, background)(data).values
+        return _positive_class(values, model)
+
+    def shap_values(self, model, data, background=None):
+        """
+        SHAP-värden (rader x features) för data; cachade rader återanvänds. Utan background
+        dras bakgrunden ur hela data (inte bara de rader som saknas i cachen).
+        """
+        start = time.perf_counter()
+        if background is None:
+            background = self.background(data)
+        key = f"{self.model_hash(model)}-{hash_inputs(background)[:12]}"
+        rows = self._cache_for(key)
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        missing = np.fromiter((h not in rows for h in row_hashes.tolist()), dtype=bool, count=len(row_hashes))
+        if missing.any():
+            computed = self._compute(model, data.iloc[np.flatnonzero(missing)], background)
+            for h, value in zip(row_hashes[missing].tolist(), computed):
+                rows[h] = np.asarray(value, dtype=np.float64)
+            self._persist(key, rows)
+        values = np.stack([rows[h] for h in row_hashes.tolist()]) if len(row_hashes) else np.empty((0, data.shape[1]))
+        self.timings = {"total_s": time.perf_counter() - start, "computed_rows": int(missing.sum()),
+                        "cached_rows": int(len(missing) - missing.sum())}
+        logger.info(f"✅ SHAP-värden för {len(values)} rader ({self.timings['computed_rows']} nya) "
+                    f"på {self.timings['total_s']:.2f}s")
+        return values
+
+    def explain(self, model, data, top_k=DEFAULT_TOP_K, background=None):
+        """
+        De top_k viktigaste features per prediktion: DataFrame (samma index som data) med
+        kolumnerna feature_1, shap_1, ..., feature_k, shap_k sorterade efter |SHAP|.
+        """
+        values = self.shap_values(model, data, background)
+        return top_features(values, list(data.columns), top_k, index=data.index)
+
+
+def top_features(values, feature_names, top_k=DEFAULT_TOP_K, index=None):
+    """Väljer de top_k features med störst |SHAP| per rad (argpartition, ingen full sortering)."""
+    top_k = min(top_k, values.shape[1])
+    if top_k == 0 or len(values) == 0:
+        return pd.DataFrame(index=index)
+    magnitude = np.abs(values)
+    part = np.argpartition(-magnitude, top_k - 1, axis=1)[:, :top_k]
+    order = np.argsort(-np.take_along_axis(magnitude, part, axis=1), axis=1)
+    idx = np.take_along_axis(part, order, axis=1)
+    names = np.asarray(feature_names, dtype=object)
+    columns = {}
+    for k in range(top_k):
+        columns[f"feature_{k + 1}"] = names[idx[:, k]]
+        columns[f"shap_{k + 1}"] = values[np.arange(len(values)), idx[:, k]]
+    return pd.DataFrame(columns, index=index)
+
+
+def format_explanation_lines(explanations, max_rows=15):
+    """Textrader för rapporten: en rad per prediktion med de viktigaste faktorerna."""
+    top_k = sum(1 for c in explanations.columns if c.startswith("feature_"))
+    lines = []
+    for label, row in explanations.head(max_rows).iterrows():
+        factors = ", ".join(f"{row[f'feature_{k}']} ({row[f'shap_{k}']:+.3f})" for k in range(1, top_k + 1))
+        lines.append(f"{label}: {factors}")
+    if len(explanations) > max_rows:
+        lines.append(f"... och {len(explanations) - max_rows} till")
+    return lines
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_explanation_service():
+    """
+    Returnerar den gemensamma förklaringstjänsten (cachen delas mellan anrop).
+    """
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ExplanationService()
+        return _default_service
+
+
 def explain_model_predictions(model, data):
     """
-    Förklarar modellens beslut med hjälp av SHAP-värden.
+    Förklarar modellens beslut med hjälp av SHAP-värden (rader x features), via den cachade tjänsten.
     """
     try:
-        explainer = shap.Explainer(model, data)
-        shap_values = explainer(data)
+        shap_values = get_explanation_service().shap_values(model, data)
 
-        logging.info("✅ SHAP-värden beräknade för modellens beslut.")
+        logger.info("✅ SHAP-värden beräknade för modellens beslut.")
         return shap_values
     except Exception as e:
-        logging.error(f"❌ Fel vid SHAP-analys: {str(e)}")
+        logger.error(f"❌ Fel vid SHAP-analys: {str(e)}")
         return None
 
 
@@ -42,10 +235,12 @@ def visualize_feature_importance(shap_values, feature_names):
     Skapar en graf för att visualisera vilka faktorer som påverkar besluten mest.
     """
     try:
+        import shap
+
         shap.summary_plot(shap_values, feature_names=feature_names)
-        logging.info("✅ Feature-importance visualiserad.")
+        logger.info("✅ Feature-importance visualiserad.")
     except Exception as e:
-        logging.error(f"❌ Fel vid visualisering av feature-importance: {str(e)}")
+        logger.error(f"❌ Fel vid visualisering av feature-importance: {str(e)}")
 
 
 # Exempelanrop
@@ -65,5 +260,6 @@ if __name__ == "__main__":
     model = load_model("best_model.pkl")
     if model:
         shap_values = explain_model_predictions(model, simulated_data)
+        print(get_explanation_service().explain(model, simulated_data, top_k=2).head())
         visualize_feature_importance(shap_values, feature_names)
         print("📢 AI-beslut har analyserats och förklarats!")
@@ -3,48 +3,57 @@ import logging
 import numpy as np
 import pandas as pd
 
+from ai_learning.feature_store import compute_features, feature_frame, get_feature_store
+
 # Konfigurera loggning
-logging.basicConfig(filename="feature_engineering.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Kolumnnamn i feature-matrisen -> feature i ai_learning.feature_store
+TECHNICAL_INDICATORS = {
+    "SMA_20": "sma_20",
+    "SMA_50": "sma_50",
+    "RSI": "rsi_14",
+    "volatility": "volatility_20",
+}
 
 
 def calculate_technical_indicators(data):
     """
     Beräknar tekniska indikatorer såsom RSI, glidande medelvärde och volatilitet.
+    Returnerar en ny DataFrame; indata ändras inte.
     """
     try:
-        data["SMA_20"] = data["close"].rolling(window=20).mean()
-        data["SMA_50"] = data["close"].rolling(window=50).mean()
+        indicators = compute_features(data["close"].to_numpy(), names=tuple(TECHNICAL_INDICATORS.values()))
+        data = data.assign(**{col: indicators[:, j] for j, col in enumerate(TECHNICAL_INDICATORS)})
 
-        delta = data["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data["RSI"] = 100 - (100 / (1 + rs))
-
-        data["volatility"] = data["close"].rolling(window=20).std()
-
-        logging.info("✅ Teknisk analysindikatorer beräknade.")
+        logger.info("✅ Teknisk analysindikatorer beräknade.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av tekniska indikatorer: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av tekniska indikatorer: {str(e)}")
         return None
 
 
-def generate_feature_matrix(data):
+def generate_feature_matrix(data, symbol=None):
     """
     Skapar en feature-matris för maskininlärning baserat på tekniska och fundamentala faktorer.
+    Med symbol (och datumindex i data) läggs datan till i feature store och matrisen läses
+    därifrån, så att bara nya staplar räknas; annars beräknas den i minnet.
     """
     try:
-        data = calculate_technical_indicators(data)
-        data.dropna(inplace=True)
-
-        feature_columns = ["SMA_20", "SMA_50", "RSI", "volatility", "volume"]
-        feature_matrix = data[feature_columns]
+        names = {**TECHNICAL_INDICATORS, "volume": "volume"}
+        if symbol is not None:
+            feature_matrix = get_feature_store().features_for(symbol, data[["close", "volume"]],
+                                                              tuple(names.values()))
+        else:
+            feature_matrix = feature_frame(data["close"].to_numpy(), data["volume"].to_numpy(),
+                                           tuple(names.values()), index=data.index)
+        feature_matrix.columns = list(names)
 
-        logging.info("✅ Feature-matris skapad för maskininlärning.")
+        logger.info("✅ Feature-matris skapad för maskininlärning.")
         return feature_matrix
     except Exception as e:
-        logging.error(f"❌ Fel vid skapande av feature-matris: {str(e)}")
+        logger.error(f"❌ Fel vid skapande av feature-matris: {str(e)}")
         return None
 
 
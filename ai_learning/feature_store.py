@@ -0,0 +1,413 @@
+"""
+feature_store.py
+
+Gemensam feature store för ML- och RL-flödena.
+
+- Features är namngivna och versionerade (FEATURES, get_feature). Samma definitioner används av
+  feature_engineering, self_learning_ai och RL-miljöns dataförberedelse, så t.ex.
+  "momentum" betyder samma sak överallt.
+- Per symbol lagras kolumnvis data i append-only binärfiler:
+
+      data/feature_store/<symbol>/index.i8           tidsstämplar (ns)
+      data/feature_store/<symbol>/raw.f8             close, volume (T x 2)
+      data/feature_store/<symbol>/features-<hash>.f4 featurematris (T x F, float32)
+      data/feature_store/<symbol>/meta.json          längd, feature-uppsättningar
+
+  Featurematrisen skrivs radvis (C-ordning), så en hel matris kan lämnas ut som en
+  np.memmap-vy utan kopiering – direkt användbar i sklearn, Keras och RL-miljön.
+- Nya staplar läggs till inkrementellt: bara de sista `lookback` råraderna läses
+  för att räkna features för de nya raderna, som sedan läggs sist i filerna.
+- Staplar som överlappar lagret jämförs med det som finns; reviderad eller
+  splitjusterad historik (eller äldre staplar som saknas) gör att symbolen byggs om.
+- meta.json är commit-punkten: filerna kortas till meta["length"] innan något skrivs,
+  så rader som hann skrivas före en krasch (utan ny meta) kastas.
+- Hashen för en feature-uppsättning bygger på namn och versioner; en ny version av
+  en feature ger en ny fil som räknas om från rådatan vid nästa åtkomst.
+
+Exempel:
+    store = get_feature_store()
+    store.update("AAPL", bars)                      # DataFrame med datum, close, volume
+    X, index = store.matrix("AAPL")                 # float32-vy (T x F), utan uppvärmningsrader
+    env_data = store.frame("AAPL", RL_FEATURES)     # close, momentum, volume för TradingEnv
+    df = store.features_for("AAPL", bars, RL_FEATURES)  # update + frame för bars datum
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.pipeline import hash_inputs
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = os.path.join("data", "feature_store")
+
+Feature = namedtuple("Feature", ["name", "version", "lookback", "func"])
+
+
+def _rolling(values, window):
+    return pd.Series(values).rolling(window=window)
+
+
+def _pct_change(close, periods=1):
+    out = np.full(len(close), np.nan)
+    out[periods:] = close[periods:] / close[:-periods] - 1.0
+    return out
+
+
+def _rsi(close, window=14):
+    delta = np.diff(close, prepend=np.nan)
+    gain = _rolling(np.where(delta > 0, delta, 0.0), window).mean().to_numpy()
+    loss = _rolling(np.where(delta < 0, -delta, 0.0), window).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+
+FEATURES = {
+    f.name: f for f in [
+        Feature("close", 1, 0, lambda raw: raw["close"]),
+        Feature("volume", 1, 0, lambda raw: raw["volume"]),
+        Feature("return", 1, 1, lambda raw: _pct_change(raw["close"])),
+        Feature("log_return", 1, 1, lambda raw: np.diff(np.log(raw["close"]), prepend=np.nan)),
+        # Tiodagars förändring; kolumnen som TradingEnv förväntar sig
+        Feature("momentum", 1, 10, lambda raw: _pct_change(raw["close"], 10)),
+    ]
+}
+
+# Fönsterparametriserade features (sma_20, rsi_14, volatility_20, ...): mönster -> (lookback, funktion)
+
+_PARAMETRIC = {
+    r"sma_(\d+)": lambda w: (w - 1, lambda raw: _rolling(raw["close"], w).mean().to_numpy()),
+    r"volatility_(\d+)": lambda w: (w - 1, lambda raw: _rolling(raw["close"], w).std().to_numpy()),
+    r"return_volatility_(\d+)": lambda w: (w, lambda raw: _rolling(_pct_change(raw["close"]), w).std().to_numpy()),
+    r"momentum_(\d+)": lambda w: (w, lambda raw: _pct_change(raw["close"], w)),
+    r"rsi_(\d+)": lambda w: (w, lambda raw: _rsi(raw["close"], w)),
+}
+
+
+def get_feature(name):
+    """
+    Slår upp en feature; fönsterparametriserade namn (t.ex. sma_100, rsi_7) skapas vid behov.
+    """
+    if name not in FEATURES:
+        for pattern, build in _PARAMETRIC.items():
+            match = re.fullmatch(pattern, name)
+            if match:
+                lookback, func = build(int(match.group(1)))
+                FEATURES[name] = Feature(name, 1, lookback, func)
+                break
+        else:
+            raise KeyError(f"❌ Okänd feature: {name}")
+    return FEATURES[name]
+
+
+DEFAULT_FEATURES = ("close", "volume", "return", "momentum", "sma_20", "sma_50", "rsi_14", "volatility_20")
+RL_FEATURES = ("close", "momentum", "volume")
+
+
+def compute_features(close, volume=None, names=DEFAULT_FEATURES):
+    """
+    Beräknar features i minnet (utan lagring) och returnerar en float64-matris (T x len(names)).
+    Används av konsumenter som bara har en lös prisserie; indata ändras aldrig.
+    """
+    raw = {
+        "close": np.asarray(close, dtype=np.float64),
+        "volume": np.zeros(len(close)) if volume is None else np.asarray(volume, dtype=np.float64),
+    }
+    out = np.empty((len(raw["close"]), len(names)))
+    for j, name in enumerate(names):
+        out[:, j] = get_feature(name).func(raw)
+    return out
+
+
+def feature_frame(close, volume=None, names=DEFAULT_FEATURES, index=None, dropna=True):
+    """Som compute_features() men som DataFrame; uppvärmningsrader (NaN) tas bort med dropna."""
+    df = pd.DataFrame(compute_features(close, volume, names), columns=list(names), index=index)
+    return df.dropna() if dropna else df
+
+
+def _feature_set_key(names):
+    return hash_inputs([(n, get_feature(n).version) for n in names])[:12]
+
+
+class FeatureStore:
+    """
+    Beräknar, lagrar och lämnar ut features per symbol (se modulbeskrivningen).
+    """
+
+    def __init__(self, root=STORE_DIR, features=DEFAULT_FEATURES):
+        self.root = root
+        self.features = tuple(features)
+        self._lock = threading.RLock()
+
+    # --- Filer och metadata --------------------------------------------------
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "_", symbol))
+
+    def _meta(self, symbol):
+        try:
+            with open(os.path.join(self._dir(symbol), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"length": 0, "sets": {}}
+
+    def _write_meta(self, symbol, meta):
+        path = os.path.join(self._dir(symbol), "meta.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _read(self, symbol, name, dtype, width=None, length=None, start=0):
+        """Läser (rader start..length) ur en binärfil som memmap – ingen kopiering."""
+        path = os.path.join(self._dir(symbol), name)
+        if not length or length <= start:
+            return np.empty((0, width) if width else 0, dtype=dtype)
+        shape = (length, width) if width else (length,)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)[start:]
+
+    def _append(self, symbol, name, array):
+        with open(os.path.join(self._dir(symbol), name), "ab") as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    def _truncate(self, symbol, meta):
+        """Kortar binärfilerna till meta["length"] rader (tar bort rader från en avbruten skrivning)."""
+        row_bytes = {"index.i8": 8, "raw.f8": 16}
+        row_bytes.update({f"features-{key}.f4": 4 * len(names) for key, names in meta["sets"].items()})
+        for name, width in row_bytes.items():
+            path = os.path.join(self._dir(symbol), name)
+            size = meta["length"] * width
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                logger.warning(f"⚠️ {symbol}/{name} är längre än meta.json anger, kortas till {meta['length']} rader")
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _raw(self, symbol, length, start=0):
+        raw = self._read(symbol, "raw.f8", np.float64, 2, length, start)
+        return {"close": np.asarray(raw[:, 0]), "volume": np.asarray(raw[:, 1])}
+
+    # --- Skrivning -------------------------------------------------------------
+
+    def update(self, symbol, bars):
+        """
+        Lägger till nya staplar (DataFrame med datumindex eller kolumnen date, samt close och
+        valfritt volume). Staplar som inte är nyare än det som redan finns hoppas över om de
+        stämmer med lagret; skiljer de sig (revidering, splitjustering) byggs symbolen om.
+        Returnerar antalet tillagda (eller vid ombyggnad skrivna) rader.
+        """
+        df = bars.reset_index() if "date" not in bars.columns else bars
+        date_col = "date" if "date" in df.columns else df.columns[0]
+        ts = pd.to_datetime(df[date_col]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        close = pd.to_numeric(df["close"], errors="coerce").to_numpy(dtype=np.float64)
+        has_volume = "volume" in df.columns
+        volume = (pd.to_numeric(df["volume"], errors="coerce").to_numpy(dtype=np.float64)
+                  if has_volume else np.zeros(len(df)))
+        order = np.argsort(ts, kind="stable")
+        ts, close, volume = ts[order], close[order], volume[order]
+        keep = np.isfinite(close) & (np.diff(ts, prepend=np.int64(-1)) != 0)
+        ts, close, volume = ts[keep], close[keep], volume[keep]
+
+        with self._lock:
+            os.makedirs(self._dir(symbol), exist_ok=True)
+            meta = self._meta(symbol)
+            self._truncate(symbol, meta)
+            if meta["length"]:
+                if self._revised(symbol, meta, ts, close, volume if has_volume else None):
+                    return self._rebuild(symbol, meta, ts, close, volume if has_volume else None)
+                new = ts > meta["last_ts"]
+                ts, close, volume = ts[new], close[new], volume[new]
+            if len(ts) == 0:
+                return 0
+
+            old_length = meta["length"]
+            self._append(symbol, "index.i8", ts)
+            self._append(symbol, "raw.f8", np.column_stack([close, volume]))
+            meta["length"] = old_length + len(ts)
+            meta["last_ts"] = int(ts[-1])
+            for key, names in list(meta["sets"].items()):
+                if self._fresh(meta, names, key):
+                    self._extend(symbol, names, key, old_length, meta["length"])
+                else:
+                    del meta["sets"][key]  # gammal version – räknas om vid nästa åtkomst
+            self._ensure(symbol, meta, self.features)
+            self._write_meta(symbol, meta)
+        logger.info(f"✅ {len(ts)} nya staplar för {symbol} i feature store (totalt {meta['length']})")
+        return len(ts)
+
+    def _revised(self, symbol, meta, ts, close, volume=None):
+        """True om staplarna inom lagrets tidsintervall saknas i eller skiljer sig från lagret."""
+        overlap = ts <= meta["last_ts"]
+        if not overlap.any():
+            return False
+        stored_ts = self._read(symbol, "index.i8", np.int64, None, meta["length"])
+        pos = np.minimum(np.searchsorted(stored_ts, ts[overlap]), len(stored_ts) - 1)
+        if not np.array_equal(stored_ts[pos], ts[overlap]):
+            return True
+        raw = self._read(symbol, "raw.f8", np.float64, 2, meta["length"])[pos]
+        same = np.isclose(raw[:, 0], close[overlap], rtol=1e-9)
+        if volume is not None:
+            same &= np.isclose(raw[:, 1], volume[overlap], rtol=1e-9, equal_nan=True)
+        return not same.all()
+
+    def _rebuild(self, symbol, meta, ts, close, volume=None):
+        """
+        Skriver om symbolens rådata med de nya staplarna (de vinner över lagrade rader med
+        samma tid) och räknar om alla aktuella feature-uppsättningar från början.
+        """
+        stored_ts = np.array(self._read(symbol, "index.i8", np.int64, None, meta["length"]))
+        raw = self._raw(symbol, meta["length"])
+        stored_close, stored_volume = raw["close"].copy(), raw["volume"].copy()
+        if volume is None:
+            # Utan volym i indata behålls lagrets volym för tider som redan finns
+            pos = np.minimum(np.searchsorted(stored_ts, ts), len(stored_ts) - 1)
+            volume = np.where(stored_ts[pos] == ts, stored_volume[pos], 0.0)
+        old = ~np.isin(stored_ts, ts)
+        all_ts = np.concatenate([stored_ts[old], ts])
+        order = np.argsort(all_ts, kind="stable")
+        all_ts = all_ts[order]
+        all_raw = np.column_stack([np.concatenate([stored_close[old], close]),
+                                   np.concatenate([stored_volume[old], volume])])[order]
+        sets = [names for key, names in meta["sets"].items() if self._fresh(meta, names, key)]
+
+        # Tom meta först: avbryts ombyggnaden kortas filerna till 0 rader vid nästa öppning
+        meta = {"length": 0, "sets": {}}
+        self._write_meta(symbol, meta)
+        for name in os.listdir(self._dir(symbol)):
+            if name != "meta.json":
+                os.remove(os.path.join(self._dir(symbol), name))
+        self._append(symbol, "index.i8", all_ts)
+        self._append(symbol, "raw.f8", all_raw)
+        meta["length"] = len(all_ts)
+        meta["last_ts"] = int(all_ts[-1])
+        for names in sets + [list(self.features)]:
+            self._ensure(symbol, meta, names)
+        self._write_meta(symbol, meta)
+        logger.warning(f"🔁 Reviderad historik för {symbol}: feature store byggd om ({meta['length']} rader)")
+        return len(ts)
+
+    def _fresh(self, meta, names, key):
+        try:
+            return _feature_set_key(names) == key
+        except KeyError:
+            return False
+
+    def _extend(self, symbol, names, key, old_length, new_length):
+        """Räknar features för raderna old_length..new_length utifrån de sista lookback råraderna."""
+        lookback = max(get_feature(n).lookback for n in names)
+        start = max(old_length - lookback, 0)
+        block = compute_features(**self._raw(symbol, new_length, start), names=names)
+        self._append(symbol, f"features-{key}.f4", block[old_length - start:].astype(np.float32))
+
+    def _ensure(self, symbol, meta, names):
+        """Ser till att feature-uppsättningen finns i lagret (full beräkning första gången)."""
+        key = _feature_set_key(names)
+        if key not in meta["sets"]:
+            path = os.path.join(self._dir(symbol), f"features-{key}.f4")
+            if os.path.exists(path):
+                os.remove(path)
+            self._extend(symbol, names, key, 0, meta["length"])
+            meta["sets"][key] = list(names)
+        return key
+
+    # --- Läsning ---------------------------------------------------------------
+
+    def matrix(self, symbol, features=None, dropna=True):
+        """
+        Featurematris (float32, T x F) och tidsindex för symbolen. Matrisen är en skrivskyddad
+        memmap-vy över lagret; med dropna=True hoppas uppvärmningsraderna över (också en vy).
+        """
+        names = tuple(features or self.features)
+        with self._lock:
+            meta = self._meta(symbol)
+            if not meta["length"]:
+                raise KeyError(f"❌ Inga data för {symbol} i feature store")
+            key = _feature_set_key(names)
+            if key not in meta["sets"]:
+                self._ensure(symbol, meta, names)
+                self._write_meta(symbol, meta)
+            start = max(get_feature(n).lookback for n in names) if dropna else 0
+            X = self._read(symbol, f"features-{key}.f4", np.float32, len(names), meta["length"], start)
+            index = pd.DatetimeIndex(self._read(symbol, "index.i8", np.int64, None, meta["length"], start)
+                                     .view("datetime64[ns]"), name="date")
+        return X, index
+
+    def frame(self, symbol, features=None, dropna=True):
+        """Featurematrisen som DataFrame (samma minne som matrisen), t.ex. som data till TradingEnv."""
+        names = list(features or self.features)
+        X, index = self.matrix(symbol, names, dropna)
+        return pd.DataFrame(X, index=index, columns=names, copy=False)
+
+    def features_for(self, symbol, bars, features=None, dropna=True):
+        """
+        Lägger till bars i lagret (update) och returnerar features för just deras datum
+        (frame). Gemensam väg för konsumenter som får en DataFrame med close/volume.
+        """
+        self.update(symbol, bars)
+        df = self.frame(symbol, features, dropna)
+        dates = bars.index if "date" not in bars.columns else pd.DatetimeIndex(bars["date"])
+        return df[df.index.isin(pd.to_datetime(dates))]
+
+    def panel(self, symbols, features=None, dropna=True):
+        """
+        Matriser för flera symboler, justerade till de gemensamma tidsstämplarna:
+        en float32-array (symboler x T x F) och det gemensamma indexet. (Kopierar.)
+        """
+        names = tuple(features or self.features)
+        parts = {s: self.matrix(s, names, dropna) for s in symbols}
+        common = None
+        for _, index in parts.values():
+            common = index if common is None else common.intersection(index)
+        out = np.empty((len(symbols), len(common), len(names)), dtype=np.float32)
+        for i, s in enumerate(symbols):
+            X, index = parts[s]
+            out[i] = X[index.get_indexer(common)]
+        return out, common
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.exists(os.path.join(self.root, d, "meta.json")))
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_feature_store():
+    """
+    Returnerar den gemensamma feature store-instansen.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = FeatureStore()
+        return _default_store
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2015-01-01", periods=2500)
+    bars = pd.DataFrame({"date": dates, "close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates)))),
+                         "volume": rng.integers(100, 1000, len(dates))})
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(root=tmp)
+        start = time.perf_counter()
+        store.update("AAPL", bars.iloc[:-5])
+        print(f"⏱️ Full beräkning: {(time.perf_counter() - start) * 1000:.1f} ms")
+        start = time.perf_counter()
+        store.update("AAPL", bars)
+        print(f"⏱️ Inkrementell (5 staplar): {(time.perf_counter() - start) * 1000:.1f} ms")
+        X, index = store.matrix("AAPL")
+        print(f"📊 {type(X).__name__} {X.shape} {X.dtype}, senaste rad: {X[-1]}")
+        print(store.frame("AAPL", RL_FEATURES).tail())
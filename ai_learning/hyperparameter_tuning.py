@@ -1,13 +1,29 @@
+import itertools
+import json
 import logging
+import math
+import os
+import time
 
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import GridSearchCV
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+
+from utils.pipeline import hash_inputs
 
 # Konfigurera loggning
-logging.basicConfig(filename="hyperparameter_tuning.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARAM_GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [5, 10, 20, None],
+    "min_samples_split": [2, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+}
+HISTORY_PATH = os.path.join("models", "tuning_history.json")
+HISTORY_DATASETS = 5
 
 
 def load_training_data(file_path):
@@ -16,47 +32,210 @@ def load_training_data(file_path):
     """
     try:
         data = pd.read_csv(file_path)
-        logging.info("✅ Träningsdata laddad.")
+        logger.info("✅ Träningsdata laddad.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid laddning av träningsdata: {str(e)}")
+        logger.error(f"❌ Fel vid laddning av träningsdata: {str(e)}")
         return None
 
 
-def tune_hyperparameters(data, model_path="best_model.pkl"):
+def prepare_features(data):
     """
-    Utför hyperparameteroptimering på en RandomForest-modell.
+    Sorterar på datum (om det finns) och delar upp i features och target.
     """
+    if "date" in data.columns:
+        data = data.sort_values("date", kind="stable")
+    feature_columns = [col for col in data.columns if col not in ["symbol", "date", "target"]]
+    return data[feature_columns], data["target"]
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def load_search_history(path=HISTORY_PATH):
     try:
-        feature_columns = [
-            col for col in data.columns if col not in ["symbol", "date", "target"]
-        ]
-        X = data[feature_columns]
-        y = data["target"]
-
-        param_grid = {
-            "n_estimators": [50, 100, 200],
-            "max_depth": [5, 10, 20, None],
-            "min_samples_split": [2, 5, 10],
-            "min_samples_leaf": [1, 2, 4],
-        }
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"runs": {}, "scores": {}}
+    except Exception as e:
+        logger.warning(f"⚠️ Kunde inte läsa sökhistoriken: {str(e)}")
+        return {"runs": {}, "scores": {}}
+
+
+def save_search_history(history, path=HISTORY_PATH):
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"⚠️ Kunde inte spara sökhistoriken: {str(e)}")
+
+
+def _cv_score(params, X, y, splits, resource, random_state):
+    """
+    Medelträffsäkerhet över tidsseriefolderna, tränat på de senaste `resource` raderna i varje träningsfold
+    (hela folden om den är kortare).
+    """
+    scores = []
+    for train_idx, test_idx in splits:
+        train_idx = train_idx[-resource:]
+        model = RandomForestClassifier(random_state=random_state, n_jobs=-1, **params)
+        model.fit(X.iloc[train_idx], y.iloc[train_idx])
+        scores.append(model.score(X.iloc[test_idx], y.iloc[test_idx]))
+    return float(np.mean(scores))
+
+
+def successive_halving_search(X, y, param_grid=PARAM_GRID, n_splits=5, factor=3, min_resources=None,
+                              time_budget=None, history=None, random_state=42):
+    """
+    Successive halving över param_grid med tidsseriefolder (TimeSeriesSplit).
+
+    Alla kandidater utvärderas först på en liten del av träningsdatan (de senaste raderna i
+    varje fold); den bästa 1/factor går vidare till nästa steg med factor gånger mer data.
+    Sista steget (när en kandidat återstår eller datamängden nått den största folden)
+    tränar varje fold på hela sin träningsdel, precis som rutnätssökningen.
+
+    history (från load_search_history) gör sökningen varmstartad: redan utvärderade
+    (data, parametrar, datamängd) återanvänds, och finns tidigare fullständiga resultat
+    för samma features hoppas första steget över – bara den bästa 1/factor enligt
+    historiken (hur långt kandidaten kom och dess poäng där) plus aldrig utvärderade
+    kandidater tas med.
+
+    Sökningen avbryts när time_budget (sekunder) har förbrukats; då väljs den bästa
+    kandidaten på det högsta steg som hunnit utvärderas.
+    """
+    start = time.perf_counter()
+    history = history if history is not None else {"runs": {}, "scores": {}}
+    names = list(param_grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    # Största folden: med resource = max_resources tränas varje fold på hela sin träningsdel
+    max_resources = max(len(train_idx) for train_idx, _ in splits)
+    n_rungs = max(1, math.ceil(math.log(len(candidates), factor)))
+    min_resources = min_resources or max(math.ceil(max_resources / factor ** (n_rungs - 1)), 2 * len(np.unique(y)))
+
+    data_hash = hash_inputs((X, y))
+    feature_key = hash_inputs(list(X.columns))
+    # Poängcachen hålls för de senaste datamängderna; den aktuella flyttas sist
+    scores = history["scores"].pop(data_hash, {})
+    history["scores"][data_hash] = scores
+    for stale in list(history["scores"])[:-HISTORY_DATASETS]:
+        del history["scores"][stale]
+    prior = history["runs"].get(feature_key, {}).get("ranks", {})
+    if prior and len(candidates) > factor:
+        # Varmstart: hoppa över första steget med hjälp av tidigare fullständiga resultat
+        known = sorted((c for c in candidates if _params_key(c) in prior),
+                       key=lambda c: [-v for v in prior[_params_key(c)]])
+        unknown = [c for c in candidates if _params_key(c) not in prior]
+        candidates = known[:max(1, math.ceil(len(known) / factor))] + unknown
+        min_resources *= factor
+        logger.info(f"♻️ Varmstart från sökhistoriken: {len(candidates)} kandidater kvar")
+
+    n_fits, reused, rungs, reached = 0, 0, [], {}
+    resource = min_resources
+    best_params = history["runs"].get(feature_key, {}).get("best_params") or candidates[0]
+    best_score = -np.inf
+    out_of_time = False
+    while candidates:
+        resource = min(resource, max_resources)
+        rung_scores = []
+        for params in candidates:
+            key = f"{_params_key(params)}|{resource}"
+            if key in scores:
+                reused += 1
+            elif time_budget is not None and time.perf_counter() - start > time_budget:
+                out_of_time = True
+                break
+            else:
+                scores[key] = _cv_score(params, X, y, splits, resource, random_state)
+                n_fits += len(splits)
+            rung_scores.append((scores[key], params))
+            reached[_params_key(params)] = [resource, scores[key]]
+        if rung_scores:
+            rung_scores.sort(key=lambda item: -item[0])
+            best_score, best_params = rung_scores[0]
+            rungs.append({"resources": resource, "candidates": len(rung_scores), "best_score": best_score})
+            logger.info(f"📶 Steg {len(rungs)}: {len(rung_scores)} kandidater på {resource} rader, "
+                        f"bästa {best_score:.4f}")
+        if out_of_time:
+            logger.warning(f"⏰ Tidsbudgeten på {time_budget}s förbrukad – använder bästa kandidaten hittills")
+            break
+        if resource >= max_resources:
+            break
+        candidates = [params for _, params in rung_scores[:max(1, math.ceil(len(rung_scores) / factor))]]
+        # En ensam kvarvarande kandidat utvärderas direkt på hela folderna
+        resource = max_resources if len(candidates) == 1 else resource * factor
+
+    if not out_of_time:
+        history["runs"][feature_key] = {"ranks": {**prior, **reached}, "best_params": best_params}
+
+    return {
+        "best_params": best_params,
+        "best_score": best_score,
+        "n_fits": n_fits,
+        "reused": reused,
+        "elapsed_s": time.perf_counter() - start,
+        "rungs": rungs,
+        "complete": not out_of_time,
+    }
+
+
+def grid_search(X, y, param_grid=PARAM_GRID, n_splits=5, random_state=42):
+    """
+    Fullständig rutnätssökning med samma tidsseriefolder, som jämförelse för successive halving.
+    """
+    start = time.perf_counter()
+    search = GridSearchCV(
+        RandomForestClassifier(random_state=random_state), param_grid,
+        cv=TimeSeriesSplit(n_splits=n_splits), n_jobs=-1, verbose=1, scoring="accuracy",
+    )
+    search.fit(X, y)
+    return {
+        "best_params": search.best_params_,
+        "best_score": float(search.best_score_),
+        "n_fits": len(search.cv_results_["params"]) * n_splits,
+        "reused": 0,
+        "elapsed_s": time.perf_counter() - start,
+        "rungs": [],
+        "complete": True,
+    }
+
+
+def tune_hyperparameters(data, model_path="best_model.pkl", search="halving", time_budget=None,
+                         history_path=HISTORY_PATH, param_grid=PARAM_GRID, n_splits=5, factor=3):
+    """
+    Utför hyperparameteroptimering på en RandomForest-modell med tidsseriefolder.
+
+    search="halving" (standard) kör successive halving med tidsbudget (sekunder) och
+    varmstart från sökhistoriken i history_path; search="grid" kör hela rutnätet.
+    """
+    try:
+        X, y = prepare_features(data)
 
-        model = RandomForestClassifier(random_state=42)
-        grid_search = GridSearchCV(
-            model, param_grid, cv=5, n_jobs=-1, verbose=1, scoring="accuracy"
-        )
-        grid_search.fit(X, y)
+        if search == "grid":
+            result = grid_search(X, y, param_grid, n_splits=n_splits)
+        else:
+            history = load_search_history(history_path) if history_path else None
+            result = successive_halving_search(X, y, param_grid, n_splits=n_splits, factor=factor,
+                                               time_budget=time_budget, history=history)
+            if history_path:
+                save_search_history(history, history_path)
 
-        best_model = grid_search.best_estimator_
-        best_params = grid_search.best_params_
+        best_params = result["best_params"]
+        best_model = RandomForestClassifier(random_state=42, n_jobs=-1, **best_params).fit(X, y)
 
-        logging.info(f"✅ Bästa hyperparametrar: {best_params}")
-        logging.info(f"✅ Optimerad modell sparad.")
+        logger.info(f"✅ Bästa hyperparametrar: {best_params} (CV {result['best_score']:.4f}, "
+                    f"{result['n_fits']} anpassningar på {result['elapsed_s']:.1f}s)")
+        logger.info(f"✅ Optimerad modell sparad.")
 
         joblib.dump(best_model, model_path)
         return best_model
     except Exception as e:
-        logging.error(f"❌ Fel vid hyperparameteroptimering: {str(e)}")
+        logger.error(f"❌ Fel vid hyperparameteroptimering: {str(e)}")
         return None
 
 
@@ -75,5 +254,5 @@ if __name__ == "__main__":
         }
     )
 
-    best_model = tune_hyperparameters(simulated_data)
+    best_model = tune_hyperparameters(simulated_data, time_budget=60)
     print("📢 Bästa hyperparametrar har hittats och modellen har optimerats!")
@@ -0,0 +1,282 @@
+"""
+lstm_forecaster.py
+
+Återanvändbar LSTM-prognosmodell som delas av alla symboler.
+
+- Modellen arbetar på log-avkastning skalad med en gemensam faktor, så samma vikter
+  fungerar för alla symboler oavsett prisnivå.
+- Träningsfönster byggs med stride tricks (sliding_window_view) – vyer utan kopiering
+  och utan Python-loop över tidpunkter.
+- Vikterna sparas mellan körningar tillsammans med metadata om hur långt varje symbol
+  har tränats. Vid nästa körning laddas vikterna (varmstart) och modellen finjusteras
+  bara på fönster vars mål innehåller ny data.
+- Modellen förutsäger `horizon` steg direkt (flera utgångar). Inferensen är ett enda
+  kompilerat anrop (tf.function) över alla symboler; längre horisonter körs i block om
+  `horizon` steg, fortfarande ett anrop per block för hela universumet.
+
+TensorFlow importeras först när modellen byggs.
+
+Exempel:
+    forecaster = get_lstm_forecaster()
+    forecaster.update({"AAPL": aapl_close, "MSFT": msft_close})   # finjustera på ny data och spara
+    forecast = forecaster.predict({"AAPL": aapl_close, "MSFT": msft_close}, forecast_steps=60)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_PATH = os.path.join("models", "lstm_forecaster.weights.h5")
+DEFAULT_LOOK_BACK = 60
+DEFAULT_HORIZON = 20
+
+
+def _log_returns(series):
+    values = np.asarray(series, dtype=np.float64).ravel()
+    values = values[np.isfinite(values) & (values > 0)]
+    return np.diff(np.log(values)), values
+
+
+def series_key(series, look_back=DEFAULT_LOOK_BACK):
+    """
+    Nyckel för en serie utan symbolnamn: hash av de första look_back + 1 punkterna.
+    Stabil när serien förlängs, olika för olika serier.
+    """
+    head = np.ascontiguousarray(np.asarray(series, dtype=np.float64).ravel()[:look_back + 1])
+    return "series:" + hashlib.sha1(head.tobytes()).hexdigest()[:16]
+
+
+def _series_marker(series):
+    """Hur långt en serie sträcker sig: sista tidsstämpeln om den har datumindex, annars längden."""
+    if isinstance(series, pd.Series) and isinstance(series.index, pd.DatetimeIndex) and len(series):
+        return str(series.index[-1])
+    return int(len(series))
+
+
+def _new_points(series, marker):
+    """Antal punkter i serien som tillkommit efter marker (hela serien om marker saknas)."""
+    if marker is None:
+        return len(series)
+    if isinstance(marker, str) and isinstance(series, pd.Series) and isinstance(series.index, pd.DatetimeIndex):
+        return int((series.index > pd.Timestamp(marker)).sum())
+    if isinstance(marker, int):
+        return max(len(series) - marker, 0)
+    return len(series)
+
+
+class LSTMForecaster:
+    """
+    Delad LSTM för flerstegsprognoser av många prisserier.
+    """
+
+    def __init__(self, look_back=DEFAULT_LOOK_BACK, horizon=DEFAULT_HORIZON, units=50, weights_path=WEIGHTS_PATH):
+        self.look_back = look_back
+        self.horizon = horizon
+        self.units = units
+        self.weights_path = weights_path
+        self.scale = None
+        self.trained_until = {}
+        self.model = None
+        self.trained = False  # sant först när vikterna tränats eller laddats
+        self._infer = None
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    # --- Modell och persistens ----------------------------------------------
+
+    @property
+    def meta_path(self):
+        return f"{self.weights_path}.json" if self.weights_path else None
+
+    def _build(self):
+        import tensorflow as tf
+
+        inputs = tf.keras.Input(shape=(self.look_back, 1))
+        hidden = tf.keras.layers.LSTM(self.units)(inputs)
+        outputs = tf.keras.layers.Dense(self.horizon)(hidden)
+        model = tf.keras.Model(inputs, outputs)
+        model.compile(loss="mean_squared_error", optimizer="adam")
+        self.model = model
+        # Ett kompilerat anrop med fast signatur – ingen omspårning när antalet symboler ändras
+        self._infer = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, self.look_back, 1], tf.float32)],
+        )
+        return model
+
+    def load(self):
+        """Laddar sparade vikter och metadata om de finns och passar arkitekturen. Returnerar True vid varmstart."""
+        if not self.weights_path or not os.path.exists(self.weights_path) or not os.path.exists(self.meta_path):
+            return False
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta["look_back"], meta["horizon"], meta["units"]) != (self.look_back, self.horizon, self.units):
+                logger.warning("⚠️ Sparade LSTM-vikter har annan arkitektur – tränar från början")
+                return False
+            if self.model is None:
+                self._build()
+            self.model.load_weights(self.weights_path)
+            self.scale = meta["scale"]
+            self.trained_until = meta.get("trained_until", {})
+            self.trained = True
+            logger.info(f"✅ LSTM-vikter laddade från {self.weights_path} ({len(self.trained_until)} symboler)")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte ladda LSTM-vikter: {str(e)}")
+            return False
+
+    def save(self):
+        if not self.weights_path or not self.trained:
+            return
+        os.makedirs(os.path.dirname(self.weights_path) or ".", exist_ok=True)
+        self.model.save_weights(self.weights_path)
+        meta = {"look_back": self.look_back, "horizon": self.horizon, "units": self.units,
+                "scale": self.scale, "trained_until": self.trained_until}
+        tmp = f"{self.meta_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    # --- Träning --------------------------------------------------------------
+
+    def windows(self, returns, new_points=None):
+        """
+        (X, Y) som vyer över avkastningsserien: X (fönster, look_back, 1), Y (fönster, horizon).
+        Med new_points tas bara fönster vars mål innehåller någon av de senaste new_points punkterna.
+        """
+        size = self.look_back + self.horizon
+        if len(returns) < size:
+            return np.empty((0, self.look_back, 1)), np.empty((0, self.horizon))
+        view = sliding_window_view(returns, size)
+        if new_points is not None:
+            # Fönster i är det sista vars mål slutar på index i + size - 1
+            view = view[max(len(view) - new_points, 0):]
+        return view[:, :self.look_back, None], view[:, self.look_back:]
+
+    def fit(self, series_by_symbol, epochs=50, fine_tune_epochs=5, batch_size=256, incremental=True):
+        """
+        Tränar på alla symboler. Med sparade vikter (varmstart) och incremental=True används bara
+        fönster med ny data sedan förra körningen och fine_tune_epochs epoker i stället för epochs.
+        Modellen byggs först när det finns träningsfönster; bara symboler som bidrog med
+        fönster markeras som tränade, så korta serier tas med fullt ut när de vuxit.
+        """
+        from tensorflow.keras.callbacks import EarlyStopping
+
+        start = time.perf_counter()
+        with self._lock:
+            warm = self.trained or self.load()
+            prepared = {symbol: _log_returns(series)[0] for symbol, series in series_by_symbol.items()}
+
+            xs, ys, contributed = [], [], []
+            for symbol, returns in prepared.items():
+                new_points = None
+                if warm and incremental:
+                    new_points = _new_points(series_by_symbol[symbol], self.trained_until.get(symbol))
+                    if new_points == 0:
+                        continue
+                x, y = self.windows(returns, new_points)
+                if len(x):
+                    xs.append(x)
+                    ys.append(y)
+                    contributed.append(symbol)
+            if not xs:
+                logger.info("ℹ️ Ingen ny data att träna LSTM-modellen på")
+                return self
+            if self.model is None:
+                self._build()
+            if self.scale is None:
+                pooled = np.concatenate([r for r in prepared.values() if len(r)])
+                self.scale = float(np.std(pooled)) or 1.0
+            X = (np.concatenate(xs) / self.scale).astype(np.float32)
+            Y = (np.concatenate(ys) / self.scale).astype(np.float32)
+            n_epochs = fine_tune_epochs if warm and incremental else epochs
+            self.model.fit(X, Y, epochs=n_epochs, batch_size=batch_size, verbose=0,
+                           callbacks=[EarlyStopping(monitor="loss", patience=5, restore_best_weights=True)])
+            self.trained = True
+            for symbol in contributed:
+                self.trained_until[symbol] = _series_marker(series_by_symbol[symbol])
+            self.save()
+        self.timings["fit_s"] = time.perf_counter() - start
+        logger.info(f"✅ LSTM {'finjusterad' if warm and incremental else 'tränad'} på {len(X)} fönster "
+                    f"({n_epochs} epoker, {self.timings['fit_s']:.1f}s)")
+        return self
+
+    update = fit
+
+    # --- Prognos --------------------------------------------------------------
+
+    def predict_batch(self, series_list, forecast_steps=5):
+        """
+        Prognos för många serier. Returnerar en matris (serier x forecast_steps) med priser;
+        serier kortare än look_back + 1 punkter får NaN.
+        """
+        start = time.perf_counter()
+        if not self.trained and not self.load():
+            raise RuntimeError("❌ LSTM-modellen är inte tränad")
+        n = len(series_list)
+        last_price = np.full(n, np.nan)
+        context = np.zeros((n, self.look_back), dtype=np.float32)
+        usable = np.zeros(n, dtype=bool)
+        for i, series in enumerate(series_list):
+            returns, values = _log_returns(series)
+            if len(returns) >= self.look_back:
+                context[i] = returns[-self.look_back:] / self.scale
+                last_price[i] = values[-1]
+                usable[i] = True
+
+        blocks = []
+        for _ in range(-(-forecast_steps // self.horizon)):
+            predicted = self._infer(context[:, :, None]).numpy()
+            blocks.append(predicted)
+            context = np.concatenate([context, predicted], axis=1)[:, -self.look_back:]
+        log_path = np.cumsum(np.concatenate(blocks, axis=1)[:, :forecast_steps] * self.scale, axis=1)
+        forecast = last_price[:, None] * np.exp(log_path)
+        forecast[~usable] = np.nan
+        self.timings["predict_s"] = time.perf_counter() - start
+        return forecast
+
+    def predict(self, series_by_symbol, forecast_steps=5) -> pd.DataFrame:
+        """Som predict_batch(), men dict symbol -> serie in och en DataFrame (symbol x steg) ut."""
+        symbols = list(series_by_symbol)
+        forecast = self.predict_batch([series_by_symbol[s] for s in symbols], forecast_steps)
+        return pd.DataFrame(forecast, index=pd.Index(symbols, name="symbol"), columns=range(1, forecast_steps + 1))
+
+
+_default_forecaster = None
+_default_lock = threading.Lock()
+
+
+def get_lstm_forecaster():
+    """
+    Returnerar den gemensamma LSTM-modellen (vikterna laddas från disk vid första användningen).
+    """
+    global _default_forecaster
+    with _default_lock:
+        if _default_forecaster is None:
+            _default_forecaster = LSTMForecaster()
+        return _default_forecaster
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end="2025-03-28", periods=1000)
+    universe = {f"SYM{i}": pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates)))), index=dates)
+                for i in range(200)}
+    forecaster = LSTMForecaster(weights_path=os.path.join("models", "lstm_forecaster_demo.weights.h5"))
+    forecaster.fit({s: series.iloc[:-5] for s, series in universe.items()}, epochs=10)
+    forecaster.update(universe)  # finjusterar bara på de fem nya dagarna
+    result = forecaster.predict(universe, forecast_steps=60)
+    print(result.iloc[:5, [0, 19, 59]])
+    print(f"⏱️ {forecaster.timings}")
@@ -5,12 +5,11 @@ import numpy as np
 import pandas as pd
 from stable_baselines3 import PPO
 
-# Konfigurera loggning
-logging.basicConfig(
-    filename="reinforcement_learning.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from utils.logging_config import get_sampled_logger
+
+# Konfigurera loggning (per-steg-loggning samplas för att inte belasta träningsloopen)
+logger = logging.getLogger(__name__)
+step_logger = get_sampled_logger(__name__ + ".steps", every_n=100)
 
 class TradingEnv(gym.Env):
     """
@@ -61,7 +60,7 @@ class TradingEnv(gym.Env):
         self.current_step = 0
         self.balance = float(self.initial_balance)
         self.holding = 0.0
-        logging.info("Miljön återställd: balance=%.2f, holding=%.2f", self.balance, self.holding)
+        logger.info("Miljön återställd: balance=%.2f, holding=%.2f", self.balance, self.holding)
         return self._get_obs(), {}
 
     def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict]:
@@ -75,8 +74,8 @@ class TradingEnv(gym.Env):
         new_value = self._get_portfolio_value()
         reward = new_value - old_value
 
-        logging.info("Steg: %d, Action: %d, Reward: %.2f, Portföljvärde: %.2f",
-                     self.current_step, action, reward, new_value)
+        step_logger.debug("Steg: %d, Action: %d, Reward: %.2f, Portföljvärde: %.2f",
+                          self.current_step, action, reward, new_value)
 
         obs = self._get_obs() if not terminated else np.zeros(self.observation_space.shape, dtype=np.float32)
         return obs, reward, terminated, truncated, {}
@@ -89,11 +88,11 @@ class TradingEnv(gym.Env):
                 units = amount_to_spend / price
                 self.holding += units
                 self.balance -= amount_to_spend
-                logging.debug("Köpte: %.4f enheter till pris %.2f", units, price)
+                step_logger.debug("Köpte: %.4f enheter till pris %.2f", units, price)
         elif action == 2:  # SELL
             if self.holding > 0:
                 self.balance += self.holding * price
-                logging.debug("Sålde: %.4f enheter till pris %.2f", self.holding, price)
+                step_logger.debug("Sålde: %.4f enheter till pris %.2f", self.holding, price)
                 self.holding = 0.0
 
     def _get_portfolio_value(self) -> float:
@@ -105,7 +104,7 @@ class TradingEnv(gym.Env):
         print(f"Steg: {self.current_step} | Balance: {self.balance:.2f} | Holding: {self.holding:.4f} | Portföljvärde: {portfolio_value:.2f}")
 
     def close(self):
-        logging.info("Miljön stängs.")
+        logger.info("Miljön stängs.")
 
 if __name__ == "__main__":
     np.random.seed(42)
@@ -1,55 +1,45 @@
 import os
 import shutil
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
 
 from ai_learning.trading_rl_agent import train_rl_trading_agent
 from ai_learning.backtest_rl import backtest_rl_agent
+from utils.chart_service import get_chart_service
+from utils.event_store import get_event_store
 
+TRAINING_HISTORY_MAX_ROWS = 50
 
-def log_rl_training_result(model_name, reward, final_value, notes=""):
-    """Loggar träningsresultat till training_history.csv"""
-    log_file = "training_history.csv"
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    row = {
-        "timestamp": timestamp,
-        "model_name": model_name,
-        "reward": reward,
-        "final_value": final_value,
-        "notes": notes
-    }
-
-    if os.path.exists(log_file):
-        df = pd.read_csv(log_file)
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        df = df.tail(50)  # Behåll endast senaste 50 rader
-    else:
-        df = pd.DataFrame([row])
 
-    df.to_csv(log_file, index=False)
+def log_rl_training_result(model_name, reward, final_value, notes=""):
+    """Loggar träningsresultat i händelselagret (tabellen training_runs)"""
+    store = get_event_store()
+    # Rensningen görs av lagrets skrivtråd med jämna mellanrum, inte vid varje rad
+    store.set_retention("training_runs", max_rows=TRAINING_HISTORY_MAX_ROWS)
+    store.log_training_run(model_name, reward, final_value, notes)
 
 
 def generate_training_history_plot():
     """Skapar träningshistorik-graf och sparar som PNG"""
-    log_file = "training_history.csv"
-    if not os.path.exists(log_file):
+    store = get_event_store()
+    store.flush()
+    df = store.query("training_runs", limit=TRAINING_HISTORY_MAX_ROWS, latest=True)
+    if df.empty:
         print("⚠️ Inget träningslogg hittat för att skapa graf.")
         return
-
-    df = pd.read_csv(log_file)
-
-    plt.figure(figsize=(10, 5))
-    plt.plot(df["timestamp"], df["reward"], marker="o", label="Reward")
-    plt.plot(df["timestamp"], df["final_value"], marker="x", label="Final Portfolio Value")
-    plt.xticks(rotation=45)
-    plt.xlabel("Datum")
-    plt.ylabel("Värde")
-    plt.title("📈 RL-träningens historik")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("training_history_plot.png")
-    plt.close()
+    timestamps = df["ts"]
+
+    get_chart_service().render_lines(
+        "training_history",
+        {
+            "Reward": (timestamps, df["reward"].values),
+            "Final Portfolio Value": (timestamps, df["final_value"].values),
+        },
+        title="RL-träningens historik",
+        output_file="training_history_plot.png",
+        styles={"Reward": {"marker": "o"}, "Final Portfolio Value": {"marker": "x"}},
+        xlabel="Datum",
+        ylabel="Värde",
+    )
     print("✅ Sparade träningsgraf som training_history_plot.png")
 
 
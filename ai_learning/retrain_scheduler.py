@@ -1,22 +1,29 @@
-import schedule
-import time
 from ai_learning.retrain_rl import retrain_rl_agent_if_needed
 from data_collection.market_data import fetch_forex_data
+from utils.job_scheduler import get_scheduler
+
+
+def run_retrain_job():
+    df = fetch_forex_data("USD", "SEK", period="1mo")["history"]
+    if df is not None and not df.empty:
+        retrain_rl_agent_if_needed(
+            df,
+            current_model_path="rl_trading_model.zip",
+            retrain_threshold_reward=50,
+            retrain_timesteps=5000
+        )
 
-def start_retrain_schedule():
-    def run_retrain_loop():
-        df = fetch_forex_data("USD", "SEK", period="1mo")["history"]
-        if df is not None and not df.empty:
-            retrain_rl_agent_if_needed(
-                df,
-                current_model_path="rl_trading_model.zip",
-                retrain_threshold_reward=50,
-                retrain_timesteps=5000
-            )
 
-    # Schemalägg retrain varje måndag 06:00
-    schedule.every().monday.at("06:00").do(run_retrain_loop)
+def register_retrain_job(scheduler=None):
+    """
+    Registrerar RL-retrain i den gemensamma schemaläggaren (varje måndag 06:00).
+    """
+    scheduler = scheduler or get_scheduler()
+    return scheduler.every_weekday("monday", "06:00", "rl_retrain", run_retrain_job, timeout=3 * 3600)
 
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+
+def start_retrain_schedule():
+    # Schemalägg retrain varje måndag 06:00 och kör schemaläggaren (blockerar)
+    scheduler = get_scheduler()
+    register_retrain_job(scheduler)
+    scheduler.run_forever()
@@ -6,34 +6,39 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
 from sklearn.model_selection import train_test_split
 
+from ai_learning.feature_store import feature_frame, get_feature_store
+
 # Konfigurera loggning
-logging.basicConfig(filename="self_learning_ai.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def generate_features(price_series, window=10):
+def generate_features(price_series, window=10, symbol=None):
     """
     Skapar funktioner baserade på historiska prisrörelser för AI-modellen.
+    Med symbol (och datumindex) går beräkningen via feature store, annars i minnet.
     """
     try:
-        df = pd.DataFrame(price_series, columns=["Close"])
-        df["Returns"] = df["Close"].pct_change()
-        df["MA"] = df["Close"].rolling(window=window).mean()
-        df["Volatility"] = df["Returns"].rolling(window=window).std()
-        df.dropna(inplace=True)
-        logging.info("✅ Funktioner genererade för AI-inlärning.")
+        close = pd.Series(price_series)
+        names = {"Close": "close", "Returns": "return", "MA": f"sma_{window}", "Volatility": f"return_volatility_{window}"}
+        if symbol is not None:
+            df = get_feature_store().features_for(symbol, close.rename("close").to_frame(), tuple(names.values()))
+        else:
+            df = feature_frame(close.to_numpy(), names=tuple(names.values()), index=close.index)
+        df.columns = list(names)
+        logger.info("✅ Funktioner genererade för AI-inlärning.")
         return df
     except Exception as e:
-        logging.error(f"❌ Fel vid generering av funktioner: {str(e)}")
+        logger.error(f"❌ Fel vid generering av funktioner: {str(e)}")
         return None
 
 
-def train_self_learning_model(price_series):
+def train_self_learning_model(price_series, symbol=None):
     """
     Tränar en självförbättrande AI-modell för att identifiera handelsmönster.
     """
     try:
-        df = generate_features(price_series)
-        df["Target"] = np.where(df["Returns"] > 0, 1, 0)
+        df = generate_features(price_series, symbol=symbol)
+        df = df.assign(Target=np.where(df["Returns"] > 0, 1, 0))
 
         X = df[["MA", "Volatility"]]
         y = df["Target"]
@@ -46,10 +51,10 @@ def train_self_learning_model(price_series):
         predictions = model.predict(X_test)
         accuracy = accuracy_score(y_test, predictions)
 
-        logging.info(f"✅ AI-modell tränad. Noggrannhet: {accuracy:.2%}")
+        logger.info(f"✅ AI-modell tränad. Noggrannhet: {accuracy:.2%}")
         return model, accuracy
     except Exception as e:
-        logging.error(f"❌ Fel vid träning av AI-modell: {str(e)}")
+        logger.error(f"❌ Fel vid träning av AI-modell: {str(e)}")
         return None, None
 
 
@@ -1,30 +1,38 @@
 """
 signal_logger.py
 
-Loggar realtidssignaler (köp/sälj/håll) till en CSV, så du kan analysera
-eller fortsätta träna RL baserat på faktiskt utfall.
+Loggar realtidssignaler (köp/sälj/håll) till händelselagret (utils.event_store),
+så du kan analysera eller fortsätta träna RL baserat på faktiskt utfall.
 """
 
-import csv
-import os
-from datetime import datetime
+from utils.event_store import get_event_store
 
-def log_signal_to_csv(symbol, action, price, comment="", filename="trade_signals.csv"):
+def log_signal_to_csv(symbol, action, price, comment=""):
     """
-    Loggar en handelssignal i en CSV-fil.
+    Loggar en handelssignal i händelselagret (tabellen signals). Skrivningen köas
+    och görs i batch, så anropet blockerar inte.
     symbol: T.ex. "EURUSD"
     action: "BUY", "SELL", "HOLD", eller liknande
     price: aktuell pris
     comment: ev. extra info
-    filename: filnamn för logg
     """
-    file_exists = os.path.isfile(filename)
-    with open(filename, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["timestamp", "symbol", "action", "price", "comment"])
-        writer.writerow([datetime.now().isoformat(), symbol, action, price, comment])
+    get_event_store().log_signal(symbol, action, price, comment)
+
+def export_signals_csv(filename="signals_export.csv", symbol=None, since=None, until=None):
+    """
+    Exporterar signalloggen till en CSV-fil. Anropas explicit, t.ex. vid dagens slut.
+    """
+    return get_event_store().export_csv("signals", filename, symbol=symbol, since=since, until=until)
+
+def get_signal_history(symbol=None, since=None, until=None):
+    """
+    Returnerar loggade signaler (valfritt för en symbol och ett tidsintervall) som DataFrame.
+    """
+    store = get_event_store()
+    store.flush()
+    return store.query("signals", symbol=symbol, since=since, until=until)
 
 if __name__ == "__main__":
     # Exempel
     log_signal_to_csv("USDSEK", "BUY", 10.25, "Momentum uppåt")
+    print(get_signal_history("USDSEK").tail())
@@ -5,7 +5,7 @@ import pandas as pd
 from scipy.optimize import minimize
 
 # Konfigurera loggning
-logging.basicConfig(filename="strategy_auto_optimizer.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def evaluate_strategy(params, price_series):
@@ -19,10 +19,10 @@ def evaluate_strategy(params, price_series):
         signals = np.where(short_ma > long_ma, 1, -1)
         returns = price_series.pct_change() * signals[:-1]
         avg_return = returns.mean()
-        logging.info(f"✅ Strategi utvärderad med avkastning: {avg_return:.4f}")
+        logger.info(f"✅ Strategi utvärderad med avkastning: {avg_return:.4f}")
         return -avg_return  # Negativ eftersom vi minimerar i optimeringen
     except Exception as e:
-        logging.error(f"❌ Fel vid strategiutvärdering: {str(e)}")
+        logger.error(f"❌ Fel vid strategiutvärdering: {str(e)}")
         return np.inf
 
 
@@ -40,12 +40,12 @@ def optimize_strategy(price_series, param_bounds=((5, 50), (50, 200))):
             method="L-BFGS-B",
         )
         optimized_params = result.x
-        logging.info(
+        logger.info(
             f"✅ Strategioptimering klar: Short MA={optimized_params[0]:.0f}, Long MA={optimized_params[1]:.0f}"
         )
         return optimized_params
     except Exception as e:
-        logging.error(f"❌ Fel vid strategioptimering: {str(e)}")
+        logger.error(f"❌ Fel vid strategioptimering: {str(e)}")
         return None
 
 
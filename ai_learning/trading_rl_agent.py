@@ -11,11 +11,7 @@ from stable_baselines3.common.vec_env import DummyVecEnv
 from ai_learning.reinforcement_learning import TradingEnv
 
 # Konfigurera loggning
-logging.basicConfig(
-    filename="train_rl_agent.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 def train_rl_trading_agent(df: pd.DataFrame, timesteps: int = 100_000, model_path: str = "rl_trading_model.zip") -> PPO:
     """
@@ -34,18 +30,18 @@ def train_rl_trading_agent(df: pd.DataFrame, timesteps: int = 100_000, model_pat
 
     # Skapa en vektoriserad miljö med DummyVecEnv
     env = DummyVecEnv([make_env])
-    logging.info("Startar träning av RL-agenten med %d timesteps...", timesteps)
+    logger.info("Startar träning av RL-agenten med %d timesteps...", timesteps)
 
     # Initiera PPO-modellen med MlpPolicy
     model = PPO("MlpPolicy", env, verbose=1)
 
     # Träna modellen
     model.learn(total_timesteps=timesteps)
-    logging.info("Träningen klar, sparar modellen till %s", model_path)
+    logger.info("Träningen klar, sparar modellen till %s", model_path)
 
     # Spara den tränade modellen
     model.save(model_path)
-    logging.info("✅ RL-modell tränad och sparad till %s", model_path)
+    logger.info("✅ RL-modell tränad och sparad till %s", model_path)
 
     # Stäng miljön för att frigöra resurser
     env.close()
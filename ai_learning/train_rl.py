@@ -51,11 +51,6 @@ except ModuleNotFoundError:
             return np.array([current_price], dtype=np.float32), reward, done, {}
 
 # Konfigurera loggning
-logging.basicConfig(
-    filename="train_rl.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 # Sätt ett seed för reproducibilitet
@@ -8,7 +8,7 @@ from tensorflow.keras.layers import Dense
 from tensorflow.keras.models import Model
 
 # Konfigurera loggning
-logging.basicConfig(filename="transfer_learning.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def load_pretrained_model(base_model_path):
@@ -17,10 +17,10 @@ def load_pretrained_model(base_model_path):
     """
     try:
         base_model = keras.models.load_model(base_model_path)
-        logging.info("✅ Förtränad modell laddad.")
+        logger.info("✅ Förtränad modell laddad.")
         return base_model
     except Exception as e:
-        logging.error(f"❌ Fel vid laddning av förtränad modell: {str(e)}")
+        logger.error(f"❌ Fel vid laddning av förtränad modell: {str(e)}")
         return None
 
 
@@ -53,10 +53,10 @@ def fine_tune_model(base_model, new_data, output_classes=2, learning_rate=0.001)
             X_train, y_train, validation_data=(X_test, y_test), epochs=10, batch_size=32
         )
 
-        logging.info("✅ Modell finjusterad och tränad på ny data.")
+        logger.info("✅ Modell finjusterad och tränad på ny data.")
         return fine_tuned_model
     except Exception as e:
-        logging.error(f"❌ Fel vid finjustering av modellen: {str(e)}")
+        logger.error(f"❌ Fel vid finjustering av modellen: {str(e)}")
         return None
 
 
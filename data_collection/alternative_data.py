@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="alternative_data.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_google_trends(keyword):
@@ -14,10 +14,10 @@ def fetch_google_trends(keyword):
         url = f"https://api.googletrends.com/trends/{keyword}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Google Trends-data hämtad för: {keyword}")
+        logger.info(f"✅ Google Trends-data hämtad för: {keyword}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av Google Trends-data: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av Google Trends-data: {str(e)}")
         return None
 
 
@@ -29,10 +29,10 @@ def fetch_twitter_sentiment(keyword):
         url = f"https://api.twitter.com/sentiment/{keyword}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Twitter-sentiment analyserat för: {keyword}")
+        logger.info(f"✅ Twitter-sentiment analyserat för: {keyword}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av Twitter-sentiment: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av Twitter-sentiment: {str(e)}")
         return None
 
 
@@ -44,10 +44,10 @@ def fetch_satellite_data(location):
         url = f"https://api.satellitedata.com/economy/{location}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Satellitdata hämtad för: {location}")
+        logger.info(f"✅ Satellitdata hämtad för: {location}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av satellitdata: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av satellitdata: {str(e)}")
         return None
 
 
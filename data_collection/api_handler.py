@@ -4,7 +4,7 @@ from datetime import datetime
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="api_handler.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # API-konfiguration
 AVANZA_API_URL = "https://www.avanza.se/_api/market"
@@ -24,10 +24,10 @@ def fetch_avanza_stock(symbol):
     try:
         response = requests.get(f"{AVANZA_API_URL}/{symbol}")
         data = response.json()
-        logging.info(f"[{datetime.now()}] ✅ Hämtade Avanza-data för {symbol}: {data}")
+        logger.info(f"[{datetime.now()}] ✅ Hämtade Avanza-data för {symbol}: {data}")
         return data
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av Avanza-data för {symbol}: {str(e)}"
         )
         return None
@@ -42,12 +42,12 @@ def fetch_binance_price(symbol):
         response = requests.get(f"{BINANCE_API_URL}?symbol={symbol}")
         data = response.json()
         price = float(data["price"])
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Hämtade Binance-data för {symbol}: {price} USD"
         )
         return price
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av Binance-data för {symbol}: {str(e)}"
         )
         return None
@@ -65,10 +65,10 @@ def fetch_alpaca_stock(symbol):
     try:
         response = requests.get(f"{ALPACA_API_URL}/assets/{symbol}", headers=headers)
         data = response.json()
-        logging.info(f"[{datetime.now()}] ✅ Hämtade Alpaca-data för {symbol}: {data}")
+        logger.info(f"[{datetime.now()}] ✅ Hämtade Alpaca-data för {symbol}: {data}")
         return data
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av Alpaca-data för {symbol}: {str(e)}"
         )
         return None
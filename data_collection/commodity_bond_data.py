@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="commodity_bond_data.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_commodity_prices(commodity):
@@ -14,10 +14,10 @@ def fetch_commodity_prices(commodity):
         url = f"https://api.commoditydata.com/prices?commodity={commodity}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Prisdata hämtad för: {commodity}")
+        logger.info(f"✅ Prisdata hämtad för: {commodity}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av råvarupriser: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av råvarupriser: {str(e)}")
         return None
 
 
@@ -29,10 +29,10 @@ def fetch_bond_yields(country):
         url = f"https://api.bonddata.com/yields?country={country}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Obligationsräntor hämtade för: {country}")
+        logger.info(f"✅ Obligationsräntor hämtade för: {country}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av obligationsräntor: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av obligationsräntor: {str(e)}")
         return None
 
 
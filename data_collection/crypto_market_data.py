@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="crypto_market_data.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_crypto_prices(symbol):
@@ -14,10 +14,10 @@ def fetch_crypto_prices(symbol):
         url = f"https://api.coingecko.com/api/v3/simple/price?ids={symbol}&vs_currencies=usd"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Prisdata hämtad för: {symbol}")
+        logger.info(f"✅ Prisdata hämtad för: {symbol}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av kryptovalutapriser: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av kryptovalutapriser: {str(e)}")
         return None
 
 
@@ -29,10 +29,10 @@ def fetch_onchain_data(symbol):
         url = f"https://api.glassnode.com/v1/metrics/{symbol}/onchain-data"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ On-chain data hämtad för: {symbol}")
+        logger.info(f"✅ On-chain data hämtad för: {symbol}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av on-chain data: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av on-chain data: {str(e)}")
         return None
 
 
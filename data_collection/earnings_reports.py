@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="earnings_reports.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_earnings_report(symbol):
@@ -14,10 +14,10 @@ def fetch_earnings_report(symbol):
         url = f"https://api.earningsdata.com/reports?symbol={symbol}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Vinstdata hämtad för: {symbol}")
+        logger.info(f"✅ Vinstdata hämtad för: {symbol}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av vinstdata: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av vinstdata: {str(e)}")
         return None
 
 
@@ -29,11 +29,11 @@ def analyze_earnings_surprise(symbol):
         report = fetch_earnings_report(symbol)
         if report:
             surprise = report["actual_eps"] - report["estimated_eps"]
-            logging.info(f"✅ Analys av vinstöverraskning för {symbol}: {surprise}")
+            logger.info(f"✅ Analys av vinstöverraskning för {symbol}: {surprise}")
             return surprise
         return None
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av vinstöverraskning: {str(e)}")
+        logger.error(f"❌ Fel vid analys av vinstöverraskning: {str(e)}")
         return None
 
 
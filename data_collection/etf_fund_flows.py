@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="etf_fund_flows.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_etf_flows(etf_symbol):
@@ -14,10 +14,10 @@ def fetch_etf_flows(etf_symbol):
         url = f"https://api.etfdata.com/fund_flows?symbol={etf_symbol}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ ETF-flöden hämtade för: {etf_symbol}")
+        logger.info(f"✅ ETF-flöden hämtade för: {etf_symbol}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av ETF-flöden: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av ETF-flöden: {str(e)}")
         return None
 
 
@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="hedge_fund_positions.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_hedge_fund_holdings(fund_name):
@@ -14,10 +14,10 @@ def fetch_hedge_fund_holdings(fund_name):
         url = f"https://api.hedgefunddata.com/holdings?fund={fund_name}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Innehavsdata hämtad för hedgefonden: {fund_name}")
+        logger.info(f"✅ Innehavsdata hämtad för hedgefonden: {fund_name}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av hedgefondens innehav: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av hedgefondens innehav: {str(e)}")
         return None
 
 
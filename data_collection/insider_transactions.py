@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="insider_transactions.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_insider_trades(symbol):
@@ -14,10 +14,10 @@ def fetch_insider_trades(symbol):
         url = f"https://api.insidertrading.com/trades?symbol={symbol}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Insiderhandel hämtad för: {symbol}")
+        logger.info(f"✅ Insiderhandel hämtad för: {symbol}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av insiderhandel: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av insiderhandel: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ from datetime import datetime
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="institutional_flows.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # API-konfiguration (exempel: WhaleWisdom, Fintel, Bloomberg)
 FINTEL_API_URL = "https://fintel.io/api/institutional-ownership"
@@ -24,12 +24,12 @@ def fetch_institutional_flows(symbol):
         outflows = data.get("outflows", 0)
         net_flow = inflows - outflows
 
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Institutionella flöden för {symbol}: Inflows: {inflows}, Outflows: {outflows}, Net: {net_flow}"
         )
         return {"inflows": inflows, "outflows": outflows, "net_flow": net_flow}
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av institutionella flöden för {symbol}: {str(e)}"
         )
         return None
@@ -46,7 +46,7 @@ def analyze_institutional_sentiment(symbol):
         sentiment = (
             "bullish" if net_flow > 0 else "bearish" if net_flow < 0 else "neutral"
         )
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] 📊 Institutionellt sentiment för {symbol}: {sentiment}"
         )
         return sentiment
@@ -4,7 +4,6 @@ import requests
 from typing import Dict
 
 # Konfigurera loggning
-logging.basicConfig(filename="macro_data.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # API-konfiguration (ex. Alpha Vantage)
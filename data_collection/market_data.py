@@ -5,11 +5,6 @@ import yfinance as yf
 import pandas as pd
 
 # Konfigurera loggning med ett specifikt format
-logging.basicConfig(
-    filename="market_data.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 def fetch_stock_price(symbol: str) -> Optional[float]:
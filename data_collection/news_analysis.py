@@ -4,7 +4,7 @@ import requests
 from textblob import TextBlob
 
 # Konfigurera loggning
-logging.basicConfig(filename="news_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # API-konfiguration
 NEWS_API_URL = "https://newsapi.org/v2/everything"
@@ -26,12 +26,12 @@ def fetch_news(keyword, count=10):
         response.raise_for_status()
         data = response.json()
         articles = [article["title"] for article in data.get("articles", [])[:count]]
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Hämtade {len(articles)} nyhetsartiklar för {keyword}"
         )
         return articles
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av nyheter för {keyword}: {str(e)}"
         )
         return []
@@ -55,7 +55,7 @@ def analyze_news_sentiment(news_articles):
         else "neutral"
     )
 
-    logging.info(
+    logger.info(
         f"[{datetime.now()}] 📊 Sentimentanalys: {sentiment} (Polarity: {total_polarity})"
     )
 
@@ -80,7 +80,7 @@ def fetch_and_analyze_news(keyword):
         return result
 
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel i fetch_and_analyze_news({keyword}): {str(e)}"
         )
         return {
@@ -107,12 +107,12 @@ def get_recent_headlines(limit=10):
         response.raise_for_status()
         data = response.json()
         headlines = [article["title"] for article in data.get("articles", [])[:limit]]
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Hämtade {len(headlines)} rubriker (get_recent_headlines)"
         )
         return headlines
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid get_recent_headlines: {str(e)}"
         )
         return []
@@ -4,7 +4,7 @@ from datetime import datetime
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="order_flow_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # API-konfiguration (exempelvis från Nasdaq, NYSE, eller andra börser)
 ORDER_FLOW_API_URL = "https://api.example.com/orderflow"
@@ -24,7 +24,7 @@ def fetch_order_flow(symbol):
         sell_orders = data.get("sell_orders", 0)
         net_flow = buy_orders - sell_orders
 
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Orderflöde för {symbol}: Buy Orders: {buy_orders}, Sell Orders: {sell_orders}, Net: {net_flow}"
         )
         return {
@@ -33,7 +33,7 @@ def fetch_order_flow(symbol):
             "net_flow": net_flow,
         }
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av orderflöde för {symbol}: {str(e)}"
         )
         return None
@@ -50,7 +50,7 @@ def analyze_order_flow_sentiment(symbol):
         sentiment = (
             "bullish" if net_flow > 0 else "bearish" if net_flow < 0 else "neutral"
         )
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] 📊 Orderflödessentiment för {symbol}: {sentiment}"
         )
         return sentiment
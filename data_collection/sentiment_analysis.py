@@ -9,7 +9,7 @@ from transformers import pipeline
 import torch
 
 # Konfigurera loggning
-logging.basicConfig(filename="sentiment_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # API-konfiguration för Twitter, Reddit eller nyhetskällor (valfri expansion)
 TWITTER_API_URL = "https://api.twitter.com/2/tweets/search/recent"
@@ -31,12 +31,12 @@ def fetch_tweets(keyword, count=10):
         response = requests.get(TWITTER_API_URL, headers=headers, params=params)
         data = response.json()
         tweets = [tweet["text"] for tweet in data.get("data", [])]
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Hämtade {len(tweets)} tweets för {keyword}"
         )
         return tweets
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av tweets för {keyword}: {str(e)}"
         )
         return []
@@ -53,12 +53,12 @@ def fetch_reddit_posts(subreddit="stocks", count=10):
             post["data"]["title"]
             for post in data.get("data", {}).get("children", [])[:count]
         ]
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Hämtade {len(posts)} Reddit-inlägg från {subreddit}"
         )
         return posts
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid hämtning av Reddit-inlägg: {str(e)}"
         )
         return []
@@ -80,7 +80,7 @@ def analyze_sentiment_textblob(texts):
     else:
         sentiment = "neutral"
 
-    logging.info(
+    logger.info(
         f"[{datetime.now()}] 📊 (TextBlob) Sentimentanalys: {sentiment} (Polarity: {total_polarity})"
     )
     return sentiment
@@ -114,7 +114,7 @@ def analyze_sentiment_transformer(texts):
     else:
         sentiment = "neutral"
 
-    logging.info(
+    logger.info(
         f"[{datetime.now()}] 📊 (Transformer) Sentimentanalys: {sentiment} (Score: {avg_score})"
     )
     return sentiment
@@ -0,0 +1,454 @@
+"""
+cleaning_pipeline.py
+
+Blockvis rensning och imputation av partitionerad data (t.ex. minutdata) som inte
+behöver rymmas i minnet.
+
+- Källan läses block för block: en katalog med Parquet-partitioner (radgrupper läses
+  som batcher med pyarrow), .npz-partitioner (samma reservformat som handelsloggen),
+  CSV-filer, en DataFrame, en lista av DataFrames eller en funktion som returnerar en
+  ny iterator av DataFrames vid varje anrop (run() läser källan två gånger).
+- Första passet samlar strömmande statistik per kolumn: antal, medel och varians
+  (Chan/Welford-sammanslagning), min/max samt ett slumpurval för kvantiler och median.
+- Andra passet rensar varje block: dubbletter tas bort (mot alla tidigare block, via
+  sorterade 64-bitars radhashar), saknade värden fylls (median, framåtfyllnad eller KNN
+  i glidande fönster) och outlier-flaggning, winsorisering och normalisering görs i ett
+  sammanslaget pass på plats i en float32-matris, radblock för radblock.
+- KNN-imputationen söker grannar bara bland kompletta rader i ett fönster av de
+  senaste knn_window raderna (även över blockgränser), så kostnaden växer linjärt
+  med historiken i stället för kvadratiskt.
+
+Exempel:
+    pipeline = CleaningPipeline(key="timestamp", fill="knn", winsor_limits=(0.001, 0.999))
+    pipeline.run("data/minute_bars", output_dir="data/minute_bars_clean")
+"""
+
+import glob
+import importlib.util
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 500_000
+DEFAULT_KNN_WINDOW = 2_000
+DEFAULT_SAMPLE_SIZE = 100_000
+ROW_BLOCK = 65_536
+SEEN_BLOCKS = 16  # sorterade hash-block innan de slås ihop
+
+if importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet"):
+    PARTITION_SUFFIX = ".parquet"
+else:
+    PARTITION_SUFFIX = ".npz"
+
+
+# --- Läsning och skrivning av partitioner --------------------------------
+
+def _read_partition(path, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Läser en partitionsfil som en följd av DataFrames om högst chunk_rows rader."""
+    if path.endswith(".parquet"):
+        if importlib.util.find_spec("pyarrow"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+            return
+        yield from _slices(pd.read_parquet(path, columns=columns), chunk_rows)
+    elif path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as data:
+            names = [c for c in (columns or data.files) if c in data.files]
+            yield from _slices(pd.DataFrame({name: data[name] for name in names}), chunk_rows)
+    elif path.endswith(".csv"):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+    else:
+        raise ValueError(f"Okänt partitionsformat: {path}")
+
+
+def _slices(frame, chunk_rows):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def iter_chunks(source, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Itererar över källan block för block. source kan vara en katalog (alla .parquet-,
+    .npz- och .csv-filer i sorterad ordning, rekursivt), en enskild fil, en DataFrame,
+    en iterator/lista av DataFrames eller en funktion som returnerar en sådan.
+    """
+    if isinstance(source, pd.DataFrame):
+        frames = _slices(source if columns is None else source[columns], chunk_rows)
+    elif isinstance(source, (str, os.PathLike)):
+        source = os.fspath(source)
+        if os.path.isdir(source):
+            paths = sorted(p for ext in ("parquet", "npz", "csv")
+                           for p in glob.glob(os.path.join(source, "**", f"*.{ext}"), recursive=True))
+        else:
+            paths = [source]
+        frames = (frame for path in paths for frame in _read_partition(path, columns, chunk_rows))
+    elif callable(source):
+        frames = source()
+    else:
+        frames = source
+    for frame in frames:
+        if len(frame):
+            yield frame
+
+
+def write_partition(frame, path):
+    """Skriver ett block som Parquet (om pyarrow/fastparquet finns) eller .npz."""
+    tmp = f"{path}.tmp{PARTITION_SUFFIX}"
+    if PARTITION_SUFFIX == ".parquet":
+        frame.to_parquet(tmp, index=False)
+    else:
+        arrays = {}
+        for col in frame.columns:
+            values = frame[col]
+            if pd.api.types.is_datetime64_any_dtype(values):
+                arrays[col] = values.to_numpy(dtype="datetime64[ns]")
+            elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+                arrays[col] = values.to_numpy()
+            else:
+                arrays[col] = values.fillna("").astype(str).to_numpy(dtype="U")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+# --- Strömmande statistik ------------------------------------------------
+
+class StreamingStats:
+    """
+    Kolumnvis statistik som uppdateras block för block: antal, medel, M2 (för varians),
+    min, max och ett likformigt slumpurval (för kvantiler och median). Saknade värden ignoreras.
+    """
+
+    def __init__(self, columns, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+        n = len(columns)
+        self.columns = list(columns)
+        self.count = np.zeros(n)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+        self._sample = np.empty((0, n), dtype=np.float32)
+        self._priority = np.empty(0)
+
+    def update(self, values):
+        """values: float-matris (rader x kolumner) med NaN för saknade värden."""
+        observed = np.isfinite(values)
+        count = observed.sum(axis=0)
+        has = count > 0
+        filled = np.where(observed, values, 0.0)
+        block_mean = np.divide(filled.sum(axis=0, dtype=np.float64), count, out=np.zeros(len(count)), where=has)
+        centered = np.where(observed, values - block_mean.astype(values.dtype), 0.0)
+        block_m2 = np.einsum("ij,ij->j", centered, centered, dtype=np.float64)
+        # Chan et al.: slå ihop blockets (n, medel, M2) med det ackumulerade
+        total = self.count + count
+        delta = block_mean - self.mean
+        weight = np.divide(count, total, out=np.zeros(len(count)), where=total > 0)
+        self.mean += delta * weight
+        self.m2 += block_m2 + delta ** 2 * self.count * weight
+        self.count = total
+        self.min = np.fmin(self.min, np.where(observed, values, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(observed, values, -np.inf).max(axis=0))
+
+        # Slumpurval: behåll raderna med de sample_size lägsta slumpnycklarna
+        priority = np.concatenate([self._priority, self._rng.random(len(values))])
+        sample = np.concatenate([self._sample, values.astype(np.float32, copy=False)])
+        if len(priority) > self.sample_size:
+            keep = np.argpartition(priority, self.sample_size)[:self.sample_size]
+            priority, sample = priority[keep], sample[keep]
+        self._priority, self._sample = priority, sample
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(np.divide(self.m2, self.count - 1, out=np.zeros(len(self.m2)), where=self.count > 1))
+
+    def quantile(self, q):
+        """Approximativ kvantil per kolumn från slumpurvalet."""
+        if not len(self._sample):
+            return np.full(len(self.columns), np.nan)
+        return np.nanquantile(self._sample, q, axis=0)
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def to_frame(self):
+        return pd.DataFrame({"count": self.count, "mean": self.mean, "std": self.std,
+                             "min": self.min, "max": self.max, "median": self.median}, index=self.columns)
+
+
+# --- KNN-imputation i glidande fönster ------------------------------------
+
+def _knn_fill(targets, donors, k):
+    """
+    Fyller NaN i targets (rader x kolumner) med medel av de k närmaste kompletta
+    donorraderna. Avstånd som i sklearn:s nan_euclidean: euklidiskt över observerade
+    kolumner, uppskalat med andelen observerade kolumner.
+    """
+    present = np.isfinite(targets)
+    observed = np.where(present, targets, 0.0).astype(np.float64)
+    donors = donors.astype(np.float64)
+    # |t - d|^2 över observerade kolumner = sum(t^2) - 2 t.d + sum(d^2 över t:s kolumner)
+    dist = ((observed ** 2).sum(axis=1)[:, None] - 2 * observed @ donors.T
+            + present.astype(donors.dtype) @ (donors ** 2).T)
+    n_present = np.maximum(present.sum(axis=1), 1)
+    dist *= (targets.shape[1] / n_present)[:, None]
+    k = min(k, len(donors))
+    nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    estimates = donors[nearest].mean(axis=1)
+    targets[~present] = estimates[~present]
+    return targets
+
+
+def knn_impute_windowed(values, k=5, window=DEFAULT_KNN_WINDOW, history=None, fallback=None):
+    """
+    KNN-imputation på plats där grannar bara söks bland kompletta rader i de senaste
+    `window` raderna före och inom varje block om `window` rader.
+
+    history: kompletta rader från föregående block (donorer för blockets första rader).
+    fallback: värden per kolumn för rader som saknar donorer (t.ex. median).
+    Returnerar (values, ny historik) så att anropet kan kedjas över block.
+    """
+    n_cols = values.shape[1]
+    history = history if history is not None else np.empty((0, n_cols), dtype=values.dtype)
+    complete = np.isfinite(values).all(axis=1)
+    for start in range(0, len(values), window):
+        stop = min(start + window, len(values))
+        rows = np.flatnonzero(~complete[start:stop]) + start
+        if not len(rows):
+            continue
+        lo = max(start - window, 0)
+        donors = values[lo:stop][complete[lo:stop]]
+        if len(donors) < window and len(history):
+            donors = np.concatenate([history[-(window - len(donors)):], donors])
+        if len(donors):
+            values[rows] = _knn_fill(values[rows], donors, k)
+        elif fallback is not None:
+            block = values[rows]
+            missing = ~np.isfinite(block)
+            block[missing] = np.take(fallback, np.nonzero(missing)[1])
+            values[rows] = block
+    tail = values[complete][-window:]
+    history = np.concatenate([history, tail])[-window:] if len(tail) < window else tail.copy()
+    return values, history
+
+
+# --- Pipeline -------------------------------------------------------------
+
+class CleaningPipeline:
+    """
+    Komponerbar rensning i två pass över en blockvis källa.
+
+    key: kolumn(er) som identifierar en rad vid dubblettkontroll (None = alla kolumner).
+    fill: "median", "ffill", "knn" eller None.
+    outliers: "flag" (kolumnen is_outlier), "drop" (raden tas bort) eller None.
+        En rad är outlier om någon kolumn ligger mer än outlier_threshold standardavvikelser
+        från medel (före winsorisering).
+    winsor_limits: (nedre, övre) kvantil att klippa vid, eller None.
+    normalize: "zscore", "minmax" (mot winsorgränserna om de finns) eller None.
+    """
+
+    def __init__(self, columns=None, key=None, fill="median", knn_neighbors=5, knn_window=DEFAULT_KNN_WINDOW,
+                 outliers="flag", outlier_threshold=3.0, winsor_limits=(0.01, 0.99), normalize=None,
+                 drop_duplicates=True, chunk_rows=DEFAULT_CHUNK_ROWS, sample_size=DEFAULT_SAMPLE_SIZE):
+        self.columns = list(columns) if columns is not None else None
+        self.key = [key] if isinstance(key, str) else (list(key) if key is not None else None)
+        self.fill = fill
+        self.knn_neighbors = knn_neighbors
+        self.knn_window = knn_window
+        self.outliers = outliers
+        self.outlier_threshold = outlier_threshold
+        self.winsor_limits = winsor_limits
+        self.normalize = normalize
+        self.drop_duplicates = drop_duplicates
+        self.chunk_rows = chunk_rows
+        self.sample_size = sample_size
+        self.stats = None
+        self.timings = {}
+
+    def _numeric_columns(self, frame):
+        if self.columns is not None:
+            return self.columns
+        exclude = set(self.key or [])
+        return [c for c in frame.columns if c not in exclude and pd.api.types.is_numeric_dtype(frame[c])
+                and not pd.api.types.is_bool_dtype(frame[c])]
+
+    # --- Pass 1 -----------------------------------------------------------
+
+    def fit(self, source):
+        """Första passet: strömmande statistik per numerisk kolumn."""
+        start = time.perf_counter()
+        rows = 0
+        for frame in iter_chunks(source, chunk_rows=self.chunk_rows):
+            columns = self._numeric_columns(frame)
+            if self.stats is None or self.stats.columns != columns:
+                if self.stats is not None:
+                    raise ValueError("❌ Kolumnerna skiljer sig mellan partitionerna")
+                self.stats = StreamingStats(columns, self.sample_size)
+            self.stats.update(frame[columns].to_numpy(dtype=np.float32, na_value=np.nan))
+            rows += len(frame)
+        if self.stats is None:
+            raise ValueError("❌ Källan innehåller ingen data")
+        self._prepare()
+        self.timings["fit_s"] = time.perf_counter() - start
+        logger.info(f"📊 Statistik för {len(self.stats.columns)} kolumner över {rows} rader "
+                    f"({self.timings['fit_s']:.1f}s)")
+        return self
+
+    def _prepare(self):
+        stats = self.stats
+        self._mean = stats.mean.astype(np.float32)
+        std = stats.std.astype(np.float32)
+        self._std = np.where(std > 0, std, 1).astype(np.float32)
+        self._median = np.nan_to_num(stats.median).astype(np.float32)
+        if self.winsor_limits is not None:
+            self._lower = stats.quantile(self.winsor_limits[0]).astype(np.float32)
+            self._upper = stats.quantile(self.winsor_limits[1]).astype(np.float32)
+        else:
+            self._lower = stats.min.astype(np.float32)
+            self._upper = stats.max.astype(np.float32)
+        span = self._upper - self._lower
+        self._span = np.where(span > 0, span, 1).astype(np.float32)
+
+    # --- Pass 2 -----------------------------------------------------------
+
+    def _dedupe(self, frame, seen):
+        """
+        Tar bort rader vars nyckel redan förekommit, i blocket eller i något tidigare block.
+        seen är en lista av sorterade arrayer med 64-bitars radhashar (8 byte per unik rad).
+        """
+        subset = self.key
+        hashes = pd.util.hash_pandas_object(frame[subset] if subset else frame, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        for block in seen:
+            position = np.minimum(np.searchsorted(block, hashes), len(block) - 1)
+            keep &= block[position] != hashes
+        if keep.any():
+            seen.append(np.sort(hashes[keep]))
+        if len(seen) > SEEN_BLOCKS:
+            seen[:] = [np.sort(np.concatenate(seen))]
+        return frame[keep] if not keep.all() else frame
+
+    def _fill(self, values, state):
+        missing = ~np.isfinite(values)
+        if self.fill == "median" and missing.any():
+            values[missing] = np.take(self._median, np.nonzero(missing)[1])
+        elif self.fill == "ffill":
+            # Senaste observerade värde per kolumn, även över blockgränsen
+            idx = np.where(~missing, np.arange(len(values))[:, None], -1)
+            np.maximum.accumulate(idx, axis=0, out=idx)
+            carried = state.get("last", self._median)
+            filled = np.where(idx >= 0, values[np.maximum(idx, 0), np.arange(values.shape[1])], carried)
+            values[missing] = filled[missing]
+            state["last"] = values[-1].copy()
+        elif self.fill == "knn":
+            values, state["history"] = knn_impute_windowed(values, self.knn_neighbors, self.knn_window,
+                                                           state.get("history"), fallback=self._median)
+        return values
+
+    def _transform_values(self, values):
+        """
+        Sammanslaget pass på plats, radblock för radblock: outlier-flagga, winsorisering
+        och normalisering. Returnerar outlier-masken.
+        """
+        flags = np.zeros(len(values), dtype=bool)
+        limit = (self.outlier_threshold * self._std).astype(np.float32)
+        for start in range(0, len(values), ROW_BLOCK):
+            block = values[start:start + ROW_BLOCK]
+            if self.outliers:
+                flags[start:start + len(block)] = (np.abs(block - self._mean) > limit).any(axis=1)
+            if self.winsor_limits is not None:
+                np.clip(block, self._lower, self._upper, out=block)
+            if self.normalize == "zscore":
+                block -= self._mean
+                block /= self._std
+            elif self.normalize == "minmax":
+                block -= self._lower
+                block /= self._span
+        return flags
+
+    def transform(self, source):
+        """
+        Andra passet: generator med rensade block (numeriska kolumner som float32).
+        Kräver att fit() har körts.
+        """
+        if self.stats is None:
+            raise RuntimeError("❌ fit() måste köras före transform()")
+        columns = self.stats.columns
+        state, seen = {}, []
+        for frame in iter_chunks(source, chunk_rows=self.chunk_rows):
+            if self.drop_duplicates:
+                frame = self._dedupe(frame, seen)
+            values = frame[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+            if not values.flags.writeable:
+                values = values.copy()
+            values = self._fill(values, state)
+            flags = self._transform_values(values)
+
+            out = frame.drop(columns=columns)
+            out = out.assign(**{col: values[:, i] for i, col in enumerate(columns)})[list(frame.columns)]
+            if self.outliers == "flag":
+                out["is_outlier"] = flags
+            elif self.outliers == "drop":
+                out = out[~flags]
+            yield out.reset_index(drop=True)
+
+    def run(self, source, output_dir=None, prefix="part"):
+        """
+        Kör båda passen. Med output_dir skrivs varje rensat block som en egen partition
+        och listan med sökvägar returneras; annars returneras en sammanslagen DataFrame.
+        Källan läses två gånger, så en engångsiterator måste ges som en funktion som
+        returnerar en ny iterator (t.ex. lambda: read_blocks(...)).
+        """
+        start = time.perf_counter()
+        if self.stats is None:
+            if not isinstance(source, pd.DataFrame) and not callable(source) and iter(source) is source:
+                raise TypeError("❌ run() läser källan två gånger; ange en funktion som returnerar "
+                                "en ny iterator, en lista av DataFrames eller en katalog")
+            self.fit(source)
+        rows, parts, frames = 0, [], []
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        for i, frame in enumerate(self.transform(source)):
+            rows += len(frame)
+            if output_dir:
+                path = os.path.join(output_dir, f"{prefix}-{i:05d}{PARTITION_SUFFIX}")
+                write_partition(frame, path)
+                parts.append(path)
+            else:
+                frames.append(frame)
+        self.timings["total_s"] = time.perf_counter() - start
+        logger.info(f"✅ Rensade {rows} rader i {max(len(parts), len(frames))} block "
+                    f"({self.timings['total_s']:.1f}s)")
+        if output_dir:
+            return parts
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(1)
+    n = 200_000
+    bars = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-02 09:30", periods=n, freq="min"),
+        "close": 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, n))),
+        "volume": rng.lognormal(8, 1, n),
+    })
+    bars.loc[rng.choice(n, 2_000, replace=False), "close"] = np.nan
+    bars.loc[rng.choice(n, 50, replace=False), "volume"] *= 100  # outliers
+    bars = pd.concat([bars, bars.iloc[:100]])  # dubbletter
+
+    pipeline = CleaningPipeline(key="timestamp", fill="knn", normalize="zscore", chunk_rows=50_000)
+    cleaned = pipeline.run(bars)
+    print(cleaned.head())
+    print(f"📢 {len(cleaned)} rader, {int(cleaned['is_outlier'].sum())} outliers, {pipeline.timings}")
@@ -1,12 +1,12 @@
 import logging
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
+
+from utils.chart_service import get_chart_service
 
 # Konfigurera loggning
-logging.basicConfig(filename="correlation_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_correlation(data):
@@ -15,25 +15,27 @@ def analyze_correlation(data):
     """
     try:
         correlation_matrix = data.corr()
-        logging.info("✅ Korrelation mellan features analyserad.")
+        logger.info("✅ Korrelation mellan features analyserad.")
         return correlation_matrix
     except Exception as e:
-        logging.error(f"❌ Fel vid korrelationsanalys: {str(e)}")
+        logger.error(f"❌ Fel vid korrelationsanalys: {str(e)}")
         return None
 
 
-def plot_correlation_matrix(correlation_matrix):
+def plot_correlation_matrix(correlation_matrix, output_file="correlation_matrix.png"):
     """
-    Visualiserar korrelation mellan variabler.
+    Visualiserar korrelation mellan variabler och sparar som PNG.
     """
     try:
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", fmt=".2f")
-        plt.title("Feature Correlation Matrix")
-        plt.show()
-        logging.info("✅ Korrelationsmatris plottad.")
+        get_chart_service().render_heatmap(
+            "correlation_matrix",
+            correlation_matrix,
+            title="Feature Correlation Matrix",
+            output_file=output_file,
+        )
+        logger.info(f"✅ Korrelationsmatris plottad: {output_file}")
     except Exception as e:
-        logging.error(f"❌ Fel vid plottning av korrelationsmatris: {str(e)}")
+        logger.error(f"❌ Fel vid plottning av korrelationsmatris: {str(e)}")
 
 
 # Exempelanrop
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="data_augmentation.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def generate_synthetic_data(data, num_samples=100):
@@ -13,10 +13,10 @@ def generate_synthetic_data(data, num_samples=100):
     """
     try:
         synthetic_data = data.sample(n=num_samples, replace=True).reset_index(drop=True)
-        logging.info(f"✅ Genererade {num_samples} syntetiska datapunkter.")
+        logger.info(f"✅ Genererade {num_samples} syntetiska datapunkter.")
         return synthetic_data
     except Exception as e:
-        logging.error(f"❌ Fel vid skapande av syntetisk data: {str(e)}")
+        logger.error(f"❌ Fel vid skapande av syntetisk data: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="data_cleaning.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def clean_data(data):
@@ -22,12 +22,12 @@ def clean_data(data):
         z_scores = np.abs((data - data.mean()) / data.std())
         data = data[(z_scores < 3).all(axis=1)]
 
-        logging.info(
+        logger.info(
             "✅ Data har rensats från dubbletter, outliers och saknade värden."
         )
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid datarensning: {str(e)}")
+        logger.error(f"❌ Fel vid datarensning: {str(e)}")
         return None
 
 
@@ -2,18 +2,30 @@ import logging
 
 import numpy as np
 import pandas as pd
-from sklearn.impute import KNNImputer
+
+from data_processing.cleaning_pipeline import knn_impute_windowed
 
 # Konfigurera loggning
-logging.basicConfig(filename="data_imputation.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def impute_missing_values(data, method="knn", k=5):
+def impute_missing_values(data, method="knn", k=5, window=None):
     """
     Fyller i saknade värden med antingen KNN-imputation eller medelvärde.
+
+    Med window söks KNN-grannar bara bland kompletta rader inom glidande fönster om
+    window rader (linjär kostnad, för långa serier som minutdata); utan window används
+    sklearn:s KNNImputer över hela datasetet.
     """
     try:
-        if method == "knn":
+        if method == "knn" and window:
+            values = data.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            fallback = np.nan_to_num(np.nanmedian(values, axis=0)) if len(values) else None
+            values, _ = knn_impute_windowed(values, k=k, window=window, fallback=fallback)
+            imputed_data = pd.DataFrame(values, columns=data.columns, index=data.index)
+        elif method == "knn":
+            from sklearn.impute import KNNImputer
+
             imputer = KNNImputer(n_neighbors=k)
             imputed_data = pd.DataFrame(
                 imputer.fit_transform(data), columns=data.columns
@@ -21,13 +33,13 @@ def impute_missing_values(data, method="knn", k=5):
         elif method == "mean":
             imputed_data = data.fillna(data.mean())
         else:
-            logging.error("❌ Ogiltig metod angiven för imputering.")
+            logger.error("❌ Ogiltig metod angiven för imputering.")
             return None
 
-        logging.info(f"✅ Saknade värden ifyllda med {method}-metoden.")
+        logger.info(f"✅ Saknade värden ifyllda med {method}-metoden.")
         return imputed_data
     except Exception as e:
-        logging.error(f"❌ Fel vid imputering av saknade värden: {str(e)}")
+        logger.error(f"❌ Fel vid imputering av saknade värden: {str(e)}")
         return None
 
 
@@ -5,7 +5,7 @@ import pandas as pd
 from sklearn.decomposition import PCA
 
 # Konfigurera loggning
-logging.basicConfig(filename="dimensionality_reduction.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def reduce_dimensions(data, n_components=2):
@@ -15,12 +15,12 @@ def reduce_dimensions(data, n_components=2):
     try:
         pca = PCA(n_components=n_components)
         reduced_data = pca.fit_transform(data)
-        logging.info(f"✅ Datadimensioner reducerade till {n_components} komponenter.")
+        logger.info(f"✅ Datadimensioner reducerade till {n_components} komponenter.")
         return pd.DataFrame(
             reduced_data, columns=[f"PC{i+1}" for i in range(n_components)]
         )
     except Exception as e:
-        logging.error(f"❌ Fel vid dimensionell reduktion: {str(e)}")
+        logger.error(f"❌ Fel vid dimensionell reduktion: {str(e)}")
         return None
 
 
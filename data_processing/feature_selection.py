@@ -1,13 +1,132 @@
 import logging
+import os
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 from sklearn.feature_selection import (SelectKBest, f_classif,
+                                       mutual_info_classif,
                                        mutual_info_regression)
 
+from utils.process_manager import get_task_runner
+
 # Konfigurera loggning
-logging.basicConfig(filename="feature_selection.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CORRELATION_BLOCK_SIZE = 1024
+MI_CHUNK_COLUMNS = 256
+MI_BINS = 16
+
+
+def _as_float32(X):
+    """Features som float32-matris (rader x kolumner); saknade värden ersätts med kolumnmedel."""
+    values = X.to_numpy(dtype=np.float32, copy=True) if isinstance(X, pd.DataFrame) else np.array(X, dtype=np.float32)
+    missing = ~np.isfinite(values)
+    if missing.any():
+        means = np.nanmean(np.where(missing, np.nan, values), axis=0)
+        values[missing] = np.take(np.nan_to_num(means), np.nonzero(missing)[1])
+    return values
+
+
+def _standardize(values):
+    """Centrerar och skalar kolumnerna på plats så att Z.T @ Z / n blir korrelationsmatrisen."""
+    values -= values.mean(axis=0, dtype=np.float64).astype(np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->j", values, values, dtype=np.float64)).astype(np.float32)
+    norms[norms == 0] = np.inf  # konstanta kolumner får korrelation 0
+    values /= norms
+    return values
+
+
+def max_abs_correlation_with_earlier(X, block_size=CORRELATION_BLOCK_SIZE):
+    """
+    För varje kolumn j: max |korrelation| mot någon tidigare kolumn i < j.
+
+    Korrelationerna räknas i float32-block om block_size kolumner (minne ~ block_size x kolumner),
+    så hela korrelationsmatrisen hålls aldrig i minnet.
+    """
+    Z = _standardize(_as_float32(X))
+    n_cols = Z.shape[1]
+    result = np.zeros(n_cols, dtype=np.float32)
+    for start in range(0, n_cols, block_size):
+        stop = min(start + block_size, n_cols)
+        block = np.abs(Z[:, start:stop].T @ Z[:, start:])  # (rader i blocket) x (kolumner från start)
+        # Behåll bara par i < j (övre triangeln) inom blocket
+        rows = np.arange(start, stop)[:, None]
+        cols = np.arange(start, n_cols)[None, :]
+        block[rows >= cols] = 0
+        np.maximum(result[start:], block.max(axis=0), out=result[start:])
+    return result
+
+
+def correlated_feature_mask(X, threshold=0.9, block_size=CORRELATION_BLOCK_SIZE):
+    """Boolesk mask över kolumnerna: True för kolumner som korrelerar > threshold med en tidigare kolumn."""
+    return max_abs_correlation_with_earlier(X, block_size) > threshold
+
+
+def _binned_codes(values, bins):
+    """
+    Kvantilbaserade bin-koder per kolumn (rangordning), vektoriserat över alla kolumner.
+    Lika värden får samma rang (den lägsta i gruppen) och hamnar därmed i samma bin;
+    en konstant kolumn blir en enda bin.
+    """
+    n_rows = len(values)
+    order = np.argsort(values, axis=0, kind="stable")
+    ordered = np.take_along_axis(values, order, axis=0)
+    positions = np.broadcast_to(np.arange(n_rows)[:, None], values.shape)
+    new_group = np.ones(values.shape, dtype=bool)
+    new_group[1:] = ordered[1:] != ordered[:-1]
+    tie_rank = np.maximum.accumulate(np.where(new_group, positions, 0), axis=0)
+    codes = np.empty(values.shape, dtype=np.int64)
+    np.put_along_axis(codes, order, tie_rank * bins // n_rows, axis=0)
+    return codes
+
+
+def mutual_info_binned(X, y, bins=MI_BINS, discrete_target=False):
+    """
+    Snabb skattning av mutual information för alla kolumner samtidigt via kvantil-binning
+    och en enda gemensam histogram-räkning (np.bincount). Lämpad för screening av många features.
+    """
+    values = _as_float32(X)
+    n_rows, n_cols = values.shape
+    y = np.asarray(y).ravel()
+    if discrete_target:
+        _, y_codes = np.unique(y, return_inverse=True)
+    else:
+        y_codes = _binned_codes(y.astype(np.float64)[:, None], bins)[:, 0]
+    n_y = int(y_codes.max()) + 1
+    x_codes = _binned_codes(values, bins)
+    flat = ((np.arange(n_cols)[None, :] * bins + x_codes) * n_y + y_codes[:, None]).ravel()
+    joint = np.bincount(flat, minlength=n_cols * bins * n_y).reshape(n_cols, bins, n_y) / n_rows
+    px = joint.sum(axis=2, keepdims=True)
+    py = joint.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = joint * np.log(joint / (px * py))
+    return np.nansum(terms, axis=(1, 2))
+
+
+def _mutual_info_chunk(values, y, discrete_target, random_state):
+    score = mutual_info_classif if discrete_target else mutual_info_regression
+    return score(values, y, random_state=random_state)
+
+
+def mutual_info_scores(X, y, method="knn", discrete_target=False, n_jobs=None, chunk_columns=MI_CHUNK_COLUMNS,
+                       random_state=42):
+    """
+    Mutual information per kolumn. method="knn" använder sklearns skattare, parallelliserad över
+    kolumnblock i den gemensamma processpoolen; method="binned" använder mutual_info_binned.
+    """
+    if method == "binned":
+        return mutual_info_binned(X, y, discrete_target=discrete_target)
+    values = _as_float32(X).astype(np.float64)
+    y = np.asarray(y).ravel()
+    n_jobs = n_jobs or os.cpu_count() or 1
+    chunks = np.array_split(np.arange(values.shape[1]), max(1, min(n_jobs * 4, -(-values.shape[1] // chunk_columns))))
+    if n_jobs == 1 or len(chunks) == 1:
+        return _mutual_info_chunk(values, y, discrete_target, random_state)
+    runner = get_task_runner()
+    futures = [runner.submit(_mutual_info_chunk, np.ascontiguousarray(values[:, idx]), y, discrete_target, random_state)
+               for idx in chunks if len(idx)]
+    return np.concatenate([f.result() for f in futures])
 
 
 # Funktion för att välja de bästa funktionerna baserat på ANOVA F-test
@@ -19,32 +138,33 @@ def select_best_features_anova(X, y, k=5):
         selector = SelectKBest(score_func=f_classif, k=k)
         selector.fit(X, y)
         selected_features = X.columns[selector.get_support()]
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Valda bästa funktioner (ANOVA): {list(selected_features)}"
         )
         return selected_features
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid ANOVA feature selection: {str(e)}"
         )
         return None
 
 
 # Funktion för att välja de bästa funktionerna med Mutual Information
-def select_best_features_mutual_info(X, y, k=5):
+def select_best_features_mutual_info(X, y, k=5, method="knn", n_jobs=None):
     """
     Väljer de bästa funktionerna baserat på Mutual Information för regressionsproblem.
+    Skattningen parallelliseras över kolumner (se mutual_info_scores); method="binned" är snabbast.
     """
     try:
-        selector = SelectKBest(score_func=mutual_info_regression, k=k)
-        selector.fit(X, y)
-        selected_features = X.columns[selector.get_support()]
-        logging.info(
+        scores = mutual_info_scores(X, y, method=method, n_jobs=n_jobs)
+        top = np.sort(np.argpartition(-scores, min(k, len(scores)) - 1)[:k]) if k < len(scores) else np.arange(len(scores))
+        selected_features = X.columns[top]
+        logger.info(
             f"[{datetime.now()}] ✅ Valda bästa funktioner (Mutual Information): {list(selected_features)}"
         )
         return selected_features
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid Mutual Information feature selection: {str(e)}"
         )
         return None
@@ -54,29 +174,35 @@ def select_best_features_mutual_info(X, y, k=5):
 def remove_highly_correlated_features(X, threshold=0.9):
     """
     Tar bort funktioner som har hög korrelation (> threshold) för att minska redundans.
+    Korrelationerna räknas blockvis i float32 (se max_abs_correlation_with_earlier).
     """
     try:
-        corr_matrix = X.corr()
-        upper_triangle = corr_matrix.where(
-            np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
-        )
-        to_drop = [
-            column
-            for column in upper_triangle.columns
-            if any(upper_triangle[column].abs() > threshold)
-        ]
+        to_drop = list(X.columns[correlated_feature_mask(X, threshold)])
         reduced_X = X.drop(columns=to_drop)
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Borttagna starkt korrelerade funktioner: {to_drop}"
         )
         return reduced_X
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid borttagning av starkt korrelerade funktioner: {str(e)}"
         )
         return X
 
 
+def screen_features(X, y, threshold=0.9, k=100, method="binned", discrete_target=False):
+    """
+    Screening av många kandidat-features: tar först bort redundanta (korrelation > threshold)
+    och väljer sedan de k med högst mutual information. Returnerar de valda kolumnnamnen.
+    """
+    keep = ~correlated_feature_mask(X, threshold)
+    candidates = X.columns[keep]
+    scores = mutual_info_scores(X[candidates], y, method=method, discrete_target=discrete_target)
+    order = np.argsort(-scores, kind="stable")[:k]
+    logger.info(f"[{datetime.now()}] ✅ Screening: {X.shape[1]} -> {keep.sum()} okorrelerade -> {len(order)} valda")
+    return candidates[order]
+
+
 # Exempelanrop
 if __name__ == "__main__":
     np.random.seed(42)
@@ -4,11 +4,6 @@ import numpy as np
 from typing import Optional
 
 # Konfigurera loggning
-logging.basicConfig(
-    filename="normalization.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 def min_max_normalization(data: np.ndarray) -> Optional[np.ndarray]:
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="outlier_detection.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def detect_outliers(data, method="zscore", threshold=3):
@@ -23,13 +23,13 @@ def detect_outliers(data, method="zscore", threshold=3):
                 ((data < (Q1 - 1.5 * IQR)) | (data > (Q3 + 1.5 * IQR))).any(axis=1)
             ]
         else:
-            logging.error("❌ Ogiltig metod angiven för outlier-detektering.")
+            logger.error("❌ Ogiltig metod angiven för outlier-detektering.")
             return None
 
-        logging.info(f"✅ Identifierade {len(outliers)} outliers i datasetet.")
+        logger.info(f"✅ Identifierade {len(outliers)} outliers i datasetet.")
         return outliers
     except Exception as e:
-        logging.error(f"❌ Fel vid identifiering av outliers: {str(e)}")
+        logger.error(f"❌ Fel vid identifiering av outliers: {str(e)}")
         return None
 
 
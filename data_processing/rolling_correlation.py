@@ -0,0 +1,366 @@
+"""
+rolling_correlation.py
+
+Rullande korrelations- och betamotor för hela universumet.
+
+- Avkastningarna för de senaste `window` staplarna hålls i en ringbuffert (staplar x symboler).
+- Motorn håller löpande summor S = sum(r) och korsprodukter C = sum(r r^T). En ny stapel
+  lägger till sin yttre produkt och drar bort den utgående stapelns, så hela N x N-matrisen
+  uppdateras i O(N^2) per stapel i stället för O(window * N^2). Båda termerna görs som en
+  enda rang-2-uppdatering (N x 2 @ 2 x N) i en förallokerad arbetsmatris.
+- Avrundningsfel från addition/subtraktion nollställs genom att C räknas om exakt från
+  bufferten var `resync_every` stapel (amorterat O(N^2) per stapel).
+- Saknad stapel för en symbol räknas som oförändrat pris (avkastning 0).
+- Kovarians, korrelation, volatilitet och beta mot ett jämförelseindex räknas ur S och C
+  vid behov; snapshot() ger en ögonblicksbild för riskrapporten och sektorrotationen.
+
+Stängda staplar från MarketDataHub kan kopplas in direkt med attach(); nya symboler läggs
+till i universumet när de dyker upp.
+
+Exempel:
+    engine = RollingCorrelationEngine(window=60 * 390, benchmark="SPY")
+    engine.attach(get_market_hub(), interval=60)
+    snapshot = engine.snapshot()
+    snapshot.correlation.loc["AAPL", "MSFT"], snapshot.beta["AAPL"]
+"""
+
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BARS_PER_DAY = 390  # minutstaplar per handelsdag
+DEFAULT_WINDOW = 60 * BARS_PER_DAY
+RESYNC_BLOCK = 4096
+# Jämförelseindex för den gemensamma motorns beta (strömmas tillsammans med prenumerationerna)
+DEFAULT_BENCHMARK = os.getenv("CORRELATION_BENCHMARK", "SPY")
+
+CorrelationSnapshot = namedtuple(
+    "CorrelationSnapshot", ["timestamp", "n_obs", "symbols", "correlation", "beta", "volatility"]
+)
+
+
+class RollingCorrelationEngine:
+    """
+    Rullande N x N-korrelation och beta över de senaste `window` staplarna.
+    """
+
+    def __init__(self, symbols=(), window=DEFAULT_WINDOW, benchmark=None, dtype=np.float32, resync_every=None):
+        self.window = int(window)
+        self.benchmark = benchmark
+        self.dtype = dtype
+        self.resync_every = resync_every or self.window
+        self.symbols = []
+        self._index = {}
+        self._buffer = np.zeros((self.window, 0), dtype=dtype)
+        self._sums = np.zeros(0)
+        self._cross = np.zeros((0, 0))
+        self._scratch = np.zeros((0, 0))
+        self._last_price = np.zeros(0)
+        self.head = 0  # nästa skrivposition i ringbufferten
+        self.count = 0  # antal staplar i fönstret
+        self.total = 0  # antal staplar sedan start
+        self._since_resync = 0
+        self.timestamp = None
+        self._pending_start = None
+        self._pending = {}
+        self._attached = set()  # (id(hub), interval) som motorn redan prenumererar på
+        self._lock = threading.RLock()
+        self.add_symbols(symbols)
+
+    # --- Universum ----------------------------------------------------------
+
+    def add_symbols(self, symbols):
+        """Utökar universumet; nya symboler har avkastning 0 för staplarna som redan ligger i fönstret."""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new:
+            return
+        with self._lock:
+            n_old, n = len(self.symbols), len(self.symbols) + len(new)
+            for i, symbol in enumerate(new, start=n_old):
+                self._index[symbol] = i
+            self.symbols.extend(new)
+            buffer = np.zeros((self.window, n), dtype=self.dtype)
+            buffer[:, :n_old] = self._buffer
+            cross = np.zeros((n, n))
+            cross[:n_old, :n_old] = self._cross
+            self._buffer, self._cross, self._scratch = buffer, cross, np.empty((n, n))
+            self._sums = np.concatenate([self._sums, np.zeros(len(new))])
+            self._last_price = np.concatenate([self._last_price, np.full(len(new), np.nan)])
+
+    def _vector(self, values, default=0.0):
+        """dict symbol -> värde eller vektor i universumets ordning till en float-vektor."""
+        if isinstance(values, (dict, pd.Series)):
+            self.add_symbols(values.keys())
+            vector = np.full(len(self.symbols), default)
+            for symbol, value in values.items():
+                vector[self._index[symbol]] = value
+            return vector
+        return np.asarray(values, dtype=np.float64)
+
+    # --- Uppdatering -----------------------------------------------------------
+
+    def update(self, returns, timestamp=None):
+        """Lägger till en stapel avkastningar (dict eller vektor i universumets ordning) i O(N^2)."""
+        with self._lock:
+            x = self._vector(returns)
+            x = np.where(np.isfinite(x), x, 0.0).astype(self.dtype)
+            outgoing = self._buffer[self.head]
+            # C += x x^T - o o^T som en rang-2-uppdatering
+            left = np.stack([x, outgoing], axis=1).astype(np.float64)
+            right = np.stack([x, -outgoing.astype(np.float64)])
+            np.matmul(left, right, out=self._scratch)
+            self._cross += self._scratch
+            self._sums += x.astype(np.float64) - outgoing
+            self._buffer[self.head] = x
+            self._advance(1, timestamp)
+
+    def update_many(self, returns, timestamps=None):
+        """
+        Lägger till många staplar (staplar x symboler) på en gång, t.ex. vid uppstart från historik.
+        Blockvis: C += X^T X - O^T O för varje block om högst window staplar.
+        """
+        with self._lock:
+            if isinstance(returns, pd.DataFrame):
+                self.add_symbols(returns.columns)
+                timestamps = returns.index if timestamps is None else timestamps
+                returns = returns.reindex(columns=self.symbols).to_numpy(dtype=np.float64)
+            X = np.asarray(returns, dtype=np.float64)
+            X = np.where(np.isfinite(X), X, 0.0).astype(self.dtype)
+            for start in range(0, len(X), self.window):
+                block = X[start:start + self.window]
+                rows = (self.head + np.arange(len(block))) % self.window
+                outgoing = self._buffer[rows].astype(np.float64)
+                incoming = block.astype(np.float64)
+                self._cross += incoming.T @ incoming - outgoing.T @ outgoing
+                self._sums += incoming.sum(axis=0) - outgoing.sum(axis=0)
+                self._buffer[rows] = block
+                stamp = timestamps[start + len(block) - 1] if timestamps is not None and len(timestamps) else None
+                self._advance(len(block), stamp)
+
+    def _advance(self, n, timestamp):
+        self.head = (self.head + n) % self.window
+        self.count = min(self.count + n, self.window)
+        self.total += n
+        if timestamp is not None:
+            self.timestamp = timestamp
+        self._since_resync += n
+        if self._since_resync >= self.resync_every:
+            self.resync()
+
+    def resync(self):
+        """Räknar om S och C exakt från ringbufferten (nollställer ackumulerade avrundningsfel)."""
+        with self._lock:
+            cross = np.zeros_like(self._cross)
+            for start in range(0, self.window, RESYNC_BLOCK):
+                block = self._buffer[start:start + RESYNC_BLOCK].astype(np.float64)
+                cross += block.T @ block
+            self._cross = cross
+            self._sums = self._buffer.sum(axis=0, dtype=np.float64)
+            self._since_resync = 0
+
+    def update_prices(self, prices, timestamp=None):
+        """Lägger till en stapel slutkurser; log-avkastningen räknas mot föregående kurs per symbol."""
+        with self._lock:
+            price = self._vector(prices, default=np.nan)
+            valid = np.isfinite(price) & (price > 0)
+            returns = np.zeros(len(price))
+            seen = valid & np.isfinite(self._last_price)
+            returns[seen] = np.log(price[seen] / self._last_price[seen])
+            self._last_price[valid] = price[valid]
+            if seen.any():  # första kursen per symbol ger ingen avkastning
+                self.update(returns, timestamp)
+
+    @classmethod
+    def from_prices(cls, prices, window=DEFAULT_WINDOW, benchmark=None, **kwargs):
+        """Bygger motorn från en kurstabell (tid x symboler), t.ex. dagskurser eller minutstaplar."""
+        prices = prices.sort_index().ffill()
+        engine = cls(prices.columns, window=window, benchmark=benchmark, **kwargs)
+        engine.update_many(np.log(prices).diff().iloc[1:])
+        engine._last_price = prices.iloc[-1].to_numpy(dtype=np.float64)
+        return engine
+
+    # --- Strömmande staplar -------------------------------------------------------
+
+    def on_bar(self, bar):
+        """
+        Tar emot en stängd stapel från MarketDataHub. Staplar med samma starttid samlas
+        ihop; när en senare starttid dyker upp läggs det föregående tvärsnittet till.
+        """
+        with self._lock:
+            if self._pending_start is not None and bar.start > self._pending_start:
+                self.flush()
+            if self._pending_start is None or bar.start >= self._pending_start:
+                self._pending_start = bar.start
+                self._pending[bar.symbol] = bar.close
+
+    def flush(self):
+        """Lägger till det påbörjade tvärsnittet av staplar (om något)."""
+        with self._lock:
+            if self._pending:
+                self.update_prices(self._pending, timestamp=self._pending_start)
+            self._pending, self._pending_start = {}, None
+
+    def attach(self, hub, interval=60, symbols=None):
+        """
+        Prenumererar på stängda staplar med angivet intervall från en MarketDataHub.
+        Upprepade anrop för samma hubb och intervall ger ingen ny prenumeration.
+        """
+        with self._lock:
+            key = (id(hub), interval)
+            if key in self._attached:
+                return self
+            self._attached.add(key)
+        hub.subscribe_bars(self.on_bar, interval=interval, symbols=symbols)
+        return self
+
+    # --- Resultat ---------------------------------------------------------------
+
+    def covariance(self):
+        """Stickprovskovarians (N x N) över fönstret."""
+        with self._lock:
+            n = self.count
+            if n < 2:
+                return np.full((len(self.symbols), len(self.symbols)), np.nan)
+            mean = self._sums / n
+            return (self._cross - n * np.outer(mean, mean)) / (n - 1)
+
+    def volatility(self):
+        return np.sqrt(np.clip(np.diag(self.covariance()), 0, None))
+
+    def correlation(self):
+        cov = self.covariance()
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return np.clip(corr, -1.0, 1.0)
+
+    def beta(self, benchmark=None):
+        """Beta för varje symbol mot benchmark (standard: motorns jämförelseindex)."""
+        benchmark = benchmark or self.benchmark
+        if benchmark not in self._index:
+            return np.full(len(self.symbols), np.nan)
+        cov = self.covariance()
+        b = self._index[benchmark]
+        variance = cov[b, b]
+        return cov[:, b] / variance if variance > 0 else np.full(len(self.symbols), np.nan)
+
+    def snapshot(self, benchmark=None):
+        """Ögonblicksbild med korrelationsmatris, beta och volatilitet per stapel som pandas-objekt."""
+        with self._lock:
+            index = pd.Index(list(self.symbols), name="symbol")
+            return CorrelationSnapshot(
+                timestamp=self.timestamp,
+                n_obs=self.count,
+                symbols=list(self.symbols),
+                correlation=pd.DataFrame(self.correlation(), index=index, columns=index),
+                beta=pd.Series(self.beta(benchmark), index=index, name="beta"),
+                volatility=pd.Series(self.volatility(), index=index, name="volatility"),
+            )
+
+
+# --- Sammanfattningar för rapporter ----------------------------------------------
+
+def top_correlated_pairs(correlation, k=10):
+    """De k symbolparen med högst korrelation (övre triangeln) som DataFrame."""
+    values = correlation.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    pairs = values[rows, cols]
+    valid = np.flatnonzero(np.isfinite(pairs))
+    order = valid[np.argsort(-pairs[valid])[:k]]
+    names = correlation.index
+    return pd.DataFrame({"symbol_a": names[rows[order]], "symbol_b": names[cols[order]],
+                         "correlation": pairs[order]})
+
+
+def sector_correlation(correlation, sectors):
+    """
+    Genomsnittlig korrelation mellan och inom sektorer (sektor x sektor).
+    sectors: dict symbol -> sektor; symboler utan sektor ignoreras. Diagonalen utesluter
+    symbolernas korrelation med sig själva.
+    """
+    symbols = [s for s in correlation.index if s in sectors]
+    labels = pd.Categorical([sectors[s] for s in symbols])
+    groups = np.eye(len(labels.categories))[labels.codes]  # symboler x sektorer
+    values = np.nan_to_num(correlation.loc[symbols, symbols].to_numpy())
+    np.fill_diagonal(values, 0.0)
+    totals = groups.T @ values @ groups
+    sizes = groups.sum(axis=0)
+    pairs = np.outer(sizes, sizes) - np.diag(sizes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = totals / pairs
+    return pd.DataFrame(average, index=labels.categories, columns=labels.categories)
+
+
+def current_snapshot(engine=None, min_obs=2):
+    """Ögonblicksbild från motorn (standard den gemensamma), eller None om fönstret är för kort."""
+    engine = engine or get_correlation_engine()
+    return engine.snapshot() if engine.count >= min_obs and engine.symbols else None
+
+
+def correlation_risk_summary(snapshot, weights=None, k=5):
+    """
+    Nyckeltal för riskrapporten: portföljbeta (viktad med weights, dict symbol -> vikt),
+    genomsnittlig parvis korrelation och de mest korrelerade paren.
+    """
+    corr = snapshot.correlation
+    symbols = list(weights) if weights else list(corr.index)
+    symbols = [s for s in symbols if s in corr.index]
+    sub = corr.loc[symbols, symbols].to_numpy()
+    upper = sub[np.triu_indices(len(symbols), k=1)]
+    w = pd.Series(weights, dtype=float).reindex(symbols).fillna(0.0) if weights else pd.Series(1.0, index=symbols)
+    w = w / w.sum() if w.sum() else w
+    beta = snapshot.beta.reindex(symbols)
+    return {
+        "portfolio_beta": float((beta * w).sum()) if beta.notna().any() else None,
+        "avg_correlation": float(np.nanmean(upper)) if np.isfinite(upper).any() else None,
+        "top_pairs": top_correlated_pairs(corr.loc[symbols, symbols], k=k),
+        "n_obs": snapshot.n_obs,
+    }
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_correlation_engine():
+    """
+    Returnerar den gemensamma korrelationsmotorn (minutstaplar, 60 handelsdagars fönster,
+    beta mot DEFAULT_BENCHMARK).
+    """
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = RollingCorrelationEngine(benchmark=DEFAULT_BENCHMARK or None)
+            if _default_engine.benchmark:
+                _default_engine.add_symbols([_default_engine.benchmark])
+        return _default_engine
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(0)
+    n_symbols, n_bars = 50, 5 * BARS_PER_DAY
+    market = rng.normal(0, 0.001, n_bars)
+    loadings = rng.uniform(0.5, 1.5, n_symbols)
+    returns = market[:, None] * loadings + rng.normal(0, 0.001, (n_bars, n_symbols))
+    symbols = ["INDEX"] + [f"SYM{i}" for i in range(n_symbols)]
+    frame = pd.DataFrame(np.column_stack([market, returns]), columns=symbols,
+                         index=pd.date_range("2025-03-24 09:30", periods=n_bars, freq="min"))
+
+    engine = RollingCorrelationEngine(window=2 * BARS_PER_DAY, benchmark="INDEX")
+    engine.update_many(frame.iloc[:-10])
+    for timestamp, row in frame.iloc[-10:].iterrows():
+        engine.update(row.to_dict(), timestamp)
+    snapshot = engine.snapshot()
+    print(snapshot.beta.head())
+    print(f"📢 Skattad beta SYM0: {snapshot.beta['SYM0']:.2f} (sann {loadings[0]:.2f})")
+    print(correlation_risk_summary(snapshot, k=3)["top_pairs"])
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="time_series_processing.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def generate_moving_average(data, column, window=20):
@@ -13,10 +13,10 @@ def generate_moving_average(data, column, window=20):
     """
     try:
         data[f"SMA_{window}"] = data[column].rolling(window=window).mean()
-        logging.info(f"✅ {window}-dagars glidande medelvärde beräknat.")
+        logger.info(f"✅ {window}-dagars glidande medelvärde beräknat.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av glidande medelvärde: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av glidande medelvärde: {str(e)}")
         return None
 
 
@@ -26,10 +26,10 @@ def calculate_trend_indicator(data, column):
     """
     try:
         data[f"trend_{column}"] = np.gradient(data[column])
-        logging.info("✅ Trendindikator beräknad.")
+        logger.info("✅ Trendindikator beräknad.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid trendanalys: {str(e)}")
+        logger.error(f"❌ Fel vid trendanalys: {str(e)}")
         return None
 
 
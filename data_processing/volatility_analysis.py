@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="volatility_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_daily_volatility(price_series):
@@ -19,12 +19,12 @@ def calculate_daily_volatility(price_series):
         log_returns = np.log(price_series / np.roll(price_series, 1))[1:]
         daily_volatility = np.std(log_returns)
 
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Daglig volatilitet beräknad: {daily_volatility:.6f}"
         )
         return float(daily_volatility)
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid beräkning av daglig volatilitet: {str(e)}"
         )
         return None
@@ -38,12 +38,12 @@ def calculate_annual_volatility(price_series):
         daily_vol = calculate_daily_volatility(price_series)
         annual_volatility = daily_vol * np.sqrt(252) if daily_vol is not None else None
         if annual_volatility is not None:
-            logging.info(
+            logger.info(
                 f"[{datetime.now()}] ✅ Årlig volatilitet beräknad: {annual_volatility:.6f}"
             )
         return annual_volatility
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid beräkning av årlig volatilitet: {str(e)}"
         )
         return None
@@ -58,12 +58,12 @@ def analyze_historical_volatility(price_series, window=30):
             raise ValueError("Ogiltig prisserie eller för kort för vald tidsperiod")
 
         rolling_volatility = pd.Series(price_series).pct_change().rolling(window=window).std()
-        logging.info(
+        logger.info(
             f"[{datetime.now()}] ✅ Historisk volatilitet analyserad över {window} dagar."
         )
         return rolling_volatility
     except Exception as e:
-        logging.error(
+        logger.error(
             f"[{datetime.now()}] ❌ Fel vid analys av historisk volatilitet: {str(e)}"
         )
         return None
@@ -75,10 +75,10 @@ def fetch_vix_index():
     """
     try:
         vix_value = np.random.uniform(15, 35)  # Simulerad data, ersätt med API-anrop
-        logging.info(f"[{datetime.now()}] ✅ VIX-index: {vix_value:.2f}")
+        logger.info(f"[{datetime.now()}] ✅ VIX-index: {vix_value:.2f}")
         return float(vix_value)
     except Exception as e:
-        logging.error(f"[{datetime.now()}] ❌ Fel vid hämtning av VIX-index: {str(e)}")
+        logger.error(f"[{datetime.now()}] ❌ Fel vid hämtning av VIX-index: {str(e)}")
         return None
 
 
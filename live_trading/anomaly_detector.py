@@ -0,0 +1,208 @@
+"""
+anomaly_detector.py
+
+Vektoriserad detektering av ovanliga prisrörelser för hela det bevakade universumet.
+
+- Löpande (exponentiellt viktat) medelvärde och varians för avkastningen hålls som
+  NumPy-arrayer med en plats per symbol; en uppdatering med priser för tusentals
+  symboler är några få arrayoperationer.
+- z-värdet för varje ny avkastning beräknas mot statistiken *före* uppdateringen,
+  så att en extrem rörelse inte späder ut sitt eget larm.
+- De första `window` avkastningarna vägs lika (Welford), så variansen startar från
+  ett verkligt stickprov i stället för 0. Oförändrade priser (t.ex. pollning när
+  marknaden är stängd) räknas inte som avkastningar och krymper inte variansen.
+- Larm dedupliceras per symbol och riktning med en nedkylningstid (cooldown) och
+  skickas samlat (ett meddelande per uppdatering) till notifieringsvägen.
+
+Exempel:
+    detector = get_anomaly_detector()
+    alerts = detector.update({"AAPL": 187.2, "TSLA": 171.4})
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 100
+DEFAULT_THRESHOLD = 2.5
+DEFAULT_COOLDOWN = 15 * 60
+# Lägsta standardavvikelse per uppdatering (0,1 %), ungefär en likvid akties brus per minut
+DEFAULT_MIN_STD = 1e-3
+
+Alert = namedtuple("Alert", ["symbol", "z_score", "change", "price", "ts"])
+
+
+def send_alerts_to_telegram(alerts):
+    """
+    Standardnotifiering: ett samlat Telegram-meddelande för alla larm i en uppdatering.
+    """
+    from notifications.telegram_bot import send_telegram_message
+
+    lines = [f"- {a.symbol}: {a.change:+.2%} (z = {a.z_score:+.1f})" for a in alerts[:50]]
+    if len(alerts) > 50:
+        lines.append(f"... och {len(alerts) - 50} till")
+    send_telegram_message("🚨 *Ovanliga marknadsrörelser:*\n" + "\n".join(lines))
+
+
+class AnomalyDetector:
+    """
+    Håller rullande avkastningsstatistik per symbol och larmar när |z| överstiger tröskeln.
+    """
+
+    def __init__(self, symbols=(), window=DEFAULT_WINDOW, threshold=DEFAULT_THRESHOLD, min_samples=20,
+                 cooldown=DEFAULT_COOLDOWN, notifier=None, capacity=1024, min_std=DEFAULT_MIN_STD):
+        self.alpha = 2.0 / (window + 1)
+        self.threshold = threshold
+        self.min_samples = min_samples
+        # Golv för standardavvikelsen så att ett litet hopp i en lugn serie inte ger ett orimligt z
+        self.min_std = min_std
+        self.cooldown = cooldown
+        self.notifier = notifier
+        self.symbols = []
+        self.index = {}
+        self._lock = threading.Lock()
+        self._allocate(max(capacity, len(symbols)))
+        self._indices(list(symbols))
+
+    def _allocate(self, capacity):
+        old = getattr(self, "last_price", None)
+        n = len(self.symbols)
+        arrays = {
+            "last_price": np.nan, "mean": 0.0, "var": 0.0, "count": 0,
+            "last_alert_ts": -np.inf, "last_alert_sign": 0,
+        }
+        for name, fill in arrays.items():
+            dtype = np.int64 if isinstance(fill, int) else np.float64
+            new = np.full(capacity, fill, dtype=dtype)
+            if old is not None:
+                new[:n] = getattr(self, name)[:n]
+            setattr(self, name, new)
+
+    def _indices(self, symbols):
+        """Returnerar index för symbolerna; nya symboler får en plats (arrayerna dubblas vid behov)."""
+        missing = [s for s in dict.fromkeys(symbols) if s not in self.index]
+        if missing:
+            needed = len(self.symbols) + len(missing)
+            if needed > len(self.last_price):
+                self._allocate(max(needed, 2 * len(self.last_price)))
+            for symbol in missing:
+                self.index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+        return np.fromiter((self.index[s] for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def update(self, prices, ts=None, threshold=None):
+        """
+        Uppdaterar med nya priser (dict symbol -> pris) och returnerar nya larm.
+        threshold ersätter detektorns tröskel för just detta anrop (detektorn ändras inte).
+        """
+        symbols = list(prices)
+        with self._lock:
+            idx = self._indices(symbols)
+            values = np.fromiter((prices[s] for s in symbols), dtype=np.float64, count=len(symbols))
+            return self._update(idx, values, ts, threshold)
+
+    def update_arrays(self, symbols, values, ts=None, threshold=None):
+        """
+        Som update() men med en lista symboler och en array priser (snabbast för stora universum).
+        """
+        with self._lock:
+            return self._update(self._indices(list(symbols)), np.asarray(values, dtype=np.float64), ts, threshold)
+
+    def _update(self, idx, values, ts, threshold=None):
+        ts = time.time() if ts is None else ts
+        valid = np.isfinite(values) & (values > 0)
+        idx, values = idx[valid], values[valid]
+        previous = self.last_price[idx]
+        self.last_price[idx] = values
+        has_prev = np.isfinite(previous)
+        idx, values, previous = idx[has_prev], values[has_prev], previous[has_prev]
+        if len(idx) == 0:
+            return []
+
+        returns = values / previous - 1.0
+        # Oförändrat pris = inaktuell notering, inte en avkastning på 0
+        moved = returns != 0.0
+        idx, values, returns = idx[moved], values[moved], returns[moved]
+        if len(idx) == 0:
+            return []
+        mean, var, count = self.mean[idx], self.var[idx], self.count[idx]
+        z = (returns - mean) / np.maximum(np.sqrt(var), self.min_std)
+
+        # Exponentiellt viktat medelvärde och varians (West/Finch), uppdaterat för alla symboler på en gång.
+        # Under uppvärmningen är vikten 1/(n+1), dvs. vanligt medel och varians över de första avkastningarna.
+        alpha = np.maximum(1.0 / (count + 1), self.alpha)
+        delta = returns - mean
+        increment = alpha * delta
+        self.mean[idx] = mean + increment
+        self.var[idx] = (1 - alpha) * (var + delta * increment)
+        self.count[idx] = count + 1
+
+        sign = np.sign(z).astype(np.int64)
+        threshold = self.threshold if threshold is None else threshold
+        candidate = (np.abs(z) > threshold) & (count >= self.min_samples)
+        # Samma symbol och riktning larmar inte igen förrän cooldown har passerat
+        cooled = (ts - self.last_alert_ts[idx] >= self.cooldown) | (self.last_alert_sign[idx] != sign)
+        hits = np.flatnonzero(candidate & cooled)
+        if len(hits) == 0:
+            return []
+
+        self.last_alert_ts[idx[hits]] = ts
+        self.last_alert_sign[idx[hits]] = sign[hits]
+        alerts = [
+            Alert(self.symbols[i], float(zv), float(r), float(p), ts)
+            for i, zv, r, p in zip(idx[hits].tolist(), z[hits], returns[hits], values[hits])
+        ]
+        alerts.sort(key=lambda a: -abs(a.z_score))
+        logger.warning(f"⚠️ {len(alerts)} ovanliga marknadsrörelser: "
+                       f"{', '.join(f'{a.symbol} z={a.z_score:+.1f}' for a in alerts[:10])}")
+        if self.notifier is not None:
+            try:
+                self.notifier(alerts)
+            except Exception as e:
+                logger.error(f"❌ Fel vid notifiering av marknadslarm: {str(e)}")
+        return alerts
+
+    def snapshot(self):
+        """Aktuell statistik per symbol som dict symbol -> (medel, std, antal)."""
+        n = len(self.symbols)
+        std = np.sqrt(self.var[:n])
+        return {s: (float(self.mean[i]), float(std[i]), int(self.count[i])) for i, s in enumerate(self.symbols)}
+
+
+_default_detector = None
+_default_lock = threading.Lock()
+
+
+def get_anomaly_detector():
+    """
+    Returnerar den gemensamma detektorn, som skickar larm till Telegram.
+    """
+    global _default_detector
+    with _default_lock:
+        if _default_detector is None:
+            _default_detector = AnomalyDetector(notifier=send_alerts_to_telegram)
+        return _default_detector
+
+
+# Exempelanrop: benchmark med 5000 symboler
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n_symbols, n_updates = 5_000, 500
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    detector = AnomalyDetector(symbols, threshold=4.0, cooldown=60)
+    prices = np.full(n_symbols, 100.0)
+    total_alerts = 0
+    start = time.perf_counter()
+    for step in range(n_updates):
+        shocks = rng.normal(0, 0.001, n_symbols)
+        shocks[rng.integers(0, n_symbols, 3)] += 0.02  # några få verkliga hopp
+        prices *= 1 + shocks
+        total_alerts += len(detector.update_arrays(symbols, prices, ts=float(step)))
+    elapsed = time.perf_counter() - start
+    print(f"📈 {n_updates} uppdateringar x {n_symbols} symboler på {elapsed:.2f}s "
+          f"({n_updates * n_symbols / elapsed:,.0f} symboluppdateringar/s), {total_alerts} larm")
@@ -4,11 +4,13 @@ import pandas as pd
 
 # För realtidsdata via WebSockets
 import asyncio
-import websockets
-import json
+import os
+
+from data_processing.rolling_correlation import get_correlation_engine
+from live_trading.market_stream import MarketDataStream, get_market_hub
 
 # Konfigurera loggning
-logging.basicConfig(filename="live_market_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_market_conditions(data):
@@ -23,46 +25,54 @@ def analyze_market_conditions(data):
             "Bearish",
         )
 
-        logging.info("✅ Marknadsanalys genomförd.")
+        logger.info("✅ Marknadsanalys genomförd.")
         return data[["date", "close", "volatility", "market_trend"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid marknadsanalys: {str(e)}")
+        logger.error(f"❌ Fel vid marknadsanalys: {str(e)}")
         return None
 
 
-async def subscribe_realtime_data(symbol, on_data_callback):
+async def subscribe_realtime_data(symbol, on_data_callback, url=None, hub=None, correlation_engine=None,
+                                  correlation_interval=60):
     """
-    Exempel på en asynkron funktion som kopplar upp till en (fiktiv) WebSocket
-    och tar emot realtidsdata för en given aktiesymbol.
-    
+    Prenumererar på realtidsdata för en eller flera symboler över en gemensam
+    WebSocket-anslutning (live_trading.market_stream.MarketDataStream).
+
     Parametrar:
-      - symbol: Vilken aktiesymbol du vill lyssna på (t.ex. "AAPL").
-      - on_data_callback: En funktion som tar emot ett dict med realtidsdata.
-    
-    OBS! Yahoo Finance har ingen officiell gratis WebSocket-endpoint.
-         Detta är en förenklad exempelimplementation. Byt ut URL
-         och anpassa anropet efter den leverantör du använder (Polygon.io, AlphaVantage m.fl.).
+      - symbol: Aktiesymbol (t.ex. "AAPL") eller lista av symboler.
+      - on_data_callback: Funktion som tar emot ett dict {"symbol", "price", "size", "ts"} per tick.
+      - url: WebSocket-URL (standard MARKET_STREAM_URL i miljön).
+      - hub: MarketDataHub som ticks och staplar skrivs till (standard get_market_hub()).
+      - correlation_engine: rullande korrelationsmotor som matas med hubbens stängda staplar
+        (standard get_correlation_engine()); används av risk- och sektorrapporterna.
+        Motorns jämförelseindex strömmas med så att beta kan beräknas.
+
+    OBS! Yahoo Finance har ingen officiell gratis WebSocket-endpoint. Byt URL och
+         prenumerationsmeddelande efter den leverantör du använder (Polygon.io, AlphaVantage m.fl.).
     """
-    url = "wss://fictive-stream.yourdataapi.com"  # Byt till korrekt WebSocket-URL
+    symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+    url = url or os.getenv("MARKET_STREAM_URL", "wss://fictive-stream.yourdataapi.com")
+    hub = hub or get_market_hub()
+    engine = correlation_engine or get_correlation_engine()
+    stream_symbols = list(symbols)
+    if engine.benchmark and engine.benchmark not in stream_symbols:
+        stream_symbols.append(engine.benchmark)
+    engine.add_symbols(stream_symbols)
+    engine.attach(hub, interval=correlation_interval)
+
+    def _on_ticks(sym, ts, price, size):
+        for t, p, v in zip(ts.tolist(), price.tolist(), size.tolist()):
+            on_data_callback({"symbol": sym, "price": p, "size": v, "ts": t})
+
+    hub.subscribe_ticks(_on_ticks, symbols=symbols)
+    stream = MarketDataStream(url, stream_symbols, hub)
     try:
-        async with websockets.connect(url) as ws:
-            # Skicka ev. prenumerationsmeddelande
-            subscribe_message = {
-                "action": "subscribe",
-                "symbol": symbol
-            }
-            await ws.send(json.dumps(subscribe_message))
-            logging.info(f"🔌 WebSocket-anslutning etablerad för {symbol}")
-
-            while True:
-                # Vänta på inkommande meddelanden
-                message = await ws.recv()
-                data = json.loads(message)
-                # Exempel: Om data är i form av { "symbol": ..., "price": ... }
-                on_data_callback(data)
-
+        await stream.run()
     except Exception as e:
-        logging.error(f"❌ Fel vid realtidsprenumeration för {symbol}: {str(e)}")
+        logger.error(f"❌ Fel vid realtidsprenumeration för {symbols}: {str(e)}")
+    finally:
+        # Callbacken får inte ligga kvar i den delade hubben när prenumerationen avslutas
+        hub.unsubscribe_ticks(_on_ticks)
 
 
 def handle_realtime_update(update):
@@ -74,9 +84,9 @@ def handle_realtime_update(update):
     symbol = update.get("symbol", "UNKNOWN")
     price = update.get("price", None)
     if price is not None:
-        logging.info(f"📡 Realtidsuppdatering för {symbol}: {price}")
+        logger.info(f"📡 Realtidsuppdatering för {symbol}: {price}")
     else:
-        logging.warning(f"⚠️ Oväntat meddelande: {update}")
+        logger.warning(f"⚠️ Oväntat meddelande: {update}")
 
 
 # Exempelanrop
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="live_performance_tracking.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def track_signal_performance(signals, actual_prices):
@@ -19,10 +19,10 @@ def track_signal_performance(signals, actual_prices):
         ) | (signals["signal"] == "SELL") & (signals["actual_return"] < 0)
         accuracy = signals["success"].mean()
 
-        logging.info(f"✅ Signalträffsäkerhet: {accuracy:.2%}")
+        logger.info(f"✅ Signalträffsäkerhet: {accuracy:.2%}")
         return accuracy
     except Exception as e:
-        logging.error(f"❌ Fel vid spårning av signalprestanda: {str(e)}")
+        logger.error(f"❌ Fel vid spårning av signalprestanda: {str(e)}")
         return None
 
 
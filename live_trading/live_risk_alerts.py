@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="live_risk_alerts.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def detect_risk_alerts(data, volatility_threshold=0.05):
@@ -17,13 +17,44 @@ def detect_risk_alerts(data, volatility_threshold=0.05):
             data["volatility"] > volatility_threshold, "HIGH RISK", "NORMAL"
         )
 
-        logging.info("✅ Riskvarningar genererade.")
+        logger.info("✅ Riskvarningar genererade.")
         return data[["date", "close", "volatility", "risk_alert"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid generering av riskvarningar: {str(e)}")
+        logger.error(f"❌ Fel vid generering av riskvarningar: {str(e)}")
         return None
 
 
+def volatility_risk_alerts(forecast, volatility_threshold=0.05):
+    """
+    Riskvarningar från volatilitetsmotorns prognos (VolatilityEngine.forecast()):
+    HIGH RISK när prognostiserad volatilitet överstiger tröskeln eller regimen är "high".
+    """
+    try:
+        alerts = forecast[["sigma", "long_run", "ratio", "regime"]].copy()
+        alerts["risk_alert"] = np.where(
+            (alerts["sigma"] > volatility_threshold) | (alerts["regime"] == "high"), "HIGH RISK", "NORMAL"
+        )
+        logger.info(f"✅ Volatilitetsvarningar: {int((alerts['risk_alert'] == 'HIGH RISK').sum())} av {len(alerts)}")
+        return alerts
+    except Exception as e:
+        logger.error(f"❌ Fel vid volatilitetsvarningar: {str(e)}")
+        return None
+
+
+def format_volatility_alerts(alerts):
+    """
+    Telegram-meddelande för symbolerna med HIGH RISK (None om inga varningar finns).
+    """
+    if alerts is None:
+        return None
+    flagged = alerts[alerts["risk_alert"] == "HIGH RISK"].sort_values("ratio", ascending=False)
+    if flagged.empty:
+        return None
+    lines = [f"- {symbol}: σ {row.sigma:.2%} ({row.ratio:.1f}x normalt, regim {row.regime})"
+             for symbol, row in flagged.iterrows()]
+    return "⚠️ *Förhöjd volatilitet (GARCH):*\n" + "\n".join(lines)
+
+
 # Exempelanrop
 if __name__ == "__main__":
     df = pd.DataFrame(
@@ -36,3 +67,10 @@ if __name__ == "__main__":
     risk_alerts = detect_risk_alerts(df)
     print("📢 Riskvarningar:")
     print(risk_alerts.tail())
+
+    forecast = pd.DataFrame(
+        {"sigma": [0.012, 0.061, 0.02], "long_run": [0.015, 0.03, 0.012], "ratio": [0.8, 2.0, 1.7],
+         "regime": ["normal", "high", "high"]},
+        index=pd.Index(["AAPL", "TSLA", "NVDA"], name="symbol"),
+    )
+    print(format_volatility_alerts(volatility_risk_alerts(forecast)))
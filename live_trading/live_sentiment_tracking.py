@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="live_sentiment_tracking.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_live_sentiment(keyword):
@@ -14,10 +14,10 @@ def fetch_live_sentiment(keyword):
         url = f"https://api.sentimentanalysis.com/live?keyword={keyword}"
         response = requests.get(url)
         data = response.json()
-        logging.info(f"✅ Live-sentimentdata hämtad för: {keyword}")
+        logger.info(f"✅ Live-sentimentdata hämtad för: {keyword}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av live-sentimentdata: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av live-sentimentdata: {str(e)}")
         return None
 
 
@@ -1,11 +1,18 @@
 import logging
+import time
+from collections import namedtuple
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="live_signal_generator.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SHORT_WINDOW = 50
+LONG_WINDOW = 200
+
+SignalEvent = namedtuple("SignalEvent", ["symbol", "signal", "previous", "close", "sma_50", "sma_200", "ts"])
 
 
 def generate_trading_signals(data: pd.DataFrame) -> pd.DataFrame:
@@ -19,18 +26,18 @@ def generate_trading_signals(data: pd.DataFrame) -> pd.DataFrame:
     - Annars → HOLD
     """
     try:
-        df = data.copy()
-        df["SMA_50"] = df["close"].rolling(window=50).mean()
-        df["SMA_200"] = df["close"].rolling(window=200).mean()
+        close = data["close"]
+        sma_50 = close.rolling(window=SHORT_WINDOW).mean()
+        sma_200 = close.rolling(window=LONG_WINDOW).mean()
+        signal = np.select([sma_50 > sma_200, sma_50 < sma_200], ["BUY", "SELL"], default="HOLD")
+        # Bygg bara de kolumner som returneras i stället för att kopiera hela indatan
+        df = pd.DataFrame({"date": data["date"], "close": close, "SMA_50": sma_50,
+                           "SMA_200": sma_200, "signal": signal}, index=data.index)
 
-        df["signal"] = "HOLD"
-        df.loc[df["SMA_50"] > df["SMA_200"], "signal"] = "BUY"
-        df.loc[df["SMA_50"] < df["SMA_200"], "signal"] = "SELL"
-
-        logging.info(f"[{datetime.now()}] ✅ Signaler genererade för {len(df)} rader.")
+        logger.info(f"[{datetime.now()}] ✅ Signaler genererade för {len(df)} rader.")
         return df[["date", "close", "SMA_50", "SMA_200", "signal"]]
     except Exception as e:
-        logging.error(f"[{datetime.now()}] ❌ Fel vid signalgenerering: {str(e)}")
+        logger.error(f"[{datetime.now()}] ❌ Fel vid signalgenerering: {str(e)}")
         return pd.DataFrame()
 
 
@@ -40,7 +47,10 @@ def summarize_latest_signal(signal_df: pd.DataFrame) -> dict:
     Returnerar en dict med signal och pris.
     """
     try:
-        last_row = signal_df.dropna().iloc[-1]
+        # Senaste raden där båda glidande medelvärdena finns (utan dropna över hela tabellen)
+        last_row = signal_df.loc[signal_df[["SMA_50", "SMA_200"]].notna().all(axis=1).iloc[::-1].idxmax()]
+        if pd.isna(last_row["SMA_200"]):
+            raise ValueError("för kort historik för SMA-200")
         return {
             "signal": last_row["signal"],
             "close": float(last_row["close"]),
@@ -49,7 +59,7 @@ def summarize_latest_signal(signal_df: pd.DataFrame) -> dict:
             "date": last_row["date"].strftime("%Y-%m-%d")
         }
     except Exception as e:
-        logging.warning(f"[{datetime.now()}] ⚠️ Kunde inte sammanfatta senaste signal: {str(e)}")
+        logger.warning(f"[{datetime.now()}] ⚠️ Kunde inte sammanfatta senaste signal: {str(e)}")
         return {
             "signal": "HOLD",
             "close": None,
@@ -59,6 +69,174 @@ def summarize_latest_signal(signal_df: pd.DataFrame) -> dict:
         }
 
 
+class _CrossoverState:
+    """
+    Tillstånd per symbol: ringbuffert med de senaste LONG_WINDOW stängningskurserna
+    och löpande summor för båda fönstren.
+    """
+
+    __slots__ = ("window", "pos", "count", "sum_short", "sum_long", "signal", "updates")
+
+    def __init__(self, long_window):
+        self.window = np.zeros(long_window, dtype=np.float64)
+        self.pos = 0
+        self.count = 0
+        self.sum_short = 0.0
+        self.sum_long = 0.0
+        self.signal = "HOLD"
+        self.updates = 0
+
+
+class StreamingSignalGenerator:
+    """
+    Inkrementell SMA-50/200-korsning per symbol. Varje ny stapel uppdaterar löpande
+    summor i O(1) (oberoende av historikens längd) och bara tillståndsbyten
+    (BUY <-> SELL, HOLD -> BUY/SELL) publiceras som SignalEvent.
+
+    Kan kopplas direkt till MarketDataHub (live_trading.market_stream) och återskapa
+    sitt tillstånd från hubbens staplar eller en DataFrame med "close" vid omstart.
+
+    Exempel:
+        generator = StreamingSignalGenerator(ledger=get_trade_ledger())
+        generator.rebuild_from_hub(hub, interval=60)
+        generator.attach(hub, interval=60)
+        generator.subscribe(lambda event: print(event))
+    """
+
+    def __init__(self, short_window=SHORT_WINDOW, long_window=LONG_WINDOW, ledger=None,
+                 strategy="sma_crossover", resync_every=10_000):
+        if short_window >= long_window:
+            raise ValueError("❌ Kort fönster måste vara mindre än långt fönster")
+        self.short_window = short_window
+        self.long_window = long_window
+        self.ledger = ledger
+        self.strategy = strategy
+        # Löpande summor räknas om från bufferten med jämna mellanrum mot flyttalsdrift
+        self.resync_every = resync_every
+        self._states = {}
+        self._subscribers = []
+        self.latencies_us = []
+
+    def subscribe(self, callback):
+        """callback(event) anropas för varje tillståndsbyte."""
+        self._subscribers.append(callback)
+
+    def attach(self, hub, interval=60, symbols=None):
+        """Prenumererar på stängda staplar från en MarketDataHub."""
+        hub.subscribe_bars(self.on_bar, interval=interval, symbols=symbols)
+
+    def on_bar(self, bar):
+        start = time.perf_counter()
+        event = self.update(bar.symbol, bar.close, bar.start + bar.interval)
+        self.latencies_us.append((time.perf_counter() - start) * 1e6)
+        if len(self.latencies_us) > 10_000:
+            del self.latencies_us[:5_000]
+        return event
+
+    def _state(self, symbol):
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _CrossoverState(self.long_window)
+        return state
+
+    def _push(self, state, close):
+        long_w, short_w = self.long_window, self.short_window
+        window = state.window
+        pos = state.pos
+        if state.count >= long_w:
+            state.sum_long -= float(window[pos])
+        if state.count >= short_w:
+            state.sum_short -= float(window[(pos - short_w) % long_w])
+        window[pos] = close
+        state.sum_long += close
+        state.sum_short += close
+        state.pos = (pos + 1) % long_w
+        state.count += 1
+        state.updates += 1
+        if state.updates >= self.resync_every:
+            self._resync(state)
+
+    def _resync(self, state):
+        n_long = min(state.count, self.long_window)
+        n_short = min(state.count, self.short_window)
+        idx = np.arange(state.pos - n_long, state.pos) % self.long_window
+        values = state.window[idx]
+        state.sum_long = float(values.sum())
+        state.sum_short = float(values[-n_short:].sum()) if n_short else 0.0
+        state.updates = 0
+
+    def _classify(self, state):
+        if state.count < self.long_window:
+            return "HOLD", None, None
+        sma_short = state.sum_short / self.short_window
+        sma_long = state.sum_long / self.long_window
+        if sma_short > sma_long:
+            return "BUY", sma_short, sma_long
+        if sma_short < sma_long:
+            return "SELL", sma_short, sma_long
+        return "HOLD", sma_short, sma_long
+
+    def update(self, symbol, close, ts=None):
+        """
+        Lägger till en stängningskurs. Returnerar SignalEvent vid tillståndsbyte, annars None.
+        """
+        state = self._state(symbol)
+        self._push(state, float(close))
+        signal, sma_short, sma_long = self._classify(state)
+        if signal == state.signal:
+            return None
+        previous, state.signal = state.signal, signal
+        event = SignalEvent(symbol, signal, previous, float(close), sma_short, sma_long, ts)
+        self._emit(event)
+        return event
+
+    def _emit(self, event):
+        if self.ledger is not None and event.signal in ("BUY", "SELL"):
+            ts = pd.Timestamp(event.ts, unit="s") if isinstance(event.ts, (int, float)) else event.ts
+            self.ledger.record_signal(event.symbol, event.signal, event.close, strategy=self.strategy,
+                                      comment=f"SMA{self.short_window}/{self.long_window} från {event.previous}",
+                                      ts=ts)
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"❌ Fel i signalprenumerant: {str(e)}")
+
+    # --- Återställning --------------------------------------------------
+
+    def rebuild(self, symbol, closes):
+        """
+        Återskapar tillståndet för en symbol från historiska stängningskurser
+        (Series/array eller DataFrame med "close"). Inga händelser publiceras.
+        """
+        if isinstance(closes, pd.DataFrame):
+            closes = closes["close"]
+        values = np.asarray(closes, dtype=np.float64)
+        values = values[np.isfinite(values)][-self.long_window:]
+        state = self._states[symbol] = _CrossoverState(self.long_window)
+        n = len(values)
+        state.window[:n] = values
+        state.pos = n % self.long_window
+        state.count = n
+        self._resync(state)
+        state.signal = self._classify(state)[0]
+        return state.signal
+
+    def rebuild_from_hub(self, hub, interval=60, symbols=None):
+        """Återskapar tillståndet för alla (eller valda) symboler från hubbens stängda staplar."""
+        symbols = symbols or list(hub.bar_states)
+        return {symbol: self.rebuild(symbol, hub.bars(symbol, interval, n=self.long_window)) for symbol in symbols}
+
+    def latest(self, symbol):
+        """Senaste tillstånd som dict i samma format som summarize_latest_signal."""
+        state = self._states.get(symbol)
+        if state is None:
+            return {"signal": "HOLD", "close": None, "sma_50": None, "sma_200": None}
+        signal, sma_short, sma_long = self._classify(state)
+        close = float(state.window[(state.pos - 1) % self.long_window]) if state.count else None
+        return {"signal": signal, "close": close, "sma_50": sma_short, "sma_200": sma_long}
+
+
 # Exempelanrop
 if __name__ == "__main__":
     df = pd.DataFrame({
@@ -73,3 +251,16 @@ if __name__ == "__main__":
     print(signals.tail())
     print("\n📊 Sammanfattning av senaste signal:")
     print(summary)
+
+    # Strömmande variant: samma korsningar, men O(1) per ny stapel
+    generator = StreamingSignalGenerator()
+    events = [e for e in (generator.update("DEMO", c) for c in df["close"]) if e is not None]
+    print(f"\n🔁 {len(events)} tillståndsbyten, senaste: {generator.latest('DEMO')}")
+    for history in (1_000, 1_000_000):
+        closes = np.cumsum(np.random.randn(history)) + 1000
+        generator.rebuild("BENCH", closes[:-1_000])
+        start = time.perf_counter()
+        for c in closes[-1_000:]:
+            generator.update("BENCH", c)
+        per_bar = (time.perf_counter() - start) / 1_000 * 1e6
+        print(f"⏱️ Historik {history:>9}: {per_bar:.1f} µs per stapel")
@@ -1,43 +1,46 @@
 import logging
-import random
 import time
 
+from live_trading.anomaly_detector import get_anomaly_detector
+from live_trading.market_stream import get_market_hub
+
 # Konfigurera loggning
-logging.basicConfig(filename="live_trading_monitor.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def fetch_real_time_data(symbols):
+def fetch_real_time_data(symbols, hub=None):
     """
-    Simulerar hämtning av realtidsdata för en lista av aktier.
+    Hämtar senaste pris per aktie från realtidsströmmens ringbuffertar (MarketDataHub).
+    Symboler som ännu inte fått några ticks saknas i resultatet.
     """
     try:
-        data = {symbol: round(random.uniform(100, 500), 2) for symbol in symbols}
-        logging.info(f"✅ Realtidsdata hämtad: {data}")
+        data = (hub or get_market_hub()).latest_prices(symbols)
+        missing = [symbol for symbol in symbols if symbol not in data]
+        if missing:
+            logger.warning(f"⚠️ Ingen realtidsdata ännu för: {missing}")
+        logger.info(f"✅ Realtidsdata hämtad: {data}")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av realtidsdata: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av realtidsdata: {str(e)}")
         return {}
 
 
-def detect_abnormal_movements(real_time_prices, threshold=2.5):
+def detect_abnormal_movements(real_time_prices, threshold=None, detector=None):
     """
-    Identifierar ovanliga prisrörelser baserat på en standardavvikelsers tröskel.
+    Identifierar ovanliga prisrörelser: z-värdet för senaste avkastningen mot rullande
+    medel och standardavvikelse per symbol (vektoriserat över alla symboler).
+    threshold gäller bara detta anrop (standard: detektorns egen tröskel); den delade
+    detektorn ändras inte. Returnerar dict symbol -> z-värde för nya larm (efter deduplicering/cooldown).
     """
     try:
-        price_changes = {
-            symbol: round(random.uniform(-3, 3), 2)
-            for symbol in real_time_prices.keys()
-        }
-        alerts = {
-            symbol: change
-            for symbol, change in price_changes.items()
-            if abs(change) > threshold
-        }
+        detector = detector or get_anomaly_detector()
+        alerts = {alert.symbol: round(alert.z_score, 2)
+                  for alert in detector.update(real_time_prices, threshold=threshold)}
         if alerts:
-            logging.warning(f"⚠️ Ovanliga marknadsrörelser upptäckta: {alerts}")
+            logger.warning(f"⚠️ Ovanliga marknadsrörelser upptäckta: {alerts}")
         return alerts
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av marknadsrörelser: {str(e)}")
+        logger.error(f"❌ Fel vid analys av marknadsrörelser: {str(e)}")
         return {}
 
 
@@ -46,16 +49,16 @@ def live_monitoring(symbols, interval=30):
     Kontinuerligt övervakar realtidsmarknaden och identifierar anomalier.
     """
     while True:
-        logging.info("🔍 Övervakar marknadsrörelser i realtid...")
+        logger.info("🔍 Övervakar marknadsrörelser i realtid...")
         real_time_prices = fetch_real_time_data(symbols)
         alerts = detect_abnormal_movements(real_time_prices)
         if alerts:
-            logging.info(f"🚨 Marknadslarm: {alerts}")
+            logger.info(f"🚨 Marknadslarm: {alerts}")
         time.sleep(interval)
 
 
 # Exempelanrop
 if __name__ == "__main__":
     symbols_to_monitor = ["AAPL", "TSLA", "NVDA", "MSFT", "GOOGL"]
-    logging.info("🚀 Startar Live Trading Monitor...")
+    logger.info("🚀 Startar Live Trading Monitor...")
     live_monitoring(symbols_to_monitor)
@@ -0,0 +1,490 @@
+"""
+market_stream.py
+
+Asynkron inläsning av realtidsdata för många symboler över en enda WebSocket-anslutning.
+
+- Ticks skrivs i en NumPy-ringbuffert med fast storlek per symbol (TickRingBuffer).
+- Ticks aggregeras till staplar (standard 1s och 1m) vektoriserat per meddelande;
+  när en stapel stängs publiceras den till prenumeranter (synkrona eller async callbacks).
+- Staplar stängs även när en symbol blir tyst: strömmens klocka (senaste tidsstämpel)
+  avgör när ett intervall är passerat, vilket gör uppspelning av inspelningar deterministisk.
+- ReplayServer är en lokal WebSocket-server som spelar upp inspelade ticks (JSONL/CSV),
+  för tester och för benchmark (scripts/benchmark_market_stream.py).
+
+Meddelandeformat (både från leverantör och ReplayServer):
+    {"symbol": "AAPL", "price": 187.2, "size": 100, "ts": 1711530000.123}
+    [ {...}, {...} ]                                     # batch av ticks
+    {"symbol": "AAPL", "ts": [...], "price": [...], "size": [...]}   # kolumnbatch
+
+Exempel:
+    hub = MarketDataHub(intervals=(1, 60))
+    hub.subscribe_bars(lambda bar: print(bar), interval=60)
+    stream = MarketDataStream("wss://...", ["AAPL", "TSLA"], hub)
+    asyncio.run(stream.run())
+"""
+
+import asyncio
+import csv
+import inspect
+import json
+import logging
+import time
+from collections import defaultdict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_CAPACITY = 100_000
+DEFAULT_BAR_CAPACITY = 10_000
+DEFAULT_INTERVALS = (1, 60)
+
+Bar = namedtuple("Bar", ["symbol", "interval", "start", "open", "high", "low", "close", "volume", "ticks"])
+
+
+class TickRingBuffer:
+    """
+    Ringbuffert med fast storlek för ticks (tid, pris, volym) för en symbol.
+    """
+
+    def __init__(self, capacity=DEFAULT_TICK_CAPACITY):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.head = 0  # nästa skrivposition
+        self.count = 0
+        self.total = 0
+
+    def extend(self, ts, price, size):
+        n = len(ts)
+        if n == 0:
+            return
+        self.total += n
+        if n >= self.capacity:
+            ts, price, size = ts[-self.capacity:], price[-self.capacity:], size[-self.capacity:]
+            n = self.capacity
+        first = min(n, self.capacity - self.head)
+        for dst, src in ((self.ts, ts), (self.price, price), (self.size, size)):
+            dst[self.head:self.head + first] = src[:first]
+            if first < n:
+                dst[:n - first] = src[first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def last(self, n=None):
+        """
+        Returnerar de senaste n tickarna (äldst först) som (ts, price, size)-kopior.
+        """
+        n = self.count if n is None else min(n, self.count)
+        idx = (np.arange(self.head - n, self.head)) % self.capacity
+        return self.ts[idx], self.price[idx], self.size[idx]
+
+    @property
+    def latest_price(self):
+        return float(self.price[self.head - 1]) if self.count else None
+
+
+class _BarState:
+    """
+    Pågående stapel och historik för en symbol och ett intervall.
+    """
+
+    __slots__ = ("interval", "bucket", "open", "high", "low", "close", "volume", "ticks", "history", "head", "count")
+
+    def __init__(self, interval, capacity):
+        self.interval = interval
+        self.bucket = None
+        self.history = np.zeros((capacity, 7), dtype=np.float64)  # start, o, h, l, c, v, n
+        self.head = 0
+        self.count = 0
+
+    def _store(self, row):
+        self.history[self.head] = row
+        self.head = (self.head + 1) % len(self.history)
+        self.count = min(self.count + 1, len(self.history))
+
+    def close_bar(self, symbol):
+        bar = Bar(symbol, self.interval, self.bucket * self.interval, self.open, self.high, self.low,
+                  self.close, self.volume, self.ticks)
+        self._store(bar[2:])
+        self.bucket = None
+        return bar
+
+
+class MarketDataHub:
+    """
+    Tar emot ticks, håller ringbuffertar och staplar per symbol och publicerar stängda staplar.
+    """
+
+    def __init__(self, intervals=DEFAULT_INTERVALS, tick_capacity=DEFAULT_TICK_CAPACITY,
+                 bar_capacity=DEFAULT_BAR_CAPACITY):
+        self.intervals = tuple(intervals)
+        self.tick_capacity = tick_capacity
+        self.bar_capacity = bar_capacity
+        self.ticks = {}
+        self.bar_states = {}
+        self.clock = 0.0  # senaste tidsstämpel i strömmen
+        self._last_sweep = 0
+        self._bar_subscribers = []
+        self._tick_subscribers = []
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.bar_count = 0
+
+    # --- Prenumerationer ----------------------------------------------
+
+    def subscribe_bars(self, callback, interval=None, symbols=None):
+        """
+        callback(bar) anropas när en stapel stängs. Coroutine-funktioner schemaläggs i event-loopen.
+        """
+        self._bar_subscribers.append((callback, interval, set(symbols) if symbols else None,
+                                      inspect.iscoroutinefunction(callback)))
+
+    def subscribe_ticks(self, callback, symbols=None):
+        """
+        callback(symbol, ts, price, size) anropas per meddelande med NumPy-arrayer.
+        """
+        self._tick_subscribers.append((callback, set(symbols) if symbols else None))
+
+    def unsubscribe_bars(self, callback):
+        """Tar bort alla stapelprenumerationer för callback."""
+        self._bar_subscribers = [s for s in self._bar_subscribers if s[0] is not callback]
+
+    def unsubscribe_ticks(self, callback):
+        """Tar bort alla tickprenumerationer för callback."""
+        self._tick_subscribers = [s for s in self._tick_subscribers if s[0] is not callback]
+
+    def _publish(self, bar):
+        self.bar_count += 1
+        for callback, interval, symbols, is_async in self._bar_subscribers:
+            if (interval is not None and interval != bar.interval) or (symbols and bar.symbol not in symbols):
+                continue
+            try:
+                if is_async:
+                    asyncio.get_running_loop().create_task(callback(bar))
+                else:
+                    callback(bar)
+            except Exception as e:
+                logger.error(f"❌ Fel i stapelprenumerant: {str(e)}")
+
+    # --- Inläsning ------------------------------------------------------
+
+    def _buffers(self, symbol):
+        buffer = self.ticks.get(symbol)
+        if buffer is None:
+            buffer = self.ticks[symbol] = TickRingBuffer(self.tick_capacity)
+            self.bar_states[symbol] = [_BarState(i, self.bar_capacity) for i in self.intervals]
+        return buffer, self.bar_states[symbol]
+
+    def on_ticks(self, symbol, ts, price, size):
+        """
+        Tar emot en batch ticks (NumPy-arrayer, sorterade på tid) för en symbol.
+        """
+        buffer, states = self._buffers(symbol)
+        buffer.extend(ts, price, size)
+        self.tick_count += len(ts)
+        for callback, symbols in self._tick_subscribers:
+            if not symbols or symbol in symbols:
+                try:
+                    callback(symbol, ts, price, size)
+                except Exception as e:
+                    logger.error(f"❌ Fel i tickprenumerant: {str(e)}")
+        for state in states:
+            self._aggregate(symbol, state, ts, price, size)
+        if len(ts) and ts[-1] > self.clock:
+            self.clock = float(ts[-1])
+
+    def _aggregate(self, symbol, state, ts, price, size):
+        buckets = (ts // state.interval).astype(np.int64)
+        if state.bucket is not None and buckets[0] < state.bucket:
+            # Sena ticks (före pågående stapel) räknas inte in i staplarna
+            keep = buckets >= state.bucket
+            self.late_ticks += int((~keep).sum())
+            if not keep.any():
+                return
+            ts, price, size, buckets = ts[keep], price[keep], size[keep], buckets[keep]
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ends = np.append(starts[1:], len(buckets))
+        highs = np.maximum.reduceat(price, starts)
+        lows = np.minimum.reduceat(price, starts)
+        volumes = np.add.reduceat(size, starts)
+        for k in range(len(starts)):
+            bucket = int(buckets[starts[k]])
+            if state.bucket is not None and bucket != state.bucket:
+                self._publish(state.close_bar(symbol))
+            if state.bucket is None:
+                state.bucket = bucket
+                state.open = float(price[starts[k]])
+                state.high, state.low = float(highs[k]), float(lows[k])
+                state.volume, state.ticks = float(volumes[k]), int(ends[k] - starts[k])
+            else:
+                state.high = max(state.high, float(highs[k]))
+                state.low = min(state.low, float(lows[k]))
+                state.volume += float(volumes[k])
+                state.ticks += int(ends[k] - starts[k])
+            state.close = float(price[ends[k] - 1])
+
+    def sweep(self, now=None):
+        """
+        Stänger staplar vars intervall har passerat enligt strömmens klocka (eller `now`).
+        """
+        now = self.clock if now is None else now
+        for symbol, states in self.bar_states.items():
+            for state in states:
+                if state.bucket is not None and (state.bucket + 1) * state.interval <= now:
+                    self._publish(state.close_bar(symbol))
+        self._last_sweep = int(now)
+
+    def ingest_message(self, message):
+        """
+        Tolkar ett meddelande (dict, lista av dicts eller kolumnbatch) och matar in ticks.
+        """
+        if isinstance(message, dict) and isinstance(message.get("price"), list):
+            self._ingest_columns(message["symbol"], message.get("ts"), message["price"], message.get("size"))
+        else:
+            ticks = message if isinstance(message, list) else [message]
+            grouped = defaultdict(lambda: ([], [], []))
+            now = time.time()
+            for tick in ticks:
+                price = tick.get("price")
+                if price is None or "symbol" not in tick:
+                    continue
+                ts_list, price_list, size_list = grouped[tick["symbol"]]
+                ts_list.append(tick.get("ts", now))
+                price_list.append(price)
+                size_list.append(tick.get("size", 0.0))
+            for symbol, (ts_list, price_list, size_list) in grouped.items():
+                self._ingest_columns(symbol, ts_list, price_list, size_list)
+        if int(self.clock) > self._last_sweep:
+            self.sweep()
+
+    def _ingest_columns(self, symbol, ts, price, size):
+        price = np.asarray(price, dtype=np.float64)
+        ts = np.full(len(price), time.time()) if ts is None else np.asarray(ts, dtype=np.float64)
+        if len(ts) and ts[0] > 1e12:
+            ts = ts / 1000.0  # millisekunder
+        size = np.zeros(len(price)) if size is None else np.asarray(size, dtype=np.float64)
+        if len(ts) > 1 and np.any(np.diff(ts) < 0):
+            order = np.argsort(ts, kind="stable")
+            ts, price, size = ts[order], price[order], size[order]
+        self.on_ticks(symbol, ts, price, size)
+
+    # --- Läsning --------------------------------------------------------
+
+    def latest_prices(self, symbols=None):
+        symbols = symbols or list(self.ticks)
+        return {s: self.ticks[s].latest_price for s in symbols if s in self.ticks and self.ticks[s].count}
+
+    def bars(self, symbol, interval, n=None):
+        """
+        Returnerar de senaste n stängda staplarna som DataFrame.
+        """
+        state = next((s for s in self.bar_states.get(symbol, []) if s.interval == interval), None)
+        columns = ["start", "open", "high", "low", "close", "volume", "ticks"]
+        if state is None or state.count == 0:
+            return pd.DataFrame(columns=columns)
+        n = state.count if n is None else min(n, state.count)
+        idx = np.arange(state.head - n, state.head) % len(state.history)
+        df = pd.DataFrame(state.history[idx], columns=columns)
+        df["start"] = pd.to_datetime(df["start"], unit="s")
+        df["ticks"] = df["ticks"].astype(np.int64)
+        return df
+
+
+class MarketDataStream:
+    """
+    En WebSocket-anslutning för alla symboler, med återanslutning och valfri inspelning.
+    """
+
+    def __init__(self, url, symbols, hub=None, subscribe_message=None, record_path=None,
+                 reconnect_delay=1.0, max_reconnect_delay=30.0):
+        self.url = url
+        self.symbols = list(symbols)
+        self.hub = hub or MarketDataHub()
+        self.subscribe_message = subscribe_message or {"action": "subscribe", "symbols": self.symbols}
+        self.record_path = record_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.messages = 0
+        self.bad_messages = 0
+        self._stopped = asyncio.Event()
+
+    async def run(self, max_messages=None, reconnect=True):
+        """
+        Läser meddelanden tills stop() anropas, servern stänger (om reconnect=False) eller max_messages nåtts.
+        """
+        import websockets
+
+        delay = self.reconnect_delay
+        record = open(self.record_path, "a") if self.record_path else None
+        try:
+            while not self._stopped.is_set():
+                try:
+                    async with websockets.connect(self.url, max_size=None) as ws:
+                        await ws.send(json.dumps(self.subscribe_message))
+                        logger.info(f"🔌 WebSocket ansluten: {len(self.symbols)} symboler över en anslutning")
+                        delay = self.reconnect_delay
+                        async for raw in ws:
+                            if record is not None:
+                                record.write(raw if isinstance(raw, str) else raw.decode())
+                                record.write("\n")
+                            try:
+                                self.hub.ingest_message(json.loads(raw))
+                            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                                # Ett felaktigt meddelande (ogiltig JSON, fel format) hoppas över
+                                self.bad_messages += 1
+                                logger.warning(f"⚠️ Ogiltigt meddelande från strömmen hoppas över: {str(e)}")
+                            self.messages += 1
+                            if self._stopped.is_set() or (max_messages and self.messages >= max_messages):
+                                return
+                except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                    logger.warning(f"⚠️ WebSocket-fel ({str(e)}); ny anslutning om {delay:.1f}s")
+                if not reconnect:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            self.hub.sweep()
+            if record is not None:
+                record.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+# --- Inspelning och uppspelning --------------------------------------------
+
+def load_recording(path):
+    """
+    Läser in inspelade ticks från JSONL (ett meddelande per rad) eller CSV (symbol,ts,price,size).
+    Returnerar en lista av tick-dicts sorterade på tid.
+    """
+    ticks = []
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                ticks.append({"symbol": row["symbol"], "ts": float(row["ts"]), "price": float(row["price"]),
+                              "size": float(row.get("size") or 0)})
+    else:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    message = json.loads(line)
+                    ticks.extend(message if isinstance(message, list) else [message])
+    ticks.sort(key=lambda t: t.get("ts", 0))
+    return ticks
+
+
+def write_recording(ticks, path, batch_size=100):
+    """
+    Sparar ticks som JSONL i batchar (samma format som MarketDataStream spelar in).
+    """
+    with open(path, "w") as f:
+        for i in range(0, len(ticks), batch_size):
+            f.write(json.dumps(ticks[i:i + batch_size]))
+            f.write("\n")
+    return path
+
+
+class ReplayServer:
+    """
+    Lokal WebSocket-server som spelar upp en inspelning för de symboler klienten prenumererar på.
+    speed=None spelar upp så fort som möjligt, speed=1.0 i realtid, speed=10 tio gånger snabbare.
+
+    Exempel:
+        async with ReplayServer("recordings/ticks.jsonl") as server:
+            stream = MarketDataStream(server.url, ["AAPL"], hub)
+            await stream.run(reconnect=False)
+    """
+
+    def __init__(self, recording, host="127.0.0.1", port=0, speed=None, batch_size=100):
+        self.ticks = load_recording(recording) if isinstance(recording, str) else list(recording)
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.batch_size = batch_size
+        self._server = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws):
+        request = json.loads(await ws.recv())
+        symbols = set(request.get("symbols") or [request.get("symbol")])
+        ticks = [t for t in self.ticks if t["symbol"] in symbols]
+        # Förserialisera batcharna så att servern inte blir flaskhalsen i benchmark
+        batches = [ticks[i:i + self.batch_size] for i in range(0, len(ticks), self.batch_size)]
+        payloads = [json.dumps(batch) for batch in batches]
+        started = time.monotonic()
+        first_ts = ticks[0]["ts"] if ticks else 0.0
+        for batch, payload in zip(batches, payloads):
+            if self.speed:
+                delay = (batch[0]["ts"] - first_ts) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(payload)
+        await ws.close()
+
+    async def __aenter__(self):
+        import websockets
+
+        self._server = await websockets.serve(self._handler, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def synthetic_ticks(symbols, n_ticks, start_ts=1_700_000_000.0, ticks_per_second=1000, seed=0):
+    """
+    Skapar syntetiska ticks (slumpvandring per symbol) för tester och benchmark.
+    """
+    rng = np.random.default_rng(seed)
+    ts = start_ts + np.arange(n_ticks) / ticks_per_second
+    symbol_idx = rng.integers(0, len(symbols), n_ticks)
+    prices = 100 + np.cumsum(rng.normal(0, 0.05, (len(symbols), n_ticks)), axis=1)
+    sizes = rng.integers(1, 500, n_ticks)
+    return [
+        {"symbol": symbols[s], "ts": float(t), "price": round(float(prices[s, i]), 4), "size": int(v)}
+        for i, (t, s, v) in enumerate(zip(ts, symbol_idx, sizes))
+    ]
+
+
+_default_hub = None
+
+
+def get_market_hub():
+    """
+    Returnerar den gemensamma MarketDataHub-instansen.
+    """
+    global _default_hub
+    if _default_hub is None:
+        _default_hub = MarketDataHub()
+    return _default_hub
+
+
+# Exempelanrop: spela upp syntetiska ticks via en lokal replay-server
+if __name__ == "__main__":
+    async def _demo():
+        hub = MarketDataHub()
+        minute_bars = []
+        hub.subscribe_bars(minute_bars.append, interval=60)
+        ticks = synthetic_ticks(["AAPL", "TSLA", "NVDA"], 200_000, ticks_per_second=500)
+        async with ReplayServer(ticks) as server:
+            stream = MarketDataStream(server.url, ["AAPL", "TSLA"], hub)
+            start = time.perf_counter()
+            await stream.run(reconnect=False)
+            elapsed = time.perf_counter() - start
+        print(f"📡 {hub.tick_count} ticks på {elapsed:.2f}s ({hub.tick_count / elapsed:,.0f} ticks/s), "
+              f"{hub.bar_count} staplar")
+        print(hub.bars("AAPL", 60).tail(3))
+
+    asyncio.run(_demo())
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="sector_rotation_signals.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def detect_sector_rotation(data):
@@ -18,10 +18,10 @@ def detect_sector_rotation(data):
         best_sector = data.groupby("sector")["momentum"].last().idxmax()
         worst_sector = data.groupby("sector")["momentum"].last().idxmin()
 
-        logging.info(f"✅ Bästa sektorn: {best_sector}, Sämsta sektorn: {worst_sector}")
+        logger.info(f"✅ Bästa sektorn: {best_sector}, Sämsta sektorn: {worst_sector}")
         return best_sector, worst_sector
     except Exception as e:
-        logging.error(f"❌ Fel vid sektorrotation-analys: {str(e)}")
+        logger.error(f"❌ Fel vid sektorrotation-analys: {str(e)}")
         return None, None
 
 
@@ -1,23 +1,22 @@
 import logging
 
-import requests
+from notifications.telegram_queue import get_delivery_queue
 
 # Konfigurera loggning
-logging.basicConfig(filename="telegram_signal_sender.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def send_telegram_signal(message, bot_token, chat_id):
+def send_telegram_signal(message, bot_token, chat_id, wait=False):
     """
-    Skickar en köp-/sälj-rekommendation till Telegram.
+    Köar en köp-/sälj-rekommendation för Telegram. Returnerar en Future,
+    eller Telegrams svar om wait=True.
     """
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        data = {"chat_id": chat_id, "text": message}
-        response = requests.post(url, data=data)
-        logging.info("✅ Signal skickad till Telegram.")
-        return response.json()
+        future = get_delivery_queue(bot_token).send_message(chat_id, message)
+        logger.info("✅ Signal köad för Telegram.")
+        return future.result() if wait else future
     except Exception as e:
-        logging.error(f"❌ Fel vid skickning av Telegram-signal: {str(e)}")
+        logger.error(f"❌ Fel vid skickning av Telegram-signal: {str(e)}")
         return None
 
 
@@ -27,4 +26,4 @@ if __name__ == "__main__":
     chat_id = "DIN_CHAT_ID"
     message = "📢 Köp-signal: Tesla har brutit 200-dagars medelvärde och har positivt momentum."
 
-    send_telegram_signal(message, bot_token, chat_id)
+    send_telegram_signal(message, bot_token, chat_id, wait=True)
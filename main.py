@@ -1,54 +1,37 @@
 import os
 import logging
-import threading
 import argparse
-import pandas as pd
 import numpy as np
-import schedule
 import time
 from datetime import datetime
 
 from config.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from utils.logging_config import setup_logging
 
 # Ange tidszon
 os.environ['TZ'] = 'Europe/Stockholm'
 time.tzset()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Central, köad loggning – måste initieras innan övriga moduler importeras
+setup_logging("trading_bot.log", rate_limit=(10, 1.0))
 
 # Egna imports
-from ai_decision_engine.optimal_entry_exit import optimal_entry_exit_strategy, generate_entry_exit_dataframe, plot_entry_exit_signals
-from ai_decision_engine.strategy_generation import generate_momentum_strategy
-from data_collection.market_data import fetch_forex_data
-from data_collection.sentiment_analysis import analyze_sentiment
-from data_collection.macro_data import fetch_macro_data
-from data_collection.news_analysis import fetch_and_analyze_news, get_recent_headlines
-from data_processing.normalization import min_max_normalization
-from data_processing.volatility_analysis import calculate_daily_volatility
 # Vi tar bort den ursprungliga generate_trading_signals då vi skapar en egen signalslista
 #from live_trading.live_signal_generator import generate_trading_signals
 from live_trading.telegram_signal_sender import send_telegram_signal
-from portfolio_management.rebalancing import rebalancing
-from portfolio_management.hedge_strategy import hedge_strategy
-from portfolio_management.portfolio_data_loader import fetch_all_portfolios
+from live_trading.trade_ledger import get_trade_ledger
 from reports.generate_report import generate_pdf_report
+from reports.daily_pipeline import run_daily_pipeline
 from reports.weekly_market_report import generate_weekly_market_report
 from reports.macro_event_impact import generate_macro_event_impact_report
 from reports.monthly_performance_report import send_monthly_report
 from notifications.telegram_bot import (
-    send_ai_recommendations,
     send_pdf_report_to_telegram,
     send_telegram_message,
-    send_chart_to_telegram
 )
 from risk_management.adaptive_stop_loss import adaptive_stop_loss
-from risk_management.value_at_risk import calculate_var
-from risk_management.monte_carlo_simulation import monte_carlo_simulation_normal as monte_carlo_simulation
-from utils.process_manager import manage_processes
-from ai_learning.retrain_scheduler import start_retrain_schedule
+from utils.job_scheduler import get_scheduler
+from ai_learning.retrain_scheduler import register_retrain_job
 from ai_learning.retrain_rl import retrain_rl_agent
 from ai_learning.backtest_rl import backtest_rl_agent
 from stable_baselines3 import PPO
@@ -59,62 +42,11 @@ parser.add_argument("--no-report", action="store_true", help="Skippa PDF-rapport
 parser.add_argument("--test-mode", action="store_true", help="Aktivera testläge")
 args = parser.parse_args()
 
-# Hjälpfunktion: Konvertera värdesträngar till float
-def convert_value(value_str):
-    try:
-        value_str = value_str.replace("kr", "").strip().replace(" ", "").replace(",", ".")
-        return float(value_str)
-    except Exception:
-        return 0.0
-
-# Hjälpfunktion: Beräkna dagliga avkastningar (returns) från prisdata
-def compute_returns(prices: np.ndarray) -> np.ndarray:
-    # Avkastning: (pris_t+1 - pris_t) / pris_t
-    return np.diff(prices) / prices[:-1]
-
 def daily_ai_report():
     logging.info("🚀 Startar daglig AI-rutin...")
     try:
-        trade_log = pd.DataFrame()  # Tom handelslogg om ingen finns
-
-        # Hämta portföljdata och välj "Investeringskonto" om möjligt
-        portfolio_data = fetch_all_portfolios()
-        if "Investeringskonto" in portfolio_data and not portfolio_data["Investeringskonto"].empty:
-            portfolio_df = portfolio_data["Investeringskonto"]
-        else:
-            portfolio_df = next((df for df in portfolio_data.values() if not df.empty), pd.DataFrame())
-
-        # Mappa om portföljdata om nödvändiga kolumner saknas
-        if not (("symbol" in portfolio_df.columns) and ("allocation" in portfolio_df.columns)):
-            if "Ticker" in portfolio_df.columns:
-                portfolio_df["symbol"] = portfolio_df["Ticker"]
-            if "Värde (SEK)" in portfolio_df.columns:
-                portfolio_df["value_numeric"] = portfolio_df["Värde (SEK)"].apply(convert_value)
-                total_value = portfolio_df["value_numeric"].sum()
-                if total_value > 0:
-                    portfolio_df["allocation"] = portfolio_df["value_numeric"] / total_value
-                else:
-                    portfolio_df["allocation"] = 0.0
-
-        if "symbol" in portfolio_df.columns and "allocation" in portfolio_df.columns:
-            rebalanced_df = rebalancing(portfolio_df.copy())
-        else:
-            logging.error("Portföljdata saknar nödvändiga kolumner ('symbol', 'allocation') för rebalansering.")
-            rebalanced_df = None
-
-        pdf_path = generate_pdf_report(trade_log, rebalanced_df=rebalanced_df)
-        send_ai_recommendations()
-        send_pdf_report_to_telegram(pdf_path)
-
-        forex_result = fetch_forex_data("USD", "SEK", period="1mo")
-        df = forex_result.get("history")
-        if df is not None and not df.empty:
-            optimal_entry = optimal_entry_exit_strategy({"prices": df["Close"]})
-            logging.info(f"Optimal entry/exit: {optimal_entry}")
-            plot_entry_exit_signals(generate_entry_exit_dataframe(df["Close"]))
-            chart_file = "charts/entry_exit_plot_" + datetime.now().strftime("%Y%m%d") + ".png"
-            send_chart_to_telegram(chart_file, caption=f"Entry/Exit-signal ({datetime.today().date()})")
-
+        # Hela morgonflödet körs som en DAG; oförändrade mellanresultat återanvänds från cachen
+        run_daily_pipeline()
         logging.info("✅ Daglig AI-rapport skickad.")
     except Exception as e:
         logging.error(f"Fel i daglig AI-rutin: {str(e)}")
@@ -169,11 +101,16 @@ def monthly_check_and_run():
 def main():
     logging.info("🚀 AI Trading Bot startar...")
 
+    # Alla schemalagda jobb körs av en gemensam schemaläggare med trådpool
+    scheduler = get_scheduler(max_workers=4)
     if not args.test_mode:
-        threading.Thread(target=start_retrain_schedule, daemon=True).start()
-        schedule.every().day.at("08:00").do(daily_ai_report)
-        schedule.every().monday.at("08:05").do(weekly_summary)
-        schedule.every().day.at("08:10").do(monthly_check_and_run)
+        register_retrain_job(scheduler)
+        scheduler.every_day("08:00", "daily_ai_report", daily_ai_report, timeout=1800)
+        scheduler.every_weekday("monday", "08:05", "weekly_summary", weekly_summary, timeout=600)
+        scheduler.every_day("08:10", "monthly_check", monthly_check_and_run, timeout=600)
+        # Logga körtider per jobb efter morgonens jobb för att se vilket som är långsamt
+        scheduler.every_day("09:00", "latency_report",
+                            lambda: logging.info("⏱️ Jobbtider:\n" + scheduler.format_latency_report()))
 
     # RL-modell: kontrollera om filen "rl_trading_model.zip" finns
     rl_model_path = "rl_trading_model.zip"
@@ -189,57 +126,14 @@ def main():
         rl_model = None
 
     try:
-        forex_result = fetch_forex_data("USD", "SEK", period="1mo")
-        df = forex_result.get("history")
-        if df is None or df.empty:
+        # Hämta, beräkna features, signaler och risk via den delade dagliga pipelinen
+        results = run_daily_pipeline(targets=["signals", "risk"])
+        df = results.get("fetch_forex")
+        if df is None:
             logging.error("Ingen valutahistorik hittad")
             return
-
-        # Konvertera prisdata till en float-array
-        prices = df["Close"].values.astype(np.float32)
-        # Beräkna dagliga avkastningar istället för att använda priser direkt
-        returns = compute_returns(prices)
-
-        portfolio_data = fetch_all_portfolios()
-        if "Investeringskonto" in portfolio_data and not portfolio_data["Investeringskonto"].empty:
-            portfolio_df = portfolio_data["Investeringskonto"]
-        else:
-            portfolio_df = next((df for df in portfolio_data.values() if not df.empty), pd.DataFrame())
-
-        if not (("symbol" in portfolio_df.columns) and ("allocation" in portfolio_df.columns)):
-            if "Ticker" in portfolio_df.columns:
-                portfolio_df["symbol"] = portfolio_df["Ticker"]
-            if "Värde (SEK)" in portfolio_df.columns:
-                portfolio_df["value_numeric"] = portfolio_df["Värde (SEK)"].apply(convert_value)
-                total_value = portfolio_df["value_numeric"].sum()
-                if total_value > 0:
-                    portfolio_df["allocation"] = portfolio_df["value_numeric"] / total_value
-                else:
-                    portfolio_df["allocation"] = 0.0
-
-        headlines = get_recent_headlines(limit=15)
-        sentiment = analyze_sentiment(texts=headlines)
-        macro_data = fetch_macro_data()
-        news_sentiment = fetch_and_analyze_news("stock market")
-
-        normalized_data = min_max_normalization(prices)
-        volatility = calculate_daily_volatility(prices)
-
-        df_input = pd.DataFrame({"close": normalized_data})
-        strategy_dict = generate_momentum_strategy(df_input, sentiment, macro_data)
-        logging.info(f"Momentum-strategi: {strategy_dict}")
-        optimal_entry = optimal_entry_exit_strategy({"prices": df["Close"]})
-        logging.info(f"Optimal entry/exit: {optimal_entry}")
-
-        # Använd de dagliga avkastningarna för riskberäkning
-        calculate_var(returns)
-        monte_carlo_simulation(100000, 0.07, 0.2)
-
-        if "symbol" in portfolio_df.columns and "allocation" in portfolio_df.columns:
-            rebalanced = rebalancing(portfolio_df)
-            hedge_strategy(rebalanced)
-        else:
-            logging.error("Portföljdata saknar nödvändiga kolumner ('symbol', 'allocation') för rebalansering.")
+        macro_data = results.get("fetch_macro") or {}
+        risk = results.get("risk") or {}
 
         if not args.no_report:
             generate_pdf_report(
@@ -247,7 +141,8 @@ def main():
                 filename=None,
                 rl_backtest_result=None,
                 adjusted_assets=None,
-                rebalanced_df=rebalanced if "symbol" in portfolio_df.columns and "allocation" in portfolio_df.columns else None
+                rebalanced_df=risk.get("rebalanced"),
+                ledger_summary=get_trade_ledger().summary(days=30)
             )
             dummy_macro_data = {
                 "sp500": 2.1,
@@ -267,22 +162,15 @@ def main():
                 signals = [f"Makrodata: Indicator={macro_data.get('indicator', 'N/A')}, Value={macro_data.get('value', 'N/A')}"]
                 signals.append(f"RL-agent action: {rl_action}")
                 message = "📢 Trading Signal:\n" + "\n".join(signals)
-                send_telegram_signal(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, message)
-            manage_processes(tasks=[])
+                send_telegram_signal(message, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
 
         logging.info("✅ Bot körning avslutad korrekt")
 
         if not args.test_mode:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)
+            scheduler.run_forever()
 
     except Exception as e:
         logging.error(f"Fel i huvudloopen: {str(e)}")
 
-# Hjälpfunktion för att beräkna dagliga avkastningar
-def compute_returns(prices: np.ndarray) -> np.ndarray:
-    return np.diff(prices) / prices[:-1]
-
 if __name__ == "__main__":
     main()
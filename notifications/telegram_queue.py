@@ -0,0 +1,392 @@
+"""
+telegram_queue.py
+
+Utgående kö för Telegram-notiser. Anropare lägger bara meddelanden/filer i kön och
+fortsätter direkt; en bakgrundstråd skickar dem med en gemensam (poolad) HTTP-session.
+
+- Respekterar Telegrams gränser: ca 1 meddelande/s per chatt och 30 meddelanden/s totalt.
+- Textmeddelanden som kommer i skurar till samma chatt slås ihop (så länge de ryms).
+- Meddelanden över 4096 tecken delas upp, helst vid radbrytningar. Med parse_mode
+  delas de bara där formateringen är stängd; delar som ändå skulle klippa en entitet
+  skickas som ren text i stället för att Telegram svarar 400.
+- Misslyckade anrop görs om med exponentiell backoff; vid HTTP 429 används `retry_after`.
+- Bas-URL:en kan pekas mot en lokal fejkad Bot API-server (TELEGRAM_API_URL eller base_url),
+  se exemplet längst ned i filen.
+"""
+
+import atexit
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+MAX_MESSAGE_LENGTH = 4096
+MAX_CAPTION_LENGTH = 1024
+
+
+_HTML_TAG = re.compile(r"<(/?)([a-zA-Z-]+)[^>]*>")
+_MARKDOWN_ESCAPE = re.compile(r"\\.")
+_MARKDOWN_CODE = re.compile(r"```.*?```|`[^`]*`", re.DOTALL)
+
+
+def entities_closed(text, parse_mode):
+    """
+    Grov kontroll av att alla formateringsentiteter (Markdown/MarkdownV2/HTML) i
+    texten är stängda, så att den kan skickas som ett eget meddelande.
+    """
+    if not parse_mode:
+        return True
+    if parse_mode.upper() == "HTML":
+        open_tags = []
+        for closing, tag in _HTML_TAG.findall(text):
+            tag = tag.lower()
+            if not closing:
+                open_tags.append(tag)
+            elif not open_tags or open_tags.pop() != tag:
+                return False
+        return not open_tags and text.count("<") == text.count(">")
+    text = _MARKDOWN_ESCAPE.sub("", text)
+    if text.count("```") % 2:
+        return False
+    text = _MARKDOWN_CODE.sub("", text)
+    markers = ["*", "_", "`"] + (["~", "||"] if parse_mode == "MarkdownV2" else [])
+    return (all(text.count(marker) % 2 == 0 for marker in markers)
+            and text.count("[") == text.count("]"))
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH, parse_mode=None):
+    """
+    Delar upp en text i delar om högst `limit` tecken, i första hand vid radbrytningar.
+    Med parse_mode väljs bara radbrytningar där formateringen före brytningen är stängd.
+    """
+    if len(text) <= limit:
+        return [text]
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if parse_mode:
+            while cut > 0 and not entities_closed(text[:cut], parse_mode):
+                cut = text.rfind("\n", 0, cut)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+
+class _Outgoing:
+    def __init__(self, chat_id, method, payload, files=None, coalesce=False):
+        self.chat_id = str(chat_id)
+        self.method = method
+        self.payload = payload
+        self.files = files
+        self.coalesce = coalesce
+        self.futures = [Future()]
+        self.attempts = 0
+        self.not_before = 0.0
+        self.enqueued_at = time.monotonic()
+
+
+class TelegramDeliveryQueue:
+    """
+    Kö med bakgrundssändare för Telegram Bot API.
+
+    Exempel:
+        queue = TelegramDeliveryQueue(token)
+        queue.send_message(chat_id, "📢 Köp-signal: TSLA")
+        queue.send_document(chat_id, "reports/daily_report.pdf", caption="Daglig rapport")
+        queue.flush()
+    """
+
+    def __init__(self, token, base_url=None, per_chat_interval=1.0, global_rate=30,
+                 coalesce_window=0.5, max_retries=5, backoff_base=1.0, request_timeout=30):
+        self.token = token
+        self.base_url = (base_url or TELEGRAM_API_URL).rstrip("/")
+        self.per_chat_interval = per_chat_interval
+        self.global_interval = 1.0 / global_rate if global_rate else 0.0
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.request_timeout = request_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._queues = {}  # chat_id -> deque[_Outgoing]
+        self._next_allowed = {}  # chat_id -> monotonic tid
+        self._global_next = 0.0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+        self._thread.start()
+
+    # --- Publikt API ----------------------------------------------------
+
+    def send_message(self, chat_id, text, parse_mode=None, reply_markup=None, coalesce=True):
+        """
+        Köar ett textmeddelande. Returnerar en Future med Telegrams svar (för sista delen).
+        Långa meddelanden delas upp automatiskt; en del vars formatering inte går att
+        stänga skickas utan parse_mode.
+        """
+        future = None
+        parts = split_message(str(text), parse_mode=parse_mode)
+        for part in parts:
+            payload = {"chat_id": chat_id, "text": part}
+            if parse_mode and (len(parts) == 1 or entities_closed(part, parse_mode)):
+                payload["parse_mode"] = parse_mode
+            if reply_markup:
+                payload["reply_markup"] = reply_markup
+            future = self._enqueue(_Outgoing(chat_id, "sendMessage", payload,
+                                             coalesce=coalesce and reply_markup is None))
+        return future
+
+    def send_document(self, chat_id, file_path, caption=None):
+        return self._send_file(chat_id, "sendDocument", "document", file_path, caption)
+
+    def send_photo(self, chat_id, file_path, caption=None):
+        return self._send_file(chat_id, "sendPhoto", "photo", file_path, caption)
+
+    def _send_file(self, chat_id, method, field, file_path, caption):
+        # Läs in filen direkt så att anroparen kan ta bort/skriva över den efteråt
+        with open(file_path, "rb") as f:
+            content = f.read()
+        payload = {"chat_id": chat_id}
+        if caption:
+            payload["caption"] = caption[:MAX_CAPTION_LENGTH]
+        files = {field: (os.path.basename(file_path), content)}
+        return self._enqueue(_Outgoing(chat_id, method, payload, files=files))
+
+    def flush(self, timeout=None):
+        """
+        Väntar tills kön är tom och inga anrop pågår. Returnerar True om kön hann tömmas.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while any(self._queues.values()) or self._in_flight:
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.5)
+        return True
+
+    def stop(self, flush_timeout=10):
+        self.flush(flush_timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        self.session.close()
+
+    def pending(self):
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    # --- Intern logik ---------------------------------------------------
+
+    def _enqueue(self, item):
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("❌ Telegram-kön är stoppad")
+            queue = self._queues.setdefault(item.chat_id, deque())
+            last = queue[-1] if queue else None
+            if last is not None and self._can_merge(last, item):
+                last.payload["text"] += "\n\n" + item.payload["text"]
+                last.futures.extend(item.futures)
+            else:
+                queue.append(item)
+            self._cond.notify_all()
+        return item.futures[0]
+
+    def _can_merge(self, last, item):
+        return (
+            last.coalesce and item.coalesce
+            and last.attempts == 0
+            and last.method == item.method == "sendMessage"
+            and last.payload.get("parse_mode") == item.payload.get("parse_mode")
+            and item.enqueued_at - last.enqueued_at <= self.coalesce_window
+            and len(last.payload["text"]) + 2 + len(item.payload["text"]) <= MAX_MESSAGE_LENGTH
+        )
+
+    def _next_ready(self, now):
+        """Returnerar (chat_id, item) som får skickas nu, annars (None, tidigaste väntetid)."""
+        wait = None
+        if now < self._global_next:
+            return None, self._global_next - now
+        for chat_id, queue in self._queues.items():
+            if not queue:
+                continue
+            item = queue[0]
+            # Ge skurar en kort stund att slås ihop innan de skickas
+            ready_at = max(
+                self._next_allowed.get(chat_id, 0.0),
+                item.not_before,
+                item.enqueued_at + (self.coalesce_window if item.coalesce else 0.0),
+            )
+            if ready_at <= now:
+                return chat_id, item
+            wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    now = time.monotonic()
+                    chat_id, ready = self._next_ready(now)
+                    if chat_id is not None:
+                        item = self._queues[chat_id].popleft()
+                        if item.attempts == 0:
+                            # Futures som anroparen avbrutit hoppas över; övriga kan inte längre avbrytas
+                            item.futures = [f for f in item.futures if f.set_running_or_notify_cancel()]
+                            if not item.futures:
+                                continue
+                        self._in_flight += 1
+                        self._next_allowed[chat_id] = now + self.per_chat_interval
+                        self._global_next = now + self.global_interval
+                        break
+                    self._cond.wait(ready)
+            try:
+                self._deliver(item)
+            except Exception as e:
+                # Ett oväntat fel får inte stoppa sändartråden – övriga meddelanden ska fram
+                logger.error(f"❌ Oväntat fel vid Telegram-leverans till {item.chat_id}: {str(e)}")
+                for future in item.futures:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _deliver(self, item):
+        url = f"{self.base_url}/bot{self.token}/{item.method}"
+        item.attempts += 1
+        retry_after = None
+        error = None
+        try:
+            if item.files:
+                data = {k: (v if isinstance(v, str) else str(v)) for k, v in item.payload.items()}
+                response = self.session.post(url, data=data, files=item.files, timeout=self.request_timeout)
+            else:
+                response = self.session.post(url, json=item.payload, timeout=self.request_timeout)
+            if response.status_code == 200:
+                result = response.json()
+                for future in item.futures:
+                    future.set_result(result)
+                return
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get("parameters", {}).get("retry_after", 1))
+                except ValueError:
+                    retry_after = 1.0
+                error = RuntimeError(f"Telegram 429: för många förfrågningar (retry_after={retry_after})")
+            elif response.status_code >= 500:
+                error = RuntimeError(f"Telegram {response.status_code}: {response.text[:200]}")
+            else:
+                # Övriga 4xx (ogiltig chatt, för långt meddelande, ...) görs inte om
+                error = RuntimeError(f"Telegram {response.status_code}: {response.text[:200]}")
+                self._fail(item, error)
+                return
+        except requests.RequestException as e:
+            error = e
+
+        if item.attempts > self.max_retries:
+            self._fail(item, error)
+            return
+        delay = retry_after if retry_after is not None else self.backoff_base * (2 ** (item.attempts - 1))
+        delay += random.uniform(0, 0.1 * delay)
+        logger.warning(f"⚠️ Telegram-anrop misslyckades ({error}); försök {item.attempts}/{self.max_retries}, ny körning om {delay:.1f}s")
+        with self._cond:
+            item.not_before = time.monotonic() + delay
+            if retry_after is not None:
+                self._next_allowed[item.chat_id] = item.not_before
+            self._queues.setdefault(item.chat_id, deque()).appendleft(item)
+            self._cond.notify_all()
+
+    def _fail(self, item, error):
+        logger.error(f"❌ Telegram {item.method} till {item.chat_id} misslyckades: {error}")
+        for future in item.futures:
+            future.set_exception(error)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_delivery_queue(token, base_url=None):
+    """
+    Returnerar den delade kön för en given bot-token (skapas vid första anropet).
+    """
+    with _queues_lock:
+        key = (token, base_url)
+        if key not in _queues:
+            _queues[key] = TelegramDeliveryQueue(token, base_url=base_url)
+        return _queues[key]
+
+
+@atexit.register
+def _flush_all_queues(timeout=30):
+    # Bakgrundstråden är en daemon – töm köerna innan processen avslutas
+    for queue in list(_queues.values()):
+        queue.flush(timeout)
+
+
+# Exempelanrop: skicka en skur mot en lokal fejkad Bot API-server
+if __name__ == "__main__":
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    logging.basicConfig(level=logging.INFO)
+    received = []
+
+    class FakeBotAPI(BaseHTTPRequestHandler):
+        calls = 0
+
+        def do_POST(self):
+            FakeBotAPI.calls += 1
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if FakeBotAPI.calls == 2:
+                status, reply = 429, {"ok": False, "parameters": {"retry_after": 1}}
+            else:
+                status, reply = 200, {"ok": True, "result": {"message_id": FakeBotAPI.calls}}
+                received.append((self.path, len(body)))
+            data = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBotAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    queue = TelegramDeliveryQueue("TEST", base_url=f"http://127.0.0.1:{server.server_port}")
+    for i in range(20):
+        queue.send_message("123", f"Signal {i}")
+    queue.send_message("123", "x" * 10_000)
+    queue.flush(timeout=30)
+    queue.stop()
+    server.shutdown()
+    print(f"📨 {FakeBotAPI.calls} anrop, {len(received)} levererade: {received}")
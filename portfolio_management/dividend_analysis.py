@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="dividend_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_dividend_yield(portfolio):
@@ -16,10 +16,10 @@ def analyze_dividend_yield(portfolio):
             by="dividend_yield", ascending=False
         ).head(5)
 
-        logging.info("✅ Utdelningsanalys genomförd.")
+        logger.info("✅ Utdelningsanalys genomförd.")
         return high_yield_stocks[["symbol", "dividend_yield"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid utdelningsanalys: {str(e)}")
+        logger.error(f"❌ Fel vid utdelningsanalys: {str(e)}")
         return None
 
 
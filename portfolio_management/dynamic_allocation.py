@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="dynamic_allocation.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def dynamic_allocation(portfolio, market_trends):
@@ -18,10 +18,10 @@ def dynamic_allocation(portfolio, market_trends):
         portfolio["new_allocation"] = np.clip(
             portfolio["allocation"] + portfolio["adjustment"], 0, 1
         )
-        logging.info("✅ Dynamisk allokering uppdaterad.")
+        logger.info("✅ Dynamisk allokering uppdaterad.")
         return portfolio
     except Exception as e:
-        logging.error(f"❌ Fel vid dynamisk allokering: {str(e)}")
+        logger.error(f"❌ Fel vid dynamisk allokering: {str(e)}")
         return portfolio
 
 
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="etf_fund_comparison.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def compare_etfs_funds(funds):
@@ -14,12 +14,12 @@ def compare_etfs_funds(funds):
         funds["risk_adjusted_return"] = funds["return"] / funds["volatility"]
         best_funds = funds.sort_values(by="risk_adjusted_return", ascending=False)
 
-        logging.info("✅ ETF- och fondjämförelse genomförd.")
+        logger.info("✅ ETF- och fondjämförelse genomförd.")
         return best_funds[
             ["symbol", "return", "volatility", "expense_ratio", "risk_adjusted_return"]
         ]
     except Exception as e:
-        logging.error(f"❌ Fel vid fondjämförelse: {str(e)}")
+        logger.error(f"❌ Fel vid fondjämförelse: {str(e)}")
         return None
 
 
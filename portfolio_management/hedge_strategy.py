@@ -2,11 +2,7 @@ import logging
 from typing import Union, Dict
 
 # Konfigurera loggning
-logging.basicConfig(
-    filename="hedge_strategy.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
 
 def hedge_strategy(risk_level: Union[float, int, None]) -> Dict[str, Union[str, float]]:
     """
@@ -21,15 +17,15 @@ def hedge_strategy(risk_level: Union[float, int, None]) -> Dict[str, Union[str,
     try:
         # Grundläggande validering
         if risk_level is None:
-            logging.warning("⚠️ Ingen risknivå angiven.")
+            logger.warning("⚠️ Ingen risknivå angiven.")
             return {"strategy": "Ingen strategi", "reason": "Risknivå saknas"}
 
         if not isinstance(risk_level, (float, int)):
-            logging.warning("⚠️ Ogiltig datatyp för risknivå.")
+            logger.warning("⚠️ Ogiltig datatyp för risknivå.")
             return {"strategy": "Ingen strategi", "reason": "Ogiltig datatyp"}
 
         if not (0.0 <= risk_level <= 1.0):
-            logging.warning("⚠️ Risknivå utanför tillåtet intervall.")
+            logger.warning("⚠️ Risknivå utanför tillåtet intervall.")
             return {"strategy": "Ingen strategi", "reason": "Risknivå utanför intervall"}
 
         # Strategiutvärdering
@@ -40,7 +36,7 @@ def hedge_strategy(risk_level: Union[float, int, None]) -> Dict[str, Union[str,
         else:
             hedge = "Behåll en neutral balans mellan aktier och säkra tillgångar."
 
-        logging.info(f"✅ Hedge-strategi vald för risknivå {risk_level:.2f}: {hedge}")
+        logger.info(f"✅ Hedge-strategi vald för risknivå {risk_level:.2f}: {hedge}")
         return {
             "strategy": hedge,
             "risk_level": round(risk_level, 2),
@@ -48,7 +44,7 @@ def hedge_strategy(risk_level: Union[float, int, None]) -> Dict[str, Union[str,
         }
 
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av hedge-strategi: {str(e)}")
+        logger.error(f"❌ Fel vid analys av hedge-strategi: {str(e)}")
         return {
             "strategy": "Ingen strategi",
             "error": str(e),
@@ -1,124 +1,52 @@
-import re
-import yfinance as yf
 import logging
+import pandas as pd
 from portfolio_management.portfolio_google_sheets import fetch_all_portfolios
+from portfolio_management.valuation_engine import get_valuation_engine, is_cash
 
 logger = logging.getLogger(__name__)
 
-HEADER_STRINGS = {
-    "Aktie/Fond/ETF", "Ticker", "Antal", "Kurs (SEK)", "Värde (SEK)",
-    "Typ", "Kategori", "Konto"
-}
-
-def parse_float_str(value_str):
-    """
-    Rensar en sträng från icke-numeriska tecken (förutom punkt och minus)
-    och försöker konvertera till float. T.ex. "$263.55" -> 263.55
-    """
-    s = str(value_str).replace(",", ".")
-    # Behåll endast siffror, punkt och minus
-    s = re.sub(r"[^0-9\.\-]", "", s.strip())
-    if s == "" or s == "." or s == "-" or s == "-.":
-        return 0.0
-    try:
-        return float(s)
-    except:
-        return 0.0
-
-def get_live_stock_info(symbol):
-    """
-    Hämtar livepris och valuta för en aktie med hjälp av yfinance.
-    Om symbol innehåller 'NASDAQ:' tar vi bort den delen.
+def generate_ai_recommendations(valued=None, price_targets=None):
     """
-    try:
-        # Rensa bort eventuellt 'NASDAQ:'-prefix om det finns
-        if "NASDAQ:" in symbol:
-            symbol = symbol.split(":")[-1].strip()
+    Hämtar portföljdata från Google Sheets via fetch_all_portfolios och genererar AI-rekommendationer.
+    Alla konton värderas i ett svep (valuation_engine): talkolumner tolkas vektoriserat,
+    livekurser hämtas en gång per ticker och omräknas till SEK. En redan värderad
+    tabell (t.ex. från daglig pipelines valuation-steg) kan skickas in som `valued`.
 
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        price = info.get("regularMarketPrice")
-        currency = info.get("currency")
-        return price, currency
-    except Exception as e:
-        logger.error(f"Fel vid hämtning av live data för {symbol}: {str(e)}")
-        return None, None
+    price_targets är riktpriser från forecast_service (index ticker, kolumner 3m/6m/12m)
+    och fyller riktkurs-kolumnerna; saknas de blir de "N/A".
 
-def generate_ai_recommendations():
-    """
-    Hämtar portföljdata från Google Sheets via fetch_all_portfolios och genererar AI-rekommendationer.
-    Loggar ut debug-info för varje post så att du kan se exakt vad som händer.
-    
+    pris och riktkurser anges i innehavets valuta (valuta), total_värde alltid i SEK.
     Returnerar en dict: { konto: [ { ... }, ... ], ... }
     """
-    portfolios = fetch_all_portfolios()  
     recommendations = {}
-
-    for account, stocks in portfolios.items():
-        logger.info(f"Konto '{account}' har {len(stocks)} rader i Google Sheets.")
-        recommendations[account] = []
-        for stock in stocks:
-            # Logga hela stock-raden för felsökning
-            logger.info(f"[DEBUG] Rå data för konto '{account}': {stock}")
-
-            # Om stock inte är en dictionary – kolla om det är en header och hoppa över
-            if not isinstance(stock, dict):
-                if isinstance(stock, str) and stock.strip() in HEADER_STRINGS:
-                    logger.info(f"[DEBUG] Hoppar över header-sträng '{stock}' för konto '{account}'.")
-                    continue
-                else:
-                    logger.error(f"Felaktigt format på stockdata för konto '{account}': {stock}")
-                    continue
-
-            # 1) Hämta name och symbol
-            name = stock.get("name") or stock.get("Namn") or stock.get("Aktie/Fond/ETF") or "Okänt"
-            symbol = stock.get("symbol") or stock.get("Ticker") or ""
-
-            # 2) Hämta antal och kurs
-            antal_str = stock.get("antal") or stock.get("Antal") or "0"
-            kurs_str = stock.get("kurs") or stock.get("Kurs (SEK)") or "0"
-
-            antal = parse_float_str(antal_str)
-            kurs = parse_float_str(kurs_str)
-
-            logger.info(f"[DEBUG] Konto '{account}', rad: name={name}, symbol={symbol}, antal={antal}, kurs={kurs}")
-
-            # 3) Hämta live data (pris, valuta) om symbol finns
-            if symbol:
-                price, currency = get_live_stock_info(symbol)
-            else:
-                price, currency = None, None
-
-            # Om live data saknas, använd 'kurs'
-            if price is None:
-                price = kurs
-            if currency is None:
-                currency = "N/A"
-
-            # 4) Räkna ut totalvärde
-            total_value = price * antal
-            logger.info(f"[DEBUG] => Beräknat pris={price}, valuta={currency}, total_värde={total_value}")
-
-            # 5) Bygg rekommendationspost
-            rec = {
-                "namn": name,
-                "kategori": "Aktie",
-                "symbol": symbol,
-                "antal": antal,
-                "pris": price,
-                "valuta": currency,
-                "total_värde": total_value,
-                "rekommendation": "Behåll",
-                "motivering": "Baserat på aktuell data rekommenderas att behålla.",
-                "riktkurs_3m": "N/A",
-                "riktkurs_6m": "N/A",
-                "riktkurs_12m": "N/A",
-                "pe_ratio": "N/A",
-                "rsi": "N/A",
-                "riskbedomning": "N/A",
-                "historisk_prestanda": "N/A"
-            }
-            recommendations[account].append(rec)
+    if valued is None:
+        portfolios = fetch_all_portfolios()
+        valued = get_valuation_engine().value_portfolios(portfolios)
+        recommendations = {account: [] for account in portfolios}
+    valued = valued[~is_cash(valued)]
+
+    recs = pd.DataFrame({
+        "namn": valued["namn"].where(valued["namn"] != "", "Okänt"),
+        "kategori": "Aktie",
+        "symbol": valued["ticker"],
+        "antal": valued["antal"],
+        "pris": valued["price"],
+        "valuta": valued["currency"],
+        "total_värde": valued["market_value_sek"],
+        "rekommendation": "Behåll",
+        "motivering": "Baserat på aktuell data rekommenderas att behålla.",
+    })
+    for column in ("riktkurs_3m", "riktkurs_6m", "riktkurs_12m", "pe_ratio", "rsi",
+                   "riskbedomning", "historisk_prestanda"):
+        recs[column] = "N/A"
+    if price_targets is not None and len(price_targets):
+        for label in ("3m", "6m", "12m"):
+            if label in price_targets.columns:
+                target = recs["symbol"].map(pd.to_numeric(price_targets[label], errors="coerce")).round(2)
+                recs[f"riktkurs_{label}"] = target.astype(object).where(target.notna(), "N/A")
+    for account, group in recs.groupby(valued["konto"], sort=False):
+        recommendations[account] = group.to_dict("records")
+        logger.info(f"Konto '{account}': {len(group)} innehav, {group['total_värde'].sum():,.0f} SEK")
 
     return recommendations
 
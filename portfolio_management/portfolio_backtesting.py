@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="portfolio_backtesting.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def backtest_portfolio(portfolio, historical_data):
@@ -15,10 +15,10 @@ def backtest_portfolio(portfolio, historical_data):
         portfolio_returns = historical_data.pct_change().dot(portfolio["weights"])
         cumulative_returns = (1 + portfolio_returns).cumprod()
 
-        logging.info("✅ Portföljstrategi backtestad.")
+        logger.info("✅ Portföljstrategi backtestad.")
         return cumulative_returns
     except Exception as e:
-        logging.error(f"❌ Fel vid backtestning: {str(e)}")
+        logger.error(f"❌ Fel vid backtestning: {str(e)}")
         return None
 
 
@@ -10,7 +10,6 @@ import pandas as pd
 from oauth2client.service_account import ServiceAccountCredentials
 
 # Konfigurera loggning
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # Ladda .env och verifiera att den finns
@@ -4,7 +4,7 @@ import pandas as pd
 from scipy.optimize import minimize
 
 # Konfigurera loggning
-logging.basicConfig(filename="portfolio_optimization.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 def calculate_sharpe_ratio(returns: pd.DataFrame, weights: np.ndarray, risk_free_rate: float = 0.0) -> float:
     """
@@ -91,7 +91,7 @@ def optimize_portfolio(
         elif method == "max_sortino":
             objective = negative_sortino
         else:
-            logging.warning(f"Okänd metod '{method}', fallback: min_volatility.")
+            logger.warning(f"Okänd metod '{method}', fallback: min_volatility.")
             objective = portfolio_volatility
 
         # Vikt-summan = 1
@@ -109,15 +109,15 @@ def optimize_portfolio(
         )
 
         if not result.success:
-            logging.warning(f"Optimeringsvarning: {result.message}")
+            logger.warning(f"Optimeringsvarning: {result.message}")
 
         optimized_weights = result.x
         optimized_portfolio = dict(zip(returns.columns, optimized_weights))
 
-        logging.info(f"✅ Portföljoptimering klar (metod={method}).")
+        logger.info(f"✅ Portföljoptimering klar (metod={method}).")
         return optimized_portfolio
     except Exception as e:
-        logging.error(f"❌ Fel vid portföljoptimering: {str(e)}")
+        logger.error(f"❌ Fel vid portföljoptimering: {str(e)}")
         return {}
 
 # Exempelanrop
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="portfolio_risk_management.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def assess_portfolio_risk(portfolio_data):
@@ -21,10 +21,10 @@ def assess_portfolio_risk(portfolio_data):
             "LOW RISK",
         )
 
-        logging.info("✅ Portföljriskanalys genomförd.")
+        logger.info("✅ Portföljriskanalys genomförd.")
         return portfolio_data[["symbol", "volatility", "risk_level"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid riskanalys: {str(e)}")
+        logger.error(f"❌ Fel vid riskanalys: {str(e)}")
         return None
 
 
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="position_sizing.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_position_sizing(portfolio, risk_per_trade=0.02, total_capital=100000):
@@ -15,10 +15,10 @@ def calculate_position_sizing(portfolio, risk_per_trade=0.02, total_capital=1000
             "stop_loss"
         ]
 
-        logging.info("✅ Position sizing beräknad.")
+        logger.info("✅ Position sizing beräknad.")
         return portfolio[["symbol", "position_size"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av position sizing: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av position sizing: {str(e)}")
         return None
 
 
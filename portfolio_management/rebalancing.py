@@ -4,7 +4,6 @@ import pandas as pd
 from fpdf import FPDF
 
 # Konfigurera loggning
-logging.basicConfig(filename="rebalancing.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def rebalancing(portfolio: Union[pd.DataFrame, dict]) -> pd.DataFrame:
@@ -0,0 +1,348 @@
+"""
+rebalancing_optimizer.py
+
+Kostnadsmedveten rebalansering över alla konton.
+
+Givet nuvarande innehav (t.ex. från valuation_engine) och målvikter från optimerarna
+(markowitz, optimize_portfolio, rebalancing m.fl.) löses ett kvadratiskt problem
+(QP) för köp/sälj per position:
+
+    minimera  (w - w*)' Σ (w - w*)  +  c' |w - w0|
+    så att    0 <= sälj <= innehav,  köp >= 0          (ingen blankning)
+              sum |w - w0| <= max_turnover             (omsättningstak)
+              nettoköp + kostnader <= kontots kassa     (per konto, ingen flytt mellan konton)
+              w per symbol <= max_weight               (valfritt)
+
+där w är hushållets vikter per symbol (summerat över konton) och Σ kovariansen
+(standard: diagonal). Problemet löses vektoriserat med ADMM (samma iteration som
+OSQP) i NumPy. Därefter avrundas affärerna till hela poster (lot size) och både
+kassavillkoret och omsättningstaket kontrolleras igen, så att orderlistan alltid går
+att genomföra och aldrig omsätter mer än max_turnover.
+
+Exempel:
+    holdings = get_valuation_engine().value_portfolios(fetch_all_portfolios())
+    plan = optimize_rebalance(holdings, {"AAPL": 0.2, "MSFT": 0.2, "INVE-B.ST": 0.6},
+                              cost_bps=15, max_turnover=0.25, cash={"Alice": 5000})
+    print(format_orders_message(plan))
+"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VARIANCE = 0.04  # ca 20 % årlig volatilitet per innehav när ingen kovarians anges
+
+
+def solve_qp(P, q, A, l, u, rho=0.1, sigma=1e-6, alpha=1.6, max_iter=5000, eps_abs=1e-7, eps_rel=1e-6,
+             check_every=25):
+    """
+    Löser  min 1/2 x'Px + q'x  s.t.  l <= Ax <= u  med ADMM (OSQP-iterationen), tät algebra.
+    Returnerar (x, info) där info innehåller status, iterationer och residualer.
+    """
+    n = P.shape[0]
+    K = P + sigma * np.eye(n) + rho * (A.T @ A)
+    K_inv = np.linalg.inv(K)
+    x = np.zeros(n)
+    z = np.clip(np.zeros(A.shape[0]), l, u)
+    y = np.zeros(A.shape[0])
+    status = "max_iter"
+    r_prim = r_dual = np.inf
+    for it in range(1, max_iter + 1):
+        x_tilde = K_inv @ (sigma * x - q + A.T @ (rho * z - y))
+        z_tilde = A @ x_tilde
+        x = alpha * x_tilde + (1 - alpha) * x
+        z_relaxed = alpha * z_tilde + (1 - alpha) * z
+        z_new = np.clip(z_relaxed + y / rho, l, u)
+        y = y + rho * (z_relaxed - z_new)
+        z = z_new
+        if it % check_every == 0:
+            Ax = A @ x
+            Px = P @ x
+            ATy = A.T @ y
+            r_prim = np.abs(Ax - z).max(initial=0.0)
+            r_dual = np.abs(Px + q + ATy).max(initial=0.0)
+            eps_prim = eps_abs + eps_rel * max(np.abs(Ax).max(initial=0.0), np.abs(z).max(initial=0.0))
+            eps_dual = eps_abs + eps_rel * max(np.abs(Px).max(initial=0.0), np.abs(ATy).max(initial=0.0),
+                                               np.abs(q).max(initial=0.0))
+            if r_prim <= eps_prim and r_dual <= eps_dual:
+                status = "solved"
+                break
+    return x, {"status": status, "iterations": it, "primal_residual": float(r_prim), "dual_residual": float(r_dual)}
+
+
+def _covariance(cov, symbols):
+    """Kovarians (årlig) för symbolerna; saknade symboler får DEFAULT_VARIANCE på diagonalen."""
+    n = len(symbols)
+    if cov is None:
+        return np.eye(n) * DEFAULT_VARIANCE
+    if isinstance(cov, pd.DataFrame) and not cov.index.equals(cov.columns):
+        cov = cov.cov() * 252  # avkastningstabell (dagar x symboler)
+    cov = cov.reindex(index=symbols, columns=symbols)
+    sigma = cov.to_numpy(dtype=np.float64, copy=True)
+    missing = np.isnan(np.diag(sigma))
+    sigma[np.isnan(sigma)] = 0.0
+    sigma[missing, missing] = DEFAULT_VARIANCE
+    return sigma
+
+
+def _round_to_lots(trade_shares, held, lots):
+    """Sälj avrundas till närmaste post (högst hela innehavet), köp avrundas nedåt."""
+    buys = np.floor(np.maximum(trade_shares, 0) / lots) * lots
+    sells = np.minimum(np.round(np.maximum(-trade_shares, 0) / lots) * lots, held)
+    # Blir bara en rest kvar efter sälj (mindre än en post) säljs hela innehavet
+    sells = np.where((held - sells > 0) & (held - sells < lots) & (sells > 0), held, sells)
+    return buys - sells
+
+
+def optimize_rebalance(holdings, target_weights, cov=None, cost_bps=10.0, cash=None, max_turnover=None,
+                       min_cash_weight=0.0, lot_sizes=1, min_trade_value=0.0, max_weight=None,
+                       prices=None, buy_account=None, risk_aversion=1.0):
+    """
+    Tar fram en genomförbar orderlista för alla konton.
+
+    Parametrar:
+      holdings: DataFrame med konto, ticker, antal och market_value_sek (från valuation_engine),
+                alternativt kolumnerna symbol och value.
+      target_weights: dict/Series symbol -> målvikt. Symboler som saknas här behålls som de är.
+      cov: kovariansmatris (symbol x symbol, årlig) eller avkastningstabell; None = diagonal.
+      cost_bps: transaktionskostnad i baspunkter (skalär eller Series per symbol).
+      cash: dict konto -> kassa i SEK (standard 0, dvs. köp finansieras av sälj i samma konto).
+      max_turnover: tak för sum |Δw| (andel av totalt värde).
+      min_cash_weight: minsta kassa som andel av varje kontos värde.
+      lot_sizes: postens storlek (skalär eller Series per symbol).
+      min_trade_value: ordrar under detta värde i SEK tas bort.
+      prices: Series symbol -> pris i SEK för målsymboler som inte ägs ännu.
+      buy_account: konto där nya symboler köps (standard: kontot med mest kassa).
+
+    Returnerar dict med "orders", "allocation" (kompatibel med rapportens rebalanseringstabell)
+    och "summary".
+    """
+    start = time.perf_counter()
+    df = holdings.rename(columns={"ticker": "symbol", "market_value_sek": "value"}).copy()
+    if "konto" not in df.columns:
+        df["konto"] = "Portfölj"
+    if "antal" not in df.columns:
+        df["antal"] = np.nan
+    df = df[df["symbol"].astype(str) != ""]
+    df = df.groupby(["konto", "symbol"], as_index=False, sort=False).agg(antal=("antal", "sum"), value=("value", "sum"))
+    targets = pd.Series(target_weights, dtype=np.float64).clip(lower=0.0)
+    cash = {account: float(value) for account, value in (cash or {}).items()}
+    accounts = list(dict.fromkeys(list(df["konto"]) + list(cash)))
+    account_cash = pd.Series({a: cash.get(a, 0.0) for a in accounts})
+
+    # Nya målsymboler (som inte ägs någonstans) får en rad i köpkontot om priset är känt
+    prices = pd.Series(prices if prices is not None else {}, dtype=np.float64)
+    new_symbols = [s for s in targets.index if targets[s] > 0 and s not in set(df["symbol"])]
+    if new_symbols:
+        account = buy_account or (account_cash.idxmax() if account_cash.max() > 0 else df.groupby("konto")["value"].sum().idxmax())
+        unknown = [s for s in new_symbols if not prices.get(s, 0) > 0]
+        if unknown:
+            logger.warning(f"⚠️ Pris saknas för nya målsymboler {unknown}, de hoppas över")
+        new_rows = pd.DataFrame({"konto": account, "symbol": [s for s in new_symbols if s not in unknown],
+                                 "antal": 0.0, "value": 0.0})
+        df = pd.concat([df, new_rows], ignore_index=True)
+
+    total_value = float(df["value"].sum() + account_cash.sum())
+    if total_value <= 0:
+        raise ValueError("❌ Portföljen har inget värde att rebalansera")
+
+    # Pris per aktie i SEK: från innehavet (värde / antal) eller från prices
+    price_sek = (df["value"] / df["antal"].where(df["antal"] > 0)).fillna(df["symbol"].map(prices))
+    held = df["antal"].fillna(0.0).to_numpy()
+    w0 = df["value"].to_numpy() / total_value
+    m = len(df)
+
+    symbols = pd.Index(pd.unique(df["symbol"]))
+    sym_idx = symbols.get_indexer(df["symbol"])
+    G = np.zeros((len(symbols), m))
+    G[sym_idx, np.arange(m)] = 1.0
+    W0 = G @ w0
+    managed = symbols.isin(targets.index)
+    # Målvikterna skalas till den del av portföljen som förvaltas (ej förvaltade symboler ligger still)
+    investable = 1.0 - W0[~managed].sum() - min_cash_weight * (total_value - account_cash.sum()) / total_value
+    target_vec = targets.reindex(symbols).fillna(0.0).to_numpy()
+    if target_vec.sum() > 0:
+        target_vec = target_vec / target_vec.sum() * max(investable, 0.0)
+    target_vec = np.where(managed, target_vec, W0)
+
+    Sigma = _covariance(cov, list(symbols)) * risk_aversion
+    costs = pd.Series(cost_bps, index=df.index, dtype=np.float64) if np.isscalar(cost_bps) \
+        else df["symbol"].map(cost_bps).fillna(10.0)
+    c = costs.to_numpy() * 1e-4
+
+    # Variabler x = [köp (m), sälj (m)] i viktenheter
+    K = np.hstack([G, -G])
+    d = target_vec - W0
+    P = 2 * K.T @ Sigma @ K
+    q = -2 * K.T @ Sigma @ d + np.concatenate([c, c])
+
+    row_managed = managed[sym_idx]
+    tradable = row_managed & price_sek.notna().to_numpy()
+    buy_ub = np.where(tradable, np.inf, 0.0)
+    sell_ub = np.where(tradable, w0, 0.0)
+    blocks = [np.eye(2 * m)]
+    lower = [np.zeros(2 * m)]
+    upper = [np.concatenate([buy_ub, sell_ub])]
+    if max_turnover is not None:
+        blocks.append(np.ones((1, 2 * m)))
+        lower.append([-np.inf])
+        upper.append([max_turnover])
+    # Kassa per konto: köp - sälj + kostnader <= (kassa - minsta kassa) / totalvärde
+    account_idx = pd.Index(accounts).get_indexer(df["konto"])
+    acc = np.zeros((len(accounts), m))
+    acc[account_idx, np.arange(m)] = 1.0
+    account_value = acc @ df["value"].to_numpy() + account_cash.to_numpy()
+    blocks.append(np.hstack([acc * (1 + c), acc * (c - 1)]))
+    lower.append(np.full(len(accounts), -np.inf))
+    upper.append((account_cash.to_numpy() - min_cash_weight * account_value) / total_value)
+    if max_weight is not None:
+        blocks.append(K[managed])
+        lower.append(np.full(int(managed.sum()), -np.inf))
+        upper.append(np.maximum(max_weight - W0[managed], -W0[managed]))
+    A = np.vstack(blocks)
+    x, info = solve_qp(P, q, A, np.concatenate(lower), np.concatenate(upper))
+    if info["status"] != "solved":
+        logger.warning(f"⚠️ Rebalanseringsproblemet konvergerade inte helt: {info}")
+    trade_w = np.clip(x[:m], 0, None) - np.clip(x[m:], 0, None)
+
+    # Avrunda till poster och rensa bort små ordrar
+    lots = (pd.Series(lot_sizes, index=df.index, dtype=np.float64) if np.isscalar(lot_sizes)
+            else df["symbol"].map(lot_sizes).fillna(1.0)).to_numpy()
+    px = price_sek.fillna(0.0).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trade_shares = np.where(px > 0, trade_w * total_value / px, 0.0)
+    shares = _round_to_lots(trade_shares, held, lots)
+    shares[np.abs(shares) * px < max(min_trade_value, 1e-9)] = 0.0
+
+    # Säkerställ kassavillkoret efter avrundning: minska köp (minst prioriterade först) tills det går ihop
+    budgets = account_cash.to_numpy() - min_cash_weight * account_value
+
+    def spend(rows):
+        return float(np.sum(shares[rows] * px[rows] + np.abs(shares[rows]) * px[rows] * c[rows]))
+
+    for a, account in enumerate(accounts):
+        rows = np.flatnonzero(account_idx == a)
+        if spend(rows) <= budgets[a] + 1e-6:
+            continue
+        buy_rows = rows[shares[rows] > 0]
+        priority = (target_vec[sym_idx[buy_rows]] - (G @ (w0 + shares * px / total_value))[sym_idx[buy_rows]])
+        for i in buy_rows[np.argsort(priority)]:
+            while shares[i] > 0 and spend(rows) > budgets[a] + 1e-6:
+                shares[i] = max(shares[i] - lots[i], 0.0)
+            if spend(rows) <= budgets[a] + 1e-6:
+                break
+
+    # Omsättningstaket kontrolleras igen: avrundning uppåt av sälj kan ha dragit över det.
+    # Köp trimmas först (frigör kassa), därefter sälj så länge kontots kassavillkor håller.
+    if max_turnover is not None:
+        excess = float(np.sum(np.abs(shares) * px)) - max_turnover * total_value
+        need = np.abs(target_vec - W0)[sym_idx]  # minst behövda affärer trimmas först
+        for side in (1, -1):
+            for i in np.argsort(need):
+                rows = np.flatnonzero(account_idx == account_idx[i])
+                while excess > 1e-6 and np.sign(shares[i]) == side:
+                    step = min(lots[i], abs(shares[i]))
+                    shares[i] -= side * step
+                    if side < 0 and spend(rows) > budgets[account_idx[i]] + 1e-6:
+                        shares[i] += side * step  # mindre sälj skulle bryta kassavillkoret
+                        break
+                    excess -= step * px[i]
+                if excess <= 1e-6:
+                    break
+        # Små restköp efter trimningen tas bort (att ta bort köp påverkar aldrig kassavillkoret)
+        shares[(shares > 0) & (shares * px < max(min_trade_value, 1e-9))] = 0.0
+
+    trade_value = shares * px
+    W1 = G @ (w0 + trade_value / total_value)
+    orders = pd.DataFrame({
+        "konto": df["konto"].to_numpy(),
+        "symbol": df["symbol"].to_numpy(),
+        "side": np.where(shares > 0, "BUY", "SELL"),
+        "quantity": np.abs(shares),
+        "price_sek": px,
+        "value_sek": np.abs(trade_value),
+        "cost_sek": np.abs(trade_value) * c,
+        "weight_before": W0[sym_idx],
+        "weight_after": W1[sym_idx],
+        "target_weight": target_vec[sym_idx],
+    })[shares != 0]
+    orders = orders.sort_values(["konto", "side", "value_sek"], ascending=[True, False, False]).reset_index(drop=True)
+
+    allocation = pd.DataFrame({
+        "symbol": symbols, "allocation": W0, "new_allocation": W1, "target": target_vec,
+    })
+    allocation["adjustment"] = allocation["new_allocation"] - allocation["allocation"]
+    allocation = allocation[managed].reset_index(drop=True)
+
+    te_before = float(np.sqrt(max(d @ Sigma @ d, 0.0)))
+    te_after = float(np.sqrt(max((target_vec - W1) @ Sigma @ (target_vec - W1), 0.0)))
+    summary = {
+        "num_orders": len(orders),
+        "turnover": float(orders["value_sek"].sum() / total_value),
+        "estimated_cost_sek": float(orders["cost_sek"].sum()),
+        "tracking_error_before": te_before,
+        "tracking_error_after": te_after,
+        "total_value_sek": total_value,
+        "solver": info,
+        "solve_ms": (time.perf_counter() - start) * 1000,
+    }
+    logger.info(f"✅ Rebalansering: {len(orders)} ordrar, omsättning {summary['turnover']:.1%}, "
+                f"TE {te_before:.2%} → {te_after:.2%} ({summary['solve_ms']:.0f} ms, {m} positioner)")
+    return {"orders": orders, "allocation": allocation, "summary": summary}
+
+
+def _format_sek(values):
+    return values.map("{:,.0f}".format).str.replace(",", " ", regex=False)
+
+
+def format_order_lines(orders: pd.DataFrame) -> list:
+    """Rader "Alice: KÖP 10 AAPL (≈ 19 800 kr)" för rapport och Telegram (vektoriserat)."""
+    if orders is None or orders.empty:
+        return []
+    side = orders["side"].map({"BUY": "KÖP", "SELL": "SÄLJ"})
+    quantity = orders["quantity"].map("{:g}".format)
+    value = _format_sek(orders["value_sek"])
+    return (orders["konto"] + ": " + side + " " + quantity + " " + orders["symbol"] + " (≈ " + value + " kr)").tolist()
+
+
+def format_orders_message(plan: dict, max_lines: int = 40) -> str:
+    """Telegram-meddelande med orderlistan och sammanfattning."""
+    summary = plan["summary"]
+    lines = format_order_lines(plan["orders"])
+    if not lines:
+        return "⚖️ *Rebalansering:* inga ordrar behövs."
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... och {len(lines) - max_lines} till"]
+    return (
+        "⚖️ *Rebalansering – ordrar:*\n" + "\n".join(lines) + "\n"
+        f"Omsättning: {summary['turnover']:.1%}, "
+        f"beräknad kostnad: {_format_sek(pd.Series([summary['estimated_cost_sek']])).iloc[0]} kr\n"
+        f"Tracking error: {summary['tracking_error_before']:.2%} → {summary['tracking_error_after']:.2%}"
+    )
+
+
+# Exempelanrop: 300 positioner fördelade på fyra konton
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    accounts = ["Alice", "Valter", "Pension", "Investeringskonto"]
+    symbols = [f"SYM{i}" for i in range(120)]
+    n = 300
+    holdings = pd.DataFrame({
+        "konto": rng.choice(accounts, n),
+        "ticker": rng.choice(symbols, n),
+        "antal": rng.integers(1, 200, n).astype(float),
+    })
+    price = pd.Series(rng.uniform(50, 800, len(symbols)), index=symbols)
+    holdings["market_value_sek"] = holdings["antal"] * holdings["ticker"].map(price)
+    targets = pd.Series(rng.dirichlet(np.ones(len(symbols))), index=symbols)
+    returns = pd.DataFrame(rng.normal(0, 0.01, (500, len(symbols))), columns=symbols)
+
+    plan = optimize_rebalance(holdings, targets, cov=returns, cost_bps=10, max_turnover=0.3,
+                              cash={"Investeringskonto": 50_000}, lot_sizes=1, min_trade_value=500,
+                              prices=price)
+    print(format_orders_message(plan, max_lines=10))
+    print({k: v for k, v in plan["summary"].items() if k != "solver"}, plan["summary"]["solver"])
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="sector_exposure.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_sector_exposure(portfolio):
@@ -12,10 +12,10 @@ def analyze_sector_exposure(portfolio):
     """
     try:
         sector_exposure = portfolio.groupby("sector")["allocation"].sum()
-        logging.info("✅ Sektorexponering analyserad.")
+        logger.info("✅ Sektorexponering analyserad.")
         return sector_exposure
     except Exception as e:
-        logging.error(f"❌ Fel vid analys av sektorexponering: {str(e)}")
+        logger.error(f"❌ Fel vid analys av sektorexponering: {str(e)}")
         return None
 
 
@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="tax_optimization.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def optimize_tax_strategies(portfolio):
@@ -14,10 +14,10 @@ def optimize_tax_strategies(portfolio):
         portfolio["tax_impact"] = portfolio["gains"] * portfolio["tax_rate"]
         portfolio_sorted = portfolio.sort_values(by="tax_impact", ascending=True)
 
-        logging.info("✅ Skatteoptimering genomförd.")
+        logger.info("✅ Skatteoptimering genomförd.")
         return portfolio_sorted[["symbol", "gains", "tax_impact"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid skatteanalys: {str(e)}")
+        logger.error(f"❌ Fel vid skatteanalys: {str(e)}")
         return None
 
 
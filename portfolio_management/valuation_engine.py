@@ -0,0 +1,342 @@
+"""
+valuation_engine.py
+
+Värdering av alla konton i SEK i ett svep.
+
+- Kalkylarkets talkolumner ("1 234,50 kr", "$263.55", "1.234,5") tolkas en gång med
+  vektoriserade strängoperationer i pandas i stället för regex/float() per rad.
+- Livekurser (pris + valuta) hämtas en gång per unik ticker och cachas en kort stund.
+- Växelkurser till SEK hämtas via fetch_forex_data och cachas (FXCache); korskurser
+  mellan valutor fås ur samma vektor som en matris.
+- Innehav från alla konton slås ihop till en tabell och marknadsvärdet i SEK räknas
+  med en join mot kurser och växelkurser.
+
+Exempel:
+    engine = get_valuation_engine()
+    holdings = engine.value_portfolios(fetch_all_portfolios())
+    print(engine.summarize(holdings))
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "SEK"
+FX_TTL = 15 * 60
+QUOTE_TTL = 5 * 60
+
+# Kalkylarkets rubriker -> interna kolumnnamn
+SHEET_COLUMNS = {
+    "Aktie/Fond/ETF": "namn",
+    "Ticker": "ticker",
+    "Antal": "antal",
+    "Kurs (SEK)": "kurs",
+    "Värde (SEK)": "värde",
+    "Typ": "typ",
+    "Kategori": "kategori",
+    "Konto": "konto",
+}
+HOLDING_COLUMNS = ["konto", "namn", "ticker", "antal", "kurs", "värde", "typ", "kategori"]
+# Rader vars typ eller kategori matchar räknas som kontots kassa (värde i SEK)
+CASH_PATTERN = r"(?i)^\s*(?:kassa|likvid|cash)"
+
+# Valutor som noteras i minsta enhet (t.ex. pence på LSE): valuta -> (huvudvaluta, faktor)
+MINOR_UNITS = {"GBp": ("GBP", 0.01), "GBX": ("GBP", 0.01), "ZAc": ("ZAR", 0.01), "ILA": ("ILS", 0.01)}
+
+
+def parse_number_series(values: pd.Series) -> pd.Series:
+    """
+    Tolkar tal i svenskt eller engelskt format vektoriserat: "1 234,50 kr" -> 1234.5,
+    "$263.55" -> 263.55, "1.234,5" -> 1234.5, "1,234.5" -> 1234.5. Ogiltiga värden blir NaN.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(np.float64)
+    # Kalkylark har många upprepade värden: tolka varje unik sträng en gång
+    codes, uniques = pd.factorize(values.astype(str))
+    text = pd.Series(uniques, dtype=object).str.replace(r"[^0-9,.\-]", "", regex=True)
+    # Finns både punkt och komma är den som kommer först tusentalsavgränsare (ovanligt, så bara för de raderna)
+    mixed = text.str.contains(r",.*\.|\..*,", regex=True)
+    if mixed.any():
+        sub = text[mixed]
+        swedish = sub.str.rfind(",") > sub.str.rfind(".")
+        text[mixed] = sub.str.replace(".", "", regex=False).where(swedish, sub.str.replace(",", "", regex=False))
+    parsed = pd.to_numeric(text.str.replace(",", ".", regex=False), errors="coerce").to_numpy(dtype=np.float64)
+    result = np.full(len(codes), np.nan)
+    valid = codes >= 0
+    result[valid] = parsed[codes[valid]]
+    return pd.Series(result, index=values.index)
+
+
+def clean_tickers(values: pd.Series) -> pd.Series:
+    """Tar bort börsprefix som "NASDAQ:" och blanksteg."""
+    return values.astype(str).str.strip().str.split(":").str[-1].str.strip()
+
+
+def is_cash(holdings: pd.DataFrame) -> pd.Series:
+    """Mask för kassarader (typ eller kategori "Kassa", "Likvida medel", "Cash")."""
+    return (holdings["typ"].str.contains(CASH_PATTERN, regex=True)
+            | holdings["kategori"].str.contains(CASH_PATTERN, regex=True))
+
+
+def cash_balances(holdings: pd.DataFrame) -> pd.Series:
+    """Kassa i SEK per konto ur kassaraderna (värde-kolumnen)."""
+    cash = holdings[is_cash(holdings)]
+    return cash.groupby("konto", sort=True)["värde"].sum()
+
+
+def target_weights(frame: pd.DataFrame, column: str = "new_allocation") -> pd.Series:
+    """
+    Målvikter per rensad ticker ur ett kalkylarksutdrag (t.ex. rebalancing()). Symbolerna
+    rensas med clean_tickers så att de matchar värderingens tickers, och kassarader
+    (Typ/Kategori enligt CASH_PATTERN) och rader utan ticker tas bort.
+    """
+    frame = frame.rename(columns=SHEET_COLUMNS)
+    cash = pd.Series(False, index=frame.index)
+    for name in ("typ", "kategori"):
+        if name in frame.columns:
+            cash |= frame[name].fillna("").astype(str).str.contains(CASH_PATTERN, regex=True)
+    symbols = clean_tickers(frame["symbol"].fillna(""))
+    keep = ~cash & (symbols != "") & (symbols.str.lower() != "nan")
+    weights = pd.to_numeric(frame.loc[keep, column], errors="coerce").fillna(0.0)
+    return weights.groupby(symbols[keep]).sum()
+
+
+def normalize_holdings(portfolios: dict) -> pd.DataFrame:
+    """
+    Slår ihop konton (dict konto -> DataFrame eller lista av dicts/rader) till en tabell
+    med kolumnerna HOLDING_COLUMNS och numeriska antal/kurs/värde.
+    """
+    frames = []
+    for account, data in portfolios.items():
+        if isinstance(data, pd.DataFrame):
+            df = data
+        elif data and isinstance(data[0], (list, tuple)):
+            # Råa rader från get_all_values(): första raden är rubriker
+            df = pd.DataFrame(data[1:], columns=data[0]) if len(data) > 1 else pd.DataFrame()
+        else:
+            df = pd.DataFrame(list(data or []))
+        if df.empty:
+            continue
+        df = df.rename(columns=SHEET_COLUMNS).reindex(columns=HOLDING_COLUMNS)
+        df["konto"] = df["konto"].where(df["konto"].notna() & (df["konto"].astype(str).str.strip() != ""), account)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=HOLDING_COLUMNS)
+
+    holdings = pd.concat(frames, ignore_index=True)
+    for column in ("antal", "kurs", "värde"):
+        holdings[column] = parse_number_series(holdings[column]).fillna(0.0)
+    for column in ("namn", "ticker", "typ", "kategori"):
+        holdings[column] = holdings[column].fillna("").astype(str).str.strip()
+    holdings["ticker"] = clean_tickers(holdings["ticker"])
+    # Rader utan ticker och innehav (t.ex. summeringsrader) tas bort, kassarader behålls
+    keep = (holdings["ticker"] != "") | (holdings["antal"] != 0) | is_cash(holdings)
+    return holdings[keep].reset_index(drop=True)
+
+
+def fetch_live_quotes(tickers, max_workers=8) -> pd.DataFrame:
+    """
+    Hämtar senaste pris och valuta per ticker från yfinance (parallellt, I/O-bundet).
+    Returnerar DataFrame med index ticker och kolumnerna price, currency.
+    """
+    import yfinance as yf
+
+    def _quote(ticker):
+        try:
+            info = yf.Ticker(ticker).fast_info
+            return ticker, info.get("lastPrice"), info.get("currency")
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte hämta livekurs för {ticker}: {str(e)}")
+            return ticker, None, None
+
+    tickers = list(tickers)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as executor:
+        rows = list(executor.map(_quote, tickers))
+    return pd.DataFrame(rows, columns=["ticker", "price", "currency"]).set_index("ticker")
+
+
+def fetch_fx_to_sek(currency):
+    """Senaste växelkurs currency -> SEK via fetch_forex_data, eller None."""
+    from data_collection.market_data import fetch_forex_data
+
+    history = fetch_forex_data(currency, BASE_CURRENCY, period="5d").get("history")
+    if history is None or history.empty:
+        return None
+    return float(history["Close"].iloc[-1])
+
+
+class FXCache:
+    """
+    Växelkurser till basvalutan med TTL. En kurs hämtas bara när den saknas eller är för gammal.
+    """
+
+    def __init__(self, fetcher=fetch_fx_to_sek, ttl=FX_TTL, base=BASE_CURRENCY):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.base = base
+        self._rates = {base: (1.0, float("inf"))}
+        self._lock = threading.Lock()
+
+    def set_rate(self, currency, rate):
+        with self._lock:
+            self._rates[currency] = (float(rate), time.monotonic() + self.ttl)
+
+    def rates(self, currencies) -> pd.Series:
+        """
+        Returnerar växelkurser (valuta -> basvaluta) som Series. Saknade kurser blir NaN.
+        """
+        now = time.monotonic()
+        wanted = [c for c in dict.fromkeys(currencies) if isinstance(c, str) and c]
+        with self._lock:
+            stale = [c for c in wanted if self._rates.get(c, (None, 0))[1] <= now]
+        for currency in stale:
+            try:
+                rate = self.fetcher(currency)
+            except Exception as e:
+                logger.error(f"❌ Fel vid hämtning av växelkurs {currency}/{self.base}: {str(e)}")
+                rate = None
+            if rate is None:
+                logger.warning(f"⚠️ Ingen växelkurs för {currency}/{self.base}")
+                continue
+            self.set_rate(currency, rate)
+        with self._lock:
+            return pd.Series({c: self._rates[c][0] if c in self._rates else np.nan for c in wanted}, dtype=np.float64)
+
+    def matrix(self, currencies) -> pd.DataFrame:
+        """Korskursmatris: matrix.loc[a, b] = antal b för en a."""
+        rates = self.rates(currencies)
+        return pd.DataFrame(np.outer(rates.values, 1.0 / rates.values), index=rates.index, columns=rates.index)
+
+
+class ValuationEngine:
+    """
+    Värderar innehav från alla konton i SEK med cachade livekurser och växelkurser.
+    """
+
+    def __init__(self, quote_fetcher=fetch_live_quotes, fx=None, quote_ttl=QUOTE_TTL):
+        self.quote_fetcher = quote_fetcher
+        self.fx = fx or FXCache()
+        self.quote_ttl = quote_ttl
+        self._quotes = pd.DataFrame(columns=["price", "currency", "expires"])
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    def quotes(self, tickers) -> pd.DataFrame:
+        """Livekurser för tickers; bara saknade eller utgångna hämtas."""
+        tickers = pd.Index(pd.unique(pd.Series(list(tickers), dtype=object)))
+        tickers = tickers[tickers != ""]
+        now = time.monotonic()
+        with self._lock:
+            cached = self._quotes.reindex(tickers)
+            missing = tickers[~(cached["expires"] > now).to_numpy(dtype=bool)]
+        if len(missing):
+            fresh = self.quote_fetcher(list(missing))
+            fresh = fresh.reindex(columns=["price", "currency"])
+            fresh["expires"] = now + self.quote_ttl
+            with self._lock:
+                self._quotes = pd.concat([self._quotes.drop(fresh.index, errors="ignore"), fresh])
+                cached = self._quotes.reindex(tickers)
+        return cached[["price", "currency"]]
+
+    def value_portfolios(self, portfolios, live=True) -> pd.DataFrame:
+        """
+        Returnerar alla innehav med kolumnerna price, currency, fx_rate och market_value_sek.
+        Utan livekurs används kalkylarkets kurs (SEK).
+        """
+        start = time.perf_counter()
+        holdings = portfolios if isinstance(portfolios, pd.DataFrame) else normalize_holdings(portfolios)
+        self.timings["parse_s"] = time.perf_counter() - start
+
+        if live and len(holdings):
+            quotes = self.quotes(holdings["ticker"])
+            price = holdings["ticker"].map(quotes["price"]).astype(np.float64)
+            currency = holdings["ticker"].map(quotes["currency"])
+        else:
+            price = pd.Series(np.nan, index=holdings.index)
+            currency = pd.Series(None, index=holdings.index, dtype=object)
+        self.timings["quotes_s"] = time.perf_counter() - start
+
+        has_live = price.notna() & (price > 0)
+        price = price.where(has_live, holdings["kurs"])
+        currency = currency.where(has_live & currency.notna(), BASE_CURRENCY).astype(str)
+        # Kurser i minsta enhet (pence m.fl.) räknas om till huvudvalutan
+        minor = currency.map({k: v[1] for k, v in MINOR_UNITS.items()}).fillna(1.0)
+        currency = currency.replace({k: v[0] for k, v in MINOR_UNITS.items()})
+        price = price * minor
+
+        rates = self.fx.rates(currency.unique())
+        fx_rate = currency.map(rates).astype(np.float64)
+
+        valued = holdings.copy()
+        valued["price"] = price
+        valued["currency"] = currency
+        valued["live"] = has_live
+        valued["fx_rate"] = fx_rate
+        valued["market_value_sek"] = valued["antal"] * price * fx_rate
+        cash = is_cash(valued)
+        valued.loc[cash, "market_value_sek"] = valued.loc[cash, "värde"]
+        missing_fx = fx_rate.isna() & ~cash
+        if missing_fx.any():
+            # Utan växelkurs faller vi tillbaka på kalkylarkets värde i SEK
+            valued.loc[missing_fx, "market_value_sek"] = valued.loc[missing_fx, "värde"]
+            logger.warning(f"⚠️ Växelkurs saknas för {sorted(currency[missing_fx].unique())}, "
+                           f"använder kalkylarkets värde för {int(missing_fx.sum())} rader")
+        self.timings["total_s"] = time.perf_counter() - start
+        logger.info(f"✅ Värderade {len(valued)} innehav i {valued['konto'].nunique()} konton "
+                    f"på {self.timings['total_s'] * 1000:.0f} ms")
+        return valued
+
+    @staticmethod
+    def summarize(valued: pd.DataFrame) -> pd.DataFrame:
+        """Marknadsvärde per konto i SEK med andel av totalen."""
+        summary = valued.groupby("konto", sort=True).agg(
+            innehav=("ticker", "size"),
+            market_value_sek=("market_value_sek", "sum"),
+            sheet_value_sek=("värde", "sum"),
+        )
+        total = summary["market_value_sek"].sum()
+        summary["andel"] = summary["market_value_sek"] / total if total else 0.0
+        return summary
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_valuation_engine():
+    """
+    Returnerar den gemensamma värderingsmotorn (och därmed dess kurs- och valutacache).
+    """
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = ValuationEngine()
+        return _default_engine
+
+
+# Exempelanrop (utan nätverk, se scripts/benchmark_valuation.py för benchmark)
+if __name__ == "__main__":
+    portfolios = {
+        "Alice": pd.DataFrame({
+            "Aktie/Fond/ETF": ["Tesla", "Investor B", "BP"],
+            "Ticker": ["NASDAQ:TSLA", "INVE-B.ST", "BP.L"],
+            "Antal": ["6", "10", "100"],
+            "Kurs (SEK)": ["2 635,50", "280,10", "55,00"],
+            "Värde (SEK)": ["15 813,00 kr", "2 801,00 kr", "5 500,00 kr"],
+        }),
+        "Pension": [["Aktie/Fond/ETF", "Ticker", "Antal", "Kurs (SEK)", "Värde (SEK)"],
+                    ["Global Indexfond", "", "12,5", "310,25", "3 878,13 kr"]],
+    }
+    quotes = pd.DataFrame({"price": [250.0, 281.0, 480.0], "currency": ["USD", "SEK", "GBp"]},
+                          index=["TSLA", "INVE-B.ST", "BP.L"])
+    engine = ValuationEngine(quote_fetcher=lambda tickers: quotes.reindex(tickers),
+                             fx=FXCache(fetcher={"USD": 10.5, "GBP": 13.4}.get))
+    valued = engine.value_portfolios(portfolios)
+    print(valued[["konto", "ticker", "antal", "price", "currency", "fx_rate", "market_value_sek"]])
+    print(engine.summarize(valued))
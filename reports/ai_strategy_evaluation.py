@@ -2,7 +2,6 @@ import logging
 from typing import Dict, Any
 
 # Konfigurera loggning
-logging.basicConfig(filename="ai_strategy_evaluation.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def evaluate_ai_strategy(strategy_data: Dict[str, Any]) -> str:
@@ -1,11 +1,11 @@
 import logging
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from typing import Optional
 
+from utils.chart_service import get_chart_service
+
 # Konfigurera loggning
-logging.basicConfig(filename="benchmark_comparison.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def calculate_cumulative_returns(price_series: pd.Series) -> Optional[pd.Series]:
@@ -30,16 +30,19 @@ def plot_benchmark_comparison(
     Jämför AI-strategins prestanda med ett benchmarkindex.
     """
     try:
-        plt.figure(figsize=(10, 5))
-        plt.plot(strategy_returns, label="AI-Strategi", color="blue")
-        plt.plot(benchmark_returns, label=f"{benchmark_name}", color="red", linestyle="--")
-        plt.axhline(y=1, color="gray", linestyle="--", label="Startvärde")
-        plt.legend()
-        plt.title(f"Strategins Avkastning vs {benchmark_name}")
-        plt.xlabel("Tidsperiod")
-        plt.ylabel("Kumulativ Avkastning")
-        plt.savefig(output_file)
-        plt.close()
+        get_chart_service().render_lines(
+            "benchmark_comparison",
+            {"AI-Strategi": strategy_returns, benchmark_name: benchmark_returns},
+            title=f"Strategins Avkastning vs {benchmark_name}",
+            output_file=output_file,
+            styles={
+                "AI-Strategi": {"color": "blue"},
+                benchmark_name: {"color": "red", "linestyle": "--"},
+            },
+            hlines=[(1, {"color": "gray", "linestyle": "--", "label": "Startvärde"})],
+            xlabel="Tidsperiod",
+            ylabel="Kumulativ Avkastning",
+        )
         logger.info("✅ Benchmark-jämförelse genererad.")
     except Exception as e:
         logger.error(f"❌ Fel vid generering av benchmark-jämförelse: {str(e)}")
@@ -0,0 +1,346 @@
+"""
+daily_pipeline.py
+
+Morgonrutinen uttryckt som en DAG av namngivna steg:
+
+    fetch (portföljer, valuta, nyheter/sentiment, makro)
+      → features (portföljnormalisering, värdering i SEK, avkastning, volatilitet)
+      → signals (momentum, entry/exit)
+      → risk (VaR, Monte Carlo, rebalansering, hedge) → ordrar (kostnadsoptimerad rebalansering)
+      → volatilitet (GARCH per innehav, O(1)-uppdatering av cachat tillstånd, riskvarningar)
+      → förklaringar (SHAP top-k för den sparade modellens senaste prediktioner)
+      → report (PDF)
+      → notify (Telegram)
+
+Nyheter, makro och valuta hämtas parallellt. Samma pipeline-instans används av
+main() vid uppstart och av det schemalagda daily_ai_report-jobbet, så mellanresultat
+(normaliserad portfölj, valutahistorik, rebalansering, signaler) beräknas en gång
+och återanvänds så länge indata är oförändrade.
+"""
+
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ai_decision_engine.forecast_service import fetch_price_history, get_forecast_service
+from ai_decision_engine.optimal_entry_exit import optimal_entry_exit_strategy, generate_entry_exit_dataframe, plot_entry_exit_signals
+from ai_decision_engine.strategy_generation import generate_momentum_strategy
+from ai_learning.explainable_ai import get_explanation_service, load_model
+from ai_learning.hyperparameter_tuning import load_training_data, prepare_features
+from data_collection.market_data import fetch_forex_data
+from data_collection.sentiment_analysis import analyze_sentiment
+from data_collection.macro_data import fetch_macro_data
+from data_collection.news_analysis import fetch_and_analyze_news, get_recent_headlines
+from data_processing.normalization import min_max_normalization
+from data_processing.volatility_analysis import calculate_daily_volatility
+from live_trading.live_risk_alerts import format_volatility_alerts, volatility_risk_alerts
+from live_trading.trade_ledger import get_trade_ledger
+from portfolio_management.rebalancing import rebalancing
+from portfolio_management.rebalancing_optimizer import optimize_rebalance, format_orders_message
+from portfolio_management.hedge_strategy import hedge_strategy
+from portfolio_management.portfolio_data_loader import fetch_all_portfolios
+from portfolio_management.valuation_engine import (
+    cash_balances, get_valuation_engine, is_cash, parse_number_series, target_weights,
+)
+from reports.generate_report import generate_pdf_report
+from notifications.telegram_bot import send_ai_recommendations, send_pdf_report_to_telegram, send_telegram_message
+from risk_management.value_at_risk import calculate_var
+from risk_management.monte_carlo_simulation import monte_carlo_simulation_normal as monte_carlo_simulation
+from risk_management.volatility_engine import get_volatility_engine
+from utils.pipeline import Pipeline
+
+logger = logging.getLogger(__name__)
+
+TIMING_REPORT_DIR = "logs"
+EXPLAIN_MODEL_PATH = "best_model.pkl"
+EXPLAIN_DATA_PATH = os.path.join("data", "training_data.csv")
+
+
+def parse_sek_values(values: pd.Series) -> pd.Series:
+    """
+    Tolkar värdesträngar som "1 234,50 kr" till float (vektoriserat). Ogiltiga värden blir 0.0.
+    """
+    return parse_number_series(values).fillna(0.0)
+
+
+def selected_account(portfolio_data: dict, account: str = "Investeringskonto"):
+    """
+    Kontot som förvaltas: account om det har innehav, annars första icke-tomma kontot.
+    """
+    if account in portfolio_data and not portfolio_data[account].empty:
+        return account
+    return next((name for name, df in portfolio_data.items() if not df.empty), None)
+
+
+def select_portfolio(portfolio_data: dict, account: str = "Investeringskonto") -> pd.DataFrame:
+    """
+    Väljer kontot (eller första icke-tomma kontot) och säkerställer kolumnerna 'symbol' och 'allocation'.
+    """
+    name = selected_account(portfolio_data, account)
+    portfolio_df = portfolio_data[name].copy() if name is not None else pd.DataFrame()
+
+    if not (("symbol" in portfolio_df.columns) and ("allocation" in portfolio_df.columns)):
+        if "Ticker" in portfolio_df.columns:
+            portfolio_df["symbol"] = portfolio_df["Ticker"]
+        if "Värde (SEK)" in portfolio_df.columns:
+            portfolio_df["value_numeric"] = parse_sek_values(portfolio_df["Värde (SEK)"])
+            total_value = portfolio_df["value_numeric"].sum()
+            portfolio_df["allocation"] = portfolio_df["value_numeric"] / total_value if total_value > 0 else 0.0
+    return portfolio_df
+
+
+# --- Steg: fetch -------------------------------------------------------
+
+def _fetch_portfolios():
+    return fetch_all_portfolios()
+
+
+def _fetch_forex(base="USD", quote="SEK", period="1mo"):
+    df = fetch_forex_data(base, quote, period=period).get("history")
+    if df is None or df.empty:
+        raise ValueError("Ingen valutahistorik hittad")
+    return df
+
+
+def _fetch_news_sentiment(limit=15):
+    headlines = get_recent_headlines(limit=limit)
+    return {
+        "sentiment": analyze_sentiment(texts=headlines),
+        "news_sentiment": fetch_and_analyze_news("stock market"),
+    }
+
+
+def _fetch_macro():
+    return fetch_macro_data()
+
+
+# --- Steg: features ----------------------------------------------------
+
+def _portfolio_features(fetch_portfolios, account="Investeringskonto"):
+    return select_portfolio(fetch_portfolios, account=account)
+
+
+def _valuation(fetch_portfolios, fetch_forex):
+    engine = get_valuation_engine()
+    # Valutastegets senaste USD/SEK återanvänds i växelkurscachen i stället för ett nytt anrop
+    engine.fx.set_rate("USD", float(fetch_forex["Close"].iloc[-1]))
+    holdings = engine.value_portfolios(fetch_portfolios)
+    return {"holdings": holdings, "summary": engine.summarize(holdings)}
+
+
+def _price_history(valuation, period="5y"):
+    # Kurshistoriken för innehaven delas av riktpris- och volatilitetsstegen
+    tickers = valuation["holdings"]["ticker"].dropna().astype(str)
+    tickers = tickers[tickers != ""].unique().tolist()
+    try:
+        return fetch_price_history(tickers, period=period)
+    except Exception as e:
+        logger.error(f"❌ Kunde inte hämta kurshistorik för innehaven: {str(e)}")
+        return None
+
+
+def _price_targets(price_history, time_budget=20 * 60):
+    # Prognosmodellerna cachas per datahash; bara innehav vars kurshistorik ändrats anpassas om
+    if not price_history:
+        return None
+    return get_forecast_service().predict(price_history, time_budget=time_budget)
+
+
+def _volatility(price_history, horizon=5, volatility_threshold=0.05):
+    # GARCH-tillståndet stegas fram i O(1) per ny dag; omanpassning bara när det är inaktuellt
+    if not price_history:
+        return None
+    try:
+        get_volatility_engine().update(price_history)
+        forecast = get_volatility_engine().forecast(list(price_history), horizon=horizon)
+        return {"forecast": forecast, "alerts": volatility_risk_alerts(forecast, volatility_threshold)}
+    except Exception as e:
+        logger.error(f"❌ Kunde inte uppdatera volatilitetsprognosen: {str(e)}")
+        return None
+
+
+def _price_features(fetch_forex):
+    prices = fetch_forex["Close"].values.astype(np.float32)
+    return {
+        "prices": prices,
+        "returns": np.diff(prices) / prices[:-1],
+        "normalized": min_max_normalization(prices),
+        "volatility": calculate_daily_volatility(prices),
+    }
+
+
+# --- Steg: signals -----------------------------------------------------
+
+def _signals(fetch_forex, price_features, news_sentiment, fetch_macro):
+    close = fetch_forex["Close"]
+    df_input = pd.DataFrame({"close": price_features["normalized"]})
+    strategy = generate_momentum_strategy(df_input, news_sentiment["sentiment"], fetch_macro)
+    optimal_entry = optimal_entry_exit_strategy({"prices": close})
+    logger.info(f"Momentum-strategi: {strategy}")
+    logger.info(f"Optimal entry/exit: {optimal_entry}")
+    return {
+        "momentum_strategy": strategy,
+        "optimal_entry": optimal_entry,
+        "entry_exit_df": generate_entry_exit_dataframe(close),
+    }
+
+
+# --- Steg: risk --------------------------------------------------------
+
+def _risk(price_features, portfolio_features):
+    var = calculate_var(price_features["returns"])
+    monte_carlo = monte_carlo_simulation(100000, 0.07, 0.2)
+    rebalanced = None
+    hedge = None
+    if "symbol" in portfolio_features.columns and "allocation" in portfolio_features.columns:
+        rebalanced = rebalancing(portfolio_features.copy())
+        hedge = hedge_strategy(rebalanced)
+    else:
+        logger.error("Portföljdata saknar nödvändiga kolumner ('symbol', 'allocation') för rebalansering.")
+    return {"var": var, "monte_carlo": monte_carlo, "rebalanced": rebalanced, "hedge": hedge}
+
+
+def _rebalance_orders(fetch_portfolios, valuation, risk, account="Investeringskonto", cost_bps=10.0,
+                      max_turnover=0.25, min_trade_value=500.0):
+    # Målvikterna gäller det förvaltade kontot (samma som portfolio_features), så bara
+    # dess innehav och kassa rebalanseras; övriga konton lämnas orörda
+    rebalanced = risk.get("rebalanced")
+    if rebalanced is None or "new_allocation" not in rebalanced.columns:
+        return None
+    try:
+        konto = selected_account(fetch_portfolios, account)
+        holdings = valuation["holdings"]
+        holdings = holdings[holdings["konto"] == konto]
+        if holdings.empty:
+            logger.warning(f"⚠️ Inga värderade innehav i kontot {konto} att rebalansera")
+            return None
+        cash = cash_balances(holdings).to_dict()
+        # Kalkylarkets tickers ("NASDAQ:TSLA") rensas till värderingens nycklar ("TSLA")
+        targets = target_weights(rebalanced)
+        return optimize_rebalance(holdings[~is_cash(holdings)], targets, cost_bps=cost_bps, cash=cash,
+                                  max_turnover=max_turnover, min_trade_value=min_trade_value)
+    except Exception as e:
+        logger.error(f"❌ Kunde inte optimera rebalanseringen: {str(e)}")
+        return None
+
+
+# --- Steg: förklaringar --------------------------------------------------
+
+def _explanations(model_path=EXPLAIN_MODEL_PATH, data_path=EXPLAIN_DATA_PATH, rows=15, top_k=3):
+    # Bakgrunden dras seedat ur hela träningsdatan, så SHAP-cachen träffar mellan körningar
+    if not os.path.exists(model_path) or not os.path.exists(data_path):
+        return None
+    try:
+        model = load_model(model_path)
+        data = load_training_data(data_path)
+        if model is None or data is None:
+            return None
+        X, _ = prepare_features(data)
+        labels = data.loc[X.index, [c for c in ("symbol", "date") if c in data.columns]]
+        latest = X.tail(rows)
+        if not labels.empty:
+            latest = latest.set_axis(labels.loc[latest.index].astype(str).agg(" ".join, axis=1))
+        service = get_explanation_service()
+        return service.explain(model, latest, top_k=top_k, background=service.background(X))
+    except Exception as e:
+        logger.error(f"❌ Kunde inte förklara modellens prediktioner: {str(e)}")
+        return None
+
+
+# --- Steg: report & notify ---------------------------------------------
+
+def _report(risk, rebalance_orders=None, explanations=None, trade_log=None, summary_days=30):
+    # Läser liggarens föraggregerade dagssammanfattning i stället för att räkna om från råa affärer
+    ledger_summary = None
+    try:
+        ledger_summary = get_trade_ledger().summary(days=summary_days)
+    except Exception as e:
+        logger.warning(f"⚠️ Kunde inte läsa handelsliggaren: {str(e)}")
+    return generate_pdf_report(trade_log, rebalanced_df=risk["rebalanced"], ledger_summary=ledger_summary,
+                               rebalance_plan=rebalance_orders, explanations=explanations)
+
+
+def _notify(report, signals, valuation=None, price_targets=None, rebalance_orders=None, volatility=None,
+            symbol="USDSEK"):
+    optimal_entry = signals.get("optimal_entry") or {}
+    entry_exit_df = signals["entry_exit_df"]
+    if optimal_entry.get("signal") and entry_exit_df is not None and not entry_exit_df.empty:
+        get_trade_ledger().record_signal(symbol, optimal_entry["signal"], float(entry_exit_df["Price"].iloc[-1]),
+                                         strategy="bollinger_entry_exit")
+    # Rekommendationerna byggs på valuation-stegets innehav i stället för en ny värdering,
+    # med riktkurserna från price_targets
+    send_ai_recommendations(valuation["holdings"] if valuation else None, price_targets)
+    if rebalance_orders is not None and not rebalance_orders["orders"].empty:
+        send_telegram_message(format_orders_message(rebalance_orders))
+    volatility_message = format_volatility_alerts(volatility["alerts"]) if volatility else None
+    if volatility_message:
+        send_telegram_message(volatility_message)
+    if report:
+        send_pdf_report_to_telegram(report)
+    if entry_exit_df is not None and not entry_exit_df.empty:
+        # plot_entry_exit_signals sparar grafen och skickar den till Telegram
+        plot_entry_exit_signals(entry_exit_df)
+    return True
+
+
+def build_daily_pipeline(max_workers=4, account="Investeringskonto") -> Pipeline:
+    """
+    Bygger morgonens DAG. Hämtsteg cachas med TTL, övriga steg på indatahash.
+    Rapport- och notifieringssteg har sidoeffekter och cachas aldrig.
+    """
+    pipeline = Pipeline("daily", max_workers=max_workers)
+    pipeline.add_stage("fetch_portfolios", _fetch_portfolios, ttl=15 * 60)
+    pipeline.add_stage("fetch_forex", _fetch_forex, ttl=15 * 60)
+    pipeline.add_stage("news_sentiment", _fetch_news_sentiment, ttl=30 * 60)
+    pipeline.add_stage("fetch_macro", _fetch_macro, ttl=60 * 60)
+    pipeline.add_stage("portfolio_features", _portfolio_features, depends_on=["fetch_portfolios"], params={"account": account})
+    pipeline.add_stage("price_features", _price_features, depends_on=["fetch_forex"])
+    pipeline.add_stage("valuation", _valuation, depends_on=["fetch_portfolios", "fetch_forex"], ttl=5 * 60)
+    pipeline.add_stage("price_history", _price_history, depends_on=["valuation"], ttl=12 * 60 * 60)
+    pipeline.add_stage("price_targets", _price_targets, depends_on=["price_history"], ttl=12 * 60 * 60)
+    pipeline.add_stage("volatility", _volatility, depends_on=["price_history"], ttl=12 * 60 * 60)
+    pipeline.add_stage("signals", _signals, depends_on=["fetch_forex", "price_features", "news_sentiment", "fetch_macro"])
+    pipeline.add_stage("risk", _risk, depends_on=["price_features", "portfolio_features"])
+    pipeline.add_stage("rebalance_orders", _rebalance_orders, depends_on=["fetch_portfolios", "valuation", "risk"],
+                       params={"account": account})
+    pipeline.add_stage("explanations", _explanations, cacheable=False)
+    pipeline.add_stage("report", _report, depends_on=["risk", "rebalance_orders", "explanations"], cacheable=False)
+    pipeline.add_stage("notify", _notify,
+                       depends_on=["report", "signals", "valuation", "price_targets", "rebalance_orders", "volatility"],
+                       cacheable=False)
+    return pipeline
+
+
+_daily_pipeline = None
+
+
+def get_daily_pipeline() -> Pipeline:
+    """
+    Returnerar den delade pipeline-instansen (och därmed dess resultatcache).
+    """
+    global _daily_pipeline
+    if _daily_pipeline is None:
+        _daily_pipeline = build_daily_pipeline()
+    return _daily_pipeline
+
+
+def run_daily_pipeline(targets=None, export_timings=True) -> dict:
+    """
+    Kör morgonens pipeline (hela eller fram till `targets`) och sparar tidsrapporten som CSV.
+    """
+    pipeline = get_daily_pipeline()
+    results = pipeline.run(targets=targets)
+    logger.info("⏱️ Stegtider:\n" + pipeline.format_timing_report())
+    if export_timings:
+        os.makedirs(TIMING_REPORT_DIR, exist_ok=True)
+        path = os.path.join(TIMING_REPORT_DIR, f"daily_pipeline_timings_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        pipeline.export_timing_report(path)
+    return results
+
+
+if __name__ == "__main__":
+    results = run_daily_pipeline(targets=["risk", "signals"])
+    print(get_daily_pipeline().format_timing_report())
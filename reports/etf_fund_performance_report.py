@@ -2,7 +2,6 @@ import logging
 from typing import Dict, Any, Optional
 
 # Konfigurera loggning
-logging.basicConfig(filename="etf_fund_performance_report.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def generate_etf_fund_performance_report(fund_data: Dict[str, Dict[str, Any]]) -> Optional[str]:
@@ -4,48 +4,35 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
 import os
 import logging
-import matplotlib.pyplot as plt
 import pandas as pd
 from fpdf import FPDF
 from datetime import datetime
 import time
 from typing import Optional
 
+from reports.report_builder import (
+    ReportBuilder,
+    format_rebalancing_lines,
+    render_allocation_chart,
+    render_performance_chart,
+)
+
 # Exempelimporter från projektet – se till att dessa moduler finns
-from portfolio_management.rebalancing import add_rebalancing_section_to_pdf
+from ai_learning.explainable_ai import format_explanation_lines
+from portfolio_management.rebalancing import add_rebalancing_section_to_pdf, rebalancing
+from portfolio_management.rebalancing_optimizer import format_order_lines
 from portfolio_management.portfolio_ai_analysis import generate_ai_recommendations, suggest_new_investments
-from portfolio_management.portfolio_google_sheets import fetch_all_portfolios
+from portfolio_management.portfolio_data_loader import fetch_all_portfolios
 
 # Konfigurera loggning
-current_dir = os.path.dirname(os.path.abspath(__file__))
-log_file = os.path.join(current_dir, "generate_report.log")
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-fh = logging.FileHandler(log_file)
-fh.setLevel(logging.INFO)
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-fh.setFormatter(formatter)
-ch.setFormatter(formatter)
-logger.addHandler(fh)
-logger.addHandler(ch)
 
 def create_performance_chart(trade_log: pd.DataFrame, output_file: str) -> None:
     try:
         if "return" not in trade_log.columns:
             raise ValueError("Kolumnen 'return' saknas i trade_log")
-        trade_log["Cumulative Returns"] = (1 + trade_log["return"]).cumprod()
-        plt.figure(figsize=(10, 5))
-        plt.plot(trade_log["Cumulative Returns"], label="Portfoljutveckling", color="blue")
-        plt.axhline(y=1, color="gray", linestyle="--", label="Startvarde")
-        plt.legend()
-        plt.title("Handelsstrategins Prestanda")
-        plt.xlabel("Handel")
-        plt.ylabel("Avkastning")
-        plt.tight_layout()
-        plt.savefig(output_file)
-        plt.close()
+        with open(output_file, "wb") as f:
+            f.write(render_performance_chart(trade_log["return"].values))
         logger.info("✅ Prestandadiagram genererat.")
     except Exception as e:
         logger.error(f"❌ Fel vid skapande av prestandadiagram: {str(e)}")
@@ -94,12 +81,7 @@ def add_rebalancing_section(pdf: FPDF, rebalanced_df: pd.DataFrame) -> None:
     if rebalanced_df.empty or "symbol" not in rebalanced_df.columns:
         pdf.multi_cell(avail_width, 8, "Ingen rebalansering kunde visas.")
         return
-    for _, row in rebalanced_df.iterrows():
-        symbol = row.get("symbol", "")
-        old_allocation = f"{row.get('allocation', 0) * 100:.1f}%" if "allocation" in row else "-"
-        new_allocation = f"{row.get('new_allocation', 0) * 100:.1f}%"
-        adjustment = f"{row.get('adjustment', 0) * 100:+.1f}%" if "adjustment" in row else "-"
-        pdf.multi_cell(avail_width, 8, f"- {symbol}: {old_allocation} -> {new_allocation} ({adjustment})")
+    pdf.multi_cell(avail_width, 8, "\n".join(format_rebalancing_lines(rebalanced_df)))
     pdf.ln(5)
 
 def add_sentiment_adjustment_section(pdf: FPDF, adjusted_assets: dict) -> None:
@@ -117,6 +99,8 @@ def add_sentiment_adjustment_section(pdf: FPDF, adjusted_assets: dict) -> None:
     pdf.ln(4)
 
 def cleanup_old_reports(folder: str = "reports", days_old: int = 14) -> None:
+    if not os.path.isdir(folder):
+        return
     cutoff = time.time() - days_old * 86400
     for file in os.listdir(folder):
         path = os.path.join(folder, file)
@@ -133,7 +117,17 @@ def generate_pdf_report(trade_log: Optional[pd.DataFrame] = None,
                         rl_backtest_result: Optional[float] = None,
                         adjusted_assets: Optional[dict] = None,
                         latest_signal: Optional[dict] = None,
-                        rebalanced_df: Optional[pd.DataFrame] = None) -> Optional[str]:
+                        rebalanced_df: Optional[pd.DataFrame] = None,
+                        ledger_summary: Optional[dict] = None,
+                        rebalance_plan: Optional[dict] = None,
+                        explanations: Optional[pd.DataFrame] = None) -> Optional[str]:
+    """
+    Bygger dagsrapporten. ledger_summary är en föraggregerad sammanfattning från
+    live_trading.trade_ledger (TradeLedger.summary) och används när trade_log saknas.
+    rebalance_plan kommer från portfolio_management.rebalancing_optimizer och ersätter
+    rebalanced_df med den kostnadsoptimerade allokeringen plus orderlistan.
+    explanations är top-k-förklaringar från ai_learning.explainable_ai (ExplanationService.explain).
+    """
     try:
         today = datetime.now().strftime("%Y-%m-%d")
         if filename is None:
@@ -141,80 +135,164 @@ def generate_pdf_report(trade_log: Optional[pd.DataFrame] = None,
 
         cleanup_old_reports()
 
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-
-        # Ange sökväg till fontfiler (i projektets rotmapp, i mappen fonts)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        font_dir = os.path.join(os.path.dirname(current_dir), "fonts")
-        regular_font = os.path.join(font_dir, "DejaVuSans.ttf")
-        bold_font = os.path.join(font_dir, "DejaVuSans-Bold.ttf")
-        italic_font = os.path.join(font_dir, "DejaVuSans-Oblique.ttf")
-        pdf.add_font("DejaVu", "", regular_font, uni=True)
-        pdf.add_font("DejaVu", "B", bold_font, uni=True)
-        pdf.add_font("DejaVu", "I", italic_font, uni=True)
-        pdf.set_font("DejaVu", "", 12)
-
+        builder = ReportBuilder()
         logo_path = "logo.png"
         if os.path.exists(logo_path):
-            pdf.image(logo_path, x=10, y=8, w=30)
-
-        pdf.set_font("DejaVu", "B", 16)
-        pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, "AI Trading Report", ln=True, align="C")
-        pdf.set_font("DejaVu", "", 12)
-        pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, f"Dagens datum: {today}", ln=True, align="C")
-        pdf.ln(10)
-
-        if trade_log is not None and not trade_log.empty:
-            pdf.set_font("DejaVu", "", 12)
-            pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, f"Antal Affärer: {len(trade_log)}", ln=True)
-            pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, f"Total Avkastning: {trade_log['return'].sum():.2%}", ln=True)
-            pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, f"Win Rate: {(trade_log['return'] > 0).mean():.2%}", ln=True)
-            chart_file = os.path.join("reports", f"performance_chart_{today}.png")
-            create_performance_chart(trade_log, output_file=chart_file)
-            if os.path.exists(chart_file):
-                pdf.ln(10)
-                pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, "Handelsstrategins Utveckling:", ln=True)
-                pdf.image(chart_file, x=10, w=180)
-                os.remove(chart_file)
-
-        if rl_backtest_result:
-            pdf.ln(10)
-            pdf.set_font("DejaVu", "B", 12)
-            pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, f"RL-agentens portfoljvärde efter backtest: {rl_backtest_result:.2f} SEK", ln=True)
+            builder.add_section(lambda pdf: pdf.image(logo_path, x=10, y=8, w=30))
+        builder.add_title("AI Trading Report", f"Dagens datum: {today}")
+        if rebalance_plan is not None:
+            rebalanced_df = rebalance_plan["allocation"]
+        _add_report_body(builder, trade_log, rl_backtest_result, adjusted_assets, latest_signal, rebalanced_df,
+                         ledger_summary)
+        if rebalance_plan is not None:
+            _add_rebalance_orders(builder, rebalance_plan)
+        if explanations is not None and not explanations.empty:
+            _add_explanations(builder, explanations)
 
-        if adjusted_assets:
-            pdf.ln(10)
-            add_sentiment_adjustment_section(pdf, adjusted_assets)
+        builder.add_spacing(10)
+        builder.add_section(add_ai_recommendations_section)
+        builder.add_spacing(5)
+        builder.add_section(add_new_investment_suggestions)
 
-        if latest_signal:
-            pdf.ln(10)
-            pdf.set_font("DejaVu", "B", 14)
-            pdf.cell(pdf.w - pdf.l_margin - pdf.r_margin, 10, "Senaste Kop-/Saljsignal", ln=True)
-            pdf.set_font("DejaVu", "", 11)
-            pdf.multi_cell(pdf.w - pdf.l_margin - pdf.r_margin, 8, f"Datum: {latest_signal['date']}, Pris: {latest_signal['close']:.2f} SEK")
-            pdf.multi_cell(pdf.w - pdf.l_margin - pdf.r_margin, 8, f"SMA 50: {latest_signal['sma_50']:.2f}, SMA 200: {latest_signal['sma_200']:.2f}")
-            pdf.multi_cell(pdf.w - pdf.l_margin - pdf.r_margin, 8, f"Signal: {latest_signal['signal']}")
-        
-        if rebalanced_df is not None:
-            pdf.ln(10)
-            add_rebalancing_section(pdf, rebalanced_df)
-
-        pdf.ln(10)
-        add_ai_recommendations_section(pdf)
-        pdf.ln(5)
-        add_new_investment_suggestions(pdf)
-
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        pdf.output(filename)
-        logger.info(f"✅ PDF-rapport genererad: {filename}")
+        builder.build(filename)
+        logger.info(f"✅ PDF-rapport genererad: {filename} ({builder.timings['total_s']:.2f}s)")
         return filename
 
     except Exception as e:
         logger.error(f"❌ Fel vid skapande av PDF-rapport: {str(e)}")
         return None
 
+def _add_report_body(builder: ReportBuilder,
+                     trade_log: Optional[pd.DataFrame] = None,
+                     rl_backtest_result: Optional[float] = None,
+                     adjusted_assets: Optional[dict] = None,
+                     latest_signal: Optional[dict] = None,
+                     rebalanced_df: Optional[pd.DataFrame] = None,
+                     ledger_summary: Optional[dict] = None) -> None:
+    if trade_log is not None and not trade_log.empty and "return" in trade_log.columns:
+        returns = trade_log["return"]
+        builder.add_lines([
+            f"Antal Affärer: {len(trade_log)}",
+            f"Total Avkastning: {returns.sum():.2%}",
+            f"Win Rate: {(returns > 0).mean():.2%}",
+        ], size=12, line_height=10)
+        builder.add_spacing(10)
+        builder.add_text("Handelsstrategins Utveckling:", size=12, line_height=10)
+        # Diagrammet renderas i processpoolen medan resten av rapporten byggs
+        builder.add_chart(render_performance_chart, returns.values)
+    elif ledger_summary and ledger_summary.get("num_trades"):
+        _add_ledger_summary(builder, ledger_summary)
+
+    if rl_backtest_result:
+        builder.add_spacing(10)
+        builder.add_heading(f"RL-agentens portfoljvärde efter backtest: {rl_backtest_result:.2f} SEK", size=12)
+
+    if adjusted_assets:
+        builder.add_spacing(10)
+        builder.add_section(add_sentiment_adjustment_section, adjusted_assets)
+
+    if latest_signal:
+        builder.add_spacing(10)
+        builder.add_heading("Senaste Kop-/Saljsignal")
+        builder.add_lines([
+            f"Datum: {latest_signal['date']}, Pris: {latest_signal['close']:.2f} SEK",
+            f"SMA 50: {latest_signal['sma_50']:.2f}, SMA 200: {latest_signal['sma_200']:.2f}",
+            f"Signal: {latest_signal['signal']}",
+        ], line_height=8)
+
+    if rebalanced_df is not None:
+        builder.add_spacing(10)
+        builder.add_section(add_rebalancing_section, rebalanced_df)
+
+def _add_ledger_summary(builder: ReportBuilder, summary: dict) -> None:
+    def fmt(value, pattern):
+        return pattern.format(value) if value is not None else "-"
+
+    builder.add_heading(f"Handelsliggare {summary['start']} – {summary['end']}", size=12)
+    builder.add_lines([
+        f"Antal Affärer: {summary['num_trades']}",
+        f"Total Avkastning: {fmt(summary['total_return'], '{:.2%}')}",
+        f"Win Rate: {fmt(summary['win_rate'], '{:.2%}')}",
+        f"Sharpe Ratio: {fmt(summary['sharpe_ratio'], '{:.2f}')}",
+        f"Sortino Ratio: {fmt(summary['sortino_ratio'], '{:.2f}')}",
+        f"Max Drawdown: {fmt(summary['max_drawdown'], '{:.2%}')}",
+    ], size=12, line_height=8)
+    daily_returns = summary.get("daily_returns")
+    if daily_returns is not None and len(daily_returns) > 1:
+        builder.add_spacing(5)
+        builder.add_chart(render_performance_chart, daily_returns.values, "Daglig utveckling")
+
+def _add_rebalance_orders(builder: ReportBuilder, plan: dict) -> None:
+    summary = plan["summary"]
+    builder.add_spacing(5)
+    builder.add_heading("Ordrar for rebalansering", size=12)
+    lines = format_order_lines(plan["orders"]) or ["Inga ordrar behövs."]
+    builder.add_lines(lines + [
+        f"Omsättning: {summary['turnover']:.1%}, beräknad kostnad: {summary['estimated_cost_sek']:.0f} SEK",
+        f"Tracking error: {summary['tracking_error_before']:.2%} -> {summary['tracking_error_after']:.2%}",
+    ])
+
+def _add_explanations(builder: ReportBuilder, explanations: pd.DataFrame) -> None:
+    builder.add_spacing(5)
+    builder.add_heading("Modellens viktigaste faktorer (SHAP)", size=12)
+    builder.add_lines(format_explanation_lines(explanations))
+
+def generate_multi_account_report(portfolio_data: Optional[dict] = None,
+                                  trade_logs: Optional[dict] = None,
+                                  filename: Optional[str] = None) -> Optional[str]:
+    """
+    Bygger en rapport med ett avsnitt per konto: allokeringsdiagram, innehav och
+    (om trade_logs anges) prestandadiagram. Alla diagram renderas parallellt.
+    """
+    try:
+        # Importeras här för att undvika cirkulär import (daily_pipeline importerar denna modul)
+        from reports.daily_pipeline import select_portfolio
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        if filename is None:
+            filename = os.path.join("reports", f"accounts_report_{today}.pdf")
+        if portfolio_data is None:
+            portfolio_data = fetch_all_portfolios()
+        trade_logs = trade_logs or {}
+
+        builder = ReportBuilder("AI Trading Report – konton", f"Dagens datum: {today}")
+        for account, raw_df in portfolio_data.items():
+            builder.add_page()
+            builder.add_heading(account)
+            if raw_df is None or raw_df.empty:
+                builder.add_text("Inga innehav.")
+                continue
+            df = select_portfolio({account: raw_df}, account=account)
+            if "symbol" in df.columns and "allocation" in df.columns:
+                if "new_allocation" not in df.columns:
+                    df = rebalancing(df.copy())
+                builder.add_chart(render_allocation_chart, df["symbol"].astype(str).tolist(),
+                                  df["allocation"].values, df["new_allocation"].values, title=f"Allokering – {account}")
+                lines = ("- " + df["symbol"].astype(str) + ": " + (df["allocation"] * 100).round(1).astype(str) + "%").tolist()
+                builder.add_lines(lines)
+            trade_log = trade_logs.get(account)
+            if trade_log is not None and not trade_log.empty and "return" in trade_log.columns:
+                builder.add_heading("Handelsstrategins Utveckling", size=12)
+                builder.add_chart(render_performance_chart, trade_log["return"].values, title=account)
+
+        builder.build(filename)
+        logger.info(f"✅ Kontorapport genererad: {filename} ({builder.pdf.pages_count} sidor, {builder.timings['total_s']:.2f}s)")
+        return filename
+    except Exception as e:
+        logger.error(f"❌ Fel vid skapande av kontorapport: {str(e)}")
+        return None
+
+def generate_and_send_daily_pdf_report() -> bool:
+    """
+    Genererar dagens PDF-rapport och köar den för Telegram (används av bot_scheduler).
+    """
+    from notifications.telegram_bot import send_pdf_report_to_telegram
+
+    filename = generate_pdf_report()
+    if not filename:
+        return False
+    return send_pdf_report_to_telegram(filename)
+
 if __name__ == "__main__":
     import pandas as pd
     trade_log = pd.DataFrame({
@@ -2,7 +2,6 @@ import logging
 from typing import Dict, Any, Optional
 
 # Konfigurera loggning
-logging.basicConfig(filename="macro_event_impact.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def generate_macro_event_impact_report(event_data: Dict[str, Any]) -> Optional[str]:
@@ -9,7 +9,6 @@ import os
 from typing import Optional
 from notifications.telegram_bot import send_pdf_report_to_telegram
 
-logging.basicConfig(filename="monthly_performance_report.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def generate_monthly_performance_pdf(report_data: dict, output_path: str = "reports/monthly_report.pdf") -> Optional[str]:
@@ -0,0 +1,278 @@
+"""
+report_builder.py
+
+Byggsten för PDF-rapporterna:
+
+- Diagram renderas parallellt i den gemensamma processpoolen (utils.process_manager)
+  med diagramtjänstens figurmallar (utils.chart_service) direkt till PNG-buffertar
+  i minnet – inga temporära filer.
+- Typsnittsfilerna (DejaVu) slås upp en gång per process och registreras med fpdf2:s
+  publika add_font i varje dokument. De tolkade typsnitten cachas inte mellan
+  rapporter: fpdf2 saknar ett publikt sätt att dela ett tolkat typsnitt mellan
+  dokument (det subsettas på plats), så varje dokument tolkar om filerna (~0,15 s).
+- Tabeller byggs med vektoriserad strängformatering i pandas i stället för iterrows().
+
+ReportBuilder samlar sektioner i ordning; diagram skickas till poolen direkt när de
+läggs till och bäddas in när PDF:en skrivs, så att textsektioner byggs medan
+diagrammen renderas.
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from matplotlib.figure import Figure
+
+from utils.chart_service import get_chart_service
+from utils.process_manager import get_task_runner
+
+logger = logging.getLogger(__name__)
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts")
+FONT_FILES = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+    "I": "DejaVuSans-Oblique.ttf",
+}
+
+_font_paths = None  # stil -> sökväg till fontfilen, slås upp en gång per process
+_font_lock = threading.Lock()
+
+
+# --- Diagram (körs i arbetsprocesser) ----------------------------------
+
+def render_performance_chart(returns, title="Handelsstrategins Prestanda"):
+    """
+    Renderar kumulativ avkastning från en array med avkastningar. Returnerar PNG-bytes.
+    """
+    cumulative = np.cumprod(1 + np.asarray(returns, dtype=np.float64))
+    return get_chart_service().render_lines(
+        "report_performance",
+        {"Portfoljutveckling": cumulative},
+        title=title,
+        styles={"Portfoljutveckling": {"color": "blue"}},
+        hlines=[(1, {"color": "gray", "linestyle": "--", "label": "Startvarde"})],
+        xlabel="Handel",
+        ylabel="Avkastning",
+    )
+
+
+def render_allocation_chart(symbols, allocation, new_allocation, title="Allokering", dpi=100):
+    """
+    Renderar ett stapeldiagram med nuvarande och ny allokering per innehav. Returnerar PNG-bytes.
+    """
+    x = np.arange(len(symbols))
+    fig = Figure(figsize=(10, 5))
+    fig.subplots_adjust(left=0.08, right=0.98, top=0.92, bottom=0.2)
+    ax = fig.subplots()
+    ax.bar(x - 0.2, np.asarray(allocation) * 100, width=0.4, label="Nu")
+    ax.bar(x + 0.2, np.asarray(new_allocation) * 100, width=0.4, label="Mål")
+    ax.set_xticks(x)
+    ax.set_xticklabels(symbols, rotation=45, ha="right")
+    ax.set_ylabel("%")
+    ax.set_title(title)
+    ax.legend()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
+
+
+# --- Typsnitt ------------------------------------------------------------
+
+def font_paths() -> dict:
+    """
+    Returnerar sökvägarna till DejaVu-filerna per stil. Uppslaget görs en gång per
+    process; saknade filer loggas och hoppas över.
+    """
+    global _font_paths
+    with _font_lock:
+        if _font_paths is None:
+            paths = {}
+            for style, filename in FONT_FILES.items():
+                path = os.path.join(FONT_DIR, filename)
+                if os.path.exists(path):
+                    paths[style] = path
+                else:
+                    logger.warning(f"⚠️ Typsnittsfil saknas: {path}")
+            _font_paths = paths
+        return _font_paths
+
+
+def register_fonts(pdf: FPDF) -> None:
+    """
+    Registrerar DejaVu (normal, fet, kursiv) i ett dokument via fpdf2:s add_font.
+    Filerna tolkas om för varje dokument; bara sökvägarna cachas (se modulbeskrivningen).
+    """
+    for style, path in font_paths().items():
+        pdf.add_font("DejaVu", style, path)
+
+
+# --- Tabeller ------------------------------------------------------------
+
+def format_percent(values: pd.Series, signed: bool = False) -> pd.Series:
+    """
+    Formaterar andelar (0.123) som procentsträngar ("12.3%") vektoriserat.
+    """
+    pct = (values.astype(float) * 100).round(1)
+    text = pct.map("{:+.1f}%".format) if signed else pct.map("{:.1f}%".format)
+    return text.where(values.notna(), "-")
+
+
+def format_rebalancing_lines(rebalanced_df: pd.DataFrame) -> list:
+    """
+    Bygger rader "- SYMBOL: 10.0% -> 12.5% (+2.5%)" för hela tabellen i ett svep.
+    """
+    df = rebalanced_df
+    n = len(df)
+    symbol = df["symbol"].astype(str) if "symbol" in df.columns else pd.Series([""] * n, index=df.index)
+    old = format_percent(df["allocation"]) if "allocation" in df.columns else pd.Series(["-"] * n, index=df.index)
+    new = format_percent(df["new_allocation"]) if "new_allocation" in df.columns else pd.Series(["0.0%"] * n, index=df.index)
+    adj = format_percent(df["adjustment"], signed=True) if "adjustment" in df.columns else pd.Series(["-"] * n, index=df.index)
+    return ("- " + symbol + ": " + old + " -> " + new + " (" + adj + ")").tolist()
+
+
+# --- Rapportbyggare ------------------------------------------------------
+
+class ReportBuilder:
+    """
+    Samlar sektioner i ordning och skriver PDF:en. Diagram renderas parallellt.
+
+    Exempel:
+        builder = ReportBuilder("AI Trading Report")
+        builder.add_chart(render_performance_chart, trade_log["return"].values)
+        builder.add_heading("Rebalansering")
+        builder.add_lines(format_rebalancing_lines(rebalanced_df))
+        builder.build("reports/daily_report.pdf")
+    """
+
+    def __init__(self, title=None, subtitle=None, parallel_charts=True):
+        self.pdf = FPDF()
+        self.pdf.set_auto_page_break(auto=True, margin=15)
+        register_fonts(self.pdf)
+        self.parallel_charts = parallel_charts
+        self._ops = []
+        self.timings = {}
+        if title:
+            self.add_title(title, subtitle)
+
+    @property
+    def width(self):
+        return self.pdf.w - self.pdf.l_margin - self.pdf.r_margin
+
+    def add_title(self, title, subtitle=None):
+        self._ops.append(("title", (title, subtitle)))
+
+    def add_page(self):
+        self._ops.append(("page", None))
+
+    def add_heading(self, text, size=14):
+        self._ops.append(("heading", (text, size)))
+
+    def add_text(self, text, size=11, line_height=8):
+        self._ops.append(("text", (text, size, line_height)))
+
+    def add_lines(self, lines, size=11, line_height=6):
+        """Lägger till många rader som ett textblock (ett multi_cell-anrop i stället för ett per rad)."""
+        self._ops.append(("text", ("\n".join(lines), size, line_height)))
+
+    def add_spacing(self, height=5):
+        self._ops.append(("spacing", height))
+
+    def add_section(self, func, *args):
+        """Lägger till en befintlig sektion som skriver direkt till FPDF-objektet, t.ex. add_ai_recommendations_section."""
+        self._ops.append(("section", (func, args)))
+
+    def add_chart(self, render_func, *args, width=180, **kwargs):
+        """
+        Schemalägger ett diagram. render_func måste vara picklebar och returnera PNG-bytes.
+        Med bara en kärna renderas diagrammet i stället i processen när PDF:en skrivs.
+        """
+        runner = get_task_runner() if self.parallel_charts else None
+        if runner is not None and runner.max_workers > 1:
+            future = runner.submit(render_func, *args, **kwargs)
+        else:
+            future = None
+        self._ops.append(("chart", (future, render_func, args, kwargs, width)))
+
+    def _write(self):
+        pdf = self.pdf
+        pdf.add_page()
+        for kind, payload in self._ops:
+            if kind == "title":
+                title, subtitle = payload
+                pdf.set_font("DejaVu", "B", 16)
+                pdf.cell(self.width, 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align="C")
+                if subtitle:
+                    pdf.set_font("DejaVu", "", 12)
+                    pdf.cell(self.width, 10, subtitle, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align="C")
+                pdf.ln(10)
+            elif kind == "page":
+                pdf.add_page()
+            elif kind == "heading":
+                text, size = payload
+                pdf.set_font("DejaVu", "B", size)
+                pdf.cell(0, 10, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            elif kind == "text":
+                text, size, line_height = payload
+                pdf.set_font("DejaVu", "", size)
+                pdf.multi_cell(self.width, line_height, text)
+            elif kind == "spacing":
+                pdf.ln(payload)
+            elif kind == "section":
+                func, args = payload
+                func(pdf, *args)
+            elif kind == "chart":
+                future, render_func, args, kwargs, width = payload
+                try:
+                    png = future.result() if future is not None else render_func(*args, **kwargs)
+                    pdf.image(io.BytesIO(png), x=pdf.l_margin, w=width)
+                except Exception as e:
+                    logger.error(f"❌ Fel vid rendering av diagram: {str(e)}")
+                    pdf.set_font("DejaVu", "", 11)
+                    pdf.multi_cell(self.width, 8, f"Diagram kunde inte skapas: {str(e)}")
+
+    def build(self, filename=None):
+        """
+        Skriver PDF:en till fil (om filename anges) och returnerar filnamnet, annars PDF-bytes.
+        """
+        start = time.perf_counter()
+        self._write()
+        self.timings["layout_s"] = time.perf_counter() - start
+        data = bytes(self.pdf.output())
+        self.timings["total_s"] = time.perf_counter() - start
+        if filename is None:
+            return data
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(data)
+        return filename
+
+
+# Exempelanrop: benchmark för en flerkontosrapport på ca 50 sidor
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    accounts = ["Alice", "Valter", "Pension", "Investeringskonto"]
+    start = time.perf_counter()
+    builder = ReportBuilder("AI Trading Report", "Benchmark – flera konton")
+    for account in accounts:
+        for i in range(6):
+            builder.add_page()
+            builder.add_heading(f"{account} – strategi {i + 1}")
+            builder.add_chart(render_performance_chart, rng.normal(0.001, 0.02, 500), f"{account} #{i + 1}")
+            df = pd.DataFrame({
+                "symbol": [f"SYM{j}" for j in range(40)],
+                "allocation": rng.dirichlet(np.ones(40)),
+                "new_allocation": 1 / 40,
+            })
+            df["adjustment"] = df["new_allocation"] - df["allocation"]
+            builder.add_heading("Rebalansering", size=12)
+            builder.add_lines(format_rebalancing_lines(df))
+    filename = builder.build("reports/benchmark_report.pdf")
+    print(f"📄 {filename}: {builder.pdf.pages_count} sidor på {time.perf_counter() - start:.2f}s "
+          f"(layout {builder.timings['layout_s']:.2f}s)")
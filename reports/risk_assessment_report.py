@@ -1,21 +1,39 @@
 import logging
 from typing import Dict, Any
 
+from data_processing.rolling_correlation import correlation_risk_summary, current_snapshot
+
 # Konfigurera loggning
-logging.basicConfig(filename="risk_assessment_report.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def generate_risk_assessment_report(risk_data: Dict[str, Any]) -> str:
     """
     Skapar en rapport om portföljens risknivå och varningar.
+
+    Valfria nycklar från korrelationsmotorn (rolling_correlation.correlation_risk_summary):
+    portfolio_beta, avg_correlation och top_pairs. Saknas de hämtas de från den gemensamma
+    korrelationsmotorn (viktade med risk_data["weights"], dict symbol -> vikt, om angivet).
     """
     try:
+        if "portfolio_beta" not in risk_data and "avg_correlation" not in risk_data:
+            snapshot = current_snapshot()
+            if snapshot is not None:
+                risk_data = {**correlation_risk_summary(snapshot, risk_data.get("weights")), **risk_data}
         report = (
             f"⚠️ Riskanalys:\n"
             f"Portföljens volatilitet: {risk_data['volatility']}%\n"
             f"Max drawdown: {risk_data['max_drawdown']}%\n"
             f"Risknivå: {risk_data['risk_level']}"
         )
+        if risk_data.get("portfolio_beta") is not None:
+            report += f"\nPortföljens beta: {risk_data['portfolio_beta']:.2f}"
+        if risk_data.get("avg_correlation") is not None:
+            report += f"\nGenomsnittlig korrelation: {risk_data['avg_correlation']:.2f}"
+        top_pairs = risk_data.get("top_pairs")
+        if top_pairs is not None and len(top_pairs):
+            pairs = ", ".join(f"{row.symbol_a}/{row.symbol_b} ({row.correlation:.2f})"
+                              for row in top_pairs.itertuples())
+            report += f"\nMest korrelerade par: {pairs}"
         logger.info("✅ Riskanalysrapport genererad.")
         return report
     except Exception as e:
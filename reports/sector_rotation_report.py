@@ -1,15 +1,29 @@
 import logging
 from typing import Dict, Optional
 
+import pandas as pd
+
+from data_processing.rolling_correlation import current_snapshot, sector_correlation as correlation_by_sector
+
 # Konfigurera loggning
-logging.basicConfig(filename="sector_rotation_report.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def generate_sector_rotation_report(sector_data: Dict[str, float]) -> Optional[str]:
+def generate_sector_rotation_report(sector_data: Dict[str, float],
+                                    sector_correlation: Optional[pd.DataFrame] = None,
+                                    sectors: Optional[Dict[str, str]] = None) -> Optional[str]:
     """
     Genererar en rapport över sektorer som presterat bäst och sämst.
+
+    sector_correlation (sektor x sektor, från rolling_correlation.sector_correlation) lägger
+    till hur starkt bästa och sämsta sektorn samvarierar – låg korrelation gör rotationen
+    mellan dem mer meningsfull. Med sectors (dict symbol -> sektor) räknas den fram ur den
+    gemensamma korrelationsmotorn när sector_correlation inte anges.
     """
     try:
+        if sector_correlation is None and sectors:
+            snapshot = current_snapshot()
+            if snapshot is not None:
+                sector_correlation = correlation_by_sector(snapshot.correlation, sectors)
         best_sector = max(sector_data, key=sector_data.get)
         worst_sector = min(sector_data, key=sector_data.get)
         report = (
@@ -17,6 +31,9 @@ def generate_sector_rotation_report(sector_data: Dict[str, float]) -> Optional[s
             f"Bästa sektorn: {best_sector} ({sector_data[best_sector]}%)\n"
             f"Sämsta sektorn: {worst_sector} ({sector_data[worst_sector]}%)"
         )
+        if sector_correlation is not None and {best_sector, worst_sector} <= set(sector_correlation.index):
+            report += (f"\nKorrelation {best_sector}/{worst_sector}: "
+                       f"{sector_correlation.loc[best_sector, worst_sector]:.2f}")
         logger.info("✅ Sektorrotationsrapport genererad.")
         return report
     except Exception as e:
@@ -1,12 +1,14 @@
 import logging
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Optional, Tuple
 
+from live_trading.trade_ledger import get_trade_ledger
+from utils.chart_service import get_chart_service
+from utils.event_store import get_event_store
+
 # Konfigurera loggning
-logging.basicConfig(filename="strategy_performance.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def calculate_sharpe_ratio(returns: np.ndarray, risk_free_rate: float = 0.02) -> Optional[float]:
@@ -48,38 +50,51 @@ def plot_strategy_performance(trade_log: pd.DataFrame, output_file: str = "strat
         if "return" not in trade_log.columns:
             raise ValueError("Kolumnen 'return' saknas i trade_log")
         trade_log["Cumulative Returns"] = (1 + trade_log["return"]).cumprod()
-        plt.figure(figsize=(10, 5))
-        plt.plot(trade_log["Cumulative Returns"], label="Strategins Avkastning", color="blue")
-        plt.axhline(y=1, color="gray", linestyle="--", label="Startvärde")
-        plt.legend()
-        plt.title("Strategins Prestanda")
-        plt.xlabel("Handel")
-        plt.ylabel("Avkastning")
-        plt.savefig(output_file)
-        plt.close()
+        get_chart_service().render_lines(
+            "strategy_performance",
+            {"Strategins Avkastning": trade_log["Cumulative Returns"]},
+            title="Strategins Prestanda",
+            output_file=output_file,
+            styles={"Strategins Avkastning": {"color": "blue"}},
+            hlines=[(1, {"color": "gray", "linestyle": "--", "label": "Startvärde"})],
+            xlabel="Handel",
+            ylabel="Avkastning",
+        )
         logger.info("✅ Strategins prestandadiagram genererat.")
     except Exception as e:
         logger.error(f"❌ Fel vid skapande av prestandadiagram: {str(e)}")
 
-def log_ai_recommendation(recommendations: list, trade_log_file: str = "trade_log.csv") -> None:
+def log_ai_recommendation(recommendations: list) -> None:
     """
-    Lagrar AI:s rekommendationer i en CSV-fil.
+    Lagrar AI:s rekommendationer i händelselagret (tabellen recommendations).
     """
     try:
-        df = pd.DataFrame(recommendations)
-        df["timestamp"] = datetime.now()
-        header = not pd.io.common.file_exists(trade_log_file)
-        df.to_csv(trade_log_file, mode="a", header=header, index=False)
-        logger.info(f"✅ {len(df)} AI-rekommendation(er) loggad(e) i {trade_log_file}.")
+        get_event_store().log_recommendations(recommendations)
+        logger.info(f"✅ {len(recommendations)} AI-rekommendation(er) loggad(e).")
     except Exception as e:
         logger.error(f"❌ Fel vid loggning av AI-rekommendationer: {str(e)}")
 
-def simulate_pl_from_log(trade_log: pd.DataFrame) -> Tuple[Optional[float], pd.DataFrame]:
+def export_recommendations_csv(trade_log_file: str = "recommendations_export.csv", since=None) -> Optional[str]:
+    """
+    Exporterar loggade AI-rekommendationer till en CSV-fil (explicit anrop, inte vid varje loggning).
+    """
+    try:
+        path = get_event_store().export_csv("recommendations", trade_log_file, since=since)
+        logger.info(f"✅ AI-rekommendationer exporterade till {path}.")
+        return path
+    except Exception as e:
+        logger.error(f"❌ Fel vid export av AI-rekommendationer: {str(e)}")
+        return None
+
+def simulate_pl_from_log(trade_log: Optional[pd.DataFrame] = None, days: int = 30) -> Tuple[Optional[float], pd.DataFrame]:
     """
     Simulerar P/L baserat på in- och utpriser i trade_log.
+    Utan trade_log används handelsliggarens utfall för de senaste `days` dagarna.
     Returnerar total avkastning och uppdaterad trade_log.
     """
     try:
+        if trade_log is None:
+            trade_log = get_trade_ledger().trade_log(start=datetime.now() - pd.Timedelta(days=days))
         if "return" not in trade_log.columns:
             trade_log["return"] = (trade_log["exit_price"] - trade_log["entry_price"]) / trade_log["entry_price"]
         total_return = (1 + trade_log["return"]).prod() - 1
@@ -107,6 +122,6 @@ if __name__ == "__main__":
         {"symbol": "TSLA", "signal": "BUY", "recommended_price": 210.5},
         {"symbol": "AAPL", "signal": "SELL", "recommended_price": 155.2},
     ]
-    log_ai_recommendation(sample_recs, "trade_log.csv")
+    log_ai_recommendation(sample_recs)
     total_return, updated_log = simulate_pl_from_log(trade_log)
     print(f"📈 Totalavkastning: {total_return:.2%}" if total_return is not None else "Totalavkastning kunde inte beräknas")
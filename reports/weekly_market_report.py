@@ -2,7 +2,6 @@ import logging
 from typing import Dict, Any, Optional
 
 # Konfigurera loggning
-logging.basicConfig(filename="weekly_market_report.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 def generate_weekly_market_report(market_data: Dict[str, Any]) -> Optional[str]:
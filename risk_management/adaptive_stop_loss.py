@@ -3,23 +3,51 @@ from datetime import datetime
 import numpy as np
 import pandas as pd
 
+from risk_management.volatility_engine import get_volatility_engine
+
 # Konfigurera loggning
-logging.basicConfig(filename="adaptive_stop_loss.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+MIN_STOP = 0.01
+MAX_STOP = 0.15
 
 
-def adaptive_stop_loss(signal_data):
+def adaptive_stop_loss(signal_data, multiplier=2.0, horizon=5):
     """
-    Returnerar en enkel adaptiv stop-loss baserat på AI-signal (buy/sell).
+    Returnerar en adaptiv stop-loss baserat på AI-signal (buy/sell).
+
+    Finns en volatilitetsprognos – "volatility" i signal_data (standardavvikelse över
+    horizon dagar) eller GARCH-tillstånd för "symbol" i volatilitetsmotorn – sätts
+    stop-lossen till multiplier x prognosen (begränsad till 1–15 %). Annars används
+    fasta nivåer per signal.
 
     Args:
-        signal_data (dict): Exempelvis {"signal": "buy"}
+        signal_data (dict): Exempelvis {"signal": "buy"} eller {"signal": "buy", "symbol": "AAPL"}
+        multiplier (float): Antal standardavvikelser till stop-lossen
+        horizon (int): Prognoshorisont i dagar för GARCH-prognosen
 
     Returns:
-        dict: {"stop_loss": 0.03}
+        dict: {"stop_loss": 0.03}, med "volatility" och "regime" när prognosen används
     """
     try:
         signal = signal_data.get("signal", "buy").lower()
 
+        volatility = signal_data.get("volatility")
+        regime = signal_data.get("regime")
+        symbol = signal_data.get("symbol")
+        if volatility is None and symbol:
+            forecast = get_volatility_engine().forecast([symbol], horizon=horizon)
+            if not forecast.empty:
+                volatility = float(forecast["sigma"].iloc[0])
+                regime = forecast["regime"].iloc[0]
+
+        if volatility is not None and np.isfinite(volatility):
+            stop = float(np.clip(multiplier * volatility, MIN_STOP, MAX_STOP))
+            logger.info(f"[{datetime.now()}] ✅ Volatilitetsbaserad stop-loss för '{signal}': {stop:.4f} "
+                        f"(sigma {volatility:.4f}, regim {regime})")
+            return {"stop_loss": stop, "volatility": float(volatility), "regime": regime}
+
         if signal == "buy":
             stop = 0.03  # 3 % nedåt
         elif signal == "sell":
@@ -28,11 +56,11 @@ def adaptive_stop_loss(signal_data):
             stop = 0.04  # neutral fallback
 
         result = {"stop_loss": stop}
-        logging.info(f"[{datetime.now()}] ✅ AI-baserad stop-loss för '{signal}': {stop}")
+        logger.info(f"[{datetime.now()}] ✅ AI-baserad stop-loss för '{signal}': {stop}")
         return result
 
     except Exception as e:
-        logging.error(f"[{datetime.now()}] ❌ Fel i adaptive_stop_loss: {str(e)}")
+        logger.error(f"[{datetime.now()}] ❌ Fel i adaptive_stop_loss: {str(e)}")
         return {"stop_loss": 0.05}
 
 
@@ -62,11 +90,11 @@ def atr_based_stop_loss(price_data, atr_multiplier=3, window=14):
         atr = true_range.rolling(window=window).mean()
         stop_loss = price_data["Close"] - (atr_multiplier * atr)
 
-        logging.info(f"[{datetime.now()}] 📊 ATR-baserad stop-loss beräknad med multiplier={atr_multiplier}, window={window}")
+        logger.info(f"[{datetime.now()}] 📊 ATR-baserad stop-loss beräknad med multiplier={atr_multiplier}, window={window}")
         return stop_loss
 
     except Exception as e:
-        logging.error(f"[{datetime.now()}] ❌ Fel i atr_based_stop_loss: {str(e)}")
+        logger.error(f"[{datetime.now()}] ❌ Fel i atr_based_stop_loss: {str(e)}")
         return pd.Series([np.nan] * len(price_data), index=price_data.index)
 
 
@@ -89,3 +117,6 @@ if __name__ == "__main__":
     signal_result = adaptive_stop_loss({"signal": "buy"})
     print("🤖 AI-baserad Stop-Loss:")
     print(signal_result)
+
+    # Stop-loss från en volatilitetsprognos (t.ex. VolatilityEngine.forecast(horizon=5)["sigma"])
+    print(adaptive_stop_loss({"signal": "buy", "volatility": 0.035, "regime": "high"}))
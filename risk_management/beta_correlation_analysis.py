@@ -3,7 +3,7 @@ import logging
 import numpy as np
 
 # Konfigurera loggning
-logging.basicConfig(filename="beta_correlation_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_beta_and_correlation(portfolio_returns, market_returns):
@@ -16,10 +16,10 @@ def calculate_beta_and_correlation(portfolio_returns, market_returns):
         beta = covariance / market_variance
         correlation = np.corrcoef(portfolio_returns, market_returns)[0, 1]
 
-        logging.info(f"✅ Beta: {beta:.2f}, Korrelation: {correlation:.2f}")
+        logger.info(f"✅ Beta: {beta:.2f}, Korrelation: {correlation:.2f}")
         return beta, correlation
     except Exception as e:
-        logging.error(f"❌ Fel vid beta- och korrelationsanalys: {str(e)}")
+        logger.error(f"❌ Fel vid beta- och korrelationsanalys: {str(e)}")
         return None, None
 
 
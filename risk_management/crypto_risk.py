@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="crypto_risk.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_volatility(price_series, window=30):
@@ -13,10 +13,10 @@ def calculate_volatility(price_series, window=30):
     """
     try:
         volatility = price_series.pct_change().rolling(window=window).std()
-        logging.info(f"✅ Volatilitet beräknad över {window} dagar.")
+        logger.info(f"✅ Volatilitet beräknad över {window} dagar.")
         return volatility
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av volatilitet: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av volatilitet: {str(e)}")
         return None
 
 
@@ -29,10 +29,10 @@ def calculate_max_drawdown(price_series):
         peak = cumulative_returns.cummax()
         drawdown = (cumulative_returns - peak) / peak
         max_drawdown = drawdown.min()
-        logging.info(f"✅ Max Drawdown beräknad: {max_drawdown:.2%}")
+        logger.info(f"✅ Max Drawdown beräknad: {max_drawdown:.2%}")
         return max_drawdown
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
         return None
 
 
@@ -46,12 +46,12 @@ def risk_score(price_series, window=30):
 
         if vol is not None and drawdown is not None:
             risk_score = (vol.mean() + abs(drawdown)) / 2  # Enkel riskmodell
-            logging.info(f"✅ Riskpoäng beräknad: {risk_score:.2f}")
+            logger.info(f"✅ Riskpoäng beräknad: {risk_score:.2f}")
             return risk_score
         else:
             return None
     except Exception as e:
-        logging.error(f"❌ Fel vid riskpoängsberäkning: {str(e)}")
+        logger.error(f"❌ Fel vid riskpoängsberäkning: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="drawdown_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_max_drawdown(returns):
@@ -17,10 +17,10 @@ def calculate_max_drawdown(returns):
         drawdown = (cumulative_returns - peak) / peak
         max_drawdown = drawdown.min()
 
-        logging.info(f"✅ Maximal drawdown beräknad: {max_drawdown:.2%}")
+        logger.info(f"✅ Maximal drawdown beräknad: {max_drawdown:.2%}")
         return max_drawdown
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="drawdown_protection.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_max_drawdown(price_series):
@@ -16,10 +16,10 @@ def calculate_max_drawdown(price_series):
         peak = cumulative_returns.cummax()
         drawdown = (cumulative_returns - peak) / peak
         max_drawdown = drawdown.min()
-        logging.info(f"✅ Max Drawdown beräknad: {max_drawdown:.2%}")
+        logger.info(f"✅ Max Drawdown beräknad: {max_drawdown:.2%}")
         return max_drawdown, drawdown
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av max drawdown: {str(e)}")
         return None, None
 
 
@@ -31,15 +31,15 @@ def implement_drawdown_protection(price_series, threshold=-0.2):
         max_drawdown, drawdown_series = calculate_max_drawdown(price_series)
 
         if max_drawdown <= threshold:
-            logging.warning(
+            logger.warning(
                 f"🚨 Kritisk drawdown: {max_drawdown:.2%} - Förslag: Minska exponering!"
             )
             return "Reduce Exposure"
         else:
-            logging.info(f"✅ Drawdown under kontroll: {max_drawdown:.2%}")
+            logger.info(f"✅ Drawdown under kontroll: {max_drawdown:.2%}")
             return "Hold Position"
     except Exception as e:
-        logging.error(f"❌ Fel vid implementering av drawdown protection: {str(e)}")
+        logger.error(f"❌ Fel vid implementering av drawdown protection: {str(e)}")
         return None
 
 
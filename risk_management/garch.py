@@ -1,7 +1,18 @@
 import numpy as np
-from arch import arch_model
+
+from risk_management.volatility_engine import fit_garch_batch, variance_path
+
 
 def forecast_garch(returns: np.ndarray, forecast_steps=5) -> np.ndarray:
+    """
+    Variansprognos för forecast_steps steg med GARCH(1,1). Använder arch om paketet finns,
+    annars den vektoriserade anpassningen i volatility_engine.
+    """
+    try:
+        from arch import arch_model
+    except ImportError:
+        fit = fit_garch_batch(np.asarray(returns, dtype=np.float64)[None, :])
+        return variance_path(fit["omega"], fit["alpha"], fit["beta"], fit["h"], forecast_steps)[0]
     am = arch_model(returns, vol='Garch', p=1, q=1)
     res = am.fit(disp='off')
     forecasts = res.forecast(horizon=forecast_steps)
@@ -1,7 +1,7 @@
 import logging
 
 # Konfigurera loggning
-logging.basicConfig(filename="hedging_strategies.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def hedge_strategy(portfolio_risk_level):
@@ -26,11 +26,11 @@ def hedge_strategy(portfolio_risk_level):
             "recommendation": strategy
         }
 
-        logging.info(f"✅ Hedging-strategi föreslagen ({level}): {strategy}")
+        logger.info(f"✅ Hedging-strategi föreslagen ({level}): {strategy}")
         return result
 
     except Exception as e:
-        logging.error(f"❌ Fel vid hedging-analys: {str(e)}")
+        logger.error(f"❌ Fel vid hedging-analys: {str(e)}")
         return {
             "risk_level": portfolio_risk_level,
             "risk_category": "Okänd",
@@ -2,7 +2,7 @@ import numpy as np
 import logging
 
 # Konfigurera loggning
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 def monte_carlo_simulation_normal(initial_value, mean_return, volatility, days=252, simulations=1000):
     """
@@ -16,14 +16,14 @@ def monte_carlo_simulation_normal(initial_value, mean_return, volatility, days=2
             price_series = initial_value * (1 + daily_returns).cumprod()
             results.append(price_series[-1])
         expected_value = np.mean(results)
-        logging.info("✅ Normalfördelad Monte Carlo-simulering genomförd.")
+        logger.info("✅ Normalfördelad Monte Carlo-simulering genomförd.")
         return {
             "expected_value": float(expected_value),
             "type": "normal",
             "simulations": simulations
         }
     except Exception as e:
-        logging.error(f"❌ Fel vid normal simulering: {str(e)}")
+        logger.error(f"❌ Fel vid normal simulering: {str(e)}")
         return {"expected_value": None, "type": "normal", "simulations": simulations}
 
 
@@ -45,7 +45,7 @@ def monte_carlo_simulation_historical(returns: np.ndarray, num_simulations=1000,
 
         final_values = [series[-1] for series in simulations]
         expected_value = np.mean(final_values)
-        logging.info("✅ Historisk Monte Carlo-simulering genomförd.")
+        logger.info("✅ Historisk Monte Carlo-simulering genomförd.")
         return {
             "expected_value": float(expected_value),
             "type": "historical",
@@ -53,7 +53,7 @@ def monte_carlo_simulation_historical(returns: np.ndarray, num_simulations=1000,
             "series": simulations
         }
     except Exception as e:
-        logging.error(f"❌ Fel vid historisk simulering: {str(e)}")
+        logger.error(f"❌ Fel vid historisk simulering: {str(e)}")
         return {"expected_value": None, "type": "historical", "simulations": num_simulations, "series": []}
 
 
@@ -70,7 +70,7 @@ def ensemble_monte_carlo(initial_value, mean_return, volatility, historical_retu
 
     ensemble_value = weight_normal * ev_normal + weight_historical * ev_hist
 
-    logging.info(f"📊 Ensemble-värde: {ensemble_value:.2f}")
+    logger.info(f"📊 Ensemble-värde: {ensemble_value:.2f}")
     return {
         "ensemble_value": float(ensemble_value),
         "normal": normal_result,
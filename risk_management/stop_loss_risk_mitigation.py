@@ -3,7 +3,7 @@ import logging
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="stop_loss_risk_mitigation.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_stop_loss_levels(portfolio, stop_loss_percentage=0.05):
@@ -14,10 +14,10 @@ def analyze_stop_loss_levels(portfolio, stop_loss_percentage=0.05):
         portfolio["stop_loss_price"] = portfolio["current_price"] * (
             1 - stop_loss_percentage
         )
-        logging.info("✅ Stop-loss nivåer analyserade och föreslagna.")
+        logger.info("✅ Stop-loss nivåer analyserade och föreslagna.")
         return portfolio[["symbol", "current_price", "stop_loss_price"]]
     except Exception as e:
-        logging.error(f"❌ Fel vid stop-loss analys: {str(e)}")
+        logger.error(f"❌ Fel vid stop-loss analys: {str(e)}")
         return None
 
 
@@ -3,7 +3,7 @@ import logging
 import numpy as np
 
 # Konfigurera loggning
-logging.basicConfig(filename="tail_risk_analysis.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def analyze_tail_risk(returns):
@@ -14,12 +14,12 @@ def analyze_tail_risk(returns):
         left_tail = np.percentile(returns, 5)
         right_tail = np.percentile(returns, 95)
 
-        logging.info(
+        logger.info(
             f"✅ Tail risk analyserad: Left tail = {left_tail:.2%}, Right tail = {right_tail:.2%}"
         )
         return left_tail, right_tail
     except Exception as e:
-        logging.error(f"❌ Fel vid tail risk-analys: {str(e)}")
+        logger.error(f"❌ Fel vid tail risk-analys: {str(e)}")
         return None, None
 
 
@@ -3,7 +3,7 @@ import logging
 import numpy as np
 
 # Konfigurera loggning
-logging.basicConfig(filename="value_at_risk.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def calculate_var(returns, confidence_level=0.95):
@@ -12,10 +12,10 @@ def calculate_var(returns, confidence_level=0.95):
     """
     try:
         var = np.percentile(returns, (1 - confidence_level) * 100)
-        logging.info(f"✅ VaR vid {confidence_level:.0%} konfidensnivå: {var:.2%}")
+        logger.info(f"✅ VaR vid {confidence_level:.0%} konfidensnivå: {var:.2%}")
         return var
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av VaR: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av VaR: {str(e)}")
         return None
 
 
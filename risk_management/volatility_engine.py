@@ -0,0 +1,380 @@
+"""
+volatility_engine.py
+
+GARCH(1,1)-volatilitet för alla innehav med cachat tillstånd och regimklassning.
+
+- Alla serier anpassas samtidigt: avkastningarna läggs högerjusterade i en matris
+  (serier x tid) och likelihood-rekursionen körs i en tidsloop över NumPy-arrayer för
+  alla serier och alla kandidatparametrar på en gång. omega sätts med variansmålning
+  (omega = s2 * (1 - alpha - beta)), så bara alpha och persistensen alpha + beta söks:
+  först ett grovt gitter, sedan mönstersökning med halverat steg runt bästa punkten.
+- Varmstart: symboler med sparade parametrar hoppar över gittret och börjar
+  mönstersökningen från gårdagens parametrar med ett mindre steg.
+- Stora universum delas i block som anpassas parallellt via TaskRunner (n_jobs).
+- Tillståndet per symbol (parametrar, nästa periods varians h, senaste datum) sparas i
+  JSON. Nya dagar uppdaterar h i O(1): h' = omega + alpha * e^2 + beta * h. Full
+  omanpassning görs först när tillståndet är äldre än refit_every dagar.
+- Regim: kvoten mellan prognostiserad och långsiktig volatilitet ger "low", "normal"
+  eller "high"; prognosen matar adaptive_stop_loss och riskvarningarna.
+
+Exempel:
+    engine = get_volatility_engine()
+    engine.update(fetch_price_history(["AAPL", "MSFT"], period="5y"))
+    engine.forecast(horizon=5)     # sigma, long_run, ratio, regime per symbol
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.process_manager import get_task_runner
+
+logger = logging.getLogger(__name__)
+
+STATE_PATH = os.path.join("data", "garch_state.json")
+DEFAULT_WINDOW = 1000  # dagar historik i anpassningen
+MIN_OBSERVATIONS = 100
+REFIT_EVERY = 5  # dagar mellan fulla omanpassningar
+GRID_ALPHAS = np.array([0.02, 0.05, 0.08, 0.12, 0.16, 0.22])
+GRID_PERSISTENCE = np.array([0.80, 0.90, 0.94, 0.97, 0.985, 0.995])
+MAX_PERSISTENCE = 0.999
+MIN_ALPHA = 1e-4
+REGIME_THRESHOLDS = (0.8, 1.25)  # kvot prognos / långsiktig volatilitet
+TRADING_DAYS = 252
+FIT_CHUNK = 256
+
+
+def returns_matrix(returns_list, window=DEFAULT_WINDOW):
+    """
+    Högerjusterar avkastningsserier i en matris (serier x tid) med de senaste window
+    punkterna. Returnerar (matris med 0 för saknade, mask för giltiga punkter).
+    """
+    arrays = [np.asarray(r, dtype=np.float64).ravel()[-window:] for r in returns_list]
+    length = max((len(a) for a in arrays), default=0)
+    matrix = np.zeros((len(arrays), length))
+    valid = np.zeros((len(arrays), length), dtype=bool)
+    for i, a in enumerate(arrays):
+        ok = np.isfinite(a)
+        matrix[i, length - len(a):] = np.where(ok, a, 0.0)
+        valid[i, length - len(a):] = ok
+    return matrix, valid
+
+
+def garch_loglik(resid, valid, variance, alpha, persistence):
+    """
+    Gaussisk log-likelihood för GARCH(1,1) med variansmålning.
+
+    resid, valid: (serier x tid); variance: (serier,); alpha, persistence: (serier x kandidater).
+    Returnerar (loglik, nästa periods varians) med formen (serier x kandidater).
+    """
+    beta = persistence - alpha
+    omega = variance[:, None] * (1.0 - persistence)
+    h = np.repeat(variance[:, None], alpha.shape[1], axis=1)
+    loglik = np.zeros_like(h)
+    for t in range(resid.shape[1]):
+        e2 = resid[:, t:t + 1] ** 2
+        ok = valid[:, t:t + 1]
+        loglik -= np.where(ok, 0.5 * (np.log(h) + e2 / h), 0.0)
+        h = np.where(ok, omega + alpha * e2 + beta * h, h)
+    return loglik, h
+
+
+def _clip_params(alpha, persistence):
+    persistence = np.clip(persistence, GRID_PERSISTENCE[0] / 2, MAX_PERSISTENCE)
+    alpha = np.clip(alpha, MIN_ALPHA, persistence)
+    return alpha, persistence
+
+
+def fit_garch_batch(returns, valid=None, start=None, rounds=8, warm_rounds=4):
+    """
+    Anpassar GARCH(1,1) för alla serier (rader i returns). start: (alpha, persistence) per
+    serie för varmstart (NaN = ingen varmstart för serien).
+    Returnerar dict med arrayer: mu, omega, alpha, beta, h (nästa periods varians), loglik.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = np.isfinite(returns) if valid is None else valid
+    n = len(returns)
+    counts = np.maximum(valid.sum(axis=1), 1)
+    mu = np.where(valid, returns, 0.0).sum(axis=1) / counts
+    resid = np.where(valid, returns - mu[:, None], 0.0)
+    variance = np.maximum((resid ** 2).sum(axis=1) / counts, 1e-12)
+
+    alpha = np.full(n, np.nan)
+    persistence = np.full(n, np.nan)
+    if start is not None:
+        alpha[:], persistence[:] = start
+    warm = np.isfinite(alpha) & np.isfinite(persistence)
+
+    # Grovt gitter för serier utan varmstart
+    if (~warm).any():
+        cold = np.flatnonzero(~warm)
+        grid_alpha = np.repeat(GRID_ALPHAS, len(GRID_PERSISTENCE))[None, :]
+        grid_persistence = np.tile(GRID_PERSISTENCE, len(GRID_ALPHAS))[None, :]
+        grid_alpha = np.broadcast_to(np.minimum(grid_alpha, grid_persistence), (len(cold), grid_alpha.shape[1]))
+        grid_persistence = np.broadcast_to(grid_persistence, grid_alpha.shape)
+        loglik, _ = garch_loglik(resid[cold], valid[cold], variance[cold], grid_alpha, grid_persistence)
+        best = np.argmax(loglik, axis=1)
+        alpha[cold] = grid_alpha[0, best]
+        persistence[cold] = grid_persistence[0, best]
+
+    # Mönstersökning: 3 x 3 grannar runt bästa punkten, steget halveras varje runda
+    step_alpha = np.where(warm, 0.01, 0.02)
+    step_persistence = np.where(warm, 0.005, 0.01)
+    offsets = np.array([(da, dp) for da in (-1, 0, 1) for dp in (-1, 0, 1)], dtype=np.float64)
+    n_rounds = np.where(warm, warm_rounds, rounds)
+    for r in range(int(n_rounds.max()) if n else 0):
+        active = r < n_rounds
+        cand_alpha = alpha[:, None] + offsets[None, :, 0] * step_alpha[:, None]
+        cand_persistence = persistence[:, None] + offsets[None, :, 1] * step_persistence[:, None]
+        cand_alpha, cand_persistence = _clip_params(cand_alpha, cand_persistence)
+        loglik, _ = garch_loglik(resid, valid, variance, cand_alpha, cand_persistence)
+        best = np.argmax(loglik, axis=1)
+        rows = np.arange(n)
+        alpha = np.where(active, cand_alpha[rows, best], alpha)
+        persistence = np.where(active, cand_persistence[rows, best], persistence)
+        moved = best != 4  # index 4 = nuvarande punkt
+        step_alpha = np.where(active & ~moved, step_alpha / 2, step_alpha)
+        step_persistence = np.where(active & ~moved, step_persistence / 2, step_persistence)
+
+    loglik, h = garch_loglik(resid, valid, variance, alpha[:, None], persistence[:, None])
+    return {
+        "mu": mu,
+        "omega": variance * (1.0 - persistence),
+        "alpha": alpha,
+        "beta": persistence - alpha,
+        "h": h[:, 0],
+        "loglik": loglik[:, 0],
+        "n_obs": valid.sum(axis=1),
+    }
+
+
+def _fit_chunk(returns, valid, start):
+    return fit_garch_batch(returns, valid, start)
+
+
+def variance_path(omega, alpha, beta, h_next, horizon):
+    """Prognostiserad varians för steg 1..horizon (serier x horizon)."""
+    persistence = alpha + beta
+    long_run = omega / np.maximum(1.0 - persistence, 1e-12)
+    decay = persistence[:, None] ** np.arange(horizon)[None, :]
+    return long_run[:, None] + decay * (h_next - long_run)[:, None]
+
+
+def classify_regime(ratio, thresholds=REGIME_THRESHOLDS):
+    """Kvot prognos/långsiktig volatilitet -> "low", "normal" eller "high"."""
+    ratio = np.asarray(ratio, dtype=np.float64)
+    return np.where(ratio < thresholds[0], "low", np.where(ratio > thresholds[1], "high", "normal"))
+
+
+def _log_returns(series):
+    series = pd.Series(series).astype(float)
+    series = series[np.isfinite(series) & (series > 0)]
+    return np.log(series).diff().iloc[1:]
+
+
+class VolatilityEngine:
+    """
+    GARCH(1,1) för många symboler med sparat tillstånd och O(1)-uppdatering per ny dag.
+    """
+
+    def __init__(self, state_path=STATE_PATH, window=DEFAULT_WINDOW, refit_every=REFIT_EVERY, n_jobs=1):
+        self.state_path = state_path
+        self.window = window
+        self.refit_every = refit_every
+        self.n_jobs = n_jobs
+        self.state = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Persistens ------------------------------------------------------------
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+            logger.info(f"✅ GARCH-tillstånd laddat för {len(self.state)} symboler")
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte läsa GARCH-tillståndet: {str(e)}")
+
+    def save(self):
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp = f"{self.state_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte spara GARCH-tillståndet: {str(e)}")
+
+    # --- Anpassning och uppdatering ---------------------------------------------
+
+    def fit(self, returns_by_symbol, warm_start=True):
+        """
+        Anpassar alla symboler (dict symbol -> log-avkastning med datumindex) i ett batchanrop,
+        varmstartat från sparade parametrar. Symboler med för kort historik hoppas över.
+        """
+        start_time = time.perf_counter()
+        symbols = [s for s, r in returns_by_symbol.items() if np.isfinite(np.asarray(r, dtype=float)).sum() >= MIN_OBSERVATIONS]
+        if not symbols:
+            return []
+        returns, valid = returns_matrix([returns_by_symbol[s] for s in symbols], self.window)
+        start = np.full((2, len(symbols)), np.nan)
+        if warm_start:
+            for i, symbol in enumerate(symbols):
+                params = self.state.get(symbol)
+                if params:
+                    start[:, i] = (params["alpha"], params["alpha"] + params["beta"])
+
+        chunks = np.array_split(np.arange(len(symbols)), max(1, -(-len(symbols) // FIT_CHUNK)))
+        if self.n_jobs != 1 and len(chunks) > 1:
+            runner = get_task_runner()
+            futures = [runner.submit(_fit_chunk, returns[idx], valid[idx], start[:, idx]) for idx in chunks]
+            parts = [future.result() for future in futures]
+        else:
+            parts = [_fit_chunk(returns[idx], valid[idx], start[:, idx]) for idx in chunks]
+        result = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+        with self._lock:
+            for i, symbol in enumerate(symbols):
+                last = returns_by_symbol[symbol].index[-1] if isinstance(returns_by_symbol[symbol], pd.Series) else None
+                self.state[symbol] = {
+                    "mu": float(result["mu"][i]),
+                    "omega": float(result["omega"][i]),
+                    "alpha": float(result["alpha"][i]),
+                    "beta": float(result["beta"][i]),
+                    "h": float(result["h"][i]),
+                    "loglik": float(result["loglik"][i]),
+                    "n_obs": int(result["n_obs"][i]),
+                    "last_date": str(pd.Timestamp(last).date()) if last is not None else None,
+                    "fitted_date": str(pd.Timestamp(last).date()) if last is not None else None,
+                }
+        self.timings["fit_s"] = time.perf_counter() - start_time
+        n_warm = int(np.isfinite(start[0]).sum())
+        logger.info(f"✅ GARCH anpassad för {len(symbols)} symboler ({n_warm} varmstartade) "
+                    f"på {self.timings['fit_s']:.2f}s")
+        return symbols
+
+    def step(self, symbol, new_returns):
+        """O(1) per ny avkastning: h' = omega + alpha * (r - mu)^2 + beta * h."""
+        params = self.state[symbol]
+        h = params["h"]
+        for value in np.asarray(new_returns, dtype=np.float64):
+            if np.isfinite(value):
+                h = params["omega"] + params["alpha"] * (value - params["mu"]) ** 2 + params["beta"] * h
+        params["h"] = float(h)
+        return h
+
+    def update(self, prices_by_symbol, returns=False):
+        """
+        För dagliga anrop med kurshistorik (dict symbol -> prisserie med datumindex, eller
+        log-avkastning om returns=True). Symboler med färskt tillstånd uppdateras i O(1) med
+        dagarna efter senaste datum; nya eller inaktuella symboler anpassas om i en batch.
+        Returnerar forecast() för symbolerna.
+        """
+        start_time = time.perf_counter()
+        series = {s: (pd.Series(p).astype(float) if returns else _log_returns(p)) for s, p in prices_by_symbol.items()}
+        refit, stepped = {}, 0
+        for symbol, r in series.items():
+            params = self.state.get(symbol)
+            if not params or params.get("last_date") is None or not isinstance(r.index, pd.DatetimeIndex):
+                refit[symbol] = r
+                continue
+            new = r[r.index > pd.Timestamp(params["last_date"])]
+            age = len(r[r.index > pd.Timestamp(params["fitted_date"])]) if params.get("fitted_date") else np.inf
+            if age >= self.refit_every:
+                refit[symbol] = r
+            elif len(new):
+                self.step(symbol, new.to_numpy())
+                params["last_date"] = str(new.index[-1].date())
+                stepped += 1
+        if refit:
+            self.fit(refit)
+        self.save()
+        self.timings["update_s"] = time.perf_counter() - start_time
+        logger.info(f"📊 GARCH-uppdatering: {stepped} stegade i O(1), {len(refit)} omanpassade "
+                    f"({self.timings['update_s']:.2f}s)")
+        return self.forecast(list(series))
+
+    def forecast(self, symbols=None, horizon=1, annualize=False):
+        """
+        Volatilitetsprognos per symbol: sigma (standardavvikelse för summerad avkastning över
+        horizon dagar), sigma_1d, långsiktig volatilitet, kvoten mellan dem och regim.
+        Med annualize=True skalas volatiliteterna till årsbasis (252 handelsdagar).
+        """
+        symbols = [s for s in (symbols or list(self.state)) if s in self.state]
+        columns = ["sigma", "sigma_1d", "long_run", "ratio", "regime", "alpha", "beta", "last_date"]
+        if not symbols:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name="symbol"))
+        params = pd.DataFrame([self.state[s] for s in symbols], index=pd.Index(symbols, name="symbol"))
+        omega, alpha, beta, h = (params[c].to_numpy() for c in ("omega", "alpha", "beta", "h"))
+        path = variance_path(omega, alpha, beta, h, horizon)
+        long_run = np.sqrt(omega / np.maximum(1.0 - alpha - beta, 1e-12))
+        sigma_1d = np.sqrt(h)
+        sigma = np.sqrt(path.sum(axis=1))
+        scale = 1.0
+        if annualize:
+            # Medelvariansen över horisonten skalad till ett år
+            scale = np.sqrt(TRADING_DAYS)
+            sigma = np.sqrt(path.mean(axis=1)) * scale
+        return pd.DataFrame({
+            "sigma": sigma,
+            "sigma_1d": sigma_1d * scale,
+            "long_run": long_run * scale,
+            "ratio": sigma_1d / long_run,
+            "regime": classify_regime(sigma_1d / long_run),
+            "alpha": alpha,
+            "beta": beta,
+            "last_date": params["last_date"].to_numpy(),
+        }, index=params.index)
+
+    def sigma(self, symbol, horizon=1):
+        """Prognostiserad volatilitet för en symbol över horizon dagar (None utan tillstånd)."""
+        if symbol not in self.state:
+            return None
+        return float(self.forecast([symbol], horizon=horizon)["sigma"].iloc[0])
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_volatility_engine():
+    """
+    Returnerar den gemensamma volatilitetsmotorn (tillståndet laddas från disk vid första användningen).
+    """
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = VolatilityEngine()
+        return _default_engine
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    def simulate(n_days, omega, alpha, beta, rng):
+        h, out = omega / (1 - alpha - beta), np.empty(n_days)
+        for t in range(n_days):
+            out[t] = rng.normal(0, np.sqrt(h))
+            h = omega + alpha * out[t] ** 2 + beta * h
+        return out
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end="2025-03-28", periods=1001)
+    universe = {f"SYM{i}": pd.Series(100 * np.exp(np.cumsum(simulate(len(dates), 2e-6, 0.08, 0.9, rng))), index=dates)
+                for i in range(50)}
+    engine = VolatilityEngine(state_path=None)
+    engine.update({s: p.iloc[:-1] for s, p in universe.items()})
+    print(engine.update(universe).head())  # en ny dag: O(1)-steg utan omanpassning
+    print(engine.forecast(horizon=5, annualize=True).head())
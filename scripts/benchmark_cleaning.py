@@ -0,0 +1,106 @@
+# scripts/benchmark_cleaning.py
+"""
+Jämför blockvis rensning (CleaningPipeline) med de befintliga funktionerna som
+läser hela datasetet i minnet (clean_data, impute_missing_values med KNNImputer).
+
+Syntetisk minutdata skrivs som partitioner (Parquet eller .npz) till en temporär
+katalog och rensas block för block; tid och toppminne (tracemalloc) mäts för båda
+vägarna. Den helminnesbaserade KNN-imputationen körs bara på de första
+--legacy-rows raderna (kvadratisk kostnad) och hoppas över om sklearn saknas.
+
+Körs från projektroten:
+    python scripts/benchmark_cleaning.py --rows 2000000 --columns 8 --partitions 20
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_processing.cleaning_pipeline import PARTITION_SUFFIX, CleaningPipeline, write_partition
+from data_processing.data_cleaning import clean_data
+from data_processing.data_imputation import impute_missing_values
+
+
+def make_bars(rows, n_columns, missing=0.01, seed=3):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, (rows, n_columns)), axis=0))
+    prices[rng.random(prices.shape) < missing] = np.nan
+    frame = pd.DataFrame(prices, columns=[f"f{i}" for i in range(n_columns)])
+    frame.insert(0, "timestamp", pd.date_range("2020-01-02 09:30", periods=rows, freq="min"))
+    return frame
+
+
+def measure(name, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except ImportError as e:
+        tracemalloc.stop()
+        print(f"  {name:<22} hoppas över ({e.name} saknas)")
+        return None
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"metod": name, "rader": result, "total s": elapsed, "toppminne MB": peak / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark för blockvis datarensning")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--partitions", type=int, default=10)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--knn-window", type=int, default=2_000)
+    parser.add_argument("--legacy-rows", type=int, default=20_000, help="Rader för KNNImputer över hela datan")
+    args = parser.parse_args()
+
+    bars = make_bars(args.rows, args.columns)
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "bars")
+        os.makedirs(source)
+        step = -(-args.rows // args.partitions)
+        for i, start in enumerate(range(0, args.rows, step)):
+            write_partition(bars.iloc[start:start + step], os.path.join(source, f"part-{i:05d}{PARTITION_SUFFIX}"))
+
+        def pipeline(fill):
+            def run():
+                cleaner = CleaningPipeline(key="timestamp", fill=fill, knn_window=args.knn_window,
+                                           normalize="zscore", chunk_rows=args.chunk_rows)
+                parts = cleaner.run(source, output_dir=os.path.join(root, f"clean-{fill}"))
+                return sum(len(np.load(p)["timestamp"]) if p.endswith(".npz") else len(pd.read_parquet(p))
+                           for p in parts)
+            return run
+
+        def legacy_clean():
+            return len(clean_data(bars.drop(columns="timestamp")))
+
+        def legacy_knn(data):
+            def run():
+                import sklearn.impute  # noqa: F401 – hoppa över mätningen om sklearn saknas
+                return len(impute_missing_values(data, method="knn"))
+            return run
+
+        sample = bars.drop(columns="timestamp").iloc[:args.legacy_rows]
+        print(f"📊 {args.rows} rader x {args.columns} kolumner i {args.partitions} partitioner ({PARTITION_SUFFIX})")
+        results = [
+            measure("pipeline median", pipeline("median")),
+            measure("pipeline knn-fönster", pipeline("knn")),
+            measure("clean_data (i minnet)", legacy_clean),
+            measure("knn-fönster (urval)", lambda: len(impute_missing_values(sample, window=args.knn_window))),
+            measure("KNNImputer (urval)", legacy_knn(sample)),
+        ]
+    table = pd.DataFrame([r for r in results if r is not None]).set_index("metod")
+    print(table.round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# scripts/benchmark_forecasting.py
+"""
+Jämför träffsäkerhet och latens för prognosmodellerna på samma historik:
+de vektoriserade ETS- och AR-modellerna (alla serier i ett anrop) mot
+ARIMA, LSTM och Prophet (en anpassning per serie) samt en naiv slumpvandring.
+
+De sista --horizon punkterna i varje serie hålls utanför anpassningen och
+jämförs med prognosen (MAPE över hela horisonten och vid slutpunkten).
+De långsamma modellerna körs bara på de första --slow-sample serierna och
+hoppas över om paketet saknas (statsmodels, tensorflow, prophet).
+
+Körs från projektroten, med syntetiska serier eller riktig historik:
+    python scripts/benchmark_forecasting.py --series 500 --length 1250 --horizon 20
+    python scripts/benchmark_forecasting.py --tickers AAPL MSFT VOLV-B.ST --period 5y
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ai_learning.fast_forecast import forecast_ar_batch, forecast_ets_batch
+
+
+def make_series(n_series, length, seed=7):
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.0003, 0.0004, (n_series, 1))
+    vol = rng.uniform(0.008, 0.03, (n_series, 1))
+    return list(100 * np.exp(np.cumsum(rng.normal(drift, vol, (n_series, length)), axis=1)))
+
+
+def _naive(series_list, forecast_steps):
+    return np.array([np.full(forecast_steps, s[-1]) for s in series_list])
+
+
+def _per_series(forecast_fn):
+    def run(series_list, forecast_steps):
+        return np.array([forecast_fn(s, forecast_steps) for s in series_list])
+    return run
+
+
+def _arima(series, forecast_steps):
+    from ai_learning.timeseries import forecast_arima
+    return forecast_arima(pd.Series(series), forecast_steps=forecast_steps)
+
+
+def _lstm(series, forecast_steps):
+    from ai_learning.timeseries import forecast_lstm
+    return forecast_lstm(np.asarray(series), forecast_steps=forecast_steps)
+
+
+def _prophet(series, forecast_steps):
+    from ai_decision_engine.forecast_service import ForecastService
+    dates = pd.bdate_range(end="2024-12-31", periods=len(series))
+    forecast = ForecastService(cache_dir=None).forecast(pd.Series(series, index=dates),
+                                                        forecast_days=int(forecast_steps * 1.5), uncertainty=False)
+    future = forecast[forecast["ds"] > dates[-1]]
+    return future[future["ds"].dt.dayofweek < 5]["yhat"].to_numpy()[:forecast_steps]
+
+
+def evaluate(name, fn, train, actual):
+    start = time.perf_counter()
+    try:
+        forecast = fn(train, forecast_steps=actual.shape[1])
+    except ImportError as e:
+        print(f"  {name:<10} hoppas över ({e.name} saknas)")
+        return None
+    elapsed = time.perf_counter() - start
+    ape = np.abs(forecast - actual) / actual
+    return {
+        "metod": name,
+        "serier": len(train),
+        "MAPE %": 100 * np.nanmean(ape),
+        "MAPE slut %": 100 * np.nanmean(ape[:, -1]),
+        "total s": elapsed,
+        "ms/serie": 1000 * elapsed / len(train),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark för prognosmodeller")
+    parser.add_argument("--series", type=int, default=500)
+    parser.add_argument("--length", type=int, default=1250)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--tickers", nargs="*", help="Riktiga tickers (hämtas med yfinance) i stället för syntetiska serier")
+    parser.add_argument("--period", default="5y")
+    parser.add_argument("--slow-sample", type=int, default=5, help="Antal serier för ARIMA/LSTM/Prophet")
+    args = parser.parse_args()
+
+    if args.tickers:
+        from ai_decision_engine.forecast_service import fetch_price_history
+        series = [s.to_numpy() for s in fetch_price_history(args.tickers, period=args.period).values()]
+    else:
+        series = make_series(args.series, args.length)
+    series = [s for s in series if len(s) > args.horizon + 50]
+    train = [s[:-args.horizon] for s in series]
+    actual = np.array([s[-args.horizon:] for s in series])
+    k = min(args.slow_sample, len(series))
+
+    print(f"📊 {len(series)} serier, prognoshorisont {args.horizon} steg")
+    results = [
+        evaluate("naiv", _naive, train, actual),
+        evaluate("ets", forecast_ets_batch, train, actual),
+        evaluate("ar", forecast_ar_batch, train, actual),
+        evaluate("ets (urval)", forecast_ets_batch, train[:k], actual[:k]),
+        evaluate("arima", _per_series(_arima), train[:k], actual[:k]),
+        evaluate("lstm", _per_series(_lstm), train[:k], actual[:k]),
+        evaluate("prophet", _per_series(_prophet), train[:k], actual[:k]),
+    ]
+    table = pd.DataFrame([r for r in results if r is not None]).set_index("metod")
+    print(table.round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
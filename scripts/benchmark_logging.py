@@ -0,0 +1,94 @@
+# scripts/benchmark_logging.py
+"""
+Jämför genomströmning (steg/s) i RL-träningsmiljön och i backtest_rl_agent
+med synkron filloggning respektive köad loggning (QueueHandler/QueueListener),
+med och utan sampling av per-steg-loggningen.
+
+Körs från projektroten:
+    python scripts/benchmark_logging.py --steps 20000
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.logging_config import setup_logging, shutdown_logging, SamplingFilter
+from ai_learning.reinforcement_learning import TradingEnv
+from ai_learning.backtest_rl import backtest_rl_agent
+
+STEP_LOGGERS = ["ai_learning.reinforcement_learning.steps", "ai_learning.backtest_rl.steps"]
+
+
+def _make_data(n_rows):
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        "close": np.cumsum(rng.normal(0, 2, n_rows)) + 1000,
+        "momentum": rng.normal(size=n_rows),
+        "volume": rng.integers(100, 1000, size=n_rows),
+    })
+
+
+def _set_sampling(every_n):
+    for name in STEP_LOGGERS:
+        for f in logging.getLogger(name).filters:
+            if isinstance(f, SamplingFilter):
+                f.every_n = every_n
+
+
+def bench_env_steps(data, n_steps):
+    """Kör miljön med slumpmässiga actions, som under insamling av rollouts i PPO."""
+    env = TradingEnv(data)
+    env.reset()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 3, size=n_steps)
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(int(action))
+        if terminated or truncated:
+            env.reset()
+    return n_steps / (time.perf_counter() - start)
+
+
+def bench_backtest(data, model_path):
+    start = time.perf_counter()
+    backtest_rl_agent(data, model_path=model_path)
+    return (len(data) - 1) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--model", default="rl_trading_model.zip")
+    args = parser.parse_args()
+
+    data = _make_data(args.steps + 1)
+    log_dir = tempfile.mkdtemp(prefix="bench_logging_")
+    rows = []
+
+    for queued in (False, True):
+        for every_n in (1, 100):
+            setup_logging("bench.log", log_level=logging.DEBUG, log_dir=log_dir, queued=queued, console=False)
+            _set_sampling(every_n)
+            env_rate = bench_env_steps(data, args.steps)
+            bt_rate = bench_backtest(data, args.model) if os.path.exists(args.model) else float("nan")
+            shutdown_logging()
+            rows.append({
+                "läge": "köad" if queued else "synkron",
+                "sampling": f"1/{every_n}",
+                "env steg/s": round(env_rate),
+                "backtest steg/s": round(bt_rate) if bt_rate == bt_rate else "N/A",
+            })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# scripts/benchmark_market_stream.py
+"""
+Mäter hur många ticks per sekund MarketDataHub klarar, dels enbart inläsning
+(JSON-tolkning + ringbuffertar + stapelaggregering), dels hela kedjan via en
+lokal ReplayServer och en WebSocket-anslutning.
+
+Körs från projektroten:
+    python scripts/benchmark_market_stream.py --ticks 200000 --symbols 3 10 50
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+from live_trading.market_stream import (
+    MarketDataHub,
+    MarketDataStream,
+    ReplayServer,
+    synthetic_ticks,
+    write_recording,
+)
+
+
+def _bench_ingest(ticks, batch_size):
+    payloads = [json.dumps(ticks[i:i + batch_size]) for i in range(0, len(ticks), batch_size)]
+    hub = MarketDataHub()
+    start = time.perf_counter()
+    for payload in payloads:
+        hub.ingest_message(json.loads(payload))
+    hub.sweep()
+    return len(ticks) / (time.perf_counter() - start), hub.bar_count
+
+
+async def _bench_stream(recording, symbols, batch_size):
+    hub = MarketDataHub()
+    async with ReplayServer(recording, batch_size=batch_size) as server:
+        stream = MarketDataStream(server.url, symbols, hub)
+        start = time.perf_counter()
+        await stream.run(reconnect=False)
+        elapsed = time.perf_counter() - start
+    return hub.tick_count / elapsed, hub.bar_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark för realtidsinläsning av marknadsdata")
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--symbols", type=int, nargs="+", default=[3, 10, 50])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--ticks-per-second", type=int, default=500, help="Syntetisk tickfrekvens (styr antal staplar)")
+    args = parser.parse_args()
+
+    print(f"{'symboler':>8} {'batch':>6} {'inläsning ticks/s':>18} {'websocket ticks/s':>18} {'staplar':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_symbols in args.symbols:
+            symbols = [f"SYM{i}" for i in range(n_symbols)]
+            ticks = synthetic_ticks(symbols, args.ticks, ticks_per_second=args.ticks_per_second)
+            recording = write_recording(ticks, os.path.join(tmp, f"ticks_{n_symbols}.jsonl"))
+            for batch_size in args.batch_sizes:
+                ingest_rate, _ = _bench_ingest(ticks, batch_size)
+                stream_rate, bars = asyncio.run(_bench_stream(recording, symbols, batch_size))
+                print(f"{n_symbols:>8} {batch_size:>6} {ingest_rate:>18,.0f} {stream_rate:>18,.0f} {bars:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# scripts/benchmark_valuation.py
+"""
+Jämför värdering av en syntetisk portfölj (standard 10 000 rader fördelade på fyra konton)
+rad för rad (regex + float() och en kursuppslagning per rad, som tidigare) med
+värderingsmotorn (vektoriserad tolkning, en kursuppslagning per unik ticker och
+cachad växelkursomräkning till SEK).
+
+Kurser och växelkurser är syntetiska och i minnet, så jämförelsen mäter bara CPU-tid;
+antalet kursuppslagningar skrivs också ut eftersom det är dem som kostar nätverksanrop live.
+
+Körs från projektroten:
+    python scripts/benchmark_valuation.py --rows 10000
+"""
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from portfolio_management.valuation_engine import FXCache, ValuationEngine
+
+ACCOUNTS = ["Alice", "Valter", "Pension", "Investeringskonto"]
+QUOTE_CURRENCIES = ["SEK", "USD", "EUR", "GBp", "NOK"]
+FX_TO_SEK = {"USD": 10.5, "EUR": 11.4, "GBP": 13.4, "NOK": 0.98}
+
+
+def _format_sek(value):
+    whole, frac = f"{value:,.2f}".split(".")
+    return f"{whole.replace(',', ' ')},{frac} kr"
+
+
+def make_portfolio(n_rows, n_tickers=500, seed=42):
+    rng = np.random.default_rng(seed)
+    tickers = np.array([f"TCK{i}" for i in range(n_tickers)])
+    ticker_currency = rng.choice(QUOTE_CURRENCIES, n_tickers)
+    ticker_price = rng.uniform(5, 500, n_tickers).round(2)
+    idx = rng.integers(0, n_tickers, n_rows)
+    antal = rng.integers(1, 2000, n_rows)
+    kurs = ticker_price[idx] * 10
+    df = pd.DataFrame({
+        "Aktie/Fond/ETF": [f"Bolag {i}" for i in idx],
+        "Ticker": tickers[idx],
+        "Antal": [str(a) for a in antal],
+        "Kurs (SEK)": [f"{k:.2f}".replace(".", ",") for k in kurs],
+        "Värde (SEK)": [_format_sek(a * k) for a, k in zip(antal, kurs)],
+        "Typ": "Aktie",
+        "Kategori": "Tech",
+    })
+    account = rng.integers(0, len(ACCOUNTS), n_rows)
+    portfolios = {name: df[account == i].reset_index(drop=True) for i, name in enumerate(ACCOUNTS)}
+    quotes = pd.DataFrame({"price": ticker_price, "currency": ticker_currency}, index=tickers)
+    return portfolios, quotes
+
+
+def _parse_float_str(value_str):
+    s = re.sub(r"[^0-9\.\-]", "", str(value_str).replace(",", ".").strip())
+    try:
+        return float(s)
+    except ValueError:
+        return 0.0
+
+
+def rowwise_valuation(portfolios, quotes):
+    """Det tidigare mönstret: en loop per konto och rad, utan valutaomräkning."""
+    quote_dict = quotes.to_dict("index")
+    lookups = 0
+    totals = {}
+    for account, df in portfolios.items():
+        total = 0.0
+        for _, row in df.iterrows():
+            antal = _parse_float_str(row["Antal"])
+            kurs = _parse_float_str(row["Kurs (SEK)"].replace(" ", ""))
+            quote = quote_dict.get(row["Ticker"])
+            lookups += 1
+            price = quote["price"] if quote else kurs
+            total += price * antal
+        totals[account] = total
+    return totals, lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark för portföljvärdering")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    portfolios, quotes = make_portfolio(args.rows, args.tickers)
+    lookups = {"n": 0}
+
+    def quote_fetcher(tickers):
+        lookups["n"] += len(tickers)
+        return quotes.reindex(tickers)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        _, rowwise_lookups = rowwise_valuation(portfolios, quotes)
+    rowwise_s = (time.perf_counter() - start) / args.repeat
+
+    engine = ValuationEngine(quote_fetcher=quote_fetcher, fx=FXCache(fetcher=FX_TO_SEK.get))
+    cold_start = time.perf_counter()
+    valued = engine.value_portfolios(portfolios)
+    cold_s = time.perf_counter() - cold_start
+    warm_start = time.perf_counter()
+    for _ in range(args.repeat):
+        valued = engine.value_portfolios(portfolios)
+    warm_s = (time.perf_counter() - warm_start) / args.repeat
+
+    print(f"📊 {args.rows} rader, {args.tickers} tickers, {len(ACCOUNTS)} konton")
+    print(f"  Radvis (utan valutaomräkning): {rowwise_s * 1000:8.1f} ms, {rowwise_lookups} kursuppslagningar")
+    print(f"  Värderingsmotor, kall cache:   {cold_s * 1000:8.1f} ms, {lookups['n']} kursuppslagningar")
+    print(f"  Värderingsmotor, varm cache:   {warm_s * 1000:8.1f} ms "
+          f"(tolkning {engine.timings['parse_s'] * 1000:.1f} ms)")
+    print(engine.summarize(valued))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 # scripts/fetch_data.py
+# Importerar från projektets paket; körs/importeras från projektroten, t.ex.:
+#     python -m scripts.fetch_data
 
 import logging
 import gspread
+import pandas as pd
 from oauth2client.service_account import ServiceAccountCredentials
 
+from portfolio_management.valuation_engine import parse_number_series
+
 def get_google_sheets_client(json_keyfile_path: str):
     """
     Skapar och returnerar en gspread-klient via service account credentials.
@@ -54,8 +59,6 @@ def parse_portfolio_rows(rows: list, account_name: str) -> list:
       ]
     Används senare av AI-funktioner och/eller för att beräkna totalsummor.
     """
-    parsed_data = []
-
     # Förväntad kolumnindelning (justera om ditt Google Sheet har annan ordning):
     #   0: Aktie/Fond/ETF
     #   1: Ticker
@@ -66,65 +69,23 @@ def parse_portfolio_rows(rows: list, account_name: str) -> list:
     #   6: Kategori
     #   7: Konto
     #
-    # Du kan anpassa index nedan efter hur ditt GSheet är upplagt.
-
-    for i, row in enumerate(rows):
-        # Hoppa över första raden om det är rubriker
-        if i == 0:
-            logging.info(f"[DEBUG] Hoppar över header-rad för konto '{account_name}'.")
-            continue
-
-        # Kolla att vi har minst 8 kolumner i row
-        if len(row) < 8:
-            logging.debug(f"[DEBUG] Raden saknar kolumner (har {len(row)}).")
-            continue
-
-        # Plocka ut råvärden
-        namn = row[0].strip() if row[0] else ""
-        ticker = row[1].strip() if row[1] else ""
-        antal_str = row[2].strip() if row[2] else "0"
-        kurs_str = row[3].strip() if row[3] else "0"
-        total_str = row[4].strip() if row[4] else "0"
-        typ = row[5].strip() if row[5] else ""
-        kategori = row[6].strip() if row[6] else ""
-        konto = row[7].strip() if row[7] else account_name  # fallback
-
-        # Konvertera antal
-        try:
-            antal = float(antal_str.replace(",", "."))
-        except ValueError:
-            antal = 0.0
-
-        # Konvertera kurs
-        try:
-            kurs = float(kurs_str.replace(",", "."))
-        except ValueError:
-            kurs = 0.0
-
-        # Konvertera total_värde
-        # Tar bort "kr", mellanslag och ersätter komma med punkt
-        total_str = (total_str.replace("kr", "")
-                                .replace(" ", "")
-                                .replace(",", "."))
-        try:
-            total_värde = float(total_str)
-        except ValueError:
-            total_värde = 0.0
+    # Första raden (rubriker) hoppas över och rader med färre än 8 kolumner ignoreras.
+    # Talkolumnerna tolkas vektoriserat för hela fliken på en gång.
+    body = [row[:8] for row in rows[1:] if len(row) >= 8]
+    if len(rows) > len(body) + 1:
+        logging.debug(f"[DEBUG] {len(rows) - len(body) - 1} rader saknar kolumner för konto '{account_name}'.")
+    if not body:
+        return []
 
-        item = {
-            "namn": namn,
-            "ticker": ticker,
-            "antal": antal,
-            "pris": kurs,
-            "valuta": "SEK",       # Du kan hårdkoda om allt är i SEK
-            "total_värde": total_värde,
-            "typ": typ,
-            "kategori": kategori,
-            "konto": konto,
-        }
-        parsed_data.append(item)
+    df = pd.DataFrame(body, columns=["namn", "ticker", "antal", "pris", "total_värde", "typ", "kategori", "konto"])
+    for column in ("namn", "ticker", "typ", "kategori", "konto"):
+        df[column] = df[column].fillna("").astype(str).str.strip()
+    for column in ("antal", "pris", "total_värde"):
+        df[column] = parse_number_series(df[column]).fillna(0.0)
+    df["konto"] = df["konto"].where(df["konto"] != "", account_name)  # fallback
+    df["valuta"] = "SEK"  # Du kan hårdkoda om allt är i SEK
 
-    return parsed_data
+    return df[["namn", "ticker", "antal", "pris", "valuta", "total_värde", "typ", "kategori", "konto"]].to_dict("records")
 
 def fetch_all_portfolios(json_keyfile_path: str, sheet_id: str) -> dict:
     """
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.cleaning_pipeline import CleaningPipeline
+
+
+def _blocks(n_blocks=3, rows=100):
+    rng = np.random.default_rng(0)
+    for i in range(n_blocks):
+        frame = pd.DataFrame({"id": np.arange(i * rows, (i + 1) * rows), "close": rng.normal(100, 1, rows)})
+        frame.loc[::10, "close"] = np.nan
+        yield frame
+
+
+def test_one_shot_iterator_is_rejected():
+    with pytest.raises(TypeError):
+        CleaningPipeline(key="id").run(_blocks())
+
+
+def test_factory_source_is_reopened_for_transform():
+    out = CleaningPipeline(key="id").run(lambda: _blocks())
+    assert len(out) == 300
+    assert out["close"].notna().all()
+
+
+def test_list_of_frames_is_reiterable():
+    out = CleaningPipeline(key="id").run(list(_blocks()))
+    assert len(out) == 300
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from portfolio_management.rebalancing import rebalancing
+from portfolio_management.rebalancing_optimizer import optimize_rebalance
+from portfolio_management.valuation_engine import ValuationEngine, cash_balances, is_cash, target_weights
+
+
+def _sheet():
+    return pd.DataFrame({
+        "Aktie/Fond/ETF": ["Tesla", "Apple", "Volvo B", "Kassa"],
+        "Ticker": ["NASDAQ:TSLA", "NASDAQ:AAPL", "STO:VOLV-B", ""],
+        "Antal": ["100", "10", "20", "0"],
+        "Kurs (SEK)": ["2 500,00", "2 000,00", "250,00", "0"],
+        "Värde (SEK)": ["250 000,00", "20 000,00", "5 000,00", "25 000,00"],
+        "Typ": ["Aktie", "Aktie", "Aktie", "Kassa"],
+        "Kategori": ["Tech", "Tech", "Industri", "Likvida medel"],
+    })
+
+
+def test_target_weights_match_valuation_tickers():
+    sheet = _sheet()
+    sheet["symbol"] = sheet["Ticker"]
+    sheet["allocation"] = 0.25
+    targets = target_weights(rebalancing(sheet))
+    assert sorted(targets.index) == ["AAPL", "TSLA", "VOLV-B"]
+
+
+def test_prefixed_tickers_produce_orders():
+    sheet = _sheet()
+    holdings = ValuationEngine().value_portfolios({"ISK": sheet}, live=False)
+    rebalanced = sheet.assign(symbol=sheet["Ticker"], allocation=1 / len(sheet))
+    targets = target_weights(rebalancing(rebalanced))
+
+    plan = optimize_rebalance(holdings[~is_cash(holdings)], targets, cash=cash_balances(holdings).to_dict(),
+                              max_turnover=0.25, min_trade_value=500.0)
+
+    orders = plan["orders"]
+    assert len(orders) > 0
+    assert set(orders["symbol"]) <= {"TSLA", "AAPL", "VOLV-B"}
+    assert "TSLA" in set(orders.loc[orders["side"] == "SELL", "symbol"])
@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="api_wrapper.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def make_api_request(url, params=None, headers=None):
@@ -14,10 +14,10 @@ def make_api_request(url, params=None, headers=None):
         response = requests.get(url, params=params, headers=headers)
         response.raise_for_status()
         data = response.json()
-        logging.info("✅ API-anrop lyckades.")
+        logger.info("✅ API-anrop lyckades.")
         return data
     except requests.exceptions.RequestException as e:
-        logging.error(f"❌ Fel vid API-anrop: {str(e)}")
+        logger.error(f"❌ Fel vid API-anrop: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import shutil
 from datetime import datetime
 
 # Konfigurera loggning
-logging.basicConfig(filename="backup_data_storage.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def create_backup(source_folder="data", backup_folder="backups"):
@@ -13,7 +13,7 @@ def create_backup(source_folder="data", backup_folder="backups"):
     """
     try:
         if not os.path.exists(source_folder):
-            logging.warning(
+            logger.warning(
                 f"⚠️ Källmappen {source_folder} finns inte. Ingen backup skapad."
             )
             return False
@@ -25,10 +25,10 @@ def create_backup(source_folder="data", backup_folder="backups"):
         backup_path = os.path.join(backup_folder, f"backup_{timestamp}")
         shutil.copytree(source_folder, backup_path)
 
-        logging.info(f"✅ Backup skapad: {backup_path}")
+        logger.info(f"✅ Backup skapad: {backup_path}")
         return True
     except Exception as e:
-        logging.error(f"❌ Fel vid backup: {str(e)}")
+        logger.error(f"❌ Fel vid backup: {str(e)}")
         return False
 
 
@@ -38,7 +38,7 @@ def schedule_backup(interval=86400):
     """
     import time
 
-    logging.info("🚀 Startar schemalagd backup...")
+    logger.info("🚀 Startar schemalagd backup...")
     while True:
         create_backup()
         time.sleep(interval)
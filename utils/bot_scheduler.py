@@ -1,13 +1,11 @@
 import logging
-import schedule
-import threading
-import time
 from datetime import datetime
 
 from reports.generate_report import generate_and_send_daily_pdf_report
 from notifications.telegram_bot import send_ai_recommendations, send_telegram_notification
 from data_collection.macro_data import fetch_macro_data
 from risk_management.risk_warning import detect_risk_level
+from utils.job_scheduler import get_scheduler
 
 from dotenv import load_dotenv
 import os
@@ -16,30 +14,30 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-logging.basicConfig(filename="scheduler_manager.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
-def schedule_all_tasks():
+def schedule_all_tasks(scheduler=None):
     """
     Schemalägg alla uppgifter som AI-boten ska utföra automatiskt.
     """
-    logging.info("🕒 Initierar schemalagda uppgifter...")
+    logger.info("🕒 Initierar schemalagda uppgifter...")
+    scheduler = scheduler or get_scheduler()
 
     # Daglig PDF-rapport med AI-data
-    schedule.every().day.at("18:00").do(generate_and_send_daily_pdf_report)
+    scheduler.every_day("18:00", "daily_pdf_report", generate_and_send_daily_pdf_report, timeout=1800)
 
     # AI-rekommendationer & nya investeringar
-    schedule.every().day.at("17:00").do(send_ai_recommendations)
+    scheduler.every_day("17:00", "ai_recommendations", send_ai_recommendations, timeout=600)
 
-    # Makrohändelsekoll varje timme
-    schedule.every().hour.at(":05").do(check_macro_events)
+    # Makrohändelsekoll varje timme (missade timmar körs inte ikapp)
+    scheduler.every_hour(":05", "macro_events", check_macro_events, timeout=300, catch_up=False)
 
     # Riskvarning varje timme
-    schedule.every().hour.at(":10").do(send_risk_alert_if_needed)
+    scheduler.every_hour(":10", "risk_alert", send_risk_alert_if_needed, timeout=300, catchup_grace=1800)
 
     # Starta schemaläggning i bakgrundstråd
-    thread = threading.Thread(target=_run_scheduler_loop, daemon=True)
-    thread.start()
+    return scheduler.start()
 
 
 def check_macro_events():
@@ -55,9 +53,9 @@ def check_macro_events():
                     if event_date == today:
                         message = f"📢 Makrohändelse: {key} släpptes idag – {value.get('value', '')}"
                         send_telegram_notification(message, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
-                        logging.info(f"Makrohändelse skickad: {key}")
+                        logger.info(f"Makrohändelse skickad: {key}")
     except Exception as e:
-        logging.error(f"❌ Fel vid makrohändelsekontroll: {str(e)}")
+        logger.error(f"❌ Fel vid makrohändelsekontroll: {str(e)}")
 
 
 def send_risk_alert_if_needed():
@@ -66,12 +64,6 @@ def send_risk_alert_if_needed():
         if risk_level > 0.05:
             message = f"⚠️ Hög volatilitet upptäckt! Risknivå: {risk_level:.2%}. Överväg att minska exponering."
             send_telegram_notification(message, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
-            logging.info("🚨 Riskvarning skickad")
+            logger.info("🚨 Riskvarning skickad")
     except Exception as e:
-        logging.error(f"❌ Fel vid riskvarning: {str(e)}")
-
-
-def _run_scheduler_loop():
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+        logger.error(f"❌ Fel vid riskvarning: {str(e)}")
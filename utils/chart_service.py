@@ -0,0 +1,316 @@
+"""
+chart_service.py
+
+Huvudlös diagramrendering för servern (Agg-backend, aldrig plt.show()).
+
+- Varje diagramtyp har en återanvändbar figurmall: figur, axlar, linjer och legend
+  skapas en gång och vid varje rendering uppdateras bara linjedata och titel.
+- Figurerna ritas direkt på en egen Agg-canvas och pixelbufferten kodas som PNG med
+  låg zlib-nivå (PNG_COMPRESS_LEVEL), utan savefig()-omvägen; kodningen var annars
+  en tredjedel av renderingstiden.
+- Långa serier decimeras med LTTB (Largest-Triangle-Three-Buckets) före plottning,
+  så att formen på kurvan behålls med ett par tusen punkter i stället för hela serien.
+- Tiden för varje diagram loggas och finns som tidsrapport (timing_report()).
+
+Exempel:
+    service = get_chart_service()
+    service.render_lines(
+        "benchmark",
+        {"AI-Strategi": strategy_returns, "S&P 500": benchmark_returns},
+        title="Strategins Avkastning vs S&P 500",
+        output_file="benchmark_comparison.png",
+    )
+    print(service.format_timing_report())
+"""
+
+import io
+import logging
+import threading
+import time
+from collections import deque
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_POINTS = 2000
+PNG_COMPRESS_LEVEL = 1  # zlib-nivå: 1 ger ca 15 % större filer men halverar kodningstiden
+
+
+def _render_png(fig, canvas, dpi, compress_level=PNG_COMPRESS_LEVEL):
+    """Ritar figuren på sin Agg-canvas och kodar RGBA-bufferten som PNG."""
+    if fig.dpi != dpi:
+        fig.set_dpi(dpi)
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    image = Image.frombuffer("RGBA", (width, height), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+    buffer = io.BytesIO()
+    image.save(buffer, format="png", compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: väljer n_out punkter som behåller kurvans form.
+    Första och sista punkten behålls alltid. x och y är numeriska NumPy-arrayer.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    # Medelpunkt per hink (sista "hinken" är slutpunkten) beräknas i ett svep
+    bounds = np.append(edges, n)
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / counts
+    avg_y = np.add.reduceat(y, bounds[:-1]) / counts
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        ax_, ay_ = x[a], y[a]
+        # Arean (x2) av triangeln mellan föregående vald punkt, kandidaten och nästa hinks medelpunkt
+        area = np.abs((ax_ - avg_x[i + 1]) * (y[start:end] - ay_) - (ax_ - x[start:end]) * (avg_y[i + 1] - ay_))
+        a = start + int(area.argmax())
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def _to_xy(series):
+    """
+    Gör om en Series/array/(x, y)-tupel till numeriska arrayer. Returnerar (x, y, is_date).
+    """
+    if isinstance(series, tuple):
+        x, y = series
+        x = pd.Index(x)
+    elif isinstance(series, pd.Series):
+        x, y = series.index, series.values
+    else:
+        y = np.asarray(series)
+        x = pd.RangeIndex(len(y))
+    is_date = isinstance(x, pd.DatetimeIndex)
+    x = mdates.date2num(x.values) if is_date else np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    mask = np.isfinite(y)
+    if not mask.all():
+        x, y = x[mask], y[mask]
+    return x, y, is_date
+
+
+class _LineTemplate:
+    """
+    Figur med en fast uppsättning namngivna linjer (Line2D). Markörserier
+    (t.ex. köp/sälj) är linjer utan linjestil och decimeras inte.
+    """
+
+    def __init__(self, lines, figsize=(10, 5), xlabel="", ylabel="", hlines=None, grid=False, legend=True):
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.fig.subplots_adjust(left=0.08, right=0.98, top=0.92, bottom=0.12)
+        self.ax = self.fig.subplots()
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.lines = {}
+        self.markers = set()
+        for name, style in lines:
+            style = dict(style or {})
+            if style.get("linestyle") == "":
+                self.markers.add(name)
+            (self.lines[name],) = self.ax.plot([], [], label=style.pop("label", name), **style)
+        for y, style in (hlines or []):
+            self.ax.axhline(y=y, **style)
+        if grid:
+            self.ax.grid(True)
+        if legend:
+            self.ax.legend(loc="upper left")
+        self.lock = threading.Lock()
+        self._date_axis = None
+
+    def render(self, series, title, max_points, dpi):
+        points_in = points_out = 0
+        is_date = False
+        for name, line in self.lines.items():
+            data = series.get(name)
+            if data is None:
+                line.set_data([], [])
+                continue
+            x, y, is_date = _to_xy(data)
+            points_in += len(y)
+            if name not in self.markers and len(y) > max_points:
+                x, y = lttb(x, y, max_points)
+            points_out += len(y)
+            line.set_data(x, y)
+        if is_date != self._date_axis:
+            if is_date:
+                locator = mdates.AutoDateLocator()
+                self.ax.xaxis.set_major_locator(locator)
+                self.ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+            else:
+                self.ax.xaxis.set_major_locator(matplotlib.ticker.AutoLocator())
+                self.ax.xaxis.set_major_formatter(matplotlib.ticker.ScalarFormatter())
+            self._date_axis = is_date
+        self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        return _render_png(self.fig, self.canvas, dpi), points_in, points_out
+
+
+class _HeatmapTemplate:
+    """
+    Heatmap (t.ex. korrelationsmatris) för en given matrisstorlek; bilddata, etiketter
+    och cellvärden uppdateras vid varje rendering.
+    """
+
+    def __init__(self, shape, figsize=(10, 8), cmap="coolwarm", vmin=-1, vmax=1, annotate=True):
+        self.fig = Figure(figsize=figsize)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.fig.subplots_adjust(left=0.18, right=0.95, top=0.92, bottom=0.2)
+        self.ax = self.fig.subplots()
+        self.image = self.ax.imshow(np.zeros(shape), cmap=cmap, vmin=vmin, vmax=vmax, aspect="auto")
+        self.fig.colorbar(self.image, ax=self.ax)
+        rows, cols = shape
+        self.ax.set_xticks(np.arange(cols))
+        self.ax.set_yticks(np.arange(rows))
+        self.texts = []
+        if annotate and rows * cols <= 400:
+            self.texts = [
+                [self.ax.text(j, i, "", ha="center", va="center", fontsize=9) for j in range(cols)]
+                for i in range(rows)
+            ]
+        self._labels = None
+        self.lock = threading.Lock()
+
+    def render(self, matrix, title, dpi):
+        values = matrix.values if isinstance(matrix, pd.DataFrame) else np.asarray(matrix)
+        self.image.set_data(values)
+        if isinstance(matrix, pd.DataFrame):
+            labels = (tuple(map(str, matrix.columns)), tuple(map(str, matrix.index)))
+            if labels != self._labels:  # nya etikett-objekt bara när etiketterna faktiskt ändras
+                self.ax.set_xticklabels(labels[0], rotation=45, ha="right")
+                self.ax.set_yticklabels(labels[1])
+                self._labels = labels
+        for i, row in enumerate(self.texts):
+            for j, text in enumerate(row):
+                text.set_text(f"{values[i, j]:.2f}")
+        self.ax.set_title(title)
+        return _render_png(self.fig, self.canvas, dpi), values.size, values.size
+
+
+class ChartService:
+    """
+    Renderar diagram med återanvända figurmallar och mäter tiden per diagram.
+    """
+
+    def __init__(self, max_points=DEFAULT_MAX_POINTS, dpi=100, history=500):
+        self.max_points = max_points
+        self.dpi = dpi
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._timings = deque(maxlen=history)
+
+    def _template(self, key, factory):
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._templates[key] = factory()
+            return template
+
+    def _finish(self, chart, png, points_in, points_out, start, output_file):
+        if output_file:
+            with open(output_file, "wb") as f:
+                f.write(png)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._timings.append({
+            "chart": chart,
+            "points_in": points_in,
+            "points_out": points_out,
+            "render_ms": round(elapsed_ms, 1),
+            "bytes": len(png),
+        })
+        logger.debug(f"📊 {chart}: {points_in}→{points_out} punkter, {elapsed_ms:.0f} ms")
+        return output_file if output_file else png
+
+    def render_lines(self, chart, series, title="", output_file=None, styles=None, xlabel="", ylabel="",
+                     hlines=None, grid=False, figsize=(10, 5), max_points=None):
+        """
+        Renderar ett linjediagram. `series` är en dict namn -> Series/array/(x, y).
+        `styles` (namn -> plot-kwargs) och övrig layout används bara när mallen skapas
+        första gången för `chart`. Returnerar filnamnet om output_file anges, annars PNG-bytes.
+        """
+        start = time.perf_counter()
+        spec = [(name, (styles or {}).get(name)) for name in series]
+        template = self._template(
+            ("lines", chart, tuple(name for name, _ in spec)),
+            lambda: _LineTemplate(spec, figsize=figsize, xlabel=xlabel, ylabel=ylabel, hlines=hlines, grid=grid),
+        )
+        with template.lock:
+            png, points_in, points_out = template.render(series, title, max_points or self.max_points, self.dpi)
+        return self._finish(chart, png, points_in, points_out, start, output_file)
+
+    def render_heatmap(self, chart, matrix, title="", output_file=None, figsize=(10, 8), cmap="coolwarm",
+                       vmin=-1, vmax=1):
+        """
+        Renderar en heatmap av en matris/DataFrame. Returnerar filnamnet eller PNG-bytes.
+        """
+        start = time.perf_counter()
+        shape = tuple(np.shape(matrix))
+        template = self._template(
+            ("heatmap", chart, shape),
+            lambda: _HeatmapTemplate(shape, figsize=figsize, cmap=cmap, vmin=vmin, vmax=vmax),
+        )
+        with template.lock:
+            png, points_in, points_out = template.render(matrix, title, self.dpi)
+        return self._finish(chart, png, points_in, points_out, start, output_file)
+
+    def timing_report(self):
+        """
+        Returnerar tiderna för de senast renderade diagrammen som en lista av dicts.
+        """
+        return list(self._timings)
+
+    def format_timing_report(self):
+        lines = ["Diagram                        punkter in   ut     tid(ms)"]
+        for row in self._timings:
+            lines.append(f"{row['chart']:<30} {row['points_in']:>10} {row['points_out']:>6} {row['render_ms']:>9.1f}")
+        return "\n".join(lines)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_chart_service():
+    """
+    Returnerar den gemensamma diagramtjänsten (och därmed dess figurmallar).
+    """
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ChartService()
+        return _default_service
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    service = ChartService()
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2000-01-01", periods=200_000, freq="h")
+    for i in range(5):
+        prices = pd.Series(np.cumsum(rng.normal(0, 1, len(dates))) + 1000, index=dates)
+        service.render_lines(
+            "pris",
+            {"Pris": prices, "MA200": prices.rolling(200).mean()},
+            title=f"Simulerad serie {i + 1}",
+            styles={"MA200": {"linestyle": "--"}},
+        )
+    corr = pd.DataFrame(rng.normal(size=(500, 8)), columns=[f"f{i}" for i in range(8)]).corr()
+    for _ in range(3):
+        service.render_heatmap("korrelation", corr, title="Feature Correlation Matrix")
+    print(service.format_timing_report())
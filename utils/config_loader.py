@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Konfigurera loggning
-logging.basicConfig(filename="config_loader.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def load_config(file_path="config.json"):
@@ -18,10 +18,10 @@ def load_config(file_path="config.json"):
     try:
         with open(file_path, "r") as file:
             config = json.load(file)
-            logging.info("✅ Konfigurationsfil laddad.")
+            logger.info("✅ Konfigurationsfil laddad.")
             return config
     except Exception as e:
-        logging.error(f"❌ Fel vid inläsning av konfigurationsfil: {str(e)}")
+        logger.error(f"❌ Fel vid inläsning av konfigurationsfil: {str(e)}")
         return None
 
 
@@ -32,13 +32,13 @@ def get_env_variable(var_name):
     try:
         value = os.getenv(var_name)
         if value:
-            logging.info(f"✅ Miljövariabel laddad: {var_name}")
+            logger.info(f"✅ Miljövariabel laddad: {var_name}")
             return value
         else:
-            logging.warning(f"⚠️ Miljövariabel saknas: {var_name}")
+            logger.warning(f"⚠️ Miljövariabel saknas: {var_name}")
             return None
     except Exception as e:
-        logging.error(f"❌ Fel vid inläsning av miljövariabel: {str(e)}")
+        logger.error(f"❌ Fel vid inläsning av miljövariabel: {str(e)}")
         return None
 
 
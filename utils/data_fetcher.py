@@ -3,7 +3,7 @@ import logging
 import requests
 
 # Konfigurera loggning
-logging.basicConfig(filename="data_fetcher.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def fetch_market_data(api_url, params=None):
@@ -14,10 +14,10 @@ def fetch_market_data(api_url, params=None):
         response = requests.get(api_url, params=params)
         response.raise_for_status()
         data = response.json()
-        logging.info("✅ Marknadsdata hämtad från API.")
+        logger.info("✅ Marknadsdata hämtad från API.")
         return data
     except requests.exceptions.RequestException as e:
-        logging.error(f"❌ Fel vid API-anrop: {str(e)}")
+        logger.error(f"❌ Fel vid API-anrop: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import numpy as np
 import pandas as pd
 
 # Konfigurera loggning
-logging.basicConfig(filename="data_preprocessing.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def clean_and_normalize_data(data):
@@ -19,10 +19,10 @@ def clean_and_normalize_data(data):
         for col in data.select_dtypes(include=[np.number]):
             data[col] = (data[col] - data[col].mean()) / data[col].std()
 
-        logging.info("✅ Data rensad och normaliserad.")
+        logger.info("✅ Data rensad och normaliserad.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid dataförberedelse: {str(e)}")
+        logger.error(f"❌ Fel vid dataförberedelse: {str(e)}")
         return None
 
 
@@ -4,7 +4,7 @@ import logging
 import pytz
 
 # Konfigurera loggning
-logging.basicConfig(filename="date_utils.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def convert_to_utc(local_time, timezone):
@@ -15,10 +15,10 @@ def convert_to_utc(local_time, timezone):
         local_tz = pytz.timezone(timezone)
         local_dt = local_tz.localize(local_time)
         utc_dt = local_dt.astimezone(pytz.utc)
-        logging.info("✅ Tid konverterad till UTC.")
+        logger.info("✅ Tid konverterad till UTC.")
         return utc_dt
     except Exception as e:
-        logging.error(f"❌ Fel vid tidskonvertering: {str(e)}")
+        logger.error(f"❌ Fel vid tidskonvertering: {str(e)}")
         return None
 
 
@@ -29,10 +29,10 @@ def get_current_market_time():
     try:
         est = pytz.timezone("America/New_York")
         market_time = datetime.datetime.now(est)
-        logging.info("✅ Aktuell marknadstid hämtad.")
+        logger.info("✅ Aktuell marknadstid hämtad.")
         return market_time
     except Exception as e:
-        logging.error(f"❌ Fel vid hämtning av marknadstid: {str(e)}")
+        logger.error(f"❌ Fel vid hämtning av marknadstid: {str(e)}")
         return None
 
 
@@ -1,7 +1,7 @@
 import logging
 
 # Konfigurera loggning
-logging.basicConfig(filename="error_handler.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def log_error(error_message):
@@ -9,10 +9,10 @@ def log_error(error_message):
     Loggar ett fel och returnerar ett standardiserat svar.
     """
     try:
-        logging.error(f"❌ Fel: {error_message}")
+        logger.error(f"❌ Fel: {error_message}")
         return {"status": "error", "message": error_message}
     except Exception as e:
-        logging.error(f"❌ Fel vid loggning av fel: {str(e)}")
+        logger.error(f"❌ Fel vid loggning av fel: {str(e)}")
         return {"status": "error", "message": "Okänt fel"}
 
 
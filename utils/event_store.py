@@ -0,0 +1,448 @@
+"""
+event_store.py
+
+Append-only händelselager i SQLite (WAL-läge) för träningskörningar, handelssignaler
+och AI-rekommendationer. Ersätter CSV-filer som lästes in och skrevs om vid varje rad.
+
+- Skrivningar köas och skrivs i batchar (en transaktion per batch) av en bakgrundstråd.
+  WAL gör att läsare aldrig blockerar skrivaren och att en krasch mitt i en skrivning
+  inte förstör databasen – en batch är antingen helt skriven eller inte alls.
+- Frågor på tid och symbol går via index och returneras som DataFrames.
+- Retention (max antal rader eller max ålder) görs med DELETE på indexerade kolumner,
+  utan att filen skrivs om. Regler från set_retention() körs av skrivtråden med
+  jämna mellanrum och vid stängning, inte vid varje insättning.
+- Gamla CSV-loggar (LEGACY_CSV) importeras en gång när lagret skapas och döps
+  sedan om till *.migrated. Genomförda migreringar noteras i tabellen migrations,
+  så en fil med samma namn (t.ex. en senare export) läses aldrig in igen.
+
+Exempel:
+    store = get_event_store()
+    store.log_signal("USDSEK", "BUY", 10.25, "Momentum uppåt")
+    store.flush()
+    df = store.query("signals", symbol="USDSEK", since="2025-01-01")
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.getenv("EVENT_STORE_PATH", os.path.join("data", "events.db"))
+
+# tabell -> kolumner (utöver id och ts)
+TABLES = {
+    "training_runs": ["model_name", "reward", "final_value", "notes"],
+    "signals": ["symbol", "action", "price", "comment"],
+    "recommendations": ["symbol", "signal", "recommended_price", "payload"],
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS training_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    model_name TEXT,
+    reward REAL,
+    final_value REAL,
+    notes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_training_runs_ts ON training_runs (ts);
+CREATE INDEX IF NOT EXISTS idx_training_runs_model ON training_runs (model_name, ts);
+
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    symbol TEXT,
+    action TEXT,
+    price REAL,
+    comment TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals (ts);
+CREATE INDEX IF NOT EXISTS idx_signals_symbol ON signals (symbol, ts);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    symbol TEXT,
+    signal TEXT,
+    recommended_price REAL,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recommendations_ts ON recommendations (ts);
+CREATE INDEX IF NOT EXISTS idx_recommendations_symbol ON recommendations (symbol, ts);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    source TEXT,
+    sha256 TEXT,
+    rows INTEGER,
+    ts TEXT NOT NULL
+);
+"""
+
+# Tidigare CSV-loggar som migreras in i lagret första gången det öppnas
+LEGACY_CSV = {
+    "training_runs": "training_history.csv",
+    "signals": "trade_signals.csv",
+    "recommendations": "trade_log.csv",
+}
+
+_STOP = object()
+
+
+def _timestamp(value=None):
+    if value is None:
+        value = datetime.now()
+    elif not isinstance(value, datetime):
+        value = pd.Timestamp(value).to_pydatetime()
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+class EventStore:
+    """
+    SQLite-baserat händelselager med batchade skrivningar i bakgrunden.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=200, flush_interval=0.5, retention_interval=300):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_interval = retention_interval
+        self._retention = {}  # tabell -> (max_rows, max_age_days)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._local = threading.local()
+        writer = self._connect()
+        writer.executescript(_SCHEMA)
+        writer.close()
+
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run_writer, name="event-store-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL räcker i WAL-läge: en krasch kan tappa senaste commit men aldrig korrumpera filen
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # --- Skrivning ------------------------------------------------------
+
+    def append(self, table, rows):
+        """
+        Köar rader (dicts) för `table`. Returnerar direkt; raderna skrivs i nästa batch.
+        """
+        if table not in TABLES:
+            raise ValueError(f"❌ Okänd tabell i händelselagret: {table}")
+        if isinstance(rows, dict):
+            rows = [rows]
+        columns = TABLES[table]
+        records = [
+            tuple([_timestamp(row.get("ts") or row.get("timestamp"))] + [row.get(col) for col in columns])
+            for row in rows
+        ]
+        if not records:
+            return
+        with self._cond:
+            self._pending += len(records)
+        self._queue.put((table, records))
+
+    def log_training_run(self, model_name, reward, final_value, notes=""):
+        self.append("training_runs", {"model_name": model_name, "reward": reward,
+                                       "final_value": final_value, "notes": notes})
+
+    def log_signal(self, symbol, action, price, comment=""):
+        self.append("signals", {"symbol": symbol, "action": action, "price": price, "comment": comment})
+
+    def log_recommendations(self, recommendations):
+        """
+        Loggar AI-rekommendationer (dicts med t.ex. symbol, signal, recommended_price).
+        Övriga fält sparas som JSON i kolumnen payload.
+        """
+        rows = []
+        for rec in recommendations:
+            extra = {k: v for k, v in rec.items()
+                     if k not in ("symbol", "signal", "recommended_price", "ts", "timestamp")}
+            rows.append({
+                "ts": rec.get("ts") or rec.get("timestamp"),
+                "symbol": rec.get("symbol"),
+                "signal": rec.get("signal"),
+                "recommended_price": rec.get("recommended_price"),
+                "payload": json.dumps(extra, default=str) if extra else None,
+            })
+        self.append("recommendations", rows)
+
+    def _run_writer(self):
+        conn = self._connect()
+        next_retention = time.monotonic() + self.retention_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(next_retention - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+            if time.monotonic() >= next_retention:
+                self._apply_rules(conn)
+                next_retention = time.monotonic() + self.retention_interval
+            if item is None:
+                continue
+            if item is _STOP:
+                self._apply_rules(conn)
+                break
+            batch = [item]
+            count = len(item[1])
+            deadline = time.monotonic() + self.flush_interval
+            # Samla fler rader en kort stund så att en skur skrivs i en transaktion
+            while count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(nxt)
+                count += len(nxt[1])
+            self._write_batch(conn, batch, count)
+        conn.close()
+
+    def _write_batch(self, conn, batch, count):
+        try:
+            with conn:
+                for table, records in batch:
+                    placeholders = ", ".join(["?"] * (len(TABLES[table]) + 1))
+                    conn.executemany(
+                        f"INSERT INTO {table} (ts, {', '.join(TABLES[table])}) VALUES ({placeholders})",
+                        records,
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"❌ Fel vid skrivning till händelselagret ({count} rader): {str(e)}")
+        finally:
+            with self._cond:
+                self._pending -= count
+                self._cond.notify_all()
+
+    def flush(self, timeout=10):
+        """
+        Väntar tills alla köade rader är skrivna. Returnerar True om kön hann tömmas.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+
+    # --- Läsning --------------------------------------------------------
+
+    def query(self, table, symbol=None, since=None, until=None, limit=None, latest=False, model_name=None):
+        """
+        Hämtar rader som DataFrame, sorterade på tid. `since`/`until` kan vara
+        datetime eller sträng. latest=True med limit ger de senaste `limit` raderna.
+        """
+        if table not in TABLES:
+            raise ValueError(f"❌ Okänd tabell i händelselagret: {table}")
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if model_name is not None:
+            clauses.append("model_name = ?")
+            params.append(model_name)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(_timestamp(until))
+        sql = f"SELECT id, ts, {', '.join(TABLES[table])} FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC, id DESC" if latest else " ORDER BY ts, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        df = pd.read_sql_query(sql, self._reader(), params=params)
+        if latest:
+            df = df.iloc[::-1].reset_index(drop=True)
+        df["ts"] = pd.to_datetime(df["ts"])
+        return df
+
+    def count(self, table):
+        return self._reader().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # --- Retention ------------------------------------------------------
+
+    def set_retention(self, table, max_rows=None, max_age_days=None):
+        """
+        Registrerar en retentionsregel som skrivtråden tillämpar var
+        retention_interval:e sekund och när lagret stängs.
+        """
+        if table not in TABLES:
+            raise ValueError(f"❌ Okänd tabell i händelselagret: {table}")
+        self._retention[table] = (max_rows, max_age_days)
+
+    def _apply_rules(self, conn):
+        for table, (max_rows, max_age_days) in list(self._retention.items()):
+            try:
+                self._delete_old(conn, table, max_rows, max_age_days)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Fel vid retention i {table}: {str(e)}")
+
+    def _delete_old(self, conn, table, max_rows, max_age_days):
+        deleted = 0
+        with conn:
+            if max_age_days is not None:
+                cutoff = _timestamp(datetime.now() - timedelta(days=max_age_days))
+                deleted += conn.execute(f"DELETE FROM {table} WHERE ts < ?", (cutoff,)).rowcount
+            if max_rows is not None:
+                deleted += conn.execute(
+                    f"DELETE FROM {table} WHERE id IN "
+                    f"(SELECT id FROM {table} ORDER BY ts DESC, id DESC LIMIT -1 OFFSET ?)",
+                    (int(max_rows),),
+                ).rowcount
+        if deleted:
+            logger.info(f"🗑️ Händelselager: {deleted} gamla rader borttagna från {table}")
+        return deleted
+
+    def apply_retention(self, table, max_rows=None, max_age_days=None):
+        """
+        Tar bort gamla rader direkt (äldre än max_age_days och/eller utöver de max_rows
+        senaste). Returnerar antal borttagna rader.
+        """
+        if table not in TABLES:
+            raise ValueError(f"❌ Okänd tabell i händelselagret: {table}")
+        self.flush()
+        conn = self._connect()
+        try:
+            return self._delete_old(conn, table, max_rows, max_age_days)
+        finally:
+            conn.close()
+
+    # --- Import/export --------------------------------------------------
+
+    def import_csv(self, table, path):
+        """
+        Läser in en befintlig CSV-logg (t.ex. training_history.csv) i tabellen.
+        """
+        if not os.path.exists(path):
+            return 0
+        df = pd.read_csv(path)
+        records = df.astype(object).where(df.notna(), None).to_dict("records")
+        if table == "recommendations":
+            self.log_recommendations(records)
+        else:
+            self.append(table, records)
+        self.flush()
+        logger.info(f"✅ Importerade {len(df)} rader från {path} till {table}")
+        return len(df)
+
+    def migrate_legacy_csv(self, legacy=None):
+        """
+        Engångsimport av gamla CSV-loggar. Varje tabell migreras högst en gång: när
+        lagret öppnats första gången noteras tabellen i migrations (med filens SHA-256
+        om den fanns), och en importerad fil döps om till <fil>.migrated.
+        Returnerar antal importerade rader.
+        """
+        imported = 0
+        conn = self._connect()
+        try:
+            done = {row[0] for row in conn.execute("SELECT name FROM migrations")}
+            for table, path in (legacy or LEGACY_CSV).items():
+                name = f"legacy_csv:{table}"
+                if name in done:
+                    continue
+                digest, rows = None, 0
+                try:
+                    if os.path.exists(path):
+                        with open(path, "rb") as f:
+                            digest = hashlib.sha256(f.read()).hexdigest()
+                        rows = self.import_csv(table, path)
+                        os.replace(path, path + ".migrated")
+                    with conn:
+                        conn.execute("INSERT OR REPLACE INTO migrations (name, source, sha256, rows, ts) "
+                                     "VALUES (?, ?, ?, ?, ?)", (name, os.path.abspath(path), digest, rows, _timestamp()))
+                    imported += rows
+                except Exception as e:
+                    logger.error(f"❌ Kunde inte migrera {path} till händelselagret: {str(e)}")
+        finally:
+            conn.close()
+        return imported
+
+    def export_csv(self, table, path, **query_kwargs):
+        """
+        Exporterar tabellen (valfritt filtrerad som i query) till en CSV-fil.
+        """
+        self.flush()
+        df = self.query(table, **query_kwargs)
+        df.to_csv(path, index=False)
+        return path
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_event_store(path=None):
+    """
+    Returnerar det gemensamma händelselagret (skapas vid första anropet).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = EventStore(path or DEFAULT_DB_PATH)
+            _default_store.migrate_legacy_csv()
+        return _default_store
+
+
+@atexit.register
+def _close_default_store():
+    if _default_store is not None:
+        _default_store.close()
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    import tempfile
+
+    store = EventStore(os.path.join(tempfile.mkdtemp(), "events.db"))
+    start = time.perf_counter()
+    for i in range(10_000):
+        store.log_signal(["USDSEK", "EURSEK", "TSLA"][i % 3], "BUY" if i % 2 else "SELL", 10 + i * 0.001)
+    store.flush()
+    print(f"📝 10 000 signaler skrivna på {time.perf_counter() - start:.2f}s")
+    store.log_recommendations([{"symbol": "TSLA", "signal": "BUY", "recommended_price": 210.5, "source": "AI"}])
+    store.log_training_run("rl_trading_model.zip", 61.2, 10450.0, "Exempel")
+    store.flush()
+    print(store.query("signals", symbol="TSLA", limit=3, latest=True))
+    print(store.query("recommendations"))
+    print(f"🗑️ Borttagna: {store.apply_retention('signals', max_rows=1000)}, kvar: {store.count('signals')}")
+    store.close()
@@ -2,7 +2,7 @@ import json
 import logging
 
 # Konfigurera loggning
-logging.basicConfig(filename="file_utils.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def save_to_json(data, file_path):
@@ -12,9 +12,9 @@ def save_to_json(data, file_path):
     try:
         with open(file_path, "w") as file:
             json.dump(data, file, indent=4)
-        logging.info("✅ Data sparad till JSON.")
+        logger.info("✅ Data sparad till JSON.")
     except Exception as e:
-        logging.error(f"❌ Fel vid sparande av JSON: {str(e)}")
+        logger.error(f"❌ Fel vid sparande av JSON: {str(e)}")
 
 
 def load_from_json(file_path):
@@ -24,10 +24,10 @@ def load_from_json(file_path):
     try:
         with open(file_path, "r") as file:
             data = json.load(file)
-        logging.info("✅ Data laddad från JSON.")
+        logger.info("✅ Data laddad från JSON.")
         return data
     except Exception as e:
-        logging.error(f"❌ Fel vid inläsning av JSON: {str(e)}")
+        logger.error(f"❌ Fel vid inläsning av JSON: {str(e)}")
         return None
 
 
@@ -37,9 +37,9 @@ def save_to_csv(data, file_path):
     """
     try:
         data.to_csv(file_path, index=False)
-        logging.info("✅ Data sparad till CSV.")
+        logger.info("✅ Data sparad till CSV.")
     except Exception as e:
-        logging.error(f"❌ Fel vid sparande av CSV: {str(e)}")
+        logger.error(f"❌ Fel vid sparande av CSV: {str(e)}")
 
 
 # Exempelanrop
@@ -0,0 +1,456 @@
+"""
+job_scheduler.py
+
+En gemensam schemaläggare för alla jobb i AI-boten (daglig rapport, retrain,
+makrokoll, riskvarningar, ...). Ersätter de separata `schedule`-looparna i
+main.py, ai_learning/retrain_scheduler.py och utils/bot_scheduler.py.
+
+- Jobben körs i en trådpool så att ett långsamt jobb (t.ex. PDF-bygget) inte
+  försenar övriga jobb.
+- Varje jobb har timeout, max antal samtidiga instanser och kan bero på andra jobb.
+  Timeouten avbryter inte jobbet: trådar kan inte stoppas utifrån, så ett jobb som
+  överskrider den markeras som "timeout" och räknas inte längre mot max_instances,
+  men fortsätter att hålla sin arbetstråd tills funktionen returnerar. Jobb som kan
+  hänga (nätverk, extern process) bör själva ha timeouts eller köras i en egen
+  process som går att avsluta.
+- Senaste körning per jobb sparas i en JSON-fil, så att missade körningar
+  (t.ex. om boten låg nere 08:00) körs i efterhand vid omstart. Filen skrivs bara
+  när tillståndet har ändrats.
+- Latens per jobb samlas i ett histogram (se latency_report()).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Histogramgränser i sekunder för jobblatens
+LATENCY_BUCKETS = [0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, float("inf")]
+
+
+class DailyTrigger:
+    """
+    Körs varje dag (eller en given veckodag) vid en viss tid "HH:MM".
+    """
+
+    def __init__(self, at, weekday=None):
+        hour, minute = at.split(":")
+        self.hour = int(hour)
+        self.minute = int(minute)
+        self.weekday = WEEKDAYS.index(weekday.lower()) if isinstance(weekday, str) else weekday
+
+    def last_due(self, now):
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if candidate > now:
+            candidate -= timedelta(days=1)
+        if self.weekday is not None:
+            while candidate.weekday() != self.weekday:
+                candidate -= timedelta(days=1)
+        return candidate
+
+    def next_due(self, now):
+        step = timedelta(days=7 if self.weekday is not None else 1)
+        return self.last_due(now) + step
+
+    def __repr__(self):
+        day = WEEKDAYS[self.weekday] if self.weekday is not None else "day"
+        return f"every {day} at {self.hour:02d}:{self.minute:02d}"
+
+
+class HourlyTrigger:
+    """
+    Körs varje timme vid en viss minut, t.ex. ":05".
+    """
+
+    def __init__(self, at):
+        self.minute = int(at.lstrip(":"))
+
+    def last_due(self, now):
+        candidate = now.replace(minute=self.minute, second=0, microsecond=0)
+        if candidate > now:
+            candidate -= timedelta(hours=1)
+        return candidate
+
+    def next_due(self, now):
+        return self.last_due(now) + timedelta(hours=1)
+
+    def __repr__(self):
+        return f"every hour at :{self.minute:02d}"
+
+
+class IntervalTrigger:
+    """
+    Körs med ett fast intervall i sekunder, räknat från senaste körning.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def last_due(self, now, last_run=None):
+        if last_run is None:
+            return now
+        due = last_run + timedelta(seconds=self.seconds)
+        return due if due <= now else last_run
+
+    def next_due(self, now):
+        return now + timedelta(seconds=self.seconds)
+
+    def __repr__(self):
+        return f"every {self.seconds}s"
+
+
+class LatencyHistogram:
+    """
+    Enkelt histogram över körtider (sekunder) för ett jobb.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for i, upper in enumerate(self.buckets):
+            if seconds <= upper:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Uppskattad percentil (övre bucketgräns), q i intervallet 0-1."""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for upper, n in zip(self.buckets, self.counts):
+            cumulative += n
+            if cumulative >= target:
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_s": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_s": self.percentile(0.5),
+            "p95_s": self.percentile(0.95),
+            "max_s": round(self.max, 3),
+            "buckets": {("inf" if b == float("inf") else b): n for b, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Job:
+    def __init__(self, name, func, trigger, timeout=None, max_instances=1,
+                 depends_on=None, catch_up=True, catchup_grace=12 * 3600, args=None, kwargs=None):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.timeout = timeout
+        self.max_instances = max_instances
+        self.depends_on = list(depends_on or [])
+        self.catch_up = catch_up
+        self.catchup_grace = catchup_grace
+        self.args = args or ()
+        self.kwargs = kwargs or {}
+
+        self.last_run = None
+        self.last_status = None
+        self.last_finished = None
+        self.pending_since = None
+        self.running = {}  # future -> starttid (monotonic)
+        self.timed_out = {}  # future -> starttid; räknas inte mot max_instances
+        self.histogram = LatencyHistogram()
+
+    def is_due(self, now):
+        if isinstance(self.trigger, IntervalTrigger):
+            return self.last_run is None or self.trigger.last_due(now, self.last_run) > self.last_run
+        return self.last_run is not None and self.trigger.last_due(now) > self.last_run
+
+
+class JobScheduler:
+    """
+    Schemaläggare som kör jobb i en trådpool med timeout, samtidighetsgränser,
+    beroenden och upphämtning av missade körningar.
+
+    Exempel:
+        scheduler = JobScheduler(max_workers=4)
+        scheduler.every_day("08:00", "daily_report", daily_ai_report, timeout=900)
+        scheduler.every_weekday("monday", "06:00", "retrain", run_retrain, timeout=3600)
+        scheduler.every_day("08:10", "risk_alert", send_risk_alert, depends_on=["daily_report"])
+        scheduler.run_forever()
+    """
+
+    def __init__(self, max_workers=4, state_file="scheduler_state.json", poll_interval=1.0):
+        self.max_workers = max_workers
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.jobs = {}
+        self._executor = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._state = self._load_state()
+        self._saved_state = None  # senast skrivna tillstånd, så att oförändrat inte skrivs om
+
+    # --- Registrering ---------------------------------------------------
+
+    def add_job(self, name, func, trigger, **options):
+        if name in self.jobs:
+            raise ValueError(f"❌ Jobbet '{name}' är redan registrerat")
+        job = Job(name, func, trigger, **options)
+        saved = self._state.get(name, {}).get("last_run")
+        if saved:
+            job.last_run = datetime.fromisoformat(saved)
+        elif not isinstance(trigger, IntervalTrigger):
+            # Nytt jobb: kör först vid nästa schemalagda tillfälle, inte direkt
+            job.last_run = trigger.last_due(datetime.now())
+        self.jobs[name] = job
+        logger.info(f"🕒 Jobb registrerat: {name} ({trigger})")
+        return job
+
+    def every_day(self, at, name, func, **options):
+        return self.add_job(name, func, DailyTrigger(at), **options)
+
+    def every_weekday(self, weekday, at, name, func, **options):
+        return self.add_job(name, func, DailyTrigger(at, weekday=weekday), **options)
+
+    def every_hour(self, at, name, func, **options):
+        return self.add_job(name, func, HourlyTrigger(at), **options)
+
+    def every(self, seconds, name, func, **options):
+        return self.add_job(name, func, IntervalTrigger(seconds), **options)
+
+    # --- Tillstånd ------------------------------------------------------
+
+    def _load_state(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Kunde inte läsa schemaläggarens tillstånd: {str(e)}")
+            return {}
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        state = {
+            name: {
+                "last_run": job.last_run.isoformat() if job.last_run else None,
+                "last_status": job.last_status,
+            }
+            for name, job in self.jobs.items()
+        }
+        if state == self._saved_state:
+            return
+        tmp_path = self.state_file + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.state_file)
+            self._saved_state = state
+        except Exception as e:
+            logger.error(f"❌ Kunde inte spara schemaläggarens tillstånd: {str(e)}")
+
+    # --- Körning --------------------------------------------------------
+
+    def _dependencies_ready(self, job):
+        """Returnerar True (klar), False (vänta) eller None (beroende misslyckades)."""
+        for dep_name in job.depends_on:
+            dep = self.jobs.get(dep_name)
+            if dep is None:
+                continue
+            if dep.pending_since is not None or dep.running:
+                return False
+            if dep.last_finished and dep.last_finished >= job.pending_since and dep.last_status != "ok":
+                return None
+        return True
+
+    def _submit(self, job):
+        start = time.monotonic()
+        future = self._executor.submit(self._run_job, job, start)
+        job.running[future] = start
+        job.pending_since = None
+
+    def _run_job(self, job, start):
+        status = "ok"
+        try:
+            logger.info(f"▶️ Startar jobb: {job.name}")
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            status = "error"
+            logger.error(f"❌ Fel i jobb {job.name}: {str(e)}")
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                job.histogram.observe(elapsed)
+                for future in [f for f, s in job.running.items() if s == start]:
+                    job.running.pop(future, None)
+                for future in [f for f, s in job.timed_out.items() if s == start]:
+                    job.timed_out.pop(future, None)
+                    status = "timeout"
+                job.last_status = status
+                job.last_finished = datetime.now()
+                self._save_state()
+            logger.info(f"⏹️ Jobb {job.name} klart ({status}) på {elapsed:.2f}s")
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        for job in self.jobs.values():
+            if not job.timeout:
+                continue
+            for future, start in list(job.running.items()):
+                if now - start > job.timeout:
+                    # Trådar kan inte avbrytas; körningen flyttas ur running så att nästa
+                    # instans inte blockeras, och jobbet markeras som misslyckat. Tråden
+                    # är fortfarande upptagen tills funktionen returnerar.
+                    job.timed_out[job.running.pop(future)] = start
+                    job.last_status = "timeout"
+                    job.last_finished = datetime.now()
+                    logger.error(f"⏰ Timeout: jobbet {job.name} har kört i mer än {job.timeout}s "
+                                 f"(fortsätter i bakgrunden och håller en arbetstråd)")
+
+    def tick(self, now=None):
+        """
+        Ett varv i schemaläggaren: markerar förfallna jobb och skickar dem till trådpoolen.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._check_timeouts()
+
+            for job in self.jobs.values():
+                if job.pending_since is not None or not job.is_due(now):
+                    continue
+                scheduled = job.trigger.last_due(now) if not isinstance(job.trigger, IntervalTrigger) else now
+                if job.last_run is not None and (now - scheduled).total_seconds() > job.catchup_grace:
+                    # För gammal missad körning – hoppa till nästa tillfälle
+                    logger.warning(f"⚠️ Hoppar över missad körning av {job.name} ({scheduled:%Y-%m-%d %H:%M})")
+                    job.last_run = scheduled
+                    continue
+                if not job.catch_up and (now - scheduled).total_seconds() > max(self.poll_interval * 5, 60):
+                    job.last_run = scheduled
+                    continue
+                if (now - scheduled).total_seconds() > 60:
+                    logger.info(f"⏪ Kör ikapp missad körning av {job.name} ({scheduled:%Y-%m-%d %H:%M})")
+                job.last_run = scheduled
+                job.pending_since = now
+
+            for job in self.jobs.values():
+                if job.pending_since is None:
+                    continue
+                if len(job.running) >= job.max_instances:
+                    continue
+                ready = self._dependencies_ready(job)
+                if ready is None:
+                    logger.warning(f"⚠️ Hoppar över {job.name}: ett beroende jobb misslyckades")
+                    job.pending_since = None
+                    job.last_status = "skipped"
+                elif ready:
+                    self._submit(job)
+
+            self._save_state()
+
+    def run_job_now(self, name):
+        """
+        Kör ett jobb direkt (respekterar samtidighetsgräns och beroenden).
+        """
+        with self._lock:
+            job = self.jobs[name]
+            job.pending_since = job.pending_since or datetime.now()
+
+    def run_forever(self):
+        self._executor = self._executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        logger.info(f"🚀 Schemaläggare startad med {len(self.jobs)} jobb och {self.max_workers} arbetare")
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"❌ Fel i schemaläggarloopen: {str(e)}")
+            self._stop_event.wait(self.poll_interval)
+
+    def start(self):
+        """
+        Startar schemaläggaren i en bakgrundstråd.
+        """
+        if self._thread and self._thread.is_alive():
+            return self._thread
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="job-scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, wait=True):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    # --- Rapportering ---------------------------------------------------
+
+    def latency_report(self):
+        """
+        Returnerar körtidsstatistik per jobb, sorterat på p95 (långsammast först).
+        """
+        with self._lock:
+            rows = []
+            for job in self.jobs.values():
+                row = {"job": job.name, "last_status": job.last_status}
+                row.update(job.histogram.summary())
+                rows.append(row)
+        return sorted(rows, key=lambda r: r["p95_s"], reverse=True)
+
+    def format_latency_report(self):
+        lines = ["Jobb                     antal   medel    p50     p95     max  status"]
+        for r in self.latency_report():
+            lines.append(
+                f"{r['job']:<24} {r['count']:>5} {r['mean_s']:>7.2f} {r['p50_s']:>6.2f} "
+                f"{r['p95_s']:>7.2f} {r['max_s']:>7.2f}  {r['last_status'] or '-'}"
+            )
+        return "\n".join(lines)
+
+
+# En gemensam instans som alla delsystem registrerar sina jobb i
+_default_scheduler = None
+
+
+def get_scheduler(**kwargs):
+    """
+    Returnerar den gemensamma schemaläggaren (skapas vid första anropet).
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = JobScheduler(**kwargs)
+    return _default_scheduler
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    def slow_report():
+        time.sleep(2)
+
+    def fast_alert():
+        time.sleep(0.05)
+
+    scheduler = JobScheduler(max_workers=2, state_file=None, poll_interval=0.1)
+    scheduler.every(1, "slow_report", slow_report, timeout=1.5)
+    scheduler.every(0.5, "fast_alert", fast_alert)
+    scheduler.start()
+    time.sleep(5)
+    scheduler.stop()
+    print(scheduler.format_latency_report())
@@ -1,47 +1,227 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def setup_logging(log_filename="trading_bot.log", log_level=logging.INFO):
+# Delsystem som får en egen roterande loggfil (loggernamn-prefix -> filnamn)
+SUBSYSTEM_LOG_FILES = {
+    "ai_decision_engine": "ai_decision_engine.log",
+    "ai_learning": "ai_learning.log",
+    "data_collection": "data_collection.log",
+    "data_processing": "data_processing.log",
+    "live_trading": "live_trading.log",
+    "notifications": "notifications.log",
+    "portfolio_management": "portfolio_management.log",
+    "reports": "reports.log",
+    "risk_management": "risk_management.log",
+    "utils": "utils.log",
+}
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+class SubsystemFilter(logging.Filter):
     """
-    Konfigurerar loggning för AI-trading boten.
+    Släpper bara igenom poster från loggrar under ett visst prefix, t.ex. "ai_learning".
     """
+
+    def __init__(self, prefix):
+        super().__init__()
+        self.prefix = prefix
+
+    def filter(self, record):
+        return record.name == self.prefix or record.name.startswith(self.prefix + ".")
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Begränsar antalet poster per anropsplats (logger, fil, rad) till `rate` st per `per` sekunder.
+    Anropsplatsen används i stället för meddelandet eftersom loggraderna är f-strängar.
+    Varningar och fel släpps alltid igenom. Filtret körs i den loggande tråden när det
+    sitter på QueueHandler, därför skyddas räknarna av ett lås. Utgångna fönster rensas
+    bort en gång per period.
+    """
+
+    def __init__(self, rate=10, per=1.0, min_level_exempt=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self.min_level_exempt = min_level_exempt
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic() + per
+
+    def filter(self, record):
+        if record.levelno >= self.min_level_exempt:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_prune:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[0] < self.per}
+                self._next_prune = now + self.per
+            window_start, count = self._buckets.get(key, (now, 0))
+            if now - window_start >= self.per:
+                window_start, count = now, 0
+            if count >= self.rate:
+                self._buckets[key] = (window_start, count)
+                return False
+            self._buckets[key] = (window_start, count + 1)
+            return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Släpper igenom var n:te post per anropsplats (logger, fil, rad). Används för loggning per
+    steg i träning/backtest. Varningar och fel släpps alltid igenom. Antalet nycklar är
+    begränsat av antalet anropsplatser.
+    """
+
+    def __init__(self, every_n=100, min_level_exempt=logging.WARNING):
+        super().__init__()
+        self.every_n = max(1, int(every_n))
+        self.min_level_exempt = min_level_exempt
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno >= self.min_level_exempt:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count % self.every_n == 0
+
+
+def _rotating_handler(log_dir, filename, log_level, max_bytes, backup_count):
+    handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, filename),
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+    )
+    handler.setLevel(log_level)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+    return handler
+
+
+def setup_logging(
+    log_filename="trading_bot.log",
+    log_level=logging.INFO,
+    log_dir="logs",
+    queued=True,
+    per_subsystem=True,
+    max_bytes=10 * 1024 * 1024,
+    backup_count=5,
+    console=True,
+    rate_limit=None,
+):
+    """
+    Konfigurerar central loggning för AI-trading boten.
+
+    Alla poster går via en QueueHandler på root-loggern och skrivs till fil av en
+    QueueListener i en bakgrundstråd, så att trådar i träning/backtest inte blockeras
+    av fil-I/O. Varje delsystem (ai_learning, risk_management, ...) får dessutom en egen
+    roterande loggfil. Med queued=False skrivs posterna synkront (används vid benchmark).
+    rate_limit=(rate, per) begränsar info/debug-poster till rate st per loggmall och
+    per sekunder (RateLimitFilter); med kö filtreras de redan innan de köas.
+    Anropet är idempotent; ett andra anrop byter ut den tidigare konfigurationen.
+    """
+    global _listener, _queue_handler
+
     try:
-        # Skapa en loggmapp om den inte finns
-        log_dir = "logs"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-
-        log_filepath = os.path.join(log_dir, log_filename)
-
-        logging.basicConfig(
-            filename=log_filepath,
-            level=log_level,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        )
-        logging.getLogger().addHandler(console_handler)
-
-        logging.info("✅ Loggning initierad och konfigurerad.")
+        with _lock:
+            shutdown_logging()
+
+            if not os.path.exists(log_dir):
+                os.makedirs(log_dir)
+
+            handlers = [_rotating_handler(log_dir, log_filename, log_level, max_bytes, backup_count)]
+            if per_subsystem:
+                for prefix, filename in SUBSYSTEM_LOG_FILES.items():
+                    handler = _rotating_handler(log_dir, filename, log_level, max_bytes, backup_count)
+                    handler.addFilter(SubsystemFilter(prefix))
+                    handlers.append(handler)
+            if console:
+                console_handler = logging.StreamHandler()
+                console_handler.setLevel(max(log_level, logging.INFO))
+                console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+                handlers.append(console_handler)
+
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+                handler.close()
+            root.setLevel(log_level)
+
+            if queued:
+                log_queue = queue.SimpleQueue()
+                _queue_handler = logging.handlers.QueueHandler(log_queue)
+                if rate_limit:
+                    _queue_handler.addFilter(RateLimitFilter(*rate_limit))
+                root.addHandler(_queue_handler)
+                _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+                _listener.start()
+            else:
+                for handler in handlers:
+                    if rate_limit:
+                        handler.addFilter(RateLimitFilter(*rate_limit))
+                    root.addHandler(handler)
+
+        logging.getLogger(__name__).info("✅ Loggning initierad och konfigurerad.")
     except Exception as e:
         print(f"❌ Fel vid loggkonfiguration: {str(e)}")
 
 
-def get_logger():
+def shutdown_logging():
+    """
+    Stoppar QueueListener och tömmer kvarvarande poster till fil.
+    """
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name=None):
+    """
+    Returnerar en logger. Utan namn returneras root-loggern.
+    """
+    return logging.getLogger(name)
+
+
+def get_sampled_logger(name, every_n=100):
     """
-    Returnerar en konfigurerad logger.
+    Returnerar en logger för högfrekventa meddelanden (t.ex. per steg i TradingEnv)
+    där endast var n:te post per loggmall släpps igenom.
     """
-    return logging.getLogger()
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, SamplingFilter) for f in logger.filters):
+        logger.addFilter(SamplingFilter(every_n=every_n))
+    return logger
 
 
 # Exempelanrop
 if __name__ == "__main__":
     setup_logging()
-    logger = get_logger()
+    logger = get_logger("utils.logging_config")
     logger.info("📢 Loggningstest: Systemet körs korrekt!")
+    step_logger = get_sampled_logger("ai_learning.example.steps", every_n=10)
+    for i in range(100):
+        step_logger.debug("Steg %d", i)
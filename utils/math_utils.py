@@ -3,7 +3,7 @@ import logging
 import numpy as np
 
 # Konfigurera loggning
-logging.basicConfig(filename="math_utils.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def moving_average(data, window_size=5):
@@ -12,10 +12,10 @@ def moving_average(data, window_size=5):
     """
     try:
         result = np.convolve(data, np.ones(window_size) / window_size, mode="valid")
-        logging.info("✅ Glidande medelvärde beräknat.")
+        logger.info("✅ Glidande medelvärde beräknat.")
         return result
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av glidande medelvärde: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av glidande medelvärde: {str(e)}")
         return None
 
 
@@ -25,10 +25,10 @@ def standard_deviation(data):
     """
     try:
         result = np.std(data)
-        logging.info("✅ Standardavvikelse beräknad.")
+        logger.info("✅ Standardavvikelse beräknad.")
         return result
     except Exception as e:
-        logging.error(f"❌ Fel vid beräkning av standardavvikelse: {str(e)}")
+        logger.error(f"❌ Fel vid beräkning av standardavvikelse: {str(e)}")
         return None
 
 
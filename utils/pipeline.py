@@ -0,0 +1,243 @@
+"""
+pipeline.py
+
+Kör ett flöde av namngivna steg (t.ex. fetch → features → signals → risk → report → notify)
+som en beroendegraf (DAG). Oberoende grenar körs parallellt i en trådpool och varje
+stegs resultat cachas på en hash av dess indata, så att en omkörning hoppar över
+steg vars indata inte har ändrats. Efter varje körning finns en tidsrapport per steg.
+"""
+
+import hashlib
+import logging
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+
+def hash_inputs(obj) -> str:
+    """
+    Beräknar en stabil hash för ett stegs indata (DataFrames, arrayer, dicts, listor, skalärer).
+    """
+    h = hashlib.sha1()
+    _update_hash(h, obj)
+    return h.hexdigest()
+
+
+def _update_hash(h, obj):
+    if obj is None:
+        h.update(b"None")
+    elif isinstance(obj, (str, bytes, int, float, bool)):
+        h.update(type(obj).__name__.encode())
+        h.update(obj if isinstance(obj, bytes) else repr(obj).encode())
+    elif isinstance(obj, dict):
+        h.update(b"dict")
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        h.update(type(obj).__name__.encode())
+        for item in obj:
+            _update_hash(h, item)
+    elif hasattr(obj, "columns") and hasattr(obj, "index"):
+        # pandas DataFrame – hash av innehåll, kolumner och index
+        import pandas as pd
+        h.update(b"DataFrame")
+        h.update(repr(list(obj.columns)).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif hasattr(obj, "index") and hasattr(obj, "dtype") and hasattr(obj, "name"):
+        import pandas as pd
+        h.update(b"Series")
+        h.update(repr(obj.name).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif hasattr(obj, "tobytes") and hasattr(obj, "dtype"):
+        h.update(b"ndarray")
+        h.update(str(obj.dtype).encode())
+        h.update(repr(obj.shape).encode())
+        h.update(obj.tobytes())
+    else:
+        try:
+            h.update(pickle.dumps(obj, protocol=4))
+        except Exception:
+            h.update(repr(obj).encode())
+
+
+class Stage:
+    def __init__(self, name, func, depends_on=None, params=None, cacheable=True, ttl=None, version=1):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on or [])
+        self.params = params or {}
+        self.cacheable = cacheable
+        self.ttl = ttl
+        self.version = version
+
+
+class Pipeline:
+    """
+    En DAG av steg. Varje stegfunktion anropas med resultaten från sina beroenden
+    som nyckelordsargument (namngivna efter stegen) plus stegets egna params.
+
+    Exempel:
+        pipeline = Pipeline("daily")
+        pipeline.add_stage("fetch_forex", fetch_forex, ttl=900)
+        pipeline.add_stage("fetch_macro", fetch_macro, ttl=3600)
+        pipeline.add_stage("signals", compute_signals, depends_on=["fetch_forex", "fetch_macro"])
+        results = pipeline.run()
+        print(pipeline.format_timing_report())
+    """
+
+    def __init__(self, name, max_workers=4):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages = {}
+        self._cache = {}  # stegnamn -> (indatahash, tidpunkt, resultat)
+        self.last_timings = []
+
+    def add_stage(self, name, func, depends_on=None, **options):
+        if name in self.stages:
+            raise ValueError(f"❌ Steget '{name}' finns redan i pipelinen '{self.name}'")
+        for dep in depends_on or []:
+            if dep not in self.stages:
+                raise ValueError(f"❌ Steget '{name}' beror på okänt steg '{dep}'")
+        self.stages[name] = Stage(name, func, depends_on, **options)
+        return self.stages[name]
+
+    def _required_stages(self, targets):
+        if not targets:
+            return list(self.stages)
+        required = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in required:
+                continue
+            required.add(name)
+            stack.extend(self.stages[name].depends_on)
+        # Behåll registreringsordningen (som redan är topologisk)
+        return [name for name in self.stages if name in required]
+
+    def _cached(self, stage, input_hash):
+        if not stage.cacheable or stage.name not in self._cache:
+            return False, None
+        cached_hash, created, result = self._cache[stage.name]
+        if cached_hash != input_hash:
+            return False, None
+        if stage.ttl is not None and time.time() - created > stage.ttl:
+            return False, None
+        return True, result
+
+    def _run_stage(self, stage, inputs):
+        input_hash = hash_inputs([stage.name, stage.version, stage.params, inputs])
+        hit, result = self._cached(stage, input_hash)
+        start = time.perf_counter()
+        if not hit:
+            result = stage.func(**inputs, **stage.params)
+            if stage.cacheable:
+                self._cache[stage.name] = (input_hash, time.time(), result)
+        return result, hit, time.perf_counter() - start
+
+    def run(self, targets=None, force=False):
+        """
+        Kör de steg som behövs för `targets` (alla steg om None) och returnerar
+        en dict stegnamn -> resultat. Misslyckade steg ger None och deras
+        beroende steg hoppas över. force=True ignorerar cachen.
+        """
+        if force:
+            self._cache.clear()
+        order = self._required_stages(targets)
+        results, status, timings = {}, {}, {}
+        remaining = list(order)
+        running = {}
+        run_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"pipeline-{self.name}") as executor:
+            while remaining or running:
+                for name in list(remaining):
+                    stage = self.stages[name]
+                    if any(dep not in status for dep in stage.depends_on):
+                        continue
+                    remaining.remove(name)
+                    if any(status[dep] not in ("ok", "cached") for dep in stage.depends_on):
+                        status[name] = "skipped"
+                        results[name] = None
+                        timings[name] = (0.0, 0.0)
+                        logger.warning(f"⚠️ [{self.name}] Hoppar över {name}: ett beroende steg misslyckades")
+                        continue
+                    inputs = {dep: results[dep] for dep in stage.depends_on}
+                    future = executor.submit(self._run_stage, stage, inputs)
+                    running[future] = (name, time.perf_counter() - run_start)
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started_at = running.pop(future)
+                    try:
+                        result, hit, elapsed = future.result()
+                        results[name] = result
+                        status[name] = "cached" if hit else "ok"
+                    except Exception as e:
+                        results[name] = None
+                        status[name] = "error"
+                        elapsed = time.perf_counter() - run_start - started_at
+                        logger.error(f"❌ [{self.name}] Fel i steg {name}: {str(e)}")
+                    timings[name] = (started_at, elapsed)
+
+        self.last_timings = [
+            {
+                "stage": name,
+                "status": status[name],
+                "start_s": round(timings[name][0], 3),
+                "duration_s": round(timings[name][1], 3),
+                "depends_on": ",".join(self.stages[name].depends_on),
+            }
+            for name in order
+        ]
+        total = time.perf_counter() - run_start
+        logger.info(f"✅ [{self.name}] Pipeline klar på {total:.2f}s")
+        return results
+
+    def timing_report(self):
+        """
+        Returnerar tidsrapporten för senaste körningen som en lista av dicts.
+        """
+        return list(self.last_timings)
+
+    def format_timing_report(self):
+        lines = [f"Pipeline '{self.name}'", "Steg                     status    start(s)  tid(s)"]
+        for row in self.last_timings:
+            lines.append(f"{row['stage']:<24} {row['status']:<8} {row['start_s']:>9.2f} {row['duration_s']:>7.2f}")
+        return "\n".join(lines)
+
+    def export_timing_report(self, path):
+        """
+        Sparar tidsrapporten som CSV.
+        """
+        import csv
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["stage", "status", "start_s", "duration_s", "depends_on"])
+            writer.writeheader()
+            writer.writerows(self.last_timings)
+        return path
+
+
+# Exempelanrop
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    def slow(value):
+        time.sleep(0.5)
+        return value
+
+    pipeline = Pipeline("exempel")
+    pipeline.add_stage("news", lambda: slow("news"))
+    pipeline.add_stage("macro", lambda: slow("macro"))
+    pipeline.add_stage("forex", lambda: slow([1.0, 2.0, 3.0]))
+    pipeline.add_stage("signals", lambda news, macro, forex: (news, macro, sum(forex)),
+                       depends_on=["news", "macro", "forex"])
+    print(pipeline.run())
+    print(pipeline.format_timing_report())
+    pipeline.run()
+    print(pipeline.format_timing_report())
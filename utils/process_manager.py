@@ -1,54 +1,421 @@
+"""
+process_manager.py
+
+Gemensam processpool för CPU-tunga uppgifter (backtester per symbol, Monte Carlo-batchar,
+träningsshards för PPO, ...). Uppgifter är godtyckliga picklebara funktioner och
+resultaten returneras som futures.
+
+- Poolen är persistent och återanvänds mellan anrop (get_task_runner()).
+- Stora NumPy-arrayer i argument och resultat överförs via delat minne
+  (multiprocessing.shared_memory) i stället för att picklas genom en pipe.
+- Varje uppgift kan ha en timeout som räknas från att en arbetsprocess tar uppgiften
+  (tid i kön räknas inte). En uppgift som överskrider sin timeout får TimeoutError och
+  bara den arbetsprocessen avslutas och ersätts; övriga pågående uppgifter fortsätter.
+- CPU-affinitet kan anges som en lista av kärnor, eller "spread" för att
+  låsa varje arbetsprocess till en egen kärna (endast Linux).
+"""
+
+import collections
+import itertools
 import logging
 import multiprocessing
+import os
+import threading
 import time
+from concurrent.futures import Future, TimeoutError
+from multiprocessing import connection, resource_tracker, shared_memory
+
+import numpy as np
 
-# Konfigurera loggning
-logging.basicConfig(filename="process_manager.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
+# Arrayer större än detta (bytes) skickas via delat minne
+SHARED_MEMORY_THRESHOLD = 1 << 20
 
-def worker(task_name, duration):
+
+class SharedArray:
     """
-    Simulerar en bakgrundsprocess.
+    Picklebar referens till en NumPy-array i delat minne.
     """
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def attach(self):
+        shm = shared_memory.SharedMemory(name=self.name)
+        return shm, np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
+def _to_shared(arr):
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    return shm, SharedArray(shm.name, arr.shape, arr.dtype.str)
+
+
+def _share_large_arrays(values, blocks, threshold):
+    shared = []
+    for value in values:
+        if isinstance(value, np.ndarray) and value.nbytes >= threshold and value.dtype != object:
+            shm, handle = _to_shared(value)
+            blocks.append(shm)
+            shared.append(handle)
+        else:
+            shared.append(value)
+    return shared
+
+
+def _release(blocks):
+    for shm in blocks:
+        try:
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# --- Körs i arbetsprocesserna -----------------------------------------
+
+def _set_affinity(cpu_affinity, index):
+    if cpu_affinity is None or not hasattr(os, "sched_setaffinity"):
+        return
     try:
-        logging.info(f"✅ Startar process: {task_name}")
-        time.sleep(duration)
-        logging.info(f"✅ Klar: {task_name}")
+        if cpu_affinity == "spread":
+            cpus = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+        else:
+            os.sched_setaffinity(0, set(cpu_affinity))
     except Exception as e:
-        logging.error(f"❌ Fel i process {task_name}: {str(e)}")
+        logger.warning(f"⚠️ Kunde inte sätta CPU-affinitet: {str(e)}")
+
+
+def _run_task(fn, args, kwargs, threshold):
+    attached = []
+    try:
+        resolved_args = []
+        for value in args:
+            if isinstance(value, SharedArray):
+                shm, arr = value.attach()
+                attached.append(shm)
+                resolved_args.append(arr)
+            else:
+                resolved_args.append(value)
+        resolved_kwargs = {}
+        for key, value in kwargs.items():
+            if isinstance(value, SharedArray):
+                shm, arr = value.attach()
+                attached.append(shm)
+                resolved_kwargs[key] = arr
+            else:
+                resolved_kwargs[key] = value
+
+        result = fn(*resolved_args, **resolved_kwargs)
+
+        if isinstance(result, np.ndarray) and result.nbytes >= threshold and result.dtype != object:
+            # Föräldraprocessen tar över ägandet och gör unlink (arbetsprocesserna delar
+            # föräldrans resource_tracker, så blocket städas även om processen avslutas)
+            shm, handle = _to_shared(result)
+            shm.close()
+            return handle
+        return result
+    finally:
+        for shm in attached:
+            shm.close()
+
+
+def _worker_main(conn, cpu_affinity, index):
+    """
+    Arbetsprocessens loop: tar emot en uppgift i taget över sin egen pipe och skickar
+    tillbaka (task_id, lyckades, resultat/undantag). None avslutar processen.
+    """
+    _set_affinity(cpu_affinity, index)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        task_id, fn, args, kwargs, threshold = message
+        try:
+            reply = (task_id, True, _run_task(fn, args, kwargs, threshold))
+        except BaseException as e:
+            reply = (task_id, False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Resultat eller undantag som inte går att pickla
+            conn.send((task_id, False, RuntimeError(f"Kunde inte skicka resultatet: {e!r}")))
+
+
+# --- Föräldraprocessen -------------------------------------------------
+
+class _Task:
+    def __init__(self, task_id, fn, args, kwargs, timeout, outer):
+        self.task_id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.outer = outer
+        self.blocks = []
+        self.deadline = None
+
+    @property
+    def name(self):
+        return getattr(self.fn, "__name__", self.fn)
+
+
+class _Worker:
+    def __init__(self, process, conn, index):
+        self.process = process
+        self.conn = conn
+        self.index = index
+        self.task = None
+
+
+class TaskRunner:
+    """
+    Persistent processpool för godtyckliga picklebara funktioner.
+
+    Varje arbetsprocess har en egen pipe och kör en uppgift i taget; uppgifter som
+    väntar på en ledig process ligger i en kö i föräldraprocessen. En uppgifts timeout
+    räknas från att en arbetsprocess tar den, och vid timeout avslutas bara den
+    processen (och ersätts) – övriga pågående uppgifter påverkas inte.
+
+    Exempel:
+        runner = TaskRunner(max_workers=4)
+        futures = [runner.submit(backtest_symbol, symbol, prices, timeout=120) for symbol in symbols]
+        results = [f.result() for f in futures]
+        runner.shutdown()
+    """
+
+    def __init__(self, max_workers=None, cpu_affinity=None, shared_memory_threshold=SHARED_MEMORY_THRESHOLD,
+                 mp_context=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cpu_affinity = cpu_affinity
+        self.shared_memory_threshold = shared_memory_threshold
+        self._ctx = multiprocessing.get_context(mp_context) if mp_context else multiprocessing.get_context()
+        self._lock = threading.RLock()
+        self._ids = itertools.count()
+        self._pending = collections.deque()
+        self._closed = False
+        # Starta resource_tracker före arbetsprocesserna så att de delar den med
+        # föräldraprocessen; annars städar varje process bort delade block när den avslutas.
+        resource_tracker.ensure_running()
+        self._workers = [self._spawn(i) for i in range(self.max_workers)]
+        self._wake_recv, self._wake_send = multiprocessing.Pipe(duplex=False)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="task-runner-monitor", daemon=True)
+        self._monitor.start()
+
+    def _spawn(self, index):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.cpu_affinity, index), daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn, index)
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        """
+        Skickar in en uppgift och returnerar en Future. `timeout` (sekunder) räknas från att
+        en arbetsprocess börjar köra uppgiften, inte från inskicket.
+        """
+        outer = Future()
+        # Futuren markeras som startad innan uppgiften skickas vidare; en snabb uppgift
+        # kan annars hinna bli klar innan set_running_or_notify_cancel() anropas
+        outer.set_running_or_notify_cancel()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("❌ TaskRunner är avstängd")
+            task = _Task(next(self._ids), fn, args, kwargs, timeout, outer)
+            task.args = _share_large_arrays(args, task.blocks, self.shared_memory_threshold)
+            task.kwargs = dict(zip(kwargs, _share_large_arrays(kwargs.values(), task.blocks, self.shared_memory_threshold)))
+            self._pending.append(task)
+            self._dispatch_pending()
+        return outer
+
+    def map(self, fn, *iterables, timeout=None):
+        """
+        Som inbyggda map(), men parallellt i poolen. Returnerar en lista med resultat i ordning.
+        """
+        futures = [self.submit(fn, *args, timeout=timeout) for args in zip(*iterables)]
+        return [f.result() for f in futures]
+
+    def _dispatch_pending(self):
+        dispatched = False
+        for worker in self._workers:
+            if not self._pending:
+                break
+            if worker.task is not None:
+                continue
+            task = self._pending.popleft()
+            try:
+                worker.conn.send((task.task_id, task.fn, tuple(task.args), task.kwargs, self.shared_memory_threshold))
+            except Exception as e:
+                # T.ex. en funktion som inte går att pickla
+                _release(task.blocks)
+                task.outer.set_exception(e)
+                continue
+            task.deadline = time.monotonic() + task.timeout if task.timeout else None
+            worker.task = task
+            dispatched = True
+        if dispatched:
+            self._wake_send.send_bytes(b"1")
+
+    def _finish(self, worker, ok, value):
+        task, worker.task = worker.task, None
+        _release(task.blocks)
+        if ok and isinstance(value, SharedArray):
+            shm, view = value.attach()
+            try:
+                value = np.array(view, copy=True)
+            finally:
+                shm.close()
+                shm.unlink()
+        if ok:
+            task.outer.set_result(value)
+        else:
+            task.outer.set_exception(value)
+
+    def _replace(self, worker):
+        """Avslutar en arbetsprocess och startar en ny på samma plats."""
+        worker.process.terminate()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+        self._workers[worker.index] = self._spawn(worker.index)
+
+    def _monitor_loop(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                busy = [w for w in self._workers if w.task is not None]
+            waitables = [self._wake_recv] + [w.conn for w in busy] + [w.process.sentinel for w in busy]
+            ready = set(connection.wait(waitables, timeout=0.1))
+            with self._lock:
+                if self._closed:
+                    return
+                if self._wake_recv in ready:
+                    while self._wake_recv.poll():
+                        self._wake_recv.recv_bytes()
+                now = time.monotonic()
+                for worker in busy:
+                    if worker.task is None or self._workers[worker.index] is not worker:
+                        continue
+                    if worker.conn in ready:
+                        try:
+                            _, ok, value = worker.conn.recv()
+                        except (EOFError, OSError) as e:
+                            ok, value = False, RuntimeError(f"Arbetsprocessen avslutades oväntat: {e!r}")
+                            self._finish(worker, ok, value)
+                            self._replace(worker)
+                            continue
+                        self._finish(worker, ok, value)
+                    elif worker.process.sentinel in ready:
+                        self._finish(worker, False, RuntimeError(
+                            f"Arbetsprocessen för {worker.task.name} avslutades oväntat (kod {worker.process.exitcode})"))
+                        self._replace(worker)
+                    elif worker.task.deadline is not None and now > worker.task.deadline:
+                        task = worker.task
+                        logger.warning(f"⏰ Timeout för uppgift {task.task_id} ({task.name}); "
+                                       f"avslutar arbetsprocess {worker.process.pid}")
+                        self._finish(worker, False, TimeoutError(f"Uppgiften {task.name} överskred {task.timeout}s"))
+                        self._replace(worker)
+                self._dispatch_pending()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending, self._pending = list(self._pending), collections.deque()
+        for task in pending:
+            _release(task.blocks)
+            task.outer.set_exception(RuntimeError("TaskRunner stängdes av innan uppgiften startade"))
+        self._wake_send.send_bytes(b"1")
+        self._monitor.join()
+        for worker in self._workers:
+            if wait and worker.task is not None:
+                # Vänta in pågående uppgift innan processen avslutas
+                try:
+                    _, ok, value = worker.conn.recv()
+                    self._finish(worker, ok, value)
+                except (EOFError, OSError):
+                    pass
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5 if wait else 0.1)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            if worker.task is not None:
+                _release(worker.task.blocks)
+                worker.task.outer.set_exception(RuntimeError("TaskRunner stängdes av"))
+                worker.task = None
+            worker.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+_default_runner = None
+_default_lock = threading.Lock()
+
+
+def get_task_runner(**kwargs):
+    """
+    Returnerar den gemensamma processpoolen (skapas vid första anropet).
+    """
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = TaskRunner(**kwargs)
+        return _default_runner
 
 
 def manage_processes(tasks, timeout=10):
     """
-    Hanterar flera parallella processer och returnerar True om alla lyckas.
+    Kör en lista av uppgifter (funktion, args) parallellt i den gemensamma
+    processpoolen och returnerar True om alla lyckas.
     """
-    processes = []
     try:
-        for task_name, duration in tasks:
-            process = multiprocessing.Process(target=worker, args=(task_name, duration))
-            process.start()
-            processes.append(process)
-
-        for process in processes:
-            process.join(timeout=timeout)
-            if process.is_alive():
-                logging.warning("⚠️ Timeout: En process tog för lång tid och avslutas.")
-                process.terminate()
-                process.join()
-
-        logging.info("✅ Alla processer klara!")
+        if not tasks:
+            return True
+        runner = get_task_runner()
+        futures = [runner.submit(fn, *args, timeout=timeout) for fn, args in tasks]
+        for future in futures:
+            future.result()
+        logger.info("✅ Alla processer klara!")
         return True
-
     except Exception as e:
-        logging.error(f"❌ Fel vid hantering av processer: {str(e)}")
+        logger.error(f"❌ Fel vid hantering av processer: {str(e)}")
         return False
 
 
+def _example_batch(prices, n_paths, seed):
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, 0.01, size=(n_paths, len(prices)))
+    return prices[-1] * np.exp(shocks.cumsum(axis=1))[:, -1]
+
+
 # Exempelanrop
 if __name__ == "__main__":
-    task_list = [("Datainsamling", 2), ("Analys", 3), ("Rapportgenerering", 1)]
-    success = manage_processes(task_list)
-    if success:
-        print("📊 Alla processer slutförda!")
-    else:
-        print("❌ Något gick fel under processhantering.")
+    prices = np.cumsum(np.random.randn(500_000)) + 1000
+    with TaskRunner(max_workers=4, cpu_affinity="spread") as runner:
+        futures = [runner.submit(_example_batch, prices[-250:], 10_000, seed) for seed in range(8)]
+        print("📊 Monte Carlo-medel:", [round(float(f.result().mean()), 2) for f in futures])
+        big = runner.submit(np.sort, prices).result()
+        print("📊 Sorterad array via delat minne:", big[:3])
+        slow = runner.submit(time.sleep, 5, timeout=1)
+        try:
+            slow.result()
+        except TimeoutError as e:
+            print("⏰", e)
+        print("📊 Pool fungerar efter timeout:", runner.submit(sum, [1, 2, 3]).result())
@@ -4,7 +4,7 @@ import time
 import psutil
 
 # Konfigurera loggning
-logging.basicConfig(filename="system_health_monitor.log", level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 def check_cpu_usage(threshold=80):
@@ -13,9 +13,9 @@ def check_cpu_usage(threshold=80):
     """
     cpu_usage = psutil.cpu_percent(interval=1)
     if cpu_usage > threshold:
-        logging.warning(f"⚠️ Hög CPU-användning: {cpu_usage}%")
+        logger.warning(f"⚠️ Hög CPU-användning: {cpu_usage}%")
     else:
-        logging.info(f"✅ CPU-användning: {cpu_usage}%")
+        logger.info(f"✅ CPU-användning: {cpu_usage}%")
     return cpu_usage
 
 
@@ -26,9 +26,9 @@ def check_memory_usage(threshold=80):
     memory = psutil.virtual_memory()
     memory_usage = memory.percent
     if memory_usage > threshold:
-        logging.warning(f"⚠️ Hög minnesanvändning: {memory_usage}%")
+        logger.warning(f"⚠️ Hög minnesanvändning: {memory_usage}%")
     else:
-        logging.info(f"✅ Minnesanvändning: {memory_usage}%")
+        logger.info(f"✅ Minnesanvändning: {memory_usage}%")
     return memory_usage
 
 
@@ -39,9 +39,9 @@ def check_disk_usage(threshold=90):
     disk = psutil.disk_usage("/")
     disk_usage = disk.percent
     if disk_usage > threshold:
-        logging.warning(f"⚠️ Hög diskanvändning: {disk_usage}%")
+        logger.warning(f"⚠️ Hög diskanvändning: {disk_usage}%")
     else:
-        logging.info(f"✅ Diskanvändning: {disk_usage}%")
+        logger.info(f"✅ Diskanvändning: {disk_usage}%")
     return disk_usage
 
 
@@ -50,7 +50,7 @@ def monitor_system(interval=60):
     Övervakar systemets hälsa och loggar varningar vid höga resursnivåer.
     """
     while True:
-        logging.info("🔍 Systemövervakning pågår...")
+        logger.info("🔍 Systemövervakning pågår...")
         check_cpu_usage()
         check_memory_usage()
         check_disk_usage()
@@ -59,5 +59,5 @@ def monitor_system(interval=60):
 
 # Exempelanrop
 if __name__ == "__main__":
-    logging.info("🚀 Startar systemövervakning...")
+    logger.info("🚀 Startar systemövervakning...")
     monitor_system()